@@ -0,0 +1,219 @@
+"""
+Motor de agregação vetorizado (NumPy) para os relatórios de produção.
+
+Produz exatamente a mesma saída de agrupar_dados_completo (mesmas chaves,
+mesma ordem de inserção e mesmas somas), mas fatoriza as colunas de chave
+uma única vez e calcula cada agrupamento com np.bincount.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+import numpy as np
+
+
+def _fatorizar(valores):
+    """Converte valores em códigos inteiros preservando a ordem de primeira aparição"""
+    valores = list(valores)
+    indice = {v: i for i, v in enumerate(dict.fromkeys(valores))}
+    codigos = np.fromiter(map(indice.__getitem__, valores), dtype=np.int64, count=len(valores))
+    return codigos, list(indice)
+
+
+def _arredondar_2_casas(valores):
+    """round(x, 2) vetorizado, idêntico ao round() do Python.
+
+    np.round pode divergir do round() nativo quando x*100 cai a ~meio caminho
+    entre dois inteiros; só esses casos são refeitos com round().
+    """
+    arredondados = np.round(valores, 2)
+    escalados = valores * 100
+    duvidosos = np.flatnonzero(np.abs(escalados - np.floor(escalados) - 0.5) < 1e-6)
+    for i in duvidosos.tolist():
+        arredondados[i] = round(float(valores[i]), 2)
+    return arredondados
+
+
+def _valores_numericos(coluna):
+    """Converte PRODUÇÃO/FATURADO em float64, recusando Decimal"""
+    primeiro = next((v for v in coluna if v is not None), None)
+    if isinstance(primeiro, Decimal):
+        raise TypeError("colunas Decimal não suportadas pelo motor NumPy")
+    return np.fromiter((v or 0 for v in coluna), dtype=np.float64, count=len(coluna))
+
+
+def _agrupar(codigos):
+    """Agrupa códigos (int64) na ordem de primeira aparição.
+
+    Retorna (grupo de cada linha, índice da primeira linha de cada grupo).
+    """
+    unicos, primeira, inverso = np.unique(codigos, return_index=True, return_inverse=True)
+    ordem = np.argsort(primeira, kind='stable')
+    posicao = np.empty_like(ordem)
+    posicao[ordem] = np.arange(len(ordem))
+    return posicao[inverso.ravel()], primeira[ordem]
+
+
+def _combinar(*pares):
+    """Combina pares (códigos, cardinalidade) numa única chave int64"""
+    chave = np.zeros(len(pares[0][0]), dtype=np.int64)
+    for codigos, cardinalidade in pares:
+        chave = chave * max(cardinalidade, 1) + codigos
+    return chave
+
+
+def _nomes_nas_linhas(nomes, codigos, linhas):
+    """Nome de cada linha indicada (indexação vetorizada, uma conversão para lista)"""
+    return [nomes[c] for c in codigos[linhas].tolist()]
+
+
+def _somar(grupos, quantidade, pesos):
+    """Soma por grupo na ordem das linhas (mesma ordem do += sequencial)"""
+    return np.bincount(grupos, weights=pesos, minlength=quantidade).tolist()
+
+
+def agrupar_dados_numpy(dados, normalizar_modalidade):
+    """Versão vetorizada de agrupar_dados_completo.
+
+    `dados` são as linhas de BOLETIM_DIARIO (NOME_DO_LIDER, SERVIÇO, MEDIDA,
+    MOD, PROJETO, total_producao, total_faturado).
+    """
+    if not dados:
+        return {}, {}, {}, {}
+
+    colunas = list(zip(*dados))
+    return _agrupar_fatorizado(
+        _fatorizar(v or "Sem Líder" for v in colunas[0]),
+        _fatorizar(v or "Sem Serviço" for v in colunas[1]),
+        _fatorizar(v or "Un" for v in colunas[2]),
+        _fatorizar(v or "N/A" for v in colunas[3]),
+        _fatorizar(str(v) for v in colunas[4]),
+        _arredondar_2_casas(_valores_numericos(colunas[5])),
+        _arredondar_2_casas(_valores_numericos(colunas[6])),
+        normalizar_modalidade,
+    )
+
+
+def agrupar_colunas_numpy(colunas, normalizar_modalidade):
+    """Mesma agregação a partir de colunas_numpy.ColunasBoletim (sem passar por linhas).
+
+    As colunas seguem a ordem da consulta dos relatórios; os textos já vêm
+    codificados e só os valores distintos passam pelas normalizações.
+    """
+    if not len(colunas):
+        return {}, {}, {}, {}
+
+    lider, servico, medida, mod, projeto, producao, faturado = colunas.nomes
+    return _agrupar_fatorizado(
+        colunas.fatorizada(lider, lambda v: v or "Sem Líder"),
+        colunas.fatorizada(servico, lambda v: v or "Sem Serviço"),
+        colunas.fatorizada(medida, lambda v: v or "Un"),
+        colunas.fatorizada(mod, lambda v: v or "N/A"),
+        colunas.fatorizada(projeto, str),
+        _arredondar_2_casas(colunas.valores[producao]),
+        _arredondar_2_casas(colunas.valores[faturado]),
+        normalizar_modalidade,
+    )
+
+
+def _agrupar_fatorizado(lider, servico, medida, modalidade, projeto, producao, faturado, normalizar_modalidade):
+    """Núcleo da agregação: cada dimensão chega como (códigos na ordem de
+    primeira aparição, nomes) e os valores já arredondados"""
+    cod_lider, nomes_lider = lider
+    cod_servico, nomes_servico = servico
+    cod_medida, nomes_medida = medida
+    cod_projeto, nomes_projeto = projeto
+    n = len(cod_projeto)
+
+    # normalizar_modalidade só roda uma vez por valor distinto
+    cod_mod_bruto, mods_brutas = modalidade
+    mods_normalizadas = [normalizar_modalidade(m) for m in mods_brutas]
+    cod_mod_norm, nomes_mod = _fatorizar(mods_normalizadas)
+    cod_modalidade = np.asarray(cod_mod_norm)[cod_mod_bruto]
+
+    n_proj = len(nomes_projeto)
+    n_serv = len(nomes_servico)
+
+    # ---------- resumo por projeto ----------
+    # cod_projeto já está na ordem de primeira aparição
+    prod_proj = _somar(cod_projeto, n_proj, producao)
+    fat_proj = _somar(cod_projeto, n_proj, faturado)
+
+    grupo_proj_lider, primeira_proj_lider = _agrupar(
+        _combinar((cod_projeto, n_proj), (cod_lider, len(nomes_lider)))
+    )
+    total_lideres = np.bincount(cod_projeto[primeira_proj_lider], minlength=n_proj).tolist()
+
+    resumo_projetos = {}
+    for i, projeto in enumerate(nomes_projeto):
+        resumo_projetos[projeto] = {
+            'producao': prod_proj[i],
+            'faturado': fat_proj[i],
+            'total_lideres': total_lideres[i],
+        }
+
+    # ---------- projeto x modalidade ----------
+    grupo_mod, primeira_mod = _agrupar(_combinar((cod_projeto, n_proj), (cod_modalidade, len(nomes_mod))))
+    prod_mod = _somar(grupo_mod, len(primeira_mod), producao)
+    fat_mod = _somar(grupo_mod, len(primeira_mod), faturado)
+
+    projetos_modalidade = {}
+    for g, (projeto, modalidade) in enumerate(zip(_nomes_nas_linhas(nomes_projeto, cod_projeto, primeira_mod),
+                                                  _nomes_nas_linhas(nomes_mod, cod_modalidade, primeira_mod))):
+        projetos_modalidade.setdefault(projeto, {})[modalidade] = {
+            'producao': prod_mod[g],
+            'faturado': fat_mod[g],
+        }
+
+    # ---------- líder x serviço ----------
+    # A chave textual "projeto_líder" é montada uma vez por par, não por linha
+    cod_chave_par, chaves_lider = _fatorizar(
+        f"{projeto}_{nome_lider}" for projeto, nome_lider in zip(
+            _nomes_nas_linhas(nomes_projeto, cod_projeto, primeira_proj_lider),
+            _nomes_nas_linhas(nomes_lider, cod_lider, primeira_proj_lider))
+    )
+    cod_chave_lider = cod_chave_par[grupo_proj_lider]
+    grupo_ls, primeira_ls = _agrupar(
+        _combinar((cod_chave_lider, len(chaves_lider)), (cod_servico, n_serv))
+    )
+    prod_ls = _somar(grupo_ls, len(primeira_ls), producao)
+    fat_ls = _somar(grupo_ls, len(primeira_ls), faturado)
+
+    # As chaves de líder entram na ordem de primeira aparição, antes dos serviços
+    lideres_detalhado = {}
+    primeira_chave = _agrupar(cod_chave_lider)[1]
+    for chave, nome_lider, projeto in zip(chaves_lider,
+                                          _nomes_nas_linhas(nomes_lider, cod_lider, primeira_chave),
+                                          _nomes_nas_linhas(nomes_projeto, cod_projeto, primeira_chave)):
+        lideres_detalhado[chave] = {
+            'nome': nome_lider,
+            'projeto': projeto,
+            'servicos': {},
+        }
+    for g, (chave, servico, medida) in enumerate(zip(_nomes_nas_linhas(chaves_lider, cod_chave_lider, primeira_ls),
+                                                     _nomes_nas_linhas(nomes_servico, cod_servico, primeira_ls),
+                                                     _nomes_nas_linhas(nomes_medida, cod_medida, primeira_ls))):
+        lideres_detalhado[chave]['servicos'][servico] = {
+            'producao': prod_ls[g],
+            'faturado': fat_ls[g],
+            'medida': medida,
+        }
+
+    # ---------- projeto x serviço (medida = última vista) ----------
+    grupo_ps, primeira_ps = _agrupar(_combinar((cod_projeto, n_proj), (cod_servico, n_serv)))
+    prod_ps = _somar(grupo_ps, len(primeira_ps), producao)
+    fat_ps = _somar(grupo_ps, len(primeira_ps), faturado)
+    ultima_ps = np.zeros(len(primeira_ps), dtype=np.int64)
+    np.maximum.at(ultima_ps, grupo_ps, np.arange(n, dtype=np.int64))
+
+    servicos_por_projeto = defaultdict(lambda: defaultdict(lambda: {'producao': 0, 'faturado': 0, 'medida': ''}))
+    for g, (projeto, servico, medida) in enumerate(zip(_nomes_nas_linhas(nomes_projeto, cod_projeto, primeira_ps),
+                                                       _nomes_nas_linhas(nomes_servico, cod_servico, primeira_ps),
+                                                       _nomes_nas_linhas(nomes_medida, cod_medida, ultima_ps))):
+        servicos_por_projeto[projeto][servico] = {
+            'producao': prod_ps[g],
+            'faturado': fat_ps[g],
+            'medida': medida,
+        }
+
+    return resumo_projetos, projetos_modalidade, lideres_detalhado, servicos_por_projeto
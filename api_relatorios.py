@@ -0,0 +1,164 @@
+"""
+API JSON somente leitura com os agregados de produção (projeto, líder, serviço).
+
+Usa a mesma agregação dos relatórios do WhatsApp (agrupar_dados_completo).
+Cada resposta leva um ETag forte calculado a partir das próprias linhas de
+BOLETIM_DIARIO: se nada mudou, o painel recebe 304 sem que a agregação, o
+JSON ou a compressão sejam refeitos. Corpos grandes vão com gzip quando o
+cliente aceita.
+"""
+
+import gzip
+import hashlib
+import hmac
+import json
+import os
+from datetime import datetime
+
+from flask import Response
+
+import metricas
+
+# Exigido em "Authorization: Bearer <token>" ou ?token=; sem ele a API fica desligada (503)
+API_TOKEN = os.environ.get('API_TOKEN')
+# Corpos a partir deste tamanho (bytes) são comprimidos
+LIMITE_GZIP_API = int(os.environ.get('LIMITE_GZIP_API', 1024))
+
+TIPO_JSON = 'application/json; charset=utf-8'
+
+
+class ParametroInvalido(ValueError):
+    pass
+
+
+def configurada():
+    """A API só responde com um token definido: os agregados incluem faturamento"""
+    return bool(API_TOKEN)
+
+
+def autorizado(requisicao):
+    if not API_TOKEN:
+        return False
+    cabecalho = requisicao.headers.get('Authorization', '')
+    token = cabecalho[7:] if cabecalho.startswith('Bearer ') else requisicao.args.get('token')
+    return hmac.compare_digest(token or '', API_TOKEN)
+
+
+def ler_parametros(args, data_hoje):
+    """(projetos, data_inicio, data_fim) a partir de ?projetos=202,150&data= ou &inicio=&fim="""
+    projetos = [p.strip() for p in args.get('projetos', '').split(',') if p.strip()]
+    if not projetos:
+        raise ParametroInvalido("informe ?projetos=202,150")
+
+    data_inicio = args.get('inicio') or args.get('data') or data_hoje
+    data_fim = args.get('fim') or args.get('data') or data_inicio
+    try:
+        inicio = datetime.strptime(data_inicio, '%Y-%m-%d')
+        fim = datetime.strptime(data_fim, '%Y-%m-%d')
+    except ValueError:
+        raise ParametroInvalido("datas no formato YYYY-MM-DD")
+    if fim < inicio:
+        raise ParametroInvalido("fim anterior ao início")
+    return projetos, data_inicio, data_fim
+
+
+def versao_dados(projetos, data_inicio, data_fim, linhas):
+    """Identificador estável das linhas (igual em todos os workers, ao contrário de hash())"""
+    resumo = hashlib.blake2b(digest_size=16)
+    resumo.update(repr((sorted(projetos), data_inicio, data_fim)).encode('utf-8'))
+    for linha in linhas:
+        resumo.update(repr(tuple(linha)).encode('utf-8'))
+    return resumo.hexdigest()
+
+
+def _valor(numero):
+    return round(float(numero or 0), 2)
+
+
+def serializar_agregado(agregado, data_inicio, data_fim):
+    """Saída de agrupar_dados_completo em estruturas JSON (listas na ordem da agregação)"""
+    resumo_projetos, projetos_modalidade, lideres_detalhado, servicos_por_projeto = agregado
+
+    projetos = []
+    for projeto, dados_proj in resumo_projetos.items():
+        projetos.append({
+            'projeto': projeto,
+            'producao': _valor(dados_proj['producao']),
+            'faturado': _valor(dados_proj['faturado']),
+            'total_lideres': dados_proj.get('total_lideres', 0),
+            'modalidades': {
+                mod: {'producao': _valor(v['producao']), 'faturado': _valor(v['faturado'])}
+                for mod, v in projetos_modalidade.get(projeto, {}).items()
+            },
+        })
+
+    lideres = []
+    for dados_lider in lideres_detalhado.values():
+        servicos = [
+            {'servico': servico, 'medida': v['medida'],
+             'producao': _valor(v['producao']), 'faturado': _valor(v['faturado'])}
+            for servico, v in dados_lider['servicos'].items()
+        ]
+        lideres.append({
+            'projeto': dados_lider['projeto'],
+            'lider': dados_lider['nome'],
+            'producao': _valor(sum(s['producao'] for s in dados_lider['servicos'].values())),
+            'faturado': _valor(sum(s['faturado'] for s in dados_lider['servicos'].values())),
+            'servicos': servicos,
+        })
+
+    servicos = [
+        {'projeto': projeto, 'servico': servico, 'medida': v['medida'],
+         'producao': _valor(v['producao']), 'faturado': _valor(v['faturado'])}
+        for projeto, por_servico in servicos_por_projeto.items()
+        for servico, v in por_servico.items()
+    ]
+
+    return {
+        'periodo': {'inicio': data_inicio, 'fim': data_fim},
+        'faturado_total': _valor(sum(p['faturado'] for p in projetos)),
+        'projetos': projetos,
+        'lideres': lideres,
+        'servicos': servicos,
+    }
+
+
+def montar_representacoes(dados_json):
+    """{'identidade': bytes, 'gzip': bytes ou None}, calculadas uma vez por versão"""
+    corpo = json.dumps(dados_json, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return {
+        'identidade': corpo,
+        'gzip': gzip.compress(corpo, compresslevel=6) if len(corpo) >= LIMITE_GZIP_API else None,
+    }
+
+
+def _etags_pedidas(cabecalho):
+    """Valores de If-None-Match (comparação fraca, como manda o RFC 9110)"""
+    return {parte.strip().removeprefix('W/') for parte in cabecalho.split(',') if parte.strip()}
+
+
+def responder(requisicao, versao, obter_representacoes):
+    """304 se o cliente já tem a versão, senão o JSON (gzip quando aceito e vale a pena).
+
+    `obter_representacoes()` só é chamado quando o corpo precisa ser enviado.
+    """
+    metricas.incrementar('api_requisicoes')
+    aceita_gzip = 'gzip' in requisicao.headers.get('Accept-Encoding', '')
+    etag_identidade = f'"{versao}"'
+    etag_gzip = f'"{versao}-gz"'
+    pedidas = _etags_pedidas(requisicao.headers.get('If-None-Match', ''))
+
+    cabecalhos = {'Cache-Control': 'private, no-cache', 'Vary': 'Accept-Encoding'}
+    # As duas representações são da mesma versão dos dados: qualquer uma vale para o 304
+    if '*' in pedidas or etag_identidade in pedidas or etag_gzip in pedidas:
+        metricas.incrementar('api_304')
+        etag = etag_gzip if etag_gzip in pedidas else etag_identidade
+        return Response(status=304, headers={**cabecalhos, 'ETag': etag})
+
+    representacoes = obter_representacoes()
+    if aceita_gzip and representacoes['gzip'] is not None:
+        metricas.incrementar('api_gzip')
+        return Response(representacoes['gzip'], status=200, content_type=TIPO_JSON,
+                        headers={**cabecalhos, 'ETag': etag_gzip, 'Content-Encoding': 'gzip'})
+    return Response(representacoes['identidade'], status=200, content_type=TIPO_JSON,
+                    headers={**cabecalhos, 'ETag': etag_identidade})
@@ -0,0 +1,97 @@
+"""
+Áudio dos comandos de voz sem passar pelo disco.
+
+Antes o OGG baixado ia para temp_audio_<epoch>.ogg no diretório de trabalho,
+esperava um time.sleep(1), era decodificado pelo librosa, gravado como WAV e
+reaberto por transcrever_com_speech_recognition; dois áudios no mesmo
+segundo usavam o mesmo arquivo. Aqui os bytes baixados são decodificados de
+um BytesIO (OGG/Opus, WAV...), reamostrados para 16 kHz e convertidos em PCM
+de 16 bits pelo mesmo libsndfile que gravava o WAV, e o reconhecedor recebe
+direto um sr.AudioData.
+
+A decodificação é do soundfile e a reamostragem do filtro polifásico em
+NumPy (reamostragem.py): o librosa.load carregava numba/scipy/soxr na
+primeira chamada de cada worker só para isso. O librosa fica como caminho
+opcional (REAMOSTRADOR_AUDIO=librosa), se estiver instalado.
+
+Antes do PCM, os silêncios das pontas e as pausas longas saem
+(deteccao_voz.py, VAD_ATIVO=0 desliga): menos áudio vai para o reconhecedor.
+"""
+
+import io
+import os
+import time
+
+import soundfile as sf
+import speech_recognition as sr
+
+import deteccao_voz
+import metricas
+from reamostragem import reamostrar
+
+try:
+    import librosa
+except ImportError:
+    librosa = None
+
+# Taxa usada no reconhecimento (a mesma do WAV gravado antes)
+TAXA_RECONHECIMENTO = 16000
+LARGURA_AMOSTRA = 2  # PCM 16 bits
+# "numpy" (soundfile + filtro polifásico) ou "librosa" (librosa.load, o caminho anterior)
+REAMOSTRADOR_AUDIO = os.environ.get('REAMOSTRADOR_AUDIO', 'numpy').lower()
+
+
+def decodificar_audio(conteudo, taxa=TAXA_RECONHECIMENTO):
+    """Amostras float32 mono em `taxa` Hz a partir dos bytes do arquivo de áudio"""
+    if REAMOSTRADOR_AUDIO == 'librosa' and librosa is not None:
+        amostras, _ = librosa.load(io.BytesIO(conteudo), sr=taxa)
+        return amostras
+    canais, taxa_original = sf.read(io.BytesIO(conteudo), dtype='float32', always_2d=True)
+    # Mono como o librosa: média dos canais
+    amostras = canais[:, 0] if canais.shape[1] == 1 else canais.mean(axis=1)
+    return reamostrar(amostras, taxa_original, taxa)
+
+
+def pcm_16(amostras, taxa=TAXA_RECONHECIMENTO):
+    """Bytes PCM 16 bits little-endian, com a mesma conversão (e saturação) do WAV do soundfile"""
+    buffer = io.BytesIO()
+    sf.write(buffer, amostras, taxa, format='RAW', subtype='PCM_16', endian='LITTLE')
+    return buffer.getvalue()
+
+
+def registrar_corte(dados):
+    """Métricas do corte de silêncios de um áudio (na thread do bot, mesmo se o corte rodou em outro processo)"""
+    metricas.registrar_tempo('vad', dados['segundos_analise'])
+    metricas.incrementar('vad_audios')
+    metricas.incrementar('vad_ms_recebidos', int(dados['segundos_antes'] * 1000))
+    metricas.incrementar('vad_ms_removidos', int((dados['segundos_antes'] - dados['segundos_depois']) * 1000))
+    if dados['piso_db'] is not None:
+        metricas.definir('vad_piso_ruido_db', dados['piso_db'])
+
+
+def converter_pcm(conteudo, taxa=TAXA_RECONHECIMENTO, recortar=True):
+    """(PCM 16 bits, dados do corte de silêncios ou None): a parte pesada, que pode rodar em outro processo"""
+    amostras = decodificar_audio(conteudo, taxa)
+    dados = None
+    if recortar:
+        inicio = time.perf_counter()
+        amostras, dados = deteccao_voz.recortar_silencios(amostras, taxa)
+        dados['segundos_analise'] = time.perf_counter() - inicio
+    return pcm_16(amostras, taxa), dados
+
+
+def converter_audio(conteudo, taxa=TAXA_RECONHECIMENTO, recortar=None, executar=None):
+    """sr.AudioData pronto para o reconhecedor a partir dos bytes baixados
+
+    `executar(funcao, *argumentos)`, se informado, roda a conversão fora da
+    thread atual (ex.: PoolProcessos.executar) e devolve o resultado.
+    """
+    if recortar is None:
+        recortar = deteccao_voz.VAD_ATIVO
+    if executar is None:
+        pcm, dados = converter_pcm(conteudo, taxa, recortar)
+    else:
+        pcm, dados = executar(converter_pcm, conteudo, taxa, recortar)
+    if dados is not None:
+        registrar_corte(dados)
+    return sr.AudioData(pcm, taxa, LARGURA_AMOSTRA)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark dos motores de agregação (Python x NumPy) do relatório de produção.
+Gera linhas sintéticas no formato de BOLETIM_DIARIO, confere que as saídas
+são idênticas e mede o tempo de cada motor com 1k, 100k e 1M linhas.
+O ganho do NumPy fica em 1.0-1.3x em qualquer tamanho: o custo está em
+percorrer as linhas e montar os dicionários de saída, não nas somas. Por
+isso o motor NumPy é opcional (MOTOR_AGREGACAO=numpy) e o padrão é Python.
+
+Uso: python benchmark_agregacao.py [quantidades...]
+"""
+
+import random
+import sys
+import time
+
+from bot_final import agrupar_dados_python, normalizar_modalidade
+from agregacao_numpy import agrupar_dados_numpy
+
+MODALIDADES = ['MEC', 'mec', 'Man', 'manual', 'APO', 'drone', None, 'Outro']
+MEDIDAS = ['HA', 'UN', 'KG', None]
+
+
+def gerar_linhas(quantidade, semente=42):
+    """Gera linhas (NOME_DO_LIDER, SERVIÇO, MEDIDA, MOD, PROJETO, producao, faturado)"""
+    rnd = random.Random(semente)
+    projetos = [rnd.randint(100, 999) for _ in range(25)]
+    lideres = [f"LIDER {i:04d}" for i in range(400)] + [None]
+    servicos = [f"SERVIÇO {i:03d}" for i in range(80)] + [None]
+    linhas = []
+    for _ in range(quantidade):
+        linhas.append((
+            rnd.choice(lideres),
+            rnd.choice(servicos),
+            rnd.choice(MEDIDAS),
+            rnd.choice(MODALIDADES),
+            rnd.choice(projetos),
+            rnd.choice([None, round(rnd.uniform(0, 500), 3), rnd.randint(0, 80) + 0.005]),
+            round(rnd.uniform(0, 20000), 4),
+        ))
+    return linhas
+
+
+def estrutura(resultado):
+    """Converte a saída em listas aninhadas para comparar valores E ordem das chaves"""
+    if isinstance(resultado, dict):
+        return [(chave, estrutura(valor)) for chave, valor in resultado.items()]
+    if isinstance(resultado, (tuple, list)):
+        return [estrutura(valor) for valor in resultado]
+    return resultado
+
+
+def medir(funcao, *args, repeticoes=3):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor, resultado
+
+
+def main():
+    quantidades = [int(q) for q in sys.argv[1:]] or [1_000, 100_000, 1_000_000]
+
+    print("=== BENCHMARK MOTORES DE AGREGAÇÃO ===")
+    for quantidade in quantidades:
+        linhas = gerar_linhas(quantidade)
+        repeticoes = 1 if quantidade >= 1_000_000 else 3
+
+        t_python, saida_python = medir(agrupar_dados_python, linhas, repeticoes=repeticoes)
+        t_numpy, saida_numpy = medir(agrupar_dados_numpy, linhas, normalizar_modalidade, repeticoes=repeticoes)
+
+        identico = estrutura(saida_python) == estrutura(saida_numpy)
+        print(f"\n📊 {quantidade:>9,} linhas")
+        print(f"  🐍 Python: {t_python * 1000:10.1f} ms")
+        print(f"  🔢 NumPy:  {t_numpy * 1000:10.1f} ms  ({t_python / t_numpy:.1f}x)")
+        print(f"  {'✅' if identico else '❌'} Saídas idênticas: {identico}")
+        if not identico:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
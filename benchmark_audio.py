@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da decodificação + reamostragem do áudio de voz: soundfile + filtro
+polifásico em NumPy (padrão) contra librosa.load (REAMOSTRADOR_AUDIO=librosa).
+
+Para um OGG/Opus mono de 48 kHz de cada duração mede o tempo por áudio, o
+pico de memória alocada pelo Python/NumPy (tracemalloc) e, num processo
+novo, a primeira chamada com a importação, que é o que cada worker paga.
+
+Uso: python benchmark_audio.py [segundos...]   (padrão: 30)
+"""
+
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import audio_memoria
+from audio_memoria import decodificar_audio
+from teste_audio_memoria import gerar_ogg
+
+PRIMEIRA_CHAMADA = """
+import sys, time
+inicio = time.perf_counter()
+import audio_memoria
+audio_memoria.REAMOSTRADOR_AUDIO = sys.argv[1]
+audio_memoria.decodificar_audio(open(sys.argv[2], 'rb').read())
+print(time.perf_counter() - inicio)
+"""
+
+
+def medir(conteudo, repeticoes=5):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        decodificar_audio(conteudo)
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    tracemalloc.start()
+    decodificar_audio(conteudo)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return melhor * 1000, pico / 1024 / 1024
+
+
+def primeira_chamada(caminho, reamostrador):
+    saida = subprocess.run([sys.executable, "-c", PRIMEIRA_CHAMADA, reamostrador, caminho],
+                           capture_output=True, text=True, check=True)
+    return float(saida.stdout.strip().splitlines()[-1]) * 1000
+
+
+def main():
+    duracoes = [float(s) for s in sys.argv[1:]] or [30.0]
+    caminhos = ["numpy"] + (["librosa"] if audio_memoria.librosa is not None else [])
+
+    print("=== BENCHMARK DECODIFICAÇÃO + REAMOSTRAGEM ===")
+    for segundos in duracoes:
+        conteudo = gerar_ogg(segundos, 330)
+        print(f"\n📊 Áudio de {segundos:.0f} s ({len(conteudo) / 1024:.0f} KB OGG/Opus, 48 kHz -> 16 kHz)")
+        resultados = {}
+        for reamostrador in caminhos:
+            audio_memoria.REAMOSTRADOR_AUDIO = reamostrador
+            resultados[reamostrador] = medir(conteudo)
+        audio_memoria.REAMOSTRADOR_AUDIO = "numpy"
+        for reamostrador, (ms, mb) in resultados.items():
+            print(f"  {reamostrador:8}: {ms:7.1f} ms por áudio | pico {mb:6.1f} MB")
+
+    caminho = "/tmp/benchmark_audio.ogg"
+    with open(caminho, "wb") as f:
+        f.write(gerar_ogg(duracoes[0], 330))
+    print("\n🚀 Primeira chamada num processo novo (importação + 1 áudio)")
+    for reamostrador in caminhos:
+        print(f"  {reamostrador:8}: {primeira_chamada(caminho, reamostrador):7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
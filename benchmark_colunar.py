@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da leitura colunar (colunas_numpy) contra o caminho fetchall() +
+tuplas de obter_dados_detalhados_periodo.
+
+Um cursor falso entrega as mesmas linhas pelos dois caminhos (fetchall ou
+fetchmany), como o pyodbc faria. Mede leitura, leitura + agregação e a
+memória retida pelo resultado, e confere que as agregações são idênticas.
+
+Uso: python benchmark_colunar.py [quantidades...]   (padrão: 100000 1000000)
+"""
+
+import sys
+import time
+import tracemalloc
+
+from benchmark_agregacao import gerar_linhas, estrutura
+from bot_final import normalizar_modalidade, agrupar_dados_python
+from linhas_compactas import compactar_linhas
+from agregacao_numpy import agrupar_dados_numpy, agrupar_colunas_numpy
+from colunas_numpy import ler_colunas
+
+DESCRICAO = [(nome,) for nome in
+             ('NOME_DO_LIDER', 'SERVIÇO', 'MEDIDA', 'MOD', 'PROJETO', 'total_producao', 'total_faturado')]
+
+
+class CursorFalso:
+    """Entrega `linhas` como um cursor pyodbc já executado"""
+
+    description = DESCRICAO
+
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.posicao = 0
+
+    def fetchall(self):
+        restantes = self.linhas[self.posicao:]
+        self.posicao = len(self.linhas)
+        return restantes
+
+    def fetchmany(self, tamanho):
+        lote = self.linhas[self.posicao:self.posicao + tamanho]
+        self.posicao += len(lote)
+        return lote
+
+
+def caminho_tuplas(linhas):
+    return compactar_linhas(CursorFalso(linhas).fetchall())
+
+
+def caminho_colunar(linhas):
+    return ler_colunas(CursorFalso(linhas), colunas_texto=('PROJETO',))
+
+
+def medir(funcao, *args, repeticoes=3):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor, resultado
+
+
+def memoria_retida(funcao, *args):
+    """MB alocados e ainda vivos no resultado de `funcao`"""
+    tracemalloc.start()
+    resultado = funcao(*args)
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del resultado
+    return atual / 1024 / 1024
+
+
+def main():
+    quantidades = [int(q) for q in sys.argv[1:]] or [100_000, 1_000_000]
+
+    print("=== BENCHMARK LEITURA COLUNAR ===")
+    for quantidade in quantidades:
+        # Sem None nos valores: o caminho colunar grava NULL como 0.0 já na leitura
+        linhas = [l[:5] + (l[5] or 0.0, l[6]) for l in gerar_linhas(quantidade)]
+        print(f"\n📊 {quantidade:,} linhas")
+
+        t_tuplas, dados = medir(caminho_tuplas, linhas)
+        t_colunar, colunas = medir(caminho_colunar, linhas)
+        print(f"  Leitura      : fetchall+tuplas {t_tuplas * 1000:9.1f} ms | colunar {t_colunar * 1000:9.1f} ms "
+              f"({t_tuplas / t_colunar:.1f}x)")
+
+        t_python, esperado = medir(lambda: agrupar_dados_python(caminho_tuplas(linhas)), repeticoes=1)
+        t_numpy, por_linhas = medir(lambda: agrupar_dados_numpy(caminho_tuplas(linhas), normalizar_modalidade))
+        t_col, por_colunas = medir(lambda: agrupar_colunas_numpy(caminho_colunar(linhas), normalizar_modalidade))
+        print(f"  + agregação  : tuplas/Python {t_python * 1000:9.1f} ms | tuplas/NumPy {t_numpy * 1000:9.1f} ms | "
+              f"colunar/NumPy {t_col * 1000:9.1f} ms ({t_python / t_col:.1f}x / {t_numpy / t_col:.1f}x)")
+
+        identico = estrutura(esperado) == estrutura(por_linhas) == estrutura(por_colunas)
+        print(f"  {'✅ Agregações idênticas' if identico else '❌ AGREGAÇÕES DIFERENTES'}")
+        if not identico:
+            sys.exit(1)
+
+        mb_tuplas = memoria_retida(caminho_tuplas, linhas)
+        mb_colunar = memoria_retida(caminho_colunar, linhas)
+        print(f"  Memória retida: tuplas {mb_tuplas:7.1f} MB | colunar {mb_colunar:7.1f} MB "
+              f"(arrays {colunas.memoria_bytes() / 1024 / 1024:.1f} MB)")
+        del dados, colunas
+
+
+if __name__ == "__main__":
+    main()
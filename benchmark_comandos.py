@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da gramática de comandos contra a cascata de regex original.
+
+Mede o tempo médio por frase em três grupos: textos sem comando de data
+(caminho de palavras-chave, o mais frequente), comandos de projeto e
+períodos para todos os projetos. A coluna "memo" é comandos.interpretar
+com as frases já em memória (o caso dos comandos repetidos do dia a dia).
+
+Uso: python benchmark_comandos.py [repeticoes]   (padrão: 20000)
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+import comandos
+from comandos import interpretar_comando
+from teste_comandos import processar_comando_legado
+
+GRUPOS = {
+    "Palavras-chave": ["1", "menu", "oi", "produção", "faturamento", "quanto foi produzido hoje",
+                       "bom dia, tudo bem?", "me manda o relatório por favor"],
+    "Projeto": ["produção projeto 202 do dia", "produção do projeto 202 dia 5 a 10 de agosto",
+                "faturamento projeto 150 05/08", "produção projeto 202 5 de novembro"],
+    "Períodos": ["5 a 10 de agosto", "01/08 a 31/08", "produção do dia 05/08", "exportar 01/08 a 31/08 csv"],
+}
+
+
+def medir(funcao, frases, repeticoes):
+    with contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            for frase in frases:
+                funcao(frase)
+        decorrido = time.perf_counter() - inicio
+    return decorrido / (repeticoes * len(frases)) * 1e6
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    print("=== BENCHMARK GRAMÁTICA DE COMANDOS ===")
+    for nome, frases in GRUPOS.items():
+        legado = medir(processar_comando_legado, frases, repeticoes)
+        novo = medir(interpretar_comando, frases, repeticoes)
+        memo = medir(comandos.interpretar, frases, repeticoes)
+        print(f"  {nome:15}: cascata {legado:6.2f} µs | gramática {novo:6.2f} µs ({legado / novo:.1f}x) | "
+              f"memo {memo:5.2f} µs ({legado / memo:.1f}x)")
+
+    periodos = ["01/08/2025 A 31/08/2025", "05/08/2025 A 05/08/2025"]
+    sem_memo = medir(comandos.resolver_periodo.__wrapped__, periodos, repeticoes)
+    com_memo = medir(comandos.resolver_periodo, periodos, repeticoes)
+    print(f"  {'processar_periodo':15}: strptime {sem_memo:6.2f} µs | memo {com_memo:5.2f} µs "
+          f"({sem_memo / com_memo:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
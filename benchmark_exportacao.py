@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da exportação CSV/XLSX: linhas por segundo e pico de memória.
+
+Compara a escrita em fluxo (linhas geradas sob demanda, como no fetchmany)
+com a mesma escrita a partir da lista completa (como no fetchall). O pico de
+memória é medido com tracemalloc numa segunda passada, para não distorcer o
+tempo. O envio do arquivo (enviar_documento, multipart lido do disco) também
+é medido, contra um servidor local que descarta o corpo, ao lado do envio
+antigo em JSON com o arquivo em base64.
+
+Uso: python benchmark_exportacao.py [quantidade ...]   (padrão: 1000000)
+"""
+
+import base64
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import exportacao
+
+
+class ZapiDescarta(BaseHTTPRequestHandler):
+    """send-document local que lê o corpo em pedaços e descarta"""
+
+    def do_POST(self):
+        restante = int(self.headers['Content-Length'])
+        while restante:
+            restante -= len(self.rfile.read(min(restante, 65536)))
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def enviar_base64(caminho):
+    """Envio anterior: arquivo inteiro em base64 dentro do JSON (só para comparação)"""
+    with open(caminho, 'rb') as arquivo:
+        conteudo = base64.b64encode(arquivo.read()).decode('ascii')
+    url = f"{exportacao.ZAPI_URL_BASE}/send-document/base64"
+    return requests.post(url, json={"phone": "5511999999999", "document": f"data:text/csv;base64,{conteudo}",
+                                    "fileName": os.path.basename(caminho)})
+
+
+def medir_envio(enviar, caminho):
+    """(segundos, pico em MB) do envio do arquivo"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resposta = enviar(caminho)
+    decorrido = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert resposta is not None and resposta.status_code == 200
+    return decorrido, pico / 1024 / 1024
+
+
+def gerar_linhas(quantidade):
+    """Linhas no formato da QUERY_EXPORTACAO, geradas uma a uma"""
+    for i in range(quantidade):
+        yield (str(100 + i % 40), f"LÍDER {i % 900:04d}", f"SERVIÇO {i % 60:02d}", "HA",
+               ("MEC", "MAN", "APO", "DRO")[i % 4], (i % 1000) * 1.37, (i % 5000) * 12.91)
+
+
+def medir(formato, fonte, quantidade, diretorio):
+    """(segundos, pico em MB, tamanho do arquivo em MB)"""
+    inicio = time.perf_counter()
+    caminho, escritas = exportacao.exportar(fonte(quantidade), f"bench_{formato}", formato, diretorio)
+    decorrido = time.perf_counter() - inicio
+    assert escritas == quantidade
+    tamanho = os.path.getsize(caminho) / 1024 / 1024
+
+    tracemalloc.start()
+    exportacao.exportar(fonte(quantidade), f"bench_{formato}", formato, diretorio)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return caminho, decorrido, pico / 1024 / 1024, tamanho
+
+
+def main():
+    quantidades = [int(q) for q in sys.argv[1:]] or [1_000_000]
+    formatos = ['csv'] + (['xlsx'] if exportacao.xlsxwriter else [])
+    diretorio = tempfile.mkdtemp()
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), ZapiDescarta)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    exportacao.ZAPI_URL_BASE = f"http://127.0.0.1:{servidor.server_port}"
+
+    print("=== BENCHMARK EXPORTAÇÃO ===")
+    if not exportacao.xlsxwriter:
+        print("⚠️ xlsxwriter não instalado: só CSV")
+
+    for quantidade in quantidades:
+        print(f"\n📊 {quantidade:,} linhas".replace(',', '.'))
+        for formato in formatos:
+            for nome, fonte in (
+                ("fluxo", gerar_linhas),
+                ("lista completa", lambda n: list(gerar_linhas(n))),
+            ):
+                caminho, segundos, pico_mb, tamanho_mb = medir(formato, fonte, quantidade, diretorio)
+                print(f"  {formato.upper():4} {nome:15}: {segundos:6.2f} s | "
+                      f"{quantidade / segundos:>9,.0f} linhas/s | pico {pico_mb:7.1f} MB | "
+                      f"arquivo {tamanho_mb:6.1f} MB")
+            for nome, enviar in (
+                ("envio multipart", lambda c: exportacao.enviar_documento("5511999999999", c)),
+                ("envio base64", enviar_base64),
+            ):
+                segundos, pico_mb = medir_envio(enviar, caminho)
+                print(f"  {formato.upper():4} {nome:15}: {segundos:6.2f} s | pico {pico_mb:7.1f} MB")
+            os.remove(caminho)
+
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do leitor de frete (frete.extrair_frete) contra os regex originais
+de processar_frete_texto.
+
+Mede o tempo médio por mensagem no corpus de teste_frete e o tempo de cada
+pior caso conforme o texto cresce. Os regex originais deixam de ser medidos
+num pior caso assim que uma mensagem passa de LIMITE_LEGADO_MS (o tamanho
+seguinte levaria de minutos a horas).
+
+Uso: python benchmark_frete.py [repeticoes]   (padrão: 5000)
+"""
+
+import sys
+import time
+
+from frete import extrair_frete
+from teste_frete import CORPUS, piores_casos, processar_frete_legado
+
+TAMANHOS = (10, 20, 40, 80, 1000, 10000)
+LIMITE_LEGADO_MS = 1000
+
+
+def medir_corpus(funcao, frases, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for frase in frases:
+            funcao(frase)
+    return (time.perf_counter() - inicio) / (repeticoes * len(frases)) * 1e6
+
+
+def medir_uma(funcao, texto):
+    inicio = time.perf_counter()
+    funcao(texto)
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    print("=== BENCHMARK LEITOR DE FRETE ===")
+    legado = medir_corpus(processar_frete_legado, CORPUS, repeticoes)
+    novo = medir_corpus(extrair_frete, CORPUS, repeticoes)
+    print(f"  Corpus ({len(CORPUS)} mensagens): regex {legado:6.2f} µs | leitor {novo:6.2f} µs ({legado / novo:.1f}x)")
+
+    print("\n📊 Piores casos (ms por mensagem)")
+    for nome in piores_casos(1):
+        print(f"  {nome}")
+        medir_legado = True
+        for tamanho in TAMANHOS:
+            texto = piores_casos(tamanho)[nome]
+            t_novo = medir_uma(extrair_frete, texto)
+            if medir_legado:
+                t_legado = medir_uma(processar_frete_legado, texto)
+                medir_legado = t_legado < LIMITE_LEGADO_MS
+                print(f"    n={tamanho:6} ({len(texto):6} car.): regex {t_legado:10.2f} | leitor {t_novo:8.2f}")
+            else:
+                print(f"    n={tamanho:6} ({len(texto):6} car.): regex {'-':>10} | leitor {t_novo:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da inicialização de um worker: tempo de `import bot_final` e RSS
+máximo do processo, cada medição num processo Python novo (como um worker
+do gunicorn sem --preload).
+
+Compara o boot atual (áudio e OpenAI carregados sob demanda) com o boot
+seguido do carregamento de todos os subsistemas (modulo_audio,
+obter_transcritor e obter_cliente_openai), que é o que todo worker pagava
+quando eles eram importados no início de bot_final/pre_apontamento. Mostra
+também o resumo do `python -X importtime` de cada caso: os módulos que mais
+pesam, pelo tempo acumulado.
+
+Uso: python benchmark_inicializacao.py [repeticoes]   (padrão: 5)
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+CODIGO_WORKER = """
+import resource, sys, time
+inicio = time.perf_counter()
+import bot_final
+if sys.argv[1] == 'completo':
+    bot_final.modulo_audio()
+    bot_final.transcricao.obter_transcritor()
+    import pre_apontamento
+    pre_apontamento.obter_cliente_openai()
+print('INICIALIZACAO', time.perf_counter() - inicio, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+CASOS = {
+    "sob demanda": "boot",
+    "tudo carregado": "completo",
+}
+MAIS_PESADOS = 8
+_MEDICAO = re.compile(r'INICIALIZACAO ([\d.e-]+) (\d+)')
+_LINHA_IMPORTTIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+
+def ambiente():
+    # Chave fictícia: o cliente OpenAI é criado sem chamar a API
+    return dict(os.environ, OPENAI_API_KEY=os.environ.get('OPENAI_API_KEY', 'sk-benchmark'))
+
+
+def executar(modo, importtime=False):
+    comando = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CODIGO_WORKER, modo]
+    return subprocess.run(comando, capture_output=True, text=True, check=True, env=ambiente())
+
+
+def medir(modo, repeticoes):
+    tempos, memorias = [], []
+    for _ in range(repeticoes):
+        # bot_final imprime o próprio log (inclusive de outras threads); a medição vem marcada
+        segundos, rss_kb = _MEDICAO.search(executar(modo).stdout).groups()
+        tempos.append(float(segundos) * 1000)
+        memorias.append(int(rss_kb) / 1024)
+    return min(tempos), statistics.median(memorias)
+
+
+def resumo_importtime(modo):
+    """(módulo, ms acumulados) importados por bot_final ou depois dele, do mais pesado ao mais leve"""
+    modulos, filhos = [], []
+    # O -X importtime lista os filhos (com recuo) antes do módulo que os importou
+    for linha in executar(modo, importtime=True).stderr.splitlines():
+        m = _LINHA_IMPORTTIME.match(linha)
+        if not m:
+            continue
+        recuo, nome, acumulado = len(m.group(3)), m.group(4), int(m.group(2)) / 1000
+        if recuo == 2:
+            filhos.append((nome, acumulado))
+        elif recuo == 0:
+            if nome == 'bot_final':
+                modulos.extend(filhos)
+            if nome not in ('site', 'encodings'):
+                modulos.append((nome, acumulado))
+            filhos = []
+    return sorted(modulos, key=lambda item: -item[1])[:MAIS_PESADOS]
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print("=== BENCHMARK INICIALIZAÇÃO DO WORKER ===")
+    resultados = {nome: medir(modo, repeticoes) for nome, modo in CASOS.items()}
+    for nome, (ms, mb) in resultados.items():
+        print(f"  {nome:15}: import {ms:7.0f} ms | RSS {mb:6.1f} MB")
+    (ms_boot, mb_boot), (ms_tudo, mb_tudo) = resultados.values()
+    print(f"  Economia no boot: {ms_tudo - ms_boot:.0f} ms ({ms_tudo / ms_boot:.1f}x) e {mb_tudo - mb_boot:.1f} MB")
+
+    for nome, modo in CASOS.items():
+        print(f"\n📊 -X importtime ({nome}): mais pesados")
+        for modulo, ms in resumo_importtime(modo):
+            print(f"  {modulo:30} {ms:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do renderizador de relatórios (renderizador_relatorio) contra a
+implementação anterior de formatar_resumo_geral/formatar_resumo_detalhado,
+copiada abaixo como referência. Confere que o resumo geral é idêntico byte a
+byte e que os blocos do detalhado (bot_final.gerar_blocos_resumo_detalhado)
+trazem as mesmas linhas do detalhado antigo, e mede o tempo com 50 a 5000
+linhas de líder/serviço.
+
+Uso: python benchmark_renderizador.py [quantidades...]
+"""
+
+import sys
+import time
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+import bot_final
+from bot_final import agrupar_dados_completo
+from cache_relatorios import LinhasRelatorio, nova_versao
+from benchmark_agregacao import gerar_linhas
+import renderizador_relatorio
+
+NUMERO = "5511999999999"
+CLASSES = {'202': {'OPERADOR': 31, 'AJUDANTE': 12}, '150': {'OPERADOR': 8, 'MOTORISTA': 2}}
+SUPERVISORES = [(f"SUPERVISOR {i}", 123456.789 / (i + 1)) for i in range(8)]
+
+
+# ================== DADOS FIXOS NO LUGAR DO BANCO ==================
+def obter_nome_usuario(numero):
+    return "Usuário Benchmark"
+
+
+def obter_projetos_usuario(numero):
+    return ['202', '150']
+
+
+def obter_colaboradores_por_classe(projetos):
+    return CLASSES
+
+
+def obter_supervisores_por_faturamento(projetos_usuario, data_inicio=None, data_fim=None):
+    return SUPERVISORES
+
+
+for _nome in ('obter_nome_usuario', 'obter_projetos_usuario',
+              'obter_colaboradores_por_classe', 'obter_supervisores_por_faturamento'):
+    setattr(bot_final, _nome, globals()[_nome])
+
+
+# ================== IMPLEMENTAÇÃO ANTERIOR (REFERÊNCIA) ==================
+def formatar_moeda_legado(valor):
+    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+def formatar_numero_legado(valor):
+    return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+def formatar_resumo_geral_legado(dados, numero_usuario, titulo_data, data_inicio=None, data_fim=None, projeto_especifico=None):
+    resumo_projetos, projetos_modalidade, _, _ = agrupar_dados_completo(dados)
+    nome_usuario = obter_nome_usuario(numero_usuario)
+    
+    # Se projeto específico, usar só ele, senão usar todos os projetos do usuário
+    if projeto_especifico:
+        projetos_para_busca = [projeto_especifico]
+    else:
+        projetos_para_busca = obter_projetos_usuario(numero_usuario)
+    
+    classes_info = obter_colaboradores_por_classe(projetos_para_busca)
+
+    texto = f"📊 {titulo_data}\n\n"
+    texto += f"🎯 RESUMO GERAL - {nome_usuario}\n\n"
+    total_faturado = sum(proj['faturado'] for proj in resumo_projetos.values())
+    texto += f"💰 Faturado Total: {formatar_moeda_legado(total_faturado)}\n"
+
+    modalidades_totais = defaultdict(lambda: {'producao': 0, 'faturado': 0})
+    for projeto, mods in projetos_modalidade.items():
+        for mod, dados_mod in mods.items():
+            modalidades_totais[mod]['producao'] += dados_mod['producao']
+            modalidades_totais[mod]['faturado'] += dados_mod['faturado']
+
+    for mod, tot in modalidades_totais.items():
+        texto += f"{mod}: {formatar_numero_legado(tot['producao'])} | {formatar_moeda_legado(tot['faturado'])}\n"
+
+    texto += f"---------------------------------------------\n"
+
+    total_colabs = sum(sum(cl.values()) for cl in classes_info.values())
+    texto += f"👤Colaboradores: {total_colabs}\n"
+    todas_classes = defaultdict(int)
+    for classes in classes_info.values():
+        for classe, qtd in classes.items():
+            todas_classes[classe] += qtd
+    for classe, qtd in todas_classes.items():
+        texto += f"👤 {classe}: {qtd}\n"
+
+    texto += f"---------------------------------------------\n"
+
+    # CORRIGIDO: Usar projetos filtrados para supervisores
+    supervisores_ranking = obter_supervisores_por_faturamento(projetos_para_busca, data_inicio, data_fim)
+    if supervisores_ranking:
+        texto += f"🏆 RANKING FATURAMENTO POR SUPERVISOR\n"
+        posicao = 1
+        for supervisor, faturado in supervisores_ranking:
+            if posicao == 1:
+                emoji_pos = "🥇"
+            elif posicao == 2:
+                emoji_pos = "🥈"
+            elif posicao == 3:
+                emoji_pos = "🥉"
+            else:
+                emoji_pos = f"{posicao}º"
+            
+            texto += f"{emoji_pos} {supervisor} - {formatar_moeda_legado(faturado)}\n"
+            posicao += 1
+
+    texto += f"-----------------------------------------------\n"
+
+    if resumo_projetos:
+        texto += f"🏆 RANKING FATURAMENTO POR PROJETO\n"
+        projetos_ordenados = sorted(
+            resumo_projetos.items(), 
+            key=lambda x: x[1]['faturado'], 
+            reverse=True
+        )
+        
+        posicao = 1
+        for projeto, dados_proj in projetos_ordenados:
+            if dados_proj['faturado'] > 0:
+                if posicao == 1:
+                    emoji_pos = "🥇"
+                elif posicao == 2:
+                    emoji_pos = "🥈"
+                elif posicao == 3:
+                    emoji_pos = "🥉"
+                else:
+                    emoji_pos = f"{posicao}º"
+                
+                texto += f"{emoji_pos} {projeto} - {formatar_moeda_legado(dados_proj['faturado'])}\n"
+                posicao += 1
+
+    return texto.strip()
+
+def formatar_resumo_detalhado_legado(dados, numero_usuario, titulo_data):
+    resumo_projetos, projetos_modalidade, lideres_detalhado, servicos_por_projeto = agrupar_dados_completo(dados)
+    nome_usuario = obter_nome_usuario(numero_usuario)
+    texto = f"📊 {titulo_data}\n\n"
+    texto += f"🎯 RESUMO DETALHADO - {nome_usuario}\n\n"
+
+    projetos_processados = {}
+    for chave_lider, dados_lider in lideres_detalhado.items():
+        projeto = dados_lider['projeto']
+        nome_lider = dados_lider['nome']
+        if projeto not in projetos_processados:
+            projetos_processados[projeto] = []
+            texto += f"🏗 PROJETO {projeto} - RESUMO POR LÍDER\n"
+        texto += f"👷 {nome_lider}\n"
+        texto += f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
+        total_lider_producao = 0
+        total_lider_faturado = 0
+        total_lider_medida = ""
+        for servico, dados_servico in dados_lider['servicos'].items():
+            producao = dados_servico['producao']
+            faturado = dados_servico['faturado'] 
+            medida = dados_servico['medida']
+            total_lider_producao += producao
+            total_lider_faturado += faturado
+            total_lider_medida = medida
+            texto += f"{servico}\n"
+            texto += f"📊 Produção: {formatar_numero_legado(producao)} {medida}\n"
+            texto += f"💰 Faturado: {formatar_moeda_legado(faturado)}\n"
+            texto += "_____________________\n"
+        texto += f"🏆 TOTAL {nome_lider}:\n"
+        texto += f"📊 Produção: {formatar_numero_legado(total_lider_producao)} {total_lider_medida}\n"
+        texto += f"💰 Faturado: {formatar_moeda_legado(total_lider_faturado)}\n"
+        texto += f"═══════════════════════════════════\n\n"
+
+    # AGRUPADO POR SERVIÇO - CORRIGIDO: Só projetos dos dados filtrados
+    texto += f"***AGRUPADO POR SERVIÇO***\n"
+    for projeto, servicos in servicos_por_projeto.items():
+        texto += f"PROJETO {projeto}\n"
+        for servico, dados in servicos.items():
+            prod = formatar_numero_legado(dados['producao'])
+            fat = formatar_moeda_legado(dados['faturado'])
+            medida = dados['medida']
+            texto += f"{servico}\n"
+            texto += f"📊 Produção: {prod} {medida}\n"
+            texto += f"💰 Faturado: {fat}\n"
+            texto += "_____________________\n"
+        texto += "\n"
+    return texto.strip()
+
+
+def detalhado_em_blocos(dados, numero_usuario, titulo_data):
+    """Texto de todos os blocos do detalhado, como o pipeline envia"""
+    return '\n\n'.join(bot_final.gerar_blocos_resumo_detalhado(dados, numero_usuario, titulo_data))
+
+
+def mesmas_linhas(legado, novo):
+    """Mesmas linhas nas duas versões; nos blocos o título do agrupado se repete a cada projeto"""
+    titulo = renderizador_relatorio.TITULO_AGRUPADO_SERVICO.strip()
+
+    def contar(texto):
+        return Counter(linha for linha in texto.splitlines() if linha.strip() and linha != titulo)
+    return contar(legado) == contar(novo)
+
+
+def medir(funcao, *args, repeticoes=5):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor, resultado
+
+
+def main():
+    quantidades = [int(q) for q in sys.argv[1:]] or [50, 500, 5000]
+
+    agrupar_original = bot_final.agrupar_dados_completo
+    cache = bot_final.cache_relatorios_compartilhados
+    validade_original = cache.validade
+    # Mede o cálculo, não o cache compartilhado entre usuários
+    cache.validade = 0
+
+    print("=== BENCHMARK RENDERIZADOR DE RELATÓRIOS ===")
+    for quantidade in quantidades:
+        dados = gerar_linhas(quantidade)
+        titulo = "PRODUÇÃO 15/08/2025"
+        print(f"\n📊 {quantidade} linhas de líder/serviço")
+
+        for nome, legado, novo, comparar, igual in (
+            ("Resumo geral", formatar_resumo_geral_legado, bot_final.formatar_resumo_geral,
+             lambda a, b: a.encode('utf-8') == b.encode('utf-8'), "idêntico"),
+            ("Resumo detalhado", formatar_resumo_detalhado_legado, detalhado_em_blocos,
+             mesmas_linhas, "mesmas linhas"),
+        ):
+            t_legado, texto_legado = medir(legado, dados, NUMERO, titulo)
+            t_novo, texto_novo = medir(novo, dados, NUMERO, titulo)
+            identico = comparar(texto_legado, texto_novo)
+            print(f"  {nome}: anterior {t_legado * 1000:8.2f} ms | novo {t_novo * 1000:8.2f} ms "
+                  f"({t_legado / t_novo:.1f}x) | {len(texto_novo):,} chars | "
+                  f"{'✅ ' + igual if identico else '❌ DIFERENTE'}")
+            if not identico:
+                sys.exit(1)
+
+        # Só a renderização: a agregação é feita uma vez e reaproveitada pelas duas versões
+        agregado = agrupar_dados_completo(dados)
+        globals()['agrupar_dados_completo'] = bot_final.agrupar_dados_completo = lambda _dados: agregado
+        for nome, legado, novo in (
+            ("Render geral", formatar_resumo_geral_legado, bot_final.formatar_resumo_geral),
+            ("Render detalhado", formatar_resumo_detalhado_legado, detalhado_em_blocos),
+        ):
+            t_legado, _ = medir(legado, dados, NUMERO, titulo)
+            t_novo, _ = medir(novo, dados, NUMERO, titulo)
+            print(f"  {nome}: anterior {t_legado * 1000:8.2f} ms | novo {t_novo * 1000:8.2f} ms "
+                  f"({t_legado / t_novo:.1f}x)")
+        globals()['agrupar_dados_completo'] = bot_final.agrupar_dados_completo = agrupar_original
+
+        # Segundo usuário com os mesmos projetos: só o cabeçalho é montado
+        cache.validade = validade_original
+        versionadas = LinhasRelatorio(dados, versao=('benchmark', nova_versao()))
+        t_primeiro, _ = medir(bot_final.formatar_resumo_geral, versionadas, NUMERO, titulo, repeticoes=1)
+        t_segundo, _ = medir(bot_final.formatar_resumo_geral, versionadas, NUMERO, titulo)
+        print(f"  Resumo compartilhado: 1º usuário {t_primeiro * 1000:8.2f} ms | "
+              f"mesmos projetos {t_segundo * 1000:8.2f} ms ({t_primeiro / t_segundo:.1f}x)")
+        cache.validade = 0
+
+    for valor in (0, -0.005, 0.005, 1234.5, -98765.4321, 1e12, 2.675, Decimal('1234567.895')):
+        assert renderizador_relatorio.formatar_moeda(valor) == formatar_moeda_legado(valor), valor
+        assert renderizador_relatorio.formatar_numero(valor) == formatar_numero_legado(valor), valor
+    print("\n✅ formatar_moeda/formatar_numero idênticos")
+
+
+if __name__ == "__main__":
+    main()
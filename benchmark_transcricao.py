@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark dos motores de transcrição (transcricao.TRANSCRITORES) num corpus
+local de áudios de campo.
+
+O corpus é uma pasta com os áudios (.ogg/.opus/.wav/.flac, como vieram do
+WhatsApp) e, para cada um, um .txt com o mesmo nome e o que foi falado. Os
+áudios de campo não vão para o repositório; grave/exporte os seus para a
+pasta (padrão: corpus_voz/ ou CORPUS_VOZ).
+
+Para cada motor que carrega mede a latência por áudio (média, p50, p95 e
+fator de tempo real), o WER e a fração de áudios em que o comando
+interpretado (comandos.interpretar) é o mesmo da referência. O WER é
+calculado depois de normalizar hipótese e referência como o bot faz
+(minúsculas, números por extenso em dígitos, correção de palavras de
+comando), para que "duzentos e dois" e "202" não contem como erro.
+
+Os áudios passam pelo mesmo converter_audio do bot, com o corte de
+silêncios (deteccao_voz.py); rode com VAD_ATIVO=0 para comparar sem ele.
+
+Uso: python benchmark_transcricao.py [pasta] [motores...]   (padrão: todos)
+"""
+
+import os
+import statistics
+import sys
+import time
+
+import comandos
+from audio_memoria import converter_audio
+from correcao_fala import corrigir_transcricao
+from transcricao import TRANSCRITORES, taxa_erro_palavras
+
+EXTENSOES_AUDIO = ('.ogg', '.opus', '.oga', '.wav', '.flac')
+
+
+def carregar_corpus(pasta):
+    """[(nome, sr.AudioData, segundos, referência)] dos áudios que têm .txt"""
+    corpus = []
+    for arquivo in sorted(os.listdir(pasta)):
+        nome, extensao = os.path.splitext(arquivo)
+        caminho_texto = os.path.join(pasta, nome + '.txt')
+        if extensao.lower() not in EXTENSOES_AUDIO or not os.path.exists(caminho_texto):
+            continue
+        with open(os.path.join(pasta, arquivo), 'rb') as f:
+            audio = converter_audio(f.read())
+        with open(caminho_texto, encoding='utf-8') as f:
+            referencia = f.read().strip()
+        segundos = len(audio.frame_data) / audio.sample_width / audio.sample_rate
+        corpus.append((nome, audio, segundos, referencia))
+    return corpus
+
+
+def normalizar(texto):
+    return corrigir_transcricao(comandos.normalizar_texto(texto))
+
+
+def avaliar(transcritor, corpus):
+    tempos, hipoteses, comandos_iguais, falhas = [], [], 0, 0
+    for _, audio, _, referencia in corpus:
+        inicio = time.perf_counter()
+        try:
+            hipotese = transcritor.transcrever(audio)
+        except Exception as e:
+            print(f"    ⚠️ falha: {e}")
+            hipotese, falhas = '', falhas + 1
+        tempos.append(time.perf_counter() - inicio)
+        hipoteses.append(normalizar(hipotese))
+        comandos_iguais += comandos.interpretar(hipotese, transcrito=True) == comandos.interpretar(referencia, transcrito=True)
+    referencias = [normalizar(referencia) for _, _, _, referencia in corpus]
+    return tempos, taxa_erro_palavras(referencias, hipoteses), comandos_iguais, falhas, hipoteses
+
+
+def main():
+    pasta = sys.argv[1] if len(sys.argv) > 1 else os.environ.get('CORPUS_VOZ', 'corpus_voz')
+    motores = sys.argv[2:] or list(TRANSCRITORES)
+
+    print("=== BENCHMARK MOTORES DE TRANSCRIÇÃO ===")
+    if not os.path.isdir(pasta):
+        print(f"❌ Corpus não encontrado em {pasta}: crie a pasta com pares audio.ogg + audio.txt")
+        sys.exit(1)
+    corpus = carregar_corpus(pasta)
+    if not corpus:
+        print(f"❌ Nenhum par áudio + .txt em {pasta}")
+        sys.exit(1)
+    duracao = sum(segundos for _, _, segundos, _ in corpus)
+    print(f"📂 {len(corpus)} áudios, {duracao:.0f} s no total ({pasta})")
+
+    for nome in motores:
+        print(f"\n🎙️ {nome}")
+        inicio = time.perf_counter()
+        try:
+            transcritor = TRANSCRITORES[nome]()
+        except Exception as e:
+            print(f"  ⚠️ não carregou: {e}")
+            continue
+        print(f"  Carga          : {(time.perf_counter() - inicio) * 1000:7.0f} ms (uma vez por worker)")
+
+        tempos, wer, iguais, falhas, hipoteses = avaliar(transcritor, corpus)
+        ordenados = sorted(tempos)
+        p95 = ordenados[min(len(ordenados) - 1, int(round(0.95 * (len(ordenados) - 1))))]
+        print(f"  Latência       : média {statistics.mean(tempos) * 1000:6.0f} ms | "
+              f"p50 {statistics.median(tempos) * 1000:6.0f} ms | p95 {p95 * 1000:6.0f} ms | "
+              f"tempo real x{sum(tempos) / duracao:.2f}")
+        print(f"  WER            : {wer:.1%}")
+        print(f"  Mesmo comando  : {iguais}/{len(corpus)} ({iguais / len(corpus):.0%})"
+              + (f" | {falhas} falhas" if falhas else ""))
+        for (arquivo, _, _, referencia), hipotese in list(zip(corpus, hipoteses))[:3]:
+            print(f"    {arquivo}: {normalizar(referencia)!r} -> {hipotese!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,35 @@ import pyodbc
 import requests
 from flask import Flask, request
 from datetime import datetime
-import re
 import time
 import os
-import librosa
-import soundfile as sf
-import speech_recognition as sr
+import queue
+import threading
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import functools
-from pre_apontamento import processar_pre_apontamento
+from pre_apontamento import processar_pre_apontamento, TIMEZONE_BRASILIA
+import metricas
+from linhas_compactas import compactar_linhas, estatisticas_dimensoes
+from pool_conexoes import PoolConexoes
+from cache_dimensoes import CacheDimensoes
+from cache_transcricoes import CacheTranscricoes
+from pool_processos import PoolProcessos, FilaCheia
+from cache_relatorios import (
+    CacheLinhasDia, CacheCompartilhado, LinhasRelatorio, projetos_canonicos, nova_versao, versao_linhas,
+    iniciar_preaquecimento,
+    PREAQUECIMENTO_ATIVO, PREAQUECIMENTO_DIAS_ATIVIDADE
+)
+from relatorio_delta import COLUNA_MARCA_ALTERACAO, InstantaneosUsuarios, totais_por_servico, comparar
+import comandos
+import exportacao
+import frete
+import transcricao
+import api_relatorios
+from consultas_periodo import dividir_periodo, executar_em_fatias, mesclar_linhas_boletim, mesclar_supervisores
+from renderizador_relatorio import (
+    renderizar_corpo_resumo_geral, montar_resumo_geral, secoes_detalhadas, empacotar_blocos, renderizar_alteracoes
+)
 
 app = Flask(__name__)
 
@@ -19,6 +39,8 @@ app = Flask(__name__)
 INSTANCE_ID = os.environ.get('INSTANCE_ID')
 TOKEN = os.environ.get('TOKEN')
 CLIENT_TOKEN = os.environ.get('CLIENT_TOKEN')
+# Permite apontar para um mock local da Z-API nos testes
+ZAPI_URL_BASE = os.environ.get('ZAPI_URL_BASE', 'https://api.z-api.io').rstrip('/')
 
 # Database configs - SOMENTE VARIÁVEIS DE AMBIENTE
 DB_SERVER = os.environ.get('DB_SERVER', 'alrflorestal.database.windows.net')
@@ -26,6 +48,21 @@ DB_DATABASE = os.environ.get('DB_DATABASE', 'Tabela_teste')
 DB_USERNAME = os.environ.get('DB_USERNAME', 'sqladmin')
 DB_PASSWORD = os.environ.get('DB_PASSWORD')
 
+# Motor de agregação dos relatórios: 'python' (padrão) ou 'numpy' (opcional: mesma saída,
+# só 1.0-1.3x mais rápido em benchmark_agregacao.py de 2k a 1M linhas)
+MOTOR_AGREGACAO = os.environ.get('MOTOR_AGREGACAO', 'python').lower()
+
+# Períodos maiores que isso (em dias) são consultados em fatias paralelas
+DIAS_MINIMOS_FATIAMENTO = int(os.environ.get('DIAS_MINIMOS_FATIAMENTO', 31))
+GRANULARIDADE_FATIAS = os.environ.get('GRANULARIDADE_FATIAS', 'mes')
+
+# Intervalo entre o resumo e o detalhado (AUMENTADO de 4 para 5 segundos)
+INTERVALO_ENTRE_MENSAGENS = 5
+# Intervalo entre os blocos seguintes do detalhado
+INTERVALO_ENTRE_BLOCOS = float(os.environ.get('INTERVALO_ENTRE_BLOCOS', 2))
+# Espera máxima por cada bloco do detalhado antes de desistir do envio
+TIMEOUT_BLOCO_DETALHADO = float(os.environ.get('TIMEOUT_BLOCO_DETALHADO', 60))
+
 # Debug - mostrar quais variáveis foram carregadas
 print("🔍 DEBUG - Variáveis carregadas:")
 print(f"INSTANCE_ID: {'✅ OK' if INSTANCE_ID else '❌ VAZIO'}")
@@ -58,6 +95,9 @@ mensagens_processadas = {}  # Cache para evitar reprocessamento
 # Cache para usuários
 cache_usuarios = {}
 
+# Threads para montar o relatório detalhado enquanto o resumo é enviado
+executor_relatorios = ThreadPoolExecutor(max_workers=4, thread_name_prefix='relatorio')
+
 def conectar_db():
     try:
         # CORRIGIDO: Driver mais compatível para Railway
@@ -95,6 +135,16 @@ def conectar_db():
         print(f"[ERRO] Falha na conexão SQL: {e}")
         raise
 
+# Pool de conexões usado pelas consultas fatiadas de períodos longos
+pool_db = PoolConexoes(conectar_db, tamanho_maximo=int(os.environ.get('DB_POOL_TAMANHO', 4)))
+
+# Quantidade de colaboradores por projeto e classe, servida da memória
+cache_dimensoes = CacheDimensoes(pool_db)
+
+def periodo_deve_ser_fatiado(data_inicio, data_fim):
+    dias = (datetime.strptime(data_fim, '%Y-%m-%d') - datetime.strptime(data_inicio, '%Y-%m-%d')).days + 1
+    return dias > DIAS_MINIMOS_FATIAMENTO
+
 def normalizar_telefone(telefone):
     if not telefone:
         return ""
@@ -279,55 +329,71 @@ def salvar_frete_no_banco(dados_frete, numero, texto_original=""):
 
 # ========== NOVA FUNÇÃO: PROCESSAR COMANDO DE FRETE ==========
 def processar_frete_texto(texto):
-    """Extrai dados de frete do texto usando regex"""
-    import re
-    
-    # Regex para capturar frete com projeto opcional
-    padrao_frete = re.compile(
-        r"\bfrete\b(?:\s*(?P<projeto>\d{2,6}))?.*?"
-        r"(?:\bda\b|\bdo\b|\bdas\b|\bdos\b|\bde\b)\s+(?P<origem>[^,.;\n]+?)\s+"
-        r"(?:\bpara\b|\bpra\b|\b->\b)\s+(?P<destino>[^,.;\n]+?)"
-        r".*?(?:\bkm\b|\bkm\s*inicial\b|\bquilometragem\b|\bkm\s*é\b|\bkilometro\b).*?(?P<km>\d{1,7})",
-        flags=re.IGNORECASE | re.UNICODE
-    )
-    
-    # Regex flexível (sem "km" explícito, assume número grande é KM)
-    padrao_frete_flex = re.compile(
-        r"\bfrete\b(?:\s*(?P<projeto>\d{2,6}))?.*?"
-        r"(?:\bda\b|\bdo\b|\bdas\b|\bdos\b|\bde\b)\s+(?P<origem>[^,.;\n]+?)\s+"
-        r"(?:\bpara\b|\bpra\b|\b->\b)\s+(?P<destino>[^,.;\n]+?)"
-        r".*?(?P<km>\d{4,7})\b",
-        flags=re.IGNORECASE | re.UNICODE
-    )
-    
-    def normalizar_local(s):
-        s = " ".join(s.strip().split())
-        return " ".join(p.capitalize() for p in s.split(" "))
-    
-    texto_limpo = " ".join(texto.split())
-    match = padrao_frete.search(texto_limpo) or padrao_frete_flex.search(texto_limpo)
-    
-    if not match:
+    """Extrai dados de frete do texto (leitor de uma passada em frete.py)"""
+    return frete.extrair_frete(texto)
+
+def consultar_linhas_dia(projetos, data):
+    """Linhas agregadas de BOLETIM_DIARIO de um dia para os projetos informados"""
+    placeholders = ','.join(['?' for _ in projetos])
+    query = f"""
+    SELECT 
+        NOME_DO_LIDER,
+        SERVIÇO,
+        MEDIDA,
+        MOD,
+        PROJETO,
+        ISNULL(SUM([PRODUÇÃO]), 0) as total_producao,
+        ISNULL(SUM([FATURADO]), 0) as total_faturado
+    FROM BOLETIM_DIARIO 
+    WHERE DATA_EXECUÇÃO = ? AND PROJETO IN ({placeholders})
+    GROUP BY NOME_DO_LIDER, SERVIÇO, MEDIDA, MOD, PROJETO
+    ORDER BY PROJETO, NOME_DO_LIDER, SERVIÇO
+    """
+    with pool_db.obter() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, [data] + list(projetos))
+        return compactar_linhas(cursor.fetchall())
+
+def listar_projetos_ativos():
+    """Projetos com lançamentos em BOLETIM_DIARIO nos últimos dias"""
+    with pool_db.obter() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+        SELECT DISTINCT PROJETO
+        FROM BOLETIM_DIARIO
+        WHERE DATA_EXECUÇÃO >= DATEADD(day, ?, CAST(GETDATE() AS date))
+        """, [-PREAQUECIMENTO_DIAS_ATIVIDADE])
+        return [str(linha[0]) for linha in cursor.fetchall()]
+
+def data_hoje_consulta():
+    return datetime.today().strftime('%Y-%m-%d')
+
+# Linhas de hoje e seus agregados por projeto (mantidos quentes pelo pré-aquecimento)
+cache_linhas_dia = CacheLinhasDia(consultar_linhas_dia, agrupar=lambda linhas: agrupar_dados_completo(linhas))
+# Cálculos de relatório compartilhados entre usuários com os mesmos projetos
+cache_relatorios_compartilhados = CacheCompartilhado('cache_relatorio')
+# Transcrições por URL e por conteúdo do áudio (reentregas e encaminhamentos)
+cache_transcricoes = CacheTranscricoes()
+# Último relatório de hoje entregue a cada usuário (base do comando de alterações)
+instantaneos_usuarios = InstantaneosUsuarios()
+
+def ler_marca_alteracao(projetos, data):
+    """(MAX(marca), COUNT(*)) das linhas do dia, ou None sem COLUNA_MARCA_ALTERACAO"""
+    if not COLUNA_MARCA_ALTERACAO or not projetos:
         return None
-        
-    projeto = match.group("projeto") if match.group("projeto") else None
-    origem = normalizar_local(match.group("origem"))
-    destino = normalizar_local(match.group("destino"))
-    km = int(match.group("km"))
-    
-    return {
-        "TIPO": "FRETE",
-        "PROJETO": projeto,
-        "SAIDA": origem,
-        "DESTINO": destino,
-        "KM_INICIAL": km
-    }
+    placeholders = ','.join(['?' for _ in projetos])
+    with pool_db.obter() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+        SELECT MAX([{COLUNA_MARCA_ALTERACAO}]), COUNT(*)
+        FROM BOLETIM_DIARIO
+        WHERE DATA_EXECUÇÃO = ? AND PROJETO IN ({placeholders})
+        """, [data] + list(projetos))
+        return tuple(cursor.fetchone())
 
 def obter_dados_detalhados_hoje(numero_usuario, projeto_especifico=None):
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
-        data_hoje = datetime.today().strftime('%Y-%m-%d')
+        data_hoje = data_hoje_consulta()
         projetos_usuario = obter_projetos_usuario(numero_usuario)
         
         # Se projeto específico foi informado, verificar se usuário tem acesso
@@ -342,25 +408,7 @@ def obter_dados_detalhados_hoje(numero_usuario, projeto_especifico=None):
         if not projetos_filtro:
             return []
             
-        placeholders = ','.join(['?' for _ in projetos_filtro])
-        query = f"""
-        SELECT 
-            NOME_DO_LIDER,
-            SERVIÇO,
-            MEDIDA,
-            MOD,
-            PROJETO,
-            ISNULL(SUM([PRODUÇÃO]), 0) as total_producao,
-            ISNULL(SUM([FATURADO]), 0) as total_faturado
-        FROM BOLETIM_DIARIO 
-        WHERE DATA_EXECUÇÃO = ? AND PROJETO IN ({placeholders})
-        GROUP BY NOME_DO_LIDER, SERVIÇO, MEDIDA, MOD, PROJETO
-        ORDER BY PROJETO, NOME_DO_LIDER, SERVIÇO
-        """
-        parametros = [data_hoje] + projetos_filtro
-        cursor.execute(query, parametros)
-        resultados = cursor.fetchall()
-        conn.close()
+        resultados = cache_linhas_dia.obter(projetos_filtro, data_hoje)
         
         if projeto_especifico:
             print(f"[INFO] Dados filtrados para projeto {projeto_especifico}: {len(resultados)} registros")
@@ -370,10 +418,47 @@ def obter_dados_detalhados_hoje(numero_usuario, projeto_especifico=None):
         print(f"[ERRO] Falha ao consultar dados hoje: {e}")
         return []
 
-def obter_dados_detalhados_periodo(data_inicio, data_fim, numero_usuario, projeto_especifico=None):
+def consultar_linhas_periodo(projetos, data_inicio, data_fim):
+    """Linhas agregadas de BOLETIM_DIARIO no período para os projetos informados"""
+    placeholders = ','.join(['?' for _ in projetos])
+    query = f"""
+    SELECT 
+        NOME_DO_LIDER,
+        SERVIÇO,
+        MEDIDA,
+        MOD,
+        PROJETO,
+        ISNULL(SUM([PRODUÇÃO]), 0) as total_producao,
+        ISNULL(SUM([FATURADO]), 0) as total_faturado
+    FROM BOLETIM_DIARIO 
+    WHERE DATA_EXECUÇÃO BETWEEN ? AND ? AND PROJETO IN ({placeholders})
+    GROUP BY NOME_DO_LIDER, SERVIÇO, MEDIDA, MOD, PROJETO
+    ORDER BY PROJETO, NOME_DO_LIDER, SERVIÇO
+    """
+    if periodo_deve_ser_fatiado(data_inicio, data_fim):
+        fatias = dividir_periodo(data_inicio, data_fim, GRANULARIDADE_FATIAS)
+        print(f"[INFO] Período longo: consultando em {len(fatias)} fatias paralelas")
+        lotes = executar_em_fatias(pool_db, query, fatias, projetos)
+        return compactar_linhas(mesclar_linhas_boletim(lotes))
+
+    conn = conectar_db()
     try:
-        conn = conectar_db()
         cursor = conn.cursor()
+        cursor.execute(query, [data_inicio, data_fim] + list(projetos))
+        return compactar_linhas(cursor.fetchall())
+    finally:
+        conn.close()
+
+def obter_linhas_periodo_compartilhadas(projetos, data_inicio, data_fim):
+    """Mesma consulta para todos os usuários com o mesmo conjunto de projetos, com versão nova a cada consulta"""
+    chave = ('linhas', projetos_canonicos(projetos), data_inicio, data_fim)
+    return cache_relatorios_compartilhados.obter(
+        chave, lambda: LinhasRelatorio(consultar_linhas_periodo(projetos, data_inicio, data_fim),
+                                       versao=chave + (nova_versao(),))
+    )
+
+def obter_dados_detalhados_periodo(data_inicio, data_fim, numero_usuario, projeto_especifico=None):
+    try:
         projetos_usuario = obter_projetos_usuario(numero_usuario)
         
         # Se projeto específico foi informado, verificar se usuário tem acesso
@@ -388,25 +473,7 @@ def obter_dados_detalhados_periodo(data_inicio, data_fim, numero_usuario, projet
         if not projetos_filtro:
             return []
             
-        placeholders = ','.join(['?' for _ in projetos_filtro])
-        query = f"""
-        SELECT 
-            NOME_DO_LIDER,
-            SERVIÇO,
-            MEDIDA,
-            MOD,
-            PROJETO,
-            ISNULL(SUM([PRODUÇÃO]), 0) as total_producao,
-            ISNULL(SUM([FATURADO]), 0) as total_faturado
-        FROM BOLETIM_DIARIO 
-        WHERE DATA_EXECUÇÃO BETWEEN ? AND ? AND PROJETO IN ({placeholders})
-        GROUP BY NOME_DO_LIDER, SERVIÇO, MEDIDA, MOD, PROJETO
-        ORDER BY PROJETO, NOME_DO_LIDER, SERVIÇO
-        """
-        parametros = [data_inicio, data_fim] + projetos_filtro
-        cursor.execute(query, parametros)
-        resultados = cursor.fetchall()
-        conn.close()
+        resultados = obter_linhas_periodo_compartilhadas(projetos_filtro, data_inicio, data_fim)
         
         if projeto_especifico:
             print(f"[INFO] Dados filtrados para projeto {projeto_especifico} no período: {len(resultados)} registros")
@@ -417,6 +484,10 @@ def obter_dados_detalhados_periodo(data_inicio, data_fim, numero_usuario, projet
         return []
 
 def obter_colaboradores_por_classe(projetos):
+    try:
+        return cache_dimensoes.classes_por_projeto(projetos)
+    except Exception as e:
+        print(f"[ERRO] Cache de dimensões indisponível, consultando COLABORADORES: {e}")
     try:
         conn = conectar_db()
         cursor = conn.cursor()
@@ -448,9 +519,6 @@ def obter_colaboradores_por_classe(projetos):
 def obter_supervisores_por_faturamento(projetos_usuario, data_inicio=None, data_fim=None):
     """Busca ranking de supervisores por faturamento"""
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
-        
         if not projetos_usuario:
             return []
             
@@ -486,9 +554,19 @@ def obter_supervisores_por_faturamento(projetos_usuario, data_inicio=None, data_
             """
             parametros = [data_hoje] + projetos_usuario
             
-        cursor.execute(query, parametros)
-        resultados = cursor.fetchall()
-        conn.close()
+        # Período longo vai em fatias pelo pool: a conexão própria só é aberta no caminho direto
+        if data_inicio and data_fim and periodo_deve_ser_fatiado(data_inicio, data_fim):
+            fatias = dividir_periodo(data_inicio, data_fim, GRANULARIDADE_FATIAS)
+            lotes = executar_em_fatias(pool_db, query, fatias, projetos_usuario)
+            resultados = mesclar_supervisores(lotes)
+        else:
+            conn = conectar_db()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(query, parametros)
+                resultados = cursor.fetchall()
+            finally:
+                conn.close()
         
         return [(supervisor, faturado) for supervisor, faturado in resultados if faturado > 0]
         
@@ -497,6 +575,34 @@ def obter_supervisores_por_faturamento(projetos_usuario, data_inicio=None, data_
         return []
 
 def agrupar_dados_completo(dados):
+    # Linhas de hoje vindas do cache já trazem os agregados de cada projeto
+    agregados = getattr(dados, 'agregados', None)
+    if agregados is not None:
+        return mesclar_agregados(agregados)
+    if MOTOR_AGREGACAO == 'numpy' and dados:
+        try:
+            from agregacao_numpy import agrupar_dados_numpy
+            return agrupar_dados_numpy(dados, normalizar_modalidade)
+        except Exception as e:
+            print(f"[ERRO] Motor NumPy falhou, usando agregação Python: {e}")
+    return agrupar_dados_python(dados)
+
+def mesclar_agregados(agregados):
+    """Junta os agregados de projetos diferentes (todas as chaves de agrupar_dados_completo incluem o projeto)"""
+    if len(agregados) == 1:
+        return agregados[0]
+    resumo_projetos = {}
+    projetos_modalidade = {}
+    lideres_detalhado = {}
+    servicos_por_projeto = defaultdict(lambda: defaultdict(lambda: {'producao': 0, 'faturado': 0, 'medida': ''}))
+    for resumo, modalidades, lideres, servicos in agregados:
+        resumo_projetos.update(resumo)
+        projetos_modalidade.update(modalidades)
+        lideres_detalhado.update(lideres)
+        servicos_por_projeto.update(servicos)
+    return resumo_projetos, projetos_modalidade, lideres_detalhado, servicos_por_projeto
+
+def agrupar_dados_python(dados):
     if not dados:
         return {}, {}, {}, {}
     resumo_projetos = {}
@@ -551,6 +657,7 @@ def agrupar_dados_completo(dados):
         resumo_projetos[projeto]['total_lideres'] = len(lideres_por_projeto[projeto])
     return resumo_projetos, projetos_modalidade, lideres_detalhado, servicos_por_projeto
 
+@functools.lru_cache(maxsize=256)
 def normalizar_modalidade(modalidade):
     if not modalidade:
         return "N/A"
@@ -570,14 +677,7 @@ def normalizar_modalidade(modalidade):
     
     return modalidade_limpa.capitalize()
 
-def formatar_moeda(valor):
-    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-def formatar_numero(valor):
-    return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
 def formatar_resumo_geral(dados, numero_usuario, titulo_data, data_inicio=None, data_fim=None, projeto_especifico=None):
-    resumo_projetos, projetos_modalidade, _, _ = agrupar_dados_completo(dados)
     nome_usuario = obter_nome_usuario(numero_usuario)
     
     # Se projeto específico, usar só ele, senão usar todos os projetos do usuário
@@ -585,437 +685,193 @@ def formatar_resumo_geral(dados, numero_usuario, titulo_data, data_inicio=None,
         projetos_para_busca = [projeto_especifico]
     else:
         projetos_para_busca = obter_projetos_usuario(numero_usuario)
-    
-    classes_info = obter_colaboradores_por_classe(projetos_para_busca)
 
-    texto = f"📊 {titulo_data}\n\n"
-    texto += f"🎯 RESUMO GERAL - {nome_usuario}\n\n"
-    total_faturado = sum(proj['faturado'] for proj in resumo_projetos.values())
-    texto += f"💰 Faturado Total: {formatar_moeda(total_faturado)}\n"
+    # O corpo só depende dos projetos, do período e da versão das linhas; o nome entra apenas no cabeçalho
+    versao = versao_linhas(dados)
+    if versao is None:
+        corpo = calcular_corpo_resumo_geral(dados, projetos_para_busca, data_inicio, data_fim)
+    else:
+        chave = ('resumo', projetos_canonicos(projetos_para_busca), data_inicio or data_hoje_consulta(), data_fim, versao)
+        corpo = cache_relatorios_compartilhados.obter(
+            chave, lambda: calcular_corpo_resumo_geral(dados, projetos_para_busca, data_inicio, data_fim)
+        )
+    return montar_resumo_geral(titulo_data, nome_usuario, corpo)
 
-    modalidades_totais = defaultdict(lambda: {'producao': 0, 'faturado': 0})
-    for projeto, mods in projetos_modalidade.items():
-        for mod, dados_mod in mods.items():
-            modalidades_totais[mod]['producao'] += dados_mod['producao']
-            modalidades_totais[mod]['faturado'] += dados_mod['faturado']
+def calcular_corpo_resumo_geral(dados, projetos_para_busca, data_inicio=None, data_fim=None):
+    resumo_projetos, projetos_modalidade, _, _ = agrupar_dados_completo(dados)
+    classes_info = obter_colaboradores_por_classe(projetos_para_busca)
 
-    for mod, tot in modalidades_totais.items():
-        texto += f"{mod}: {formatar_numero(tot['producao'])} | {formatar_moeda(tot['faturado'])}\n"
+    # CORRIGIDO: Usar projetos filtrados para supervisores
+    supervisores_ranking = obter_supervisores_por_faturamento(projetos_para_busca, data_inicio, data_fim)
 
-    texto += f"---------------------------------------------\n"
+    return renderizar_corpo_resumo_geral(resumo_projetos, projetos_modalidade, classes_info, supervisores_ranking)
 
-    total_colabs = sum(sum(cl.values()) for cl in classes_info.values())
-    texto += f"👤Colaboradores: {total_colabs}\n"
-    todas_classes = defaultdict(int)
-    for classes in classes_info.values():
-        for classe, qtd in classes.items():
-            todas_classes[classe] += qtd
-    for classe, qtd in todas_classes.items():
-        texto += f"👤 {classe}: {qtd}\n"
+def gerar_blocos_resumo_detalhado(dados, numero_usuario, titulo_data):
+    """Detalhado em mensagens por projeto, geradas sob demanda"""
+    nome_usuario = obter_nome_usuario(numero_usuario)
+    # A versão das linhas já identifica projetos, período e conteúdo
+    versao = versao_linhas(dados)
+    chave = ('detalhado', versao) if versao is not None else None
+    secoes = cache_relatorios_compartilhados.consultar(chave) if chave else None
+    if secoes is None:
+        secoes = _secoes_guardando(chave, dados)
+    return empacotar_blocos(titulo_data, nome_usuario, secoes)
+
+def _secoes_guardando(chave, dados):
+    """Gera os trechos do detalhado projeto a projeto e guarda o conjunto ao final (se houver chave)"""
+    _, _, lideres_detalhado, servicos_por_projeto = agrupar_dados_completo(dados)
+    secoes = []
+    for trechos in secoes_detalhadas(lideres_detalhado, servicos_por_projeto):
+        secoes.append(trechos)
+        yield trechos
+    if chave is not None:
+        cache_relatorios_compartilhados.guardar(chave, secoes)
+
+def _colocar_bloco(fila, cancelado, item):
+    """Coloca `item` na fila esperando vaga, mas desiste se o envio foi cancelado; True se colocou"""
+    while not cancelado.is_set():
+        try:
+            fila.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
 
-    texto += f"---------------------------------------------\n"
+def _produzir_blocos(fila, cancelado, dados, numero_usuario, titulo_data):
+    """Produtor: coloca os blocos do detalhado na fila conforme são montados"""
+    try:
+        for bloco in gerar_blocos_resumo_detalhado(dados, numero_usuario, titulo_data):
+            if not _colocar_bloco(fila, cancelado, bloco):
+                return
+        _colocar_bloco(fila, cancelado, None)
+    except Exception as e:
+        _colocar_bloco(fila, cancelado, e)
+
+# ========== SUBSISTEMAS CARREGADOS SOB DEMANDA ==========
+# O áudio (soundfile, NumPy), o motor de transcrição (transcricao.obter_transcritor)
+# e o cliente OpenAI (pre_apontamento.obter_cliente_openai) só são carregados no
+# primeiro uso: o boot de cada worker do gunicorn não paga por eles, e um deploy
+# que só recebe texto nunca os carrega
+# Decodificação, reamostragem e corte de silêncios em processos separados (pool_processos):
+# um áudio longo não segura as outras mensagens do worker. PROCESSOS_AUDIO=0 roda na própria thread
+pool_audio = PoolProcessos(
+    'audio',
+    processos=int(os.environ.get('PROCESSOS_AUDIO', 1)),
+    fila=int(os.environ.get('FILA_AUDIO', 4)),
+    timeout=float(os.environ.get('TIMEOUT_AUDIO', 45)),
+)
+
+# Mensagens de áudio seguem numa thread e o webhook responde sem esperar a transcrição.
+# Uma thread por vaga do pool de áudio (rodando + fila): acima disso a mensagem é recusada
+# na hora com aviso ao usuário, sem fila escondida no executor
+AUDIO_EM_SEGUNDO_PLANO = os.environ.get('AUDIO_EM_SEGUNDO_PLANO', '1') == '1'
+CAPACIDADE_AUDIO = max(pool_audio.processos, 1) + pool_audio.fila
+MENSAGEM_AUDIO_LOTADO = "⏳ Muitos áudios sendo processados agora. Envie de novo em instantes."
+executor_audio = ThreadPoolExecutor(max_workers=CAPACIDADE_AUDIO, thread_name_prefix='audio')
+vagas_audio = threading.BoundedSemaphore(CAPACIDADE_AUDIO)
+_lock_audio_andamento = threading.Lock()
+audio_em_andamento = 0
+
+def _contar_audio_em_andamento(delta):
+    global audio_em_andamento
+    with _lock_audio_andamento:
+        audio_em_andamento += delta
+        metricas.definir('audio_mensagens_em_andamento', audio_em_andamento)
+
+def processar_audio_em_segundo_plano(dados, numero, hash_mensagem, inicio_requisicao):
+    """Entrega a mensagem de áudio a uma thread de executor_audio; False se todas as vagas estão ocupadas"""
+    if not vagas_audio.acquire(blocking=False):
+        metricas.incrementar('audio_mensagens_recusadas')
+        return False
+    _contar_audio_em_andamento(1)
 
-    # CORRIGIDO: Usar projetos filtrados para supervisores
-    supervisores_ranking = obter_supervisores_por_faturamento(projetos_para_busca, data_inicio, data_fim)
-    if supervisores_ranking:
-        texto += f"🏆 RANKING FATURAMENTO POR SUPERVISOR\n"
-        posicao = 1
-        for supervisor, faturado in supervisores_ranking:
-            if posicao == 1:
-                emoji_pos = "🥇"
-            elif posicao == 2:
-                emoji_pos = "🥈"
-            elif posicao == 3:
-                emoji_pos = "🥉"
-            else:
-                emoji_pos = f"{posicao}º"
-            
-            texto += f"{emoji_pos} {supervisor} - {formatar_moeda(faturado)}\n"
-            posicao += 1
+    def processar():
+        try:
+            processar_mensagem(dados, numero, hash_mensagem, inicio_requisicao)
+        finally:
+            _contar_audio_em_andamento(-1)
+            vagas_audio.release()
 
-    texto += f"-----------------------------------------------\n"
+    try:
+        executor_audio.submit(processar)
+    except Exception:
+        _contar_audio_em_andamento(-1)
+        vagas_audio.release()
+        raise
+    return True
 
-    if resumo_projetos:
-        texto += f"🏆 RANKING FATURAMENTO POR PROJETO\n"
-        projetos_ordenados = sorted(
-            resumo_projetos.items(), 
-            key=lambda x: x[1]['faturado'], 
-            reverse=True
-        )
-        
-        posicao = 1
-        for projeto, dados_proj in projetos_ordenados:
-            if dados_proj['faturado'] > 0:
-                if posicao == 1:
-                    emoji_pos = "🥇"
-                elif posicao == 2:
-                    emoji_pos = "🥈"
-                elif posicao == 3:
-                    emoji_pos = "🥉"
-                else:
-                    emoji_pos = f"{posicao}º"
-                
-                texto += f"{emoji_pos} {projeto} - {formatar_moeda(dados_proj['faturado'])}\n"
-                posicao += 1
+def estatisticas_audio():
+    return {
+        **pool_audio.estatisticas(),
+        'mensagens_em_andamento': audio_em_andamento,
+        'capacidade_mensagens': CAPACIDADE_AUDIO,
+        'segundo_plano': AUDIO_EM_SEGUNDO_PLANO,
+    }
 
-    return texto.strip()
+@functools.lru_cache(maxsize=None)
+def modulo_audio():
+    """audio_memoria (soundfile + NumPy), importado no primeiro áudio"""
+    import audio_memoria
+    return audio_memoria
 
-def formatar_resumo_detalhado(dados, numero_usuario, titulo_data):
-    resumo_projetos, projetos_modalidade, lideres_detalhado, servicos_por_projeto = agrupar_dados_completo(dados)
-    nome_usuario = obter_nome_usuario(numero_usuario)
-    texto = f"📊 {titulo_data}\n\n"
-    texto += f"🎯 RESUMO DETALHADO - {nome_usuario}\n\n"
-
-    projetos_processados = {}
-    for chave_lider, dados_lider in lideres_detalhado.items():
-        projeto = dados_lider['projeto']
-        nome_lider = dados_lider['nome']
-        if projeto not in projetos_processados:
-            projetos_processados[projeto] = []
-            texto += f"🏗 PROJETO {projeto} - RESUMO POR LÍDER\n"
-        texto += f"👷 {nome_lider}\n"
-        texto += f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-        total_lider_producao = 0
-        total_lider_faturado = 0
-        total_lider_medida = ""
-        for servico, dados_servico in dados_lider['servicos'].items():
-            producao = dados_servico['producao']
-            faturado = dados_servico['faturado'] 
-            medida = dados_servico['medida']
-            total_lider_producao += producao
-            total_lider_faturado += faturado
-            total_lider_medida = medida
-            texto += f"{servico}\n"
-            texto += f"📊 Produção: {formatar_numero(producao)} {medida}\n"
-            texto += f"💰 Faturado: {formatar_moeda(faturado)}\n"
-            texto += "_____________________\n"
-        texto += f"🏆 TOTAL {nome_lider}:\n"
-        texto += f"📊 Produção: {formatar_numero(total_lider_producao)} {total_lider_medida}\n"
-        texto += f"💰 Faturado: {formatar_moeda(total_lider_faturado)}\n"
-        texto += f"═══════════════════════════════════\n\n"
-
-    # AGRUPADO POR SERVIÇO - CORRIGIDO: Só projetos dos dados filtrados
-    texto += f"***AGRUPADO POR SERVIÇO***\n"
-    for projeto, servicos in servicos_por_projeto.items():
-        texto += f"PROJETO {projeto}\n"
-        for servico, dados in servicos.items():
-            prod = formatar_numero(dados['producao'])
-            fat = formatar_moeda(dados['faturado'])
-            medida = dados['medida']
-            texto += f"{servico}\n"
-            texto += f"📊 Produção: {prod} {medida}\n"
-            texto += f"💰 Faturado: {fat}\n"
-            texto += "_____________________\n"
-        texto += "\n"
-    return texto.strip()
-
-def baixar_e_converter_audio(url_audio):
+def baixar_audio(url_audio):
+    """Bytes do áudio baixado da Z-API, ou None"""
     try:
         headers = {"Client-Token": CLIENT_TOKEN}
         resposta = requests.get(url_audio, headers=headers, timeout=30)
         if resposta.status_code == 200:
-            nome_arquivo = f"temp_audio_{int(time.time())}"
-            caminho_ogg = f"{nome_arquivo}.ogg"
-            with open(caminho_ogg, 'wb') as f:
-                f.write(resposta.content)
-            time.sleep(1)
-            try:
-                audio_data, sample_rate = librosa.load(caminho_ogg, sr=16000)
-                caminho_wav = f"{nome_arquivo}.wav"
-                sf.write(caminho_wav, audio_data, sample_rate)
-                try:
-                    os.remove(caminho_ogg)
-                except:
-                    pass
-                return caminho_wav
-            except Exception as e:
-                print(f"[ERRO] Erro na conversão: {e}")
-                return None
-        else:
-            return None
+            return resposta.content
+        return None
     except Exception as e:
         print(f"[ERRO] Erro no download: {e}")
         return None
 
-def transcrever_com_speech_recognition(caminho_audio):
+def converter_e_transcrever(conteudo):
+    """Converte em memória no pool de processos (sr.AudioData a 16 kHz, audio_memoria) e transcreve; None se falhar"""
     try:
-        if not os.path.exists(caminho_audio):
-            return None
-        try:
-            r = sr.Recognizer()
-            with sr.AudioFile(caminho_audio) as source:
-                r.adjust_for_ambient_noise(source, duration=0.5)
-                audio = r.record(source)
-            texto = r.recognize_google(audio, language="pt-BR")
-            return texto.strip()
-        except Exception as e:
-            print(f"[ERRO] Erro no reconhecimento: {e}")
-            return None
+        audio = modulo_audio().converter_audio(conteudo, executar=pool_audio.executar)
+    except FilaCheia:
+        raise
     except Exception as e:
-        print(f"[ERRO] Erro geral na transcrição: {e}")
+        print(f"[ERRO] Erro na conversão: {e}")
+        return None
+    return transcrever_com_speech_recognition(audio)
+
+def transcrever_audio(url_audio, numero=None):
+    """Texto do áudio: pelo cache da URL, senão baixa e usa o cache do conteúdo, e só então converte e transcreve"""
+    texto = cache_transcricoes.por_url(url_audio)
+    if texto is not None:
+        print(f"[DEBUG] 🎤 Transcrição do cache (URL já recebida)")
+        return texto
+    conteudo = baixar_audio(url_audio)
+    if conteudo is None:
+        return None
+    try:
+        return cache_transcricoes.obter(url_audio, conteudo, lambda: converter_e_transcrever(conteudo))
+    except FilaCheia as e:
+        # Pool de áudio lotado: responde já em vez de prender o worker na fila
+        print(f"[AVISO] {e}")
+        if numero:
+            enviar_mensagem(numero, MENSAGEM_AUDIO_LOTADO)
         return None
-    finally:
-        try:
-            if os.path.exists(caminho_audio):
-                os.remove(caminho_audio)
-        except:
-            pass
 
-def processar_comando_audio(texto):
-    texto = texto.lower().strip()
-    
-    # NOVO PADRÃO CORRIGIDO: "produção do projeto X do dia Y a Z de mês"
-    padrao_projeto_periodo_completo = r'(?:produção|producao|faturamento)\s+(?:do\s+)?projeto\s+(\d+)\s+(?:do\s+)?dia\s+(\d{1,2})\s*(?:a|até)\s*(\d{1,2})\s*de\s*(julho|jul|janeiro|jan|fevereiro|fev|março|mar|abril|abr|maio|mai|junho|jun|agosto|ago|setembro|set|outubro|out|novembro|nov|dezembro|dez)'
-    match_projeto_periodo_completo = re.search(padrao_projeto_periodo_completo, texto)
-    
-    if match_projeto_periodo_completo:
-        projeto = match_projeto_periodo_completo.group(1)
-        dia_inicio = match_projeto_periodo_completo.group(2).zfill(2)
-        dia_fim = match_projeto_periodo_completo.group(3).zfill(2)
-        mes_nome = match_projeto_periodo_completo.group(4).lower()
-        
-        meses = {
-            'janeiro': '01', 'jan': '01', 'fevereiro': '02', 'fev': '02', 
-            'março': '03', 'mar': '03', 'abril': '04', 'abr': '04',
-            'maio': '05', 'mai': '05', 'junho': '06', 'jun': '06',
-            'julho': '07', 'jul': '07', 'agosto': '08', 'ago': '08',
-            'setembro': '09', 'set': '09', 'outubro': '10', 'out': '10',
-            'novembro': '11', 'nov': '11', 'dezembro': '12', 'dez': '12'
-        }
-        
-        mes = meses.get(mes_nome, '07')
-        ano = str(datetime.now().year)
-        
-        data_inicio = f"{dia_inicio}/{mes}/{ano}"
-        data_fim = f"{dia_fim}/{mes}/{ano}"
-        
-        print(f"[DEBUG] ✅ PROJETO PERÍODO DETECTADO: Projeto {projeto}, {data_inicio} a {data_fim}")
-        return "projeto_periodo", f"{projeto}|{data_inicio} A {data_fim}"
-    
-    # PADRÃO CORRIGIDO: "produção do projeto X dia Y de mês" (data única)
-    padrao_projeto_data_unica = r'(?:produção|producao|faturamento)\s+(?:do\s+)?projeto\s+(\d+)\s+(?:do\s+)?dia\s+(\d{1,2})\s*de\s*(julho|jul|janeiro|jan|fevereiro|fev|março|mar|abril|abr|maio|mai|junho|jun|agosto|ago|setembro|set|outubro|out|novembro|nov|dezembro|dez)'
-    match_projeto_data_unica = re.search(padrao_projeto_data_unica, texto)
-    
-    if match_projeto_data_unica:
-        projeto = match_projeto_data_unica.group(1)
-        dia = match_projeto_data_unica.group(2).zfill(2)
-        mes_nome = match_projeto_data_unica.group(3).lower()
-        
-        meses = {
-            'janeiro': '01', 'jan': '01', 'fevereiro': '02', 'fev': '02', 
-            'março': '03', 'mar': '03', 'abril': '04', 'abr': '04',
-            'maio': '05', 'mai': '05', 'junho': '06', 'jun': '06',
-            'julho': '07', 'jul': '07', 'agosto': '08', 'ago': '08',
-            'setembro': '09', 'set': '09', 'outubro': '10', 'out': '10',
-            'novembro': '11', 'nov': '11', 'dezembro': '12', 'dez': '12'
-        }
-        
-        mes = meses.get(mes_nome, '07')
-        ano = str(datetime.now().year)
-        data_br = f"{dia}/{mes}/{ano}"
-        
-        print(f"[DEBUG] ✅ PROJETO DATA ÚNICA DETECTADO: Projeto {projeto}, {data_br}")
-        return "projeto_periodo", f"{projeto}|{data_br} A {data_br}"
-    
-    # NOVO: Padrão para projeto específico com data numérica SIMPLES
-    padrao_projeto_data_simples = r'(?:produção|producao|faturamento)\s+(?:do\s+)?projeto\s+(\d+)\s+(\d{1,2})[/](\d{1,2})(?:[/](\d{4}))?'
-    match_projeto_data_simples = re.search(padrao_projeto_data_simples, texto)
-    
-    if match_projeto_data_simples:
-        projeto = match_projeto_data_simples.group(1)
-        dia = match_projeto_data_simples.group(2).zfill(2)
-        mes = match_projeto_data_simples.group(3).zfill(2)
-        ano = match_projeto_data_simples.group(4) if match_projeto_data_simples.group(4) else str(datetime.now().year)
-        
-        data_br = f"{dia}/{mes}/{ano}"
-        
-        print(f"[DEBUG] ✅ PROJETO DATA NUMÉRICA DETECTADO: Projeto {projeto}, {data_br}")
-        return "projeto_periodo", f"{projeto}|{data_br} A {data_br}"
-    
-    # Padrão para projeto específico com data numérica (PERÍODO)
-    padrao_projeto_numerico = r'(?:produção|producao|faturamento)\s+(?:do\s+)?projeto\s+(\d+)\s+(\d{1,2})[/-](\d{1,2})(?:[/-](\d{4}))?\s*(?:a|até)\s*(\d{1,2})[/-](\d{1,2})(?:[/-](\d{4}))?'
-    match_projeto_numerico = re.search(padrao_projeto_numerico, texto)
-    
-    if match_projeto_numerico:
-        projeto = match_projeto_numerico.group(1)
-        dia_inicio = match_projeto_numerico.group(2).zfill(2)
-        mes_inicio = match_projeto_numerico.group(3).zfill(2)
-        ano_inicio = match_projeto_numerico.group(4) if match_projeto_numerico.group(4) else str(datetime.now().year)
-        dia_fim = match_projeto_numerico.group(5).zfill(2)
-        mes_fim = match_projeto_numerico.group(6).zfill(2)
-        ano_fim = match_projeto_numerico.group(7) if match_projeto_numerico.group(7) else ano_inicio
-        
-        data_inicio = f"{dia_inicio}/{mes_inicio}/{ano_inicio}"
-        data_fim = f"{dia_fim}/{mes_fim}/{ano_fim}"
-        
-        try:
-            data_inicio_dt = datetime.strptime(data_inicio, '%d/%m/%Y')
-            data_fim_dt = datetime.strptime(data_fim, '%d/%m/%Y')
-            if data_fim_dt < data_inicio_dt:
-                return "invalido", "Data final anterior à data inicial"
-        except ValueError:
-            return "invalido", "Formato de data inválido"
-        
-        return "projeto_periodo", f"{projeto}|{data_inicio} A {data_fim}"
-    
-    # Padrão para projeto específico com período
-    padrao_projeto_periodo = r'(?:produção|producao|faturamento)\s+(?:do\s+)?projeto\s+(\d+)\s+(?:dia\s+)?(\d{1,2})\s*(?:a|até|de)\s*(\d{1,2})\s*de\s*(julho|jul|janeiro|jan|fevereiro|fev|março|mar|abril|abr|maio|mai|junho|jun|agosto|ago|setembro|set|outubro|out|novembro|nov|dezembro|dez)'
-    match_projeto_periodo = re.search(padrao_projeto_periodo, texto)
-    
-    if match_projeto_periodo:
-        projeto = match_projeto_periodo.group(1)
-        dia_inicio = match_projeto_periodo.group(2).zfill(2)
-        dia_fim = match_projeto_periodo.group(3).zfill(2)
-        mes_nome = match_projeto_periodo.group(4).lower()
-        
-        meses = {
-            'janeiro': '01', 'jan': '01', 'fevereiro': '02', 'fev': '02', 
-            'março': '03', 'mar': '03', 'abril': '04', 'abr': '04',
-            'maio': '05', 'mai': '05', 'junho': '06', 'jun': '06',
-            'julho': '07', 'jul': '07', 'agosto': '08', 'ago': '08',
-            'setembro': '09', 'set': '09', 'outubro': '10', 'out': '10',
-            'novembro': '11', 'nov': '11', 'dezembro': '12', 'dez': '12'
-        }
-        
-        mes = meses.get(mes_nome, '07')
-        ano = str(datetime.now().year)
-        
-        data_inicio = f"{dia_inicio}/{mes}/{ano}"
-        data_fim = f"{dia_fim}/{mes}/{ano}"
-        
-        return "projeto_periodo", f"{projeto}|{data_inicio} A {data_fim}"
-    
-    # Padrão para projeto específico hoje
-    padrao_projeto_hoje = r'(?:produção|producao|faturamento)\s+(?:do\s+)?projeto\s+(\d+)\s+(?:do\s+dia|hoje)'
-    match_projeto_hoje = re.search(padrao_projeto_hoje, texto)
-    
-    if match_projeto_hoje:
-        projeto = match_projeto_hoje.group(1)
-        return "projeto_hoje", projeto
-    
-    # Padrão para projeto específico em data específica
-    padrao_projeto_data = r'(?:produção|producao|faturamento)\s+(?:do\s+)?projeto\s+(\d+)\s+(?:dia\s+)?(\d{1,2})\s*de\s*(julho|jul|janeiro|jan|fevereiro|fev|março|mar|abril|abr|maio|mai|junho|jun|agosto|ago|setembro|set|outubro|out|novembro|nov|dezembro|dez)'
-    match_projeto_data = re.search(padrao_projeto_data, texto)
-    
-    if match_projeto_data:
-        projeto = match_projeto_data.group(1)
-        dia = match_projeto_data.group(2).zfill(2)
-        mes_nome = match_projeto_data.group(3).lower()
-        
-        meses = {
-            'janeiro': '01', 'jan': '01', 'fevereiro': '02', 'fev': '02', 
-            'março': '03', 'mar': '03', 'abril': '04', 'abr': '04',
-            'maio': '05', 'mai': '05', 'junho': '06', 'jun': '06',
-            'julho': '07', 'jul': '07', 'agosto': '08', 'ago': '08',
-            'setembro': '09', 'set': '09', 'outubro': '10', 'out': '10',
-            'novembro': '11', 'nov': '11', 'dezembro': '12', 'dez': '12'
-        }
-        
-        mes = meses.get(mes_nome, '07')
-        ano = str(datetime.now().year)
-        data_br = f"{dia}/{mes}/{ano}"
-        
-        return "projeto_periodo", f"{projeto}|{data_br} A {data_br}"
-    
-    # Padrão para "do dia" com data específica (TODOS OS PROJETOS)
-    padrao_dia_especifico = r'(?:produção|producao|faturamento)\s+do\s+dia\s+(\d{1,2})[/](\d{1,2})(?:[/](\d{4}))?'
-    match_dia_especifico = re.search(padrao_dia_especifico, texto)
-    
-    if match_dia_especifico:
-        dia = match_dia_especifico.group(1).zfill(2)
-        mes = match_dia_especifico.group(2).zfill(2)
-        ano = match_dia_especifico.group(3) if match_dia_especifico.group(3) else str(datetime.now().year)
-        data_br = f"{dia}/{mes}/{ano}"
-        periodo = f"{data_br} A {data_br}"
-        return "periodo", periodo
-    
-    # Padrões originais (sem projeto específico)
-    padrao_periodo = r'(\d{1,2})\s*(?:a|até|de)\s*(\d{1,2})\s*de\s*(julho|jul|janeiro|jan|fevereiro|fev|março|mar|abril|abr|maio|mai|junho|jun|agosto|ago|setembro|set|outubro|out|novembro|nov|dezembro|dez)'
-    match_periodo = re.search(padrao_periodo, texto)
-    
-    if match_periodo:
-        dia_inicio = match_periodo.group(1).zfill(2)
-        dia_fim = match_periodo.group(2).zfill(2)
-        mes_nome = match_periodo.group(3).lower()
-        
-        meses = {
-            'janeiro': '01', 'jan': '01', 'fevereiro': '02', 'fev': '02', 
-            'março': '03', 'mar': '03', 'abril': '04', 'abr': '04',
-            'maio': '05', 'mai': '05', 'junho': '06', 'jun': '06',
-            'julho': '07', 'jul': '07', 'agosto': '08', 'ago': '08',
-            'setembro': '09', 'set': '09', 'outubro': '10', 'out': '10',
-            'novembro': '11', 'nov': '11', 'dezembro': '12', 'dez': '12'
-        }
-        
-        mes = meses.get(mes_nome, '07')
-        ano = str(datetime.now().year)
-        
-        data_inicio = f"{dia_inicio}/{mes}/{ano}"
-        data_fim = f"{dia_fim}/{mes}/{ano}"
-        
-        return "periodo", f"{data_inicio} A {data_fim}"
-    
-    # Padrão original para datas numéricas (TODOS OS PROJETOS)
-    padrao_data = r'(\d{1,2})[/-](\d{1,2})(?:[/-](\d{4}))?\s*(?:a|até)\s*(\d{1,2})[/-](\d{1,2})(?:[/-](\d{4}))?'
-    match_data = re.search(padrao_data, texto)
-    if match_data:
-        dia_inicio = match_data.group(1).zfill(2)
-        mes_inicio = match_data.group(2).zfill(2)
-        ano_inicio = match_data.group(3) if match_data.group(3) else str(datetime.now().year)
-        dia_fim = match_data.group(4).zfill(2)
-        mes_fim = match_data.group(5).zfill(2)
-        ano_fim = match_data.group(6) if match_data.group(6) else str(datetime.now().year)
-        
-        data_inicio = f"{dia_inicio}/{mes_inicio}/{ano_inicio}"
-        data_fim = f"{dia_fim}/{mes_fim}/{ano_fim}"
-        periodo = f"{data_inicio} A {data_fim}"
-        return "periodo", periodo
-    
-    # Padrão para data única numérica (TODOS OS PROJETOS)
-    padrao_data_unica = r'(\d{1,2})[/-](\d{1,2})(?:[/-](\d{4}))?'
-    match_data_unica = re.search(padrao_data_unica, texto)
-    if match_data_unica:
-        dia = match_data_unica.group(1).zfill(2)
-        mes = match_data_unica.group(2).zfill(2)
-        ano = match_data_unica.group(3) if match_data_unica.group(3) else str(datetime.now().year)
-        data_br = f"{dia}/{mes}/{ano}"
-        periodo = f"{data_br} A {data_br}"
-        return "periodo", periodo
-    
-    if any(palavra in texto for palavra in ["produção", "producao", "produzido"]):
-        return "producao_hoje", None
-    elif any(palavra in texto for palavra in ["faturado", "faturamento"]):
-        return "faturado_hoje", None
-    elif any(palavra in texto for palavra in ["oi", "olá", "menu"]):
-        return "menu", None
-    else:
-        return "nao_reconhecido", None
+def transcrever_com_speech_recognition(audio):
+    if audio is None:
+        return None
+    try:
+        return transcricao.transcrever(audio)
+    except Exception as e:
+        print(f"[ERRO] Erro no reconhecimento: {e}")
+        return None
+
+def processar_comando_audio(texto, transcrito=False):
+    return comandos.interpretar(texto, transcrito=transcrito)
 
 def processar_periodo(texto):
-    padrao = r'(\d{1,2}/\d{1,2}/\d{4})\s*[Aa]\s*(\d{1,2}/\d{1,2}/\d{4})'
-    match = re.search(padrao, texto)
-    if match:
-        try:
-            data_inicio_str = match.group(1)
-            data_fim_str = match.group(2)
-            data_inicio_dt = datetime.strptime(data_inicio_str, '%d/%m/%Y')
-            data_fim_dt = datetime.strptime(data_fim_str, '%d/%m/%Y')
-            
-            if data_fim_dt < data_inicio_dt:
-                print(f"[ERRO] Data final ({data_fim_str}) anterior à data inicial ({data_inicio_str})")
-                return None, None
-                
-            data_inicio = data_inicio_dt.strftime('%Y-%m-%d')
-            data_fim = data_fim_dt.strftime('%Y-%m-%d')
-            return data_inicio, data_fim
-        except ValueError as e:
-            print(f"[ERRO] Erro ao processar datas: {e}")
-            return None, None
-    print(f"[DEBUG] Período não reconhecido: {texto}")
-    return None, None
+    return comandos.resolver_periodo(texto)
 
 def enviar_mensagem(numero, texto):
-    url = f"https://api.z-api.io/instances/{INSTANCE_ID}/token/{TOKEN}/send-text"
+    url = f"{ZAPI_URL_BASE}/instances/{INSTANCE_ID}/token/{TOKEN}/send-text"
     payload = {"phone": numero, "message": texto}
     headers = {"Content-Type": "application/json", "Client-Token": CLIENT_TOKEN}
     
@@ -1027,36 +883,230 @@ def enviar_mensagem(numero, texto):
         print(f"[ERRO] Erro ao enviar mensagem: {e}")
         return None
 
-def enviar_resposta_completa(numero, resumo, detalhado, texto_transcrito=None):
-    """Envia resposta completa com controle para evitar duplicação"""
+def enviar_relatorio_pipeline(numero, dados, titulo_data, data_inicio=None, data_fim=None, projeto_especifico=None,
+                              texto_transcrito=None, inicio_requisicao=None):
+    """Envia o resumo assim que fica pronto e depois o detalhado em blocos por projeto,
+    montados em paralelo e entregues conforme ficam prontos"""
+    # Fila curta: o produtor fica no máximo alguns blocos à frente do envio
+    fila_blocos = queue.Queue(maxsize=2)
+    cancelado = threading.Event()
     try:
+        executor_relatorios.submit(_produzir_blocos, fila_blocos, cancelado, dados, numero, titulo_data)
+
+        resumo = formatar_resumo_geral(dados, numero, titulo_data, data_inicio, data_fim, projeto_especifico)
         if texto_transcrito:
             mensagem_inicial = f"🎤 Ouvi: \"{texto_transcrito}\"\n\n{resumo}"
         else:
             mensagem_inicial = resumo
-            
-        # Enviar mensagem inicial
+
         resposta1 = enviar_mensagem(numero, mensagem_inicial)
+        enviado_em = time.time()
+        if inicio_requisicao:
+            tempo_primeira = enviado_em - inicio_requisicao
+            metricas.registrar_tempo('relatorio_tempo_primeira_mensagem', tempo_primeira)
+            print(f"[DEBUG] ⏱️ Primeira mensagem em {tempo_primeira:.2f}s")
         if not resposta1 or resposta1.status_code != 200:
             print(f"[ERRO] Falha ao enviar primeira mensagem para {numero}")
             return False
-            
-        # Aguardar antes de enviar a segunda
-        time.sleep(5)  # AUMENTADO de 4 para 5 segundos
-        
-        # Enviar detalhado
-        resposta2 = enviar_mensagem(numero, detalhado)
-        if not resposta2 or resposta2.status_code != 200:
-            print(f"[ERRO] Falha ao enviar segunda mensagem para {numero}")
-            return False
-            
+
+        # Entrega os blocos do detalhado conforme ficam prontos
+        intervalo = INTERVALO_ENTRE_MENSAGENS
+        blocos_enviados = 0
+        while True:
+            try:
+                bloco = fila_blocos.get(timeout=TIMEOUT_BLOCO_DETALHADO)
+            except queue.Empty:
+                print(f"[ERRO] Detalhado sem novo bloco em {TIMEOUT_BLOCO_DETALHADO:.0f}s para {numero}")
+                metricas.incrementar('relatorio_blocos_timeout')
+                return False
+            if bloco is None:
+                break
+            if isinstance(bloco, Exception):
+                raise bloco
+
+            # Mantém o intervalo entre as mensagens, descontando o tempo já gasto montando o bloco
+            espera = intervalo - (time.time() - enviado_em)
+            if espera > 0:
+                time.sleep(espera)
+
+            resposta = enviar_mensagem(numero, bloco)
+            enviado_em = time.time()
+            if not resposta or resposta.status_code != 200:
+                print(f"[ERRO] Falha ao enviar bloco {blocos_enviados + 1} do detalhado para {numero}")
+                return False
+            blocos_enviados += 1
+            intervalo = INTERVALO_ENTRE_BLOCOS
+
+        metricas.incrementar('relatorio_blocos_detalhado', blocos_enviados)
+        metricas.incrementar('relatorios_enviados')
+        if data_inicio is None and projeto_especifico is None:
+            instantaneos_usuarios.registrar(numero, data_hoje_consulta(), totais_por_servico(dados))
+        if inicio_requisicao:
+            metricas.registrar_tempo('relatorio_tempo_total', time.time() - inicio_requisicao)
         print(f"[DEBUG] ✅ Resposta completa enviada para {numero}")
         return True
-        
+
+    except Exception as e:
+        print(f"[ERRO] Erro ao enviar relatório em pipeline: {e}")
+        return False
+    finally:
+        # Em qualquer saída (fim, falha de envio, exceção, timeout) o produtor para e libera a thread
+        cancelado.set()
+
+def enviar_alteracoes_hoje(numero, texto_transcrito=None, inicio_requisicao=None):
+    """Envia só os líderes/serviços que mudaram desde o último relatório de hoje do usuário"""
+    try:
+        data_hoje = data_hoje_consulta()
+        titulo = f"PRODUÇÃO {datetime.today().strftime('%d/%m/%Y')}"
+        anterior = instantaneos_usuarios.obter(numero, data_hoje)
+        if anterior is None:
+            # Sem referência ainda: vai o relatório completo, que passa a ser o ponto de partida
+            dados = obter_dados_detalhados_hoje(numero)
+            return enviar_relatorio_pipeline(numero, dados, titulo, None, None,
+                                             texto_transcrito=texto_transcrito, inicio_requisicao=inicio_requisicao)
+
+        projetos = obter_projetos_usuario(numero)
+        marca = ler_marca_alteracao(projetos, data_hoje)
+        if marca is not None and marca == anterior['marca']:
+            # Nada gravado desde o último retrato: nem lê as linhas do dia
+            metricas.incrementar('alteracoes_pela_marca')
+            totais = anterior['totais']
+            mudancas = []
+        else:
+            # Houve gravação (ou não há marca para saber): relê o dia sem esperar a validade do
+            # cache; com linhas de até VALIDADE_CACHE_DIA atrás, gravações recentes não apareceriam
+            cache_linhas_dia.aquecer(projetos, data_hoje)
+            metricas.incrementar('alteracoes_releituras')
+            totais = totais_por_servico(obter_dados_detalhados_hoje(numero))
+            mudancas = comparar(anterior['totais'], totais)
+
+        desde = datetime.fromtimestamp(anterior['registrado_em'], TIMEZONE_BRASILIA).strftime('%H:%M')
+        mensagem = renderizar_alteracoes(titulo, obter_nome_usuario(numero), desde, mudancas)
+        if texto_transcrito:
+            mensagem = f"🎤 Ouvi: \"{texto_transcrito}\"\n\n{mensagem}"
+
+        resposta = enviar_mensagem(numero, mensagem)
+        if not resposta or resposta.status_code != 200:
+            print(f"[ERRO] Falha ao enviar alterações para {numero}")
+            return False
+
+        instantaneos_usuarios.registrar(numero, data_hoje, totais, marca)
+        metricas.incrementar('alteracoes_enviadas')
+        metricas.incrementar('alteracoes_servicos', len(mudancas))
+        if inicio_requisicao:
+            metricas.registrar_tempo('alteracoes_tempo_total', time.time() - inicio_requisicao)
+        print(f"[DEBUG] ✅ {len(mudancas)} alterações enviadas para {numero}")
+        return True
+
     except Exception as e:
-        print(f"[ERRO] Erro ao enviar resposta completa: {e}")
+        print(f"[ERRO] Erro ao enviar alterações: {e}")
         return False
 
+def exportar_periodo(numero, data_inicio, data_fim, projeto_especifico=None, formato=None, texto_transcrito=None):
+    """Gera o arquivo do período direto do cursor e envia como documento"""
+    caminho = None
+    try:
+        projetos_usuario = obter_projetos_usuario(numero)
+        if projeto_especifico:
+            if projeto_especifico not in projetos_usuario:
+                enviar_mensagem(numero, f"❌ Você não tem acesso ao projeto {projeto_especifico}.")
+                return False
+            projetos_filtro = [projeto_especifico]
+        else:
+            projetos_filtro = projetos_usuario
+        if not projetos_filtro:
+            enviar_mensagem(numero, "❌ Nenhum projeto vinculado ao seu número.")
+            return False
+
+        inicio = time.time()
+        nome_base = f"producao_{data_inicio.replace('-', '')}_{data_fim.replace('-', '')}"
+        if projeto_especifico:
+            nome_base = f"producao_projeto_{projeto_especifico}_{data_inicio.replace('-', '')}_{data_fim.replace('-', '')}"
+        nome_base += f"_{numero[-4:]}_{int(inicio)}"
+
+        with pool_db.obter() as conn:
+            linhas = exportacao.consultar_em_lotes(conn, projetos_filtro, data_inicio, data_fim)
+            caminho, quantidade = exportacao.exportar(linhas, nome_base, formato)
+
+        if quantidade == 0:
+            enviar_mensagem(numero, "❌ Nenhum dado encontrado no período para exportar.")
+            return False
+
+        data_inicio_br = datetime.strptime(data_inicio, '%Y-%m-%d').strftime('%d/%m/%Y')
+        data_fim_br = datetime.strptime(data_fim, '%Y-%m-%d').strftime('%d/%m/%Y')
+        legenda = f"📎 Produção {data_inicio_br} a {data_fim_br} - {quantidade:,} linhas".replace(',', '.')
+        if texto_transcrito:
+            legenda = f"🎤 Ouvi: \"{texto_transcrito}\"\n\n{legenda}"
+
+        resposta = exportacao.enviar_documento(numero, caminho, legenda)
+        if not resposta or resposta.status_code != 200:
+            print(f"[ERRO] Falha ao enviar exportação para {numero}")
+            enviar_mensagem(numero, "❌ Não consegui enviar o arquivo. Tente um período menor.")
+            return False
+
+        metricas.incrementar('exportacoes_enviadas')
+        metricas.registrar_tempo('exportacao_tempo_total', time.time() - inicio)
+        print(f"[DEBUG] ✅ Exportação enviada para {numero}: {quantidade} linhas")
+        return True
+
+    except Exception as e:
+        print(f"[ERRO] Erro ao exportar período: {e}")
+        enviar_mensagem(numero, "❌ Erro ao gerar o arquivo de exportação.")
+        return False
+    finally:
+        if caminho and os.path.exists(caminho):
+            os.remove(caminho)
+
+# Exportações em threads próprias: um arquivo grande não ocupa as threads do detalhado
+# (executor_relatorios). Acima de EXPORTACOES_SIMULTANEAS o pedido é recusado na hora
+EXPORTACOES_SIMULTANEAS = max(int(os.environ.get('EXPORTACOES_SIMULTANEAS', 2)), 1)
+MENSAGEM_EXPORTACAO_LOTADA = "⏳ Muitas exportações sendo geradas agora. Tente de novo em alguns minutos."
+executor_exportacoes = ThreadPoolExecutor(max_workers=EXPORTACOES_SIMULTANEAS, thread_name_prefix='exportacao')
+vagas_exportacao = threading.BoundedSemaphore(EXPORTACOES_SIMULTANEAS)
+_lock_exportacoes_andamento = threading.Lock()
+exportacoes_em_andamento = 0
+
+def _contar_exportacoes_em_andamento(delta):
+    global exportacoes_em_andamento
+    with _lock_exportacoes_andamento:
+        exportacoes_em_andamento += delta
+        metricas.definir('exportacoes_em_andamento', exportacoes_em_andamento)
+
+def estatisticas_exportacao():
+    return {
+        'em_andamento': exportacoes_em_andamento,
+        'capacidade': EXPORTACOES_SIMULTANEAS,
+    }
+
+def iniciar_exportacao(numero, parametro, texto_transcrito=None):
+    """Responde na hora e gera o arquivo em segundo plano (períodos longos passam do timeout do gunicorn)"""
+    projeto_id, periodo_str, formato = parametro.split("|")
+    data_inicio, data_fim = processar_periodo(periodo_str)
+    if not (data_inicio and data_fim):
+        enviar_mensagem(numero, "❌ Não consegui entender o período. Use: exportar 01/08 a 31/08")
+        return
+    if not vagas_exportacao.acquire(blocking=False):
+        metricas.incrementar('exportacoes_recusadas')
+        enviar_mensagem(numero, MENSAGEM_EXPORTACAO_LOTADA)
+        return
+
+    _contar_exportacoes_em_andamento(1)
+
+    def exportar():
+        try:
+            exportar_periodo(numero, data_inicio, data_fim, projeto_id or None, formato or None, texto_transcrito)
+        finally:
+            _contar_exportacoes_em_andamento(-1)
+            vagas_exportacao.release()
+
+    enviar_mensagem(numero, "⏳ Gerando o arquivo de exportação, ele chega em instantes...")
+    try:
+        executor_exportacoes.submit(exportar)
+    except Exception:
+        _contar_exportacoes_em_andamento(-1)
+        vagas_exportacao.release()
+        raise
+
 def enviar_mensagem_nao_autorizado(numero):
     if ja_foi_notificado(numero):
         return
@@ -1082,6 +1132,9 @@ Escolha uma opção digitando o número:
 • "produção do dia" → hoje
 • "produção do dia 01/08" → data específica
 • "produção de 01/08 a 03/08" → período
+• "produção de ontem", "semana passada", "este mês", "sexta" → datas relativas
+• "o que mudou" → só as alterações desde a última consulta de hoje
+• "exportar 01/08 a 31/08" → planilha do período (ou "... csv")
 
 🎯 *COMANDOS POR PROJETO ESPECÍFICO:*
 • "produção projeto 202 do dia" → projeto hoje
@@ -1109,7 +1162,17 @@ def health_check():
             'timestamp': datetime.now().isoformat(),
             'database': 'connected',
             'cache_users': len(cache_usuarios),
-            'processed_messages': len(mensagens_processadas)
+            'processed_messages': len(mensagens_processadas),
+            'report_dimensions': estatisticas_dimensoes(),
+            'db_pool': pool_db.estatisticas(),
+            'dimension_cache': cache_dimensoes.estatisticas(),
+            'today_cache': cache_linhas_dia.estatisticas(),
+            'shared_report_cache': cache_relatorios_compartilhados.estatisticas(),
+            'delta_snapshots': instantaneos_usuarios.estatisticas(),
+            'command_memo': comandos.estatisticas_memo(),
+            'transcription_cache': cache_transcricoes.estatisticas(),
+            'audio_pool': estatisticas_audio(),
+            'exportacoes': estatisticas_exportacao()
         }, 200
     except Exception as e:
         print(f"[ERRO] Health check failed: {e}")
@@ -1119,6 +1182,46 @@ def health_check():
             'error': str(e)
         }, 500
 
+@app.route('/metricas', methods=['GET'])
+def metricas_endpoint():
+    return {
+        **metricas.resumo(),
+        'timestamp': datetime.now().isoformat()
+    }, 200
+
+# ================== API JSON (somente leitura) ==================
+def obter_linhas_api(projetos, data_inicio, data_fim):
+    """Linhas do período pelos mesmos caches dos relatórios do WhatsApp"""
+    if data_inicio == data_fim == data_hoje_consulta():
+        return cache_linhas_dia.obter(projetos, data_inicio)
+    return obter_linhas_periodo_compartilhadas(projetos, data_inicio, data_fim)
+
+@app.route('/api/producao', methods=['GET'])
+def api_producao():
+    """Agregados por projeto, líder e serviço: ?projetos=202,150&data=YYYY-MM-DD (ou &inicio=&fim=)"""
+    if not api_relatorios.configurada():
+        return {'error': 'API desativada: defina API_TOKEN'}, 503
+    if not api_relatorios.autorizado(request):
+        return {'error': 'não autorizado'}, 401
+    try:
+        projetos, data_inicio, data_fim = api_relatorios.ler_parametros(request.args, data_hoje_consulta())
+    except api_relatorios.ParametroInvalido as e:
+        return {'error': str(e)}, 400
+
+    try:
+        linhas = obter_linhas_api(projetos, data_inicio, data_fim)
+        versao = api_relatorios.versao_dados(projetos, data_inicio, data_fim, linhas)
+
+        def representacoes():
+            return cache_relatorios_compartilhados.obter(('api', versao), lambda: api_relatorios.montar_representacoes(
+                api_relatorios.serializar_agregado(agrupar_dados_completo(linhas), data_inicio, data_fim)
+            ))
+
+        return api_relatorios.responder(request, versao, representacoes)
+    except Exception as e:
+        print(f"[ERRO] Falha na API de produção: {e}")
+        return {'error': str(e), 'timestamp': datetime.now().isoformat()}, 500
+
 @app.route('/', methods=['GET'])
 def home():
     return {
@@ -1126,47 +1229,14 @@ def home():
         'status': 'running',
         'version': '2.2 Railway - Sistema Completo',
         'timestamp': datetime.now().isoformat(),
-        'endpoints': ['/webhook', '/webhook_pre_apont', '/webhook_aprovacao', '/health', '/consultar_aprovacao/<raw_id>', '/listar_aprovacoes'],
+        'endpoints': ['/webhook', '/webhook_pre_apont', '/webhook_aprovacao', '/health', '/metricas', '/consultar_aprovacao/<raw_id>', '/listar_aprovacoes', '/api/producao'],
         'features': ['Produção', 'Frete', 'Áudio STT', 'Pré-Apontamento', 'Aprovação Coordenador']
     }, 200
 
 # ================== WEBHOOK PRINCIPAL ==================
-@app.route('/webhook', methods=['POST'])
-def webhook():
+def processar_mensagem(dados, numero, hash_mensagem, inicio_requisicao):
+    """Frete, transcrição e comandos de uma mensagem já autorizada e não repetida (a parte demorada do webhook)"""
     try:
-        dados = request.json
-        numero = dados.get("phone")
-        
-        print(f"\n[DEBUG] ========== WEBHOOK RECEBIDO ==========")
-        print(f"[DEBUG] Número: {numero}")
-        print(f"[DEBUG] Tipo: {'AUDIO' if 'audio' in dados else 'TEXTO'}")
-        
-        # ========== NOVA VERIFICAÇÃO: IGNORAR FRETES ==========
-        if eh_mensagem_frete(dados):
-            print(f"[DEBUG] 🚚 MENSAGEM DE FRETE - IGNORADA pelo bot de produção")
-            return '', 200
-        
-        # Verificação de autorização
-        if not verificar_autorizacao(numero):
-            print(f"[DEBUG] Usuário não autorizado: {numero}")
-            enviar_mensagem_nao_autorizado(numero)
-            return '', 200
-        
-        # Controle de spam
-        if not pode_processar_comando(numero):
-            print(f"[DEBUG] ❌ SPAM BLOQUEADO para {numero}")
-            return '', 200
-        
-        # Gerar hash único
-        hash_mensagem = gerar_hash_mensagem(dados, numero)
-        
-        # Verificar duplicação
-        if ja_processou_mensagem(hash_mensagem):
-            print(f"[DEBUG] ❌ MENSAGEM DUPLICADA: {hash_mensagem[:8]}")
-            return '', 200
-        
-        print(f"[DEBUG] ✅ PROCESSANDO: {hash_mensagem[:8]}")
-        
         # ========== PROCESSAMENTO DE FRETE (TEXTO E ÁUDIO) ==========
         texto_para_frete = ""
         
@@ -1196,34 +1266,32 @@ def webhook():
             print(f"[DEBUG] 🎤 Processando ÁUDIO - verificando se é frete")
             url_audio = dados["audio"].get("audioUrl")
             if url_audio:
-                caminho_wav = baixar_e_converter_audio(url_audio)
-                if caminho_wav:
-                    texto_transcrito = transcrever_com_speech_recognition(caminho_wav)
-                    if texto_transcrito:
-                        print(f"[DEBUG] Áudio transcrito: '{texto_transcrito}'")
-                        
-                        # Verificar se contém "frete"
-                        if "frete" in texto_transcrito.lower():
-                            print(f"[DEBUG] 🚚 FRETE detectado no áudio")
-                            dados_frete = processar_frete_texto(texto_transcrito)
-                            if dados_frete:
-                                if salvar_frete_no_banco(dados_frete, numero, texto_transcrito):
-                                    resposta_frete = f"""✅ *FRETE REGISTRADO (ÁUDIO)*
+                texto_transcrito = transcrever_audio(url_audio, numero)
+                if texto_transcrito:
+                    print(f"[DEBUG] Áudio transcrito: '{texto_transcrito}'")
+                    
+                    # Verificar se contém "frete"
+                    if "frete" in texto_transcrito.lower():
+                        print(f"[DEBUG] 🚚 FRETE detectado no áudio")
+                        dados_frete = processar_frete_texto(texto_transcrito)
+                        if dados_frete:
+                            if salvar_frete_no_banco(dados_frete, numero, texto_transcrito):
+                                resposta_frete = f"""✅ *FRETE REGISTRADO (ÁUDIO)*
 🎤 Ouvi: "{texto_transcrito}"
 🚚 Tipo: {dados_frete['TIPO']}
 🏗️ Projeto: {dados_frete.get('PROJETO') or 'N/A'}
 📍 Saída: {dados_frete['SAIDA']}
 🎯 Destino: {dados_frete['DESTINO']}
 📏 KM Inicial: {dados_frete['KM_INICIAL']}"""
-                                    enviar_mensagem(numero, resposta_frete)
-                                else:
-                                    enviar_mensagem(numero, f"🎤 Ouvi: \"{texto_transcrito}\"\n❌ Erro ao salvar frete.")
+                                enviar_mensagem(numero, resposta_frete)
                             else:
-                                enviar_mensagem(numero, f"🎤 Ouvi: \"{texto_transcrito}\"\n❌ Não identifiquei um frete válido.")
-                            return '', 200
+                                enviar_mensagem(numero, f"🎤 Ouvi: \"{texto_transcrito}\"\n❌ Erro ao salvar frete.")
                         else:
-                            # Não é frete, continuar com processamento normal de produção
-                            texto_para_frete = texto_transcrito
+                            enviar_mensagem(numero, f"🎤 Ouvi: \"{texto_transcrito}\"\n❌ Não identifiquei um frete válido.")
+                        return '', 200
+                    else:
+                        # Não é frete, continuar com processamento normal de produção
+                        texto_para_frete = texto_transcrito
         
         # ========== PROCESSAMENTO DE PRODUÇÃO (AUDIO) ==========
         if "audio" in dados and not texto_para_frete:
@@ -1232,11 +1300,7 @@ def webhook():
             if not url_audio:
                 return '', 200
                 
-            caminho_wav = baixar_e_converter_audio(url_audio)
-            if not caminho_wav:
-                return '', 200
-                
-            texto_transcrito = transcrever_com_speech_recognition(caminho_wav)
+            texto_transcrito = transcrever_audio(url_audio, numero)
             if not texto_transcrito:
                 return '', 200
             
@@ -1245,15 +1309,18 @@ def webhook():
         # Se temos texto transcrito do áudio, usar ele
         if texto_para_frete:
             print(f"[DEBUG] Áudio transcrito: '{texto_para_frete}'")
-            comando, parametro = processar_comando_audio(texto_para_frete)
+            comando, parametro = processar_comando_audio(texto_para_frete, transcrito=True)
             
-            if comando == "producao_hoje":
+            if comando == "alteracoes_hoje":
+                enviar_alteracoes_hoje(numero, texto_transcrito=texto_para_frete, inicio_requisicao=inicio_requisicao)
+                
+            elif comando == "exportar":
+                iniciar_exportacao(numero, parametro, texto_transcrito=texto_para_frete)
+                
+            elif comando == "producao_hoje":
                 dados_prod = obter_dados_detalhados_hoje(numero)
                 data_hoje = datetime.today().strftime('%d/%m/%Y')
-                resumo = formatar_resumo_geral(dados_prod, numero, f"PRODUÇÃO {data_hoje}", None, None)
-                detalhado = formatar_resumo_detalhado(dados_prod, numero, f"PRODUÇÃO {data_hoje}")
-                
-                enviar_resposta_completa(numero, resumo, detalhado, texto_para_frete)
+                enviar_relatorio_pipeline(numero, dados_prod, f"PRODUÇÃO {data_hoje}", None, None, texto_transcrito=texto_para_frete, inicio_requisicao=inicio_requisicao)
                 
             elif comando == "projeto_hoje" and parametro:
                 projeto_id = parametro
@@ -1261,10 +1328,7 @@ def webhook():
                 data_hoje = datetime.today().strftime('%d/%m/%Y')
                 
                 if dados_prod:
-                    resumo = formatar_resumo_geral(dados_prod, numero, f"PRODUÇÃO PROJETO {projeto_id} - {data_hoje}", None, None, projeto_id)
-                    detalhado = formatar_resumo_detalhado(dados_prod, numero, f"PRODUÇÃO PROJETO {projeto_id} - {data_hoje}")
-                    
-                    enviar_resposta_completa(numero, resumo, detalhado, texto_para_frete)
+                    enviar_relatorio_pipeline(numero, dados_prod, f"PRODUÇÃO PROJETO {projeto_id} - {data_hoje}", None, None, projeto_id, texto_transcrito=texto_para_frete, inicio_requisicao=inicio_requisicao)
                 else:
                     enviar_mensagem(numero, f"🎤 Ouvi: \"{texto_para_frete}\"\n\n❌ Nenhum dado encontrado para o projeto {projeto_id} hoje, ou você não tem acesso a este projeto.")
                 
@@ -1281,10 +1345,7 @@ def webhook():
                     data_fim_br = datetime.strptime(data_fim, '%Y-%m-%d').strftime('%d/%m/%Y')
                     
                     if dados_periodo:
-                        resumo = formatar_resumo_geral(dados_periodo, numero, f"PROJETO {projeto_id} - PERÍODO {data_inicio_br} a {data_fim_br}", data_inicio, data_fim, projeto_id)
-                        detalhado = formatar_resumo_detalhado(dados_periodo, numero, f"PROJETO {projeto_id} - PERÍODO {data_inicio_br} a {data_fim_br}")
-                        
-                        enviar_resposta_completa(numero, resumo, detalhado, texto_para_frete)
+                        enviar_relatorio_pipeline(numero, dados_periodo, f"PROJETO {projeto_id} - PERÍODO {data_inicio_br} a {data_fim_br}", data_inicio, data_fim, projeto_id, texto_transcrito=texto_para_frete, inicio_requisicao=inicio_requisicao)
                     else:
                         enviar_mensagem(numero, f"🎤 Ouvi: \"{texto_para_frete}\"\n\n❌ Nenhum dado encontrado para o projeto {projeto_id} no período {data_inicio_br} a {data_fim_br}, ou você não tem acesso a este projeto.")
                 else:
@@ -1296,13 +1357,11 @@ def webhook():
                     dados_periodo = obter_dados_detalhados_periodo(data_inicio, data_fim, numero)
                     data_inicio_br = datetime.strptime(data_inicio, '%Y-%m-%d').strftime('%d/%m/%Y')
                     data_fim_br = datetime.strptime(data_fim, '%Y-%m-%d').strftime('%d/%m/%Y')
-                    resumo = formatar_resumo_geral(dados_periodo, numero, f"PERÍODO {data_inicio_br} a {data_fim_br}", data_inicio, data_fim)
-                    detalhado = formatar_resumo_detalhado(dados_periodo, numero, f"PERÍODO {data_inicio_br} a {data_fim_br}")
-                    
-                    enviar_resposta_completa(numero, resumo, detalhado, texto_para_frete)
+                    enviar_relatorio_pipeline(numero, dados_periodo, f"PERÍODO {data_inicio_br} a {data_fim_br}", data_inicio, data_fim, texto_transcrito=texto_para_frete, inicio_requisicao=inicio_requisicao)
                 else:
                     enviar_mensagem(numero, f"🎤 Ouvi: \"{texto_para_frete}\"\n\n❌ Não consegui entender a data informada.")
             else:
+                metricas.incrementar('comandos_nao_reconhecidos_audio')
                 enviar_mensagem(numero, f"🎤 Ouvi: \"{texto_para_frete}\"\n\n❌ Não reconheci o comando. Envie novamente ou digite *menu*.")
                 
         # ========== PROCESSAMENTO DE TEXTO ==========
@@ -1333,32 +1392,29 @@ def webhook():
             elif mensagem == "1":
                 dados_detalhados = obter_dados_detalhados_hoje(numero)
                 data_hoje = datetime.today().strftime('%d/%m/%Y')
-                resumo = formatar_resumo_geral(dados_detalhados, numero, f"PRODUÇÃO {data_hoje}", None, None)
-                detalhado = formatar_resumo_detalhado(dados_detalhados, numero, f"PRODUÇÃO {data_hoje}")
-                
-                enviar_resposta_completa(numero, resumo, detalhado)
+                enviar_relatorio_pipeline(numero, dados_detalhados, f"PRODUÇÃO {data_hoje}", None, None, inicio_requisicao=inicio_requisicao)
                 
             elif mensagem == "produção" or mensagem == "producao":
                 dados_detalhados = obter_dados_detalhados_hoje(numero)
                 data_hoje = datetime.today().strftime('%d/%m/%Y')
-                resumo = formatar_resumo_geral(dados_detalhados, numero, f"PRODUÇÃO {data_hoje}", None, None)
-                detalhado = formatar_resumo_detalhado(dados_detalhados, numero, f"PRODUÇÃO {data_hoje}")
-                
-                enviar_resposta_completa(numero, resumo, detalhado)
+                enviar_relatorio_pipeline(numero, dados_detalhados, f"PRODUÇÃO {data_hoje}", None, None, inicio_requisicao=inicio_requisicao)
                 
             else:
                 comando, parametro = processar_comando_audio(mensagem)
                 
-                if comando == "projeto_hoje" and parametro:
+                if comando == "alteracoes_hoje":
+                    enviar_alteracoes_hoje(numero, inicio_requisicao=inicio_requisicao)
+                    
+                elif comando == "exportar":
+                    iniciar_exportacao(numero, parametro)
+                    
+                elif comando == "projeto_hoje" and parametro:
                     projeto_id = parametro
                     dados_detalhados = obter_dados_detalhados_hoje(numero, projeto_id)
                     data_hoje = datetime.today().strftime('%d/%m/%Y')
                     
                     if dados_detalhados:
-                        resumo = formatar_resumo_geral(dados_detalhados, numero, f"PRODUÇÃO PROJETO {projeto_id} - {data_hoje}", None, None, projeto_id)
-                        detalhado = formatar_resumo_detalhado(dados_detalhados, numero, f"PRODUÇÃO PROJETO {projeto_id} - {data_hoje}")
-                        
-                        enviar_resposta_completa(numero, resumo, detalhado)
+                        enviar_relatorio_pipeline(numero, dados_detalhados, f"PRODUÇÃO PROJETO {projeto_id} - {data_hoje}", None, None, projeto_id, inicio_requisicao=inicio_requisicao)
                     else:
                         enviar_mensagem(numero, f"❌ Nenhum dado encontrado para o projeto {projeto_id} hoje, ou você não tem acesso a este projeto.")
                         
@@ -1375,10 +1431,7 @@ def webhook():
                         data_fim_br = datetime.strptime(data_fim, '%Y-%m-%d').strftime('%d/%m/%Y')
                         
                         if dados_periodo:
-                            resumo = formatar_resumo_geral(dados_periodo, numero, f"PROJETO {projeto_id} - PERÍODO {data_inicio_br} a {data_fim_br}", data_inicio, data_fim, projeto_id)
-                            detalhado = formatar_resumo_detalhado(dados_periodo, numero, f"PROJETO {projeto_id} - PERÍODO {data_inicio_br} a {data_fim_br}")
-                            
-                            enviar_resposta_completa(numero, resumo, detalhado)
+                            enviar_relatorio_pipeline(numero, dados_periodo, f"PROJETO {projeto_id} - PERÍODO {data_inicio_br} a {data_fim_br}", data_inicio, data_fim, projeto_id, inicio_requisicao=inicio_requisicao)
                         else:
                             enviar_mensagem(numero, f"❌ Nenhum dado encontrado para o projeto {projeto_id} no período {data_inicio_br} a {data_fim_br}, ou você não tem acesso a este projeto.")
                     else:
@@ -1390,18 +1443,69 @@ def webhook():
                         dados_periodo = obter_dados_detalhados_periodo(data_inicio, data_fim, numero)
                         data_inicio_br = datetime.strptime(data_inicio, '%Y-%m-%d').strftime('%d/%m/%Y')
                         data_fim_br = datetime.strptime(data_fim, '%Y-%m-%d').strftime('%d/%m/%Y')
-                        resumo = formatar_resumo_geral(dados_periodo, numero, f"PERÍODO {data_inicio_br} a {data_fim_br}", data_inicio, data_fim)
-                        detalhado = formatar_resumo_detalhado(dados_periodo, numero, f"PERÍODO {data_inicio_br} a {data_fim_br}")
-                        
-                        enviar_resposta_completa(numero, resumo, detalhado)
+                        enviar_relatorio_pipeline(numero, dados_periodo, f"PERÍODO {data_inicio_br} a {data_fim_br}", data_inicio, data_fim, inicio_requisicao=inicio_requisicao)
                     else:
                         enviar_mensagem(numero, f"❌ Não consegui entender o período informado. Use o formato DD/MM/YYYY a DD/MM/YYYY.")
                 else:
+                    metricas.incrementar('comandos_nao_reconhecidos_texto')
                     enviar_mensagem(numero, "❓ Não reconheci o comando. Digite *menu* para ver as opções.")
         
         print(f"[DEBUG] ✅ PROCESSAMENTO CONCLUÍDO: {hash_mensagem[:8]}")
         return '', 200
         
+    except Exception as e:
+        print(f"[ERRO] Erro crítico ao processar mensagem: {e}")
+        import traceback
+        traceback.print_exc()
+        return '', 500
+
+@app.route('/webhook', methods=['POST'])
+def webhook():
+    inicio_requisicao = time.time()
+    try:
+        dados = request.json
+        numero = dados.get("phone")
+        
+        print(f"\n[DEBUG] ========== WEBHOOK RECEBIDO ==========")
+        print(f"[DEBUG] Número: {numero}")
+        print(f"[DEBUG] Tipo: {'AUDIO' if 'audio' in dados else 'TEXTO'}")
+        
+        # ========== NOVA VERIFICAÇÃO: IGNORAR FRETES ==========
+        if eh_mensagem_frete(dados):
+            print(f"[DEBUG] 🚚 MENSAGEM DE FRETE - IGNORADA pelo bot de produção")
+            return '', 200
+        
+        # Verificação de autorização
+        if not verificar_autorizacao(numero):
+            print(f"[DEBUG] Usuário não autorizado: {numero}")
+            enviar_mensagem_nao_autorizado(numero)
+            return '', 200
+        
+        # Controle de spam
+        if not pode_processar_comando(numero):
+            print(f"[DEBUG] ❌ SPAM BLOQUEADO para {numero}")
+            return '', 200
+        
+        # Gerar hash único
+        hash_mensagem = gerar_hash_mensagem(dados, numero)
+        
+        # Verificar duplicação
+        if ja_processou_mensagem(hash_mensagem):
+            print(f"[DEBUG] ❌ MENSAGEM DUPLICADA: {hash_mensagem[:8]}")
+            return '', 200
+        
+        print(f"[DEBUG] ✅ PROCESSANDO: {hash_mensagem[:8]}")
+        
+        if "audio" in dados and AUDIO_EM_SEGUNDO_PLANO:
+            # O worker (sync) responde já: a thread espera o pool de áudio e segue com o comando
+            if not processar_audio_em_segundo_plano(dados, numero, hash_mensagem, inicio_requisicao):
+                print(f"[AVISO] Áudio recusado: {CAPACIDADE_AUDIO} áudios já em processamento")
+                # Recusado sem processar: uma reentrega da mesma mensagem pode ser aceita
+                mensagens_processadas.pop(hash_mensagem, None)
+                enviar_mensagem(numero, MENSAGEM_AUDIO_LOTADO)
+            return '', 200
+        return processar_mensagem(dados, numero, hash_mensagem, inicio_requisicao)
+        
     except Exception as e:
         print(f"[ERRO] Erro crítico no webhook: {e}")
         import traceback
@@ -1422,6 +1526,17 @@ except Exception as e:
     print(f"❌ Erro na inicialização: {e}")
     print("🔄 Bot continuará tentando conectar...")
 
+def iniciar_tarefas_de_fundo():
+    """Sobe as threads de segundo plano do processo que atende requisições.
+
+    Não roda no import (scripts, testes e o master do gunicorn importam o
+    módulo): é chamada pelo hook post_worker_init do gunicorn.conf.py e pelo
+    __main__. Chamadas repetidas não criam threads novas.
+    """
+    if PREAQUECIMENTO_ATIVO:
+        iniciar_preaquecimento(cache_linhas_dia, listar_projetos_ativos, data_hoje_consulta)
+        print("🔥 Pré-aquecimento do relatório de hoje ativado")
+
 @app.route('/webhook_pre_apont', methods=['POST'])
 @app.route('/webhook_pre_apont', methods=['POST'])
 def webhook_pre_apontamento_dedicado():
@@ -1730,6 +1845,7 @@ if __name__ == '__main__':
     except Exception as e:
         print(f"❌ Erro na conexão inicial: {e}")
     
+    iniciar_tarefas_de_fundo()
     port = int(os.environ.get('PORT', 5000))
     print(f"🌐 Servidor iniciando na porta {port}")
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
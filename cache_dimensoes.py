@@ -0,0 +1,92 @@
+"""
+Cache em memória da contagem de COLABORADORES por projeto e CLASSE.
+
+O quadro de colaboradores muda no máximo uma vez por dia, mas a contagem por
+CLASSE era refeita a cada relatório. Aqui a tabela é carregada em lote e só
+recarregada quando a impressão digital (COUNT + CHECKSUM_AGG) muda ou quando
+a carga passa da validade máxima.
+"""
+
+import os
+import threading
+import time
+
+# A impressão digital é conferida no máximo a cada N segundos
+INTERVALO_VERIFICACAO_DIMENSOES = int(os.environ.get('INTERVALO_VERIFICACAO_DIMENSOES', 600))
+# Recarrega mesmo sem mudança na impressão digital depois deste tempo
+VALIDADE_MAXIMA_DIMENSOES = int(os.environ.get('VALIDADE_MAXIMA_DIMENSOES', 6 * 3600))
+
+CLASSES_IGNORADAS = ('ADM', 'COF')
+
+
+class CacheDimensoes:
+    """Quantidade de colaboradores por projeto e classe, servida da memória"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._lock = threading.Lock()
+        self._impressao = None
+        self._carregado_em = 0
+        self._verificado_em = 0
+        # (projeto, classe, quantidade) na ordem de "ORDER BY PROJETO, CLASSE"
+        self._classes = []
+        self.recargas = 0
+        self.verificacoes = 0
+
+    # ---------- carga ----------
+    def _ler_impressao(self, cursor):
+        cursor.execute("SELECT COUNT(*), CHECKSUM_AGG(BINARY_CHECKSUM(*)) FROM COLABORADORES")
+        return tuple(cursor.fetchone())
+
+    def _carregar(self, cursor):
+        cursor.execute(f"""
+        SELECT PROJETO, CLASSE, COUNT(*) as quantidade
+        FROM COLABORADORES
+        WHERE CLASSE IS NOT NULL AND CLASSE NOT IN ({','.join('?' for _ in CLASSES_IGNORADAS)})
+        GROUP BY PROJETO, CLASSE
+        ORDER BY PROJETO, CLASSE
+        """, list(CLASSES_IGNORADAS))
+        self._classes = [(projeto, classe, qtd) for projeto, classe, qtd in cursor.fetchall()]
+
+    def _garantir_atualizado(self):
+        agora = time.time()
+        if self._impressao is not None and agora - self._verificado_em < INTERVALO_VERIFICACAO_DIMENSOES:
+            return
+        with self._lock:
+            if self._impressao is not None and agora - self._verificado_em < INTERVALO_VERIFICACAO_DIMENSOES:
+                return
+            with self.pool.obter() as conn:
+                cursor = conn.cursor()
+                impressao = self._ler_impressao(cursor)
+                self.verificacoes += 1
+                vencido = agora - self._carregado_em > VALIDADE_MAXIMA_DIMENSOES
+                if impressao != self._impressao or vencido:
+                    self._carregar(cursor)
+                    self._impressao = impressao
+                    self._carregado_em = agora
+                    self.recargas += 1
+                    print(f"[INFO] Cache de dimensões recarregado: {len(self._classes)} classes/projeto")
+            self._verificado_em = agora
+
+    def invalidar(self):
+        with self._lock:
+            self._impressao = None
+
+    # ---------- consultas ----------
+    def classes_por_projeto(self, projetos):
+        """Mesmo formato de obter_colaboradores_por_classe: {projeto: {classe: quantidade}}"""
+        self._garantir_atualizado()
+        filtro = {str(p) for p in projetos}
+        por_classe = {}
+        for projeto, classe, qtd in self._classes:
+            if str(projeto) in filtro:
+                por_classe.setdefault(projeto, {})[classe] = qtd
+        return por_classe
+
+    def estatisticas(self):
+        return {
+            'recargas': self.recargas,
+            'verificacoes': self.verificacoes,
+            'carregado_ha_s': int(time.time() - self._carregado_em) if self._carregado_em else None,
+            'classes_projeto': len(self._classes),
+        }
@@ -0,0 +1,281 @@
+"""
+Caches dos relatórios: linhas do dia por projeto (com pré-aquecimento
+agendado) e resultados compartilhados entre usuários.
+
+Nos picos das 7h e 17h cada líder que manda "1" dispara uma agregação nova
+de BOLETIM_DIARIO. Com o cache, as linhas de hoje ficam guardadas por
+projeto junto com os agregados do projeto já calculados, e uma thread em
+segundo plano os recalcula a cada N minutos no horário de trabalho para os
+projetos com atividade recente; as requisições interativas passam a ser, na
+maioria, acertos de cache que só juntam os agregados prontos. A thread não
+sobe no import: quem serve a aplicação chama iniciar_preaquecimento (hook
+post_worker_init do gunicorn.conf.py ou o __main__ do bot).
+
+Usuários com a mesma lista de projetos recebem o mesmo relatório a menos do
+cabeçalho com o nome: o cálculo é guardado pelo conjunto canônico de projetos
+(CacheCompartilhado) e só o cabeçalho é montado por usuário.
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import pytz
+
+import metricas
+from consultas_periodo import chave_ordenacao_sql
+
+# Por quanto tempo as linhas de um projeto/dia valem
+VALIDADE_CACHE_DIA = int(os.environ.get('VALIDADE_CACHE_DIA', 300))
+# Pré-aquecimento: intervalo, janela de horário (Brasília) e projetos considerados ativos
+PREAQUECIMENTO_ATIVO = os.environ.get('PREAQUECIMENTO_ATIVO', '1') == '1'
+PREAQUECIMENTO_INTERVALO_MIN = int(os.environ.get('PREAQUECIMENTO_INTERVALO_MIN', 4))
+PREAQUECIMENTO_HORA_INICIO = int(os.environ.get('PREAQUECIMENTO_HORA_INICIO', 6))
+PREAQUECIMENTO_HORA_FIM = int(os.environ.get('PREAQUECIMENTO_HORA_FIM', 19))
+PREAQUECIMENTO_DIAS_ATIVIDADE = int(os.environ.get('PREAQUECIMENTO_DIAS_ATIVIDADE', 7))
+# Resultados compartilhados entre usuários: validade e quantidade máxima de entradas
+VALIDADE_CACHE_RELATORIO = int(os.environ.get('VALIDADE_CACHE_RELATORIO', 300))
+LIMITE_CACHE_RELATORIO = int(os.environ.get('LIMITE_CACHE_RELATORIO', 64))
+# Espera máxima por um cálculo igual em andamento antes de calcular na própria requisição
+ESPERA_CACHE_RELATORIO = float(os.environ.get('ESPERA_CACHE_RELATORIO', 30))
+
+TIMEZONE_BRASILIA = pytz.timezone('America/Sao_Paulo')
+
+
+_versoes = itertools.count(1)
+
+
+def nova_versao():
+    """Número que identifica um conjunto de linhas recém-consultado (único no processo)"""
+    return next(_versoes)
+
+
+class LinhasRelatorio(list):
+    """Linhas de relatório com a versão dos dados e, se houver, os agregados de cada projeto.
+
+    `versao` identifica projetos, período e conteúdo: duas listas com a mesma
+    versão têm as mesmas linhas, e os cálculos feitos sobre elas podem ser
+    compartilhados sem comparar as linhas. None = versão desconhecida.
+    """
+
+    __slots__ = ('agregados', 'versao')
+
+    def __init__(self, linhas=(), agregados=None, versao=None):
+        super().__init__(linhas)
+        self.agregados = agregados
+        self.versao = versao
+
+
+def versao_linhas(dados):
+    return getattr(dados, 'versao', None)
+
+
+class CacheLinhasDia:
+    """Linhas de BOLETIM_DIARIO de um dia e seus agregados, guardados por projeto.
+
+    `consultar(projetos, data)` devolve as linhas agregadas dos projetos
+    (mesmo formato de obter_dados_detalhados_hoje) e `agrupar(linhas)`, se
+    informado, calcula os agregados de um projeto no momento em que as
+    linhas são guardadas, fora do caminho da requisição.
+    """
+
+    def __init__(self, consultar, validade=VALIDADE_CACHE_DIA, agrupar=None):
+        self.consultar = consultar
+        self.validade = validade
+        self.agrupar = agrupar
+        self._lock = threading.Lock()
+        self._entradas = {}
+
+    def _guardar(self, projetos, data, linhas):
+        por_projeto = {str(p): [] for p in projetos}
+        for linha in linhas:
+            por_projeto.setdefault(str(linha[4]), []).append(linha)
+        with self._lock:
+            anteriores = {projeto: self._entradas.get((projeto, data)) for projeto in por_projeto}
+        entradas = {}
+        for projeto, linhas_projeto in por_projeto.items():
+            anterior = anteriores[projeto]
+            if anterior and anterior[0] == linhas_projeto:
+                # Nada mudou: mantém versão e agregados, e os relatórios já calculados continuam valendo
+                entradas[projeto] = anterior[:3]
+                continue
+            agregado = self.agrupar(linhas_projeto) if self.agrupar and linhas_projeto else None
+            entradas[projeto] = (linhas_projeto, agregado, nova_versao())
+        agora = time.time()
+        with self._lock:
+            for projeto, entrada in entradas.items():
+                self._entradas[(projeto, data)] = entrada + (agora,)
+        return entradas
+
+    def obter(self, projetos, data):
+        """LinhasRelatorio dos projetos no dia, consultando o banco só para os que não estão em cache"""
+        agora = time.time()
+        encontrados = {}
+        faltantes = []
+        with self._lock:
+            for projeto in projetos:
+                entrada = self._entradas.get((str(projeto), data))
+                if entrada and agora - entrada[3] <= self.validade:
+                    encontrados[str(projeto)] = entrada[:3]
+                else:
+                    faltantes.append(projeto)
+
+        metricas.incrementar('cache_dia_acertos', len(encontrados))
+        metricas.incrementar('cache_dia_faltas', len(faltantes))
+        if faltantes:
+            encontrados.update(self._guardar(faltantes, data, self.consultar(faltantes, data)))
+
+        versao = (data, tuple(sorted((projeto, entrada[2]) for projeto, entrada in encontrados.items())))
+        # Reproduz o ORDER BY PROJETO da consulta original
+        blocos = [entrada for entrada in encontrados.values() if entrada[0]]
+        blocos.sort(key=lambda entrada: chave_ordenacao_sql(entrada[0][0][4]))
+        agregados = [agregado for _, agregado, _ in blocos] if self.agrupar else None
+        return LinhasRelatorio((linha for linhas, _, _ in blocos for linha in linhas), agregados, versao)
+
+    def aquecer(self, projetos, data):
+        """Recalcula e guarda as linhas dos projetos, ignorando a validade atual"""
+        if projetos:
+            self._guardar(projetos, data, self.consultar(projetos, data))
+
+    def limpar_vencidos(self):
+        limite = time.time() - self.validade
+        with self._lock:
+            for chave in [c for c, (_, _, _, guardado_em) in self._entradas.items() if guardado_em < limite]:
+                del self._entradas[chave]
+
+    def estatisticas(self):
+        with self._lock:
+            return {'entradas': len(self._entradas), 'validade_s': self.validade}
+
+
+def projetos_canonicos(projetos):
+    """Chave independente de ordem e repetição: ['202', 150, '150'] -> ('150', '202')"""
+    return tuple(sorted({str(p) for p in projetos}))
+
+
+class CacheCompartilhado:
+    """Resultados de cálculo guardados por chave canônica, com LRU e validade.
+
+    Requisições simultâneas com a mesma chave esperam o cálculo em andamento
+    em vez de repeti-lo, por no máximo `espera_maxima` segundos; depois disso
+    calculam por conta própria. Exceções não são guardadas.
+    """
+
+    def __init__(self, nome, validade=VALIDADE_CACHE_RELATORIO, limite=LIMITE_CACHE_RELATORIO,
+                 espera_maxima=ESPERA_CACHE_RELATORIO):
+        self.nome = nome
+        self.validade = validade
+        self.limite = limite
+        self.espera_maxima = espera_maxima
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+        self._em_calculo = {}
+
+    def _valido(self, chave):
+        """Valor guardado ainda válido (chamar com o lock), ou None"""
+        entrada = self._entradas.get(chave)
+        if entrada and time.time() - entrada[1] <= self.validade:
+            self._entradas.move_to_end(chave)
+            return entrada
+        return None
+
+    def consultar(self, chave):
+        """Valor guardado ou None, sem calcular"""
+        if self.validade <= 0:
+            return None
+        with self._lock:
+            entrada = self._valido(chave)
+        metricas.incrementar(f'{self.nome}_acertos' if entrada else f'{self.nome}_faltas')
+        return entrada[0] if entrada else None
+
+    def guardar(self, chave, valor):
+        if self.validade <= 0:
+            return
+        with self._lock:
+            self._entradas[chave] = (valor, time.time())
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.limite:
+                self._entradas.popitem(last=False)
+
+    def obter(self, chave, calcular):
+        """Valor guardado, ou `calcular()` uma única vez para todos que pedirem a mesma chave"""
+        if self.validade <= 0:
+            return calcular()
+        while True:
+            with self._lock:
+                entrada = self._valido(chave)
+                if entrada:
+                    metricas.incrementar(f'{self.nome}_acertos')
+                    return entrada[0]
+                evento = self._em_calculo.get(chave)
+                if evento is None:
+                    evento = self._em_calculo[chave] = threading.Event()
+                    break
+            metricas.incrementar(f'{self.nome}_esperas')
+            if not evento.wait(self.espera_maxima):
+                # Cálculo em andamento travado ou lento demais: não prende esta requisição com ele
+                metricas.incrementar(f'{self.nome}_esperas_esgotadas')
+                print(f"[AVISO] {self.nome}: cálculo igual em andamento há mais de {self.espera_maxima}s, calculando localmente")
+                return calcular()
+
+        metricas.incrementar(f'{self.nome}_faltas')
+        try:
+            valor = calcular()
+            self.guardar(chave, valor)
+            return valor
+        finally:
+            with self._lock:
+                del self._em_calculo[chave]
+            evento.set()
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'entradas': len(self._entradas),
+                'em_calculo': len(self._em_calculo),
+                'limite': self.limite,
+                'validade_s': self.validade,
+            }
+
+
+def em_horario_de_trabalho(agora=None):
+    agora = agora or datetime.now(TIMEZONE_BRASILIA)
+    return PREAQUECIMENTO_HORA_INICIO <= agora.hour < PREAQUECIMENTO_HORA_FIM
+
+
+_preaquecimento = None
+_lock_preaquecimento = threading.Lock()
+
+
+def iniciar_preaquecimento(cache, projetos_ativos, data_hoje):
+    """Thread em segundo plano que mantém o cache de hoje quente (uma por processo).
+
+    `projetos_ativos()` lista os projetos com atividade recente e
+    `data_hoje()` devolve a data usada pelas consultas ('YYYY-MM-DD').
+    Chamadas repetidas devolvem a thread já em execução.
+    """
+    global _preaquecimento
+    def ciclo():
+        while True:
+            try:
+                if em_horario_de_trabalho():
+                    inicio = time.time()
+                    projetos = projetos_ativos()
+                    cache.aquecer(projetos, data_hoje())
+                    cache.limpar_vencidos()
+                    metricas.incrementar('preaquecimento_execucoes')
+                    metricas.registrar_tempo('preaquecimento_duracao', time.time() - inicio)
+                    metricas.definir('preaquecimento_projetos', len(projetos))
+                    print(f"[INFO] 🔥 Cache de hoje pré-aquecido: {len(projetos)} projetos")
+            except Exception as e:
+                print(f"[ERRO] Falha no pré-aquecimento: {e}")
+            time.sleep(PREAQUECIMENTO_INTERVALO_MIN * 60)
+
+    with _lock_preaquecimento:
+        if _preaquecimento is None or not _preaquecimento.is_alive():
+            _preaquecimento = threading.Thread(target=ciclo, name='preaquecimento', daemon=True)
+            _preaquecimento.start()
+        return _preaquecimento
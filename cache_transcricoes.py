@@ -0,0 +1,207 @@
+"""
+Cache de transcrições de áudio, pela URL e pelo conteúdo.
+
+Reentregas da Z-API, áudios encaminhados e o mesmo áudio mandado de novo
+disparavam outro download, conversão e chamada de transcrição. Aqui:
+
+- pela URL (caminho rápido): uma reentrega nem baixa o áudio de novo;
+- pelo hash do conteúdo (BLAKE2b dos bytes baixados): um encaminhamento,
+  com outra URL, pula a conversão e a transcrição;
+- as duas tabelas são LRU limitadas a LIMITE_CACHE_TRANSCRICOES;
+- com DIRETORIO_CACHE_TRANSCRICOES, cada transcrição vai também para um
+  arquivo no disco, que os outros workers (e o próximo boot) enxergam; o
+  disco é podado para LIMITE_CACHE_TRANSCRICOES_DISCO arquivos.
+
+Só transcrições concluídas são guardadas (inclusive "", áudio sem fala);
+falhas de download, conversão ou do serviço (None) não. Enquanto um áudio
+está sendo transcrito, as reentregas dele esperam o resultado em vez de
+repetir o trabalho, por no máximo ESPERA_CACHE_TRANSCRICAO segundos; depois
+disso transcrevem por conta própria.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import metricas
+
+LIMITE_CACHE_TRANSCRICOES = int(os.environ.get('LIMITE_CACHE_TRANSCRICOES', 512))
+# Pasta compartilhada entre workers ("" desliga o disco)
+DIRETORIO_CACHE_TRANSCRICOES = os.environ.get('DIRETORIO_CACHE_TRANSCRICOES', '')
+LIMITE_CACHE_TRANSCRICOES_DISCO = int(os.environ.get('LIMITE_CACHE_TRANSCRICOES_DISCO', 20000))
+# Espera máxima por uma transcrição igual em andamento (serviço travado não prende as reentregas)
+ESPERA_CACHE_TRANSCRICAO = float(os.environ.get('ESPERA_CACHE_TRANSCRICAO', 60))
+# A poda do disco lista a pasta inteira: roda a cada N gravações
+PODA_A_CADA_GRAVACOES = 200
+
+
+def hash_conteudo(conteudo):
+    return hashlib.blake2b(conteudo, digest_size=20).hexdigest()
+
+
+def _hash_url(url):
+    return hashlib.blake2b(url.encode('utf-8'), digest_size=20).hexdigest()
+
+
+class CacheTranscricoes:
+    """Transcrições por URL e por hash do conteúdo, em memória (LRU) e opcionalmente em disco"""
+
+    def __init__(self, limite=LIMITE_CACHE_TRANSCRICOES, diretorio=DIRETORIO_CACHE_TRANSCRICOES,
+                 limite_disco=LIMITE_CACHE_TRANSCRICOES_DISCO, espera_maxima=ESPERA_CACHE_TRANSCRICAO):
+        self.limite = limite
+        self.diretorio = diretorio
+        self.limite_disco = limite_disco
+        self.espera_maxima = espera_maxima
+        self._lock = threading.Lock()
+        self._por_url = OrderedDict()
+        self._por_conteudo = OrderedDict()
+        self._em_transcricao = {}
+        self._gravacoes = 0
+        if self.diretorio:
+            try:
+                os.makedirs(self.diretorio, exist_ok=True)
+            except OSError as e:
+                print(f"[AVISO] Cache de transcrições sem disco ({self.diretorio}): {e}")
+                self.diretorio = ''
+
+    def _guardar_memoria(self, tabela, chave, texto):
+        """Chamar com o lock"""
+        tabela[chave] = texto
+        tabela.move_to_end(chave)
+        while len(tabela) > self.limite:
+            tabela.popitem(last=False)
+
+    def _consultar_memoria(self, tabela, chave):
+        with self._lock:
+            texto = tabela.get(chave)
+            if texto is not None:
+                tabela.move_to_end(chave)
+            return texto
+
+    def _caminho(self, prefixo, chave):
+        return os.path.join(self.diretorio, f"{prefixo}_{chave}.txt")
+
+    def _ler_disco(self, prefixo, chave):
+        if not self.diretorio:
+            return None
+        try:
+            with open(self._caminho(prefixo, chave), encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"[AVISO] Falha ao ler cache de transcrição: {e}")
+            return None
+
+    def _gravar_disco(self, prefixo, chave, texto):
+        caminho = self._caminho(prefixo, chave)
+        # Grava em outro nome e troca: um worker nunca lê um arquivo pela metade
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporario, 'w', encoding='utf-8') as f:
+                f.write(texto)
+            os.replace(temporario, caminho)
+        except OSError as e:
+            print(f"[AVISO] Falha ao gravar cache de transcrição: {e}")
+
+    def _podar_disco(self):
+        """Remove os arquivos mais antigos acima de limite_disco"""
+        try:
+            arquivos = [e for e in os.scandir(self.diretorio) if e.name.endswith('.txt')]
+            excesso = len(arquivos) - self.limite_disco
+            if excesso <= 0:
+                return
+            arquivos.sort(key=lambda e: e.stat().st_mtime)
+            for entrada in arquivos[:excesso]:
+                os.remove(entrada.path)
+            metricas.incrementar('cache_transcricao_disco_podados', excesso)
+        except OSError as e:
+            print(f"[AVISO] Falha ao podar cache de transcrições: {e}")
+
+    def por_url(self, url):
+        """Transcrição já feita para esta URL, ou None (sem baixar nada)"""
+        chave = _hash_url(url)
+        texto = self._consultar_memoria(self._por_url, chave)
+        if texto is None:
+            texto = self._ler_disco('u', chave)
+            if texto is None:
+                return None
+            with self._lock:
+                self._guardar_memoria(self._por_url, chave, texto)
+            metricas.incrementar('cache_transcricao_acertos_disco')
+        metricas.incrementar('cache_transcricao_acertos_url')
+        return texto
+
+    def _por_conteudo_ou_disco(self, chave):
+        texto = self._consultar_memoria(self._por_conteudo, chave)
+        if texto is None:
+            texto = self._ler_disco('c', chave)
+            if texto is not None:
+                with self._lock:
+                    self._guardar_memoria(self._por_conteudo, chave, texto)
+                metricas.incrementar('cache_transcricao_acertos_disco')
+        return texto
+
+    def guardar(self, url, chave_conteudo, texto):
+        chave_url = _hash_url(url) if url else None
+        with self._lock:
+            self._guardar_memoria(self._por_conteudo, chave_conteudo, texto)
+            if chave_url:
+                self._guardar_memoria(self._por_url, chave_url, texto)
+            self._gravacoes += 1
+            podar = self._gravacoes % PODA_A_CADA_GRAVACOES == 0
+        if self.diretorio:
+            self._gravar_disco('c', chave_conteudo, texto)
+            if chave_url:
+                self._gravar_disco('u', chave_url, texto)
+            if podar:
+                self._podar_disco()
+
+    def obter(self, url, conteudo, transcrever):
+        """Transcrição do áudio `conteudo` (baixado de `url`): do cache, ou `transcrever()` uma vez só"""
+        chave = hash_conteudo(conteudo)
+        while True:
+            texto = self._por_conteudo_ou_disco(chave)
+            if texto is not None:
+                metricas.incrementar('cache_transcricao_acertos_conteudo')
+                # Encaminhamento com outra URL: a próxima reentrega dela já sai pelo caminho rápido
+                if url:
+                    with self._lock:
+                        self._guardar_memoria(self._por_url, _hash_url(url), texto)
+                return texto
+            with self._lock:
+                evento = self._em_transcricao.get(chave)
+                if evento is None:
+                    evento = self._em_transcricao[chave] = threading.Event()
+                    break
+            metricas.incrementar('cache_transcricao_esperas')
+            if not evento.wait(self.espera_maxima):
+                # Transcrição igual travada ou lenta demais: não prende esta reentrega com ela
+                metricas.incrementar('cache_transcricao_esperas_esgotadas')
+                print(f"[AVISO] Transcrição igual em andamento há mais de {self.espera_maxima}s, transcrevendo localmente")
+                return self._transcrever(url, chave, transcrever)
+
+        try:
+            return self._transcrever(url, chave, transcrever)
+        finally:
+            with self._lock:
+                del self._em_transcricao[chave]
+            evento.set()
+
+    def _transcrever(self, url, chave, transcrever):
+        metricas.incrementar('cache_transcricao_faltas')
+        texto = transcrever()
+        if texto is not None:
+            self.guardar(url, chave, texto)
+        return texto
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'por_url': len(self._por_url),
+                'por_conteudo': len(self._por_conteudo),
+                'em_transcricao': len(self._em_transcricao),
+                'limite': self.limite,
+                'disco': self.diretorio or None,
+            }
@@ -0,0 +1,129 @@
+"""
+Leitura colunar de resultados de BOLETIM_DIARIO em arrays NumPy.
+
+O caminho fetchall() cria uma tupla Python por linha (e depois uma
+LinhaBoletim) antes de qualquer agregação. Aqui o cursor é lido em lotes
+grandes com fetchmany e cada lote vai direto para colunas: textos viram
+códigos int32 de um dicionário (um valor distinto guardado uma vez) e
+números viram float64. Agregações vetorizadas, exportações e rankings
+trabalham sobre os códigos sem remontar as linhas.
+
+O pyodbc não tem leitura colunar nativa: os Row de cada lote ainda são
+criados pelo driver, mas vivem só durante o lote.
+"""
+
+import os
+from decimal import Decimal
+
+import numpy as np
+
+# Linhas lidas do cursor por lote
+TAMANHO_LOTE_COLUNAR = int(os.environ.get('TAMANHO_LOTE_COLUNAR', 50_000))
+
+_TIPOS_NUMERICOS = (int, float, Decimal)
+
+
+class ColunasBoletim:
+    """Resultado de consulta em colunas.
+
+    Colunas de texto: `codigos[nome]` (int32) + `dicionarios[nome]` (valores
+    distintos na ordem de primeira aparição). Colunas numéricas:
+    `valores[nome]` (float64, NULL vira 0; Decimal é convertido para float).
+    """
+
+    def __init__(self, nomes, codigos, dicionarios, valores, quantidade):
+        self.nomes = nomes
+        self.codigos = codigos
+        self.dicionarios = dicionarios
+        self.valores = valores
+        self.quantidade = quantidade
+
+    def __len__(self):
+        return self.quantidade
+
+    def textos(self, nome):
+        """Coluna de texto decodificada (lista Python)"""
+        dicionario = self.dicionarios[nome]
+        return [dicionario[c] for c in self.codigos[nome].tolist()]
+
+    def fatorizada(self, nome, transformar=None):
+        """(códigos int64, nomes) com `transformar` aplicado aos valores distintos.
+
+        Valores que passam a coincidir (ex.: None e '' -> "Sem Líder") são
+        unidos, mantendo a ordem de primeira aparição.
+        """
+        dicionario = self.dicionarios[nome]
+        if transformar is not None:
+            dicionario = [transformar(v) for v in dicionario]
+        indice = {}
+        remapa = np.fromiter((indice.setdefault(v, len(indice)) for v in dicionario),
+                             dtype=np.int64, count=len(dicionario))
+        return remapa[self.codigos[nome]], list(indice)
+
+    def linhas(self):
+        """Linhas como tuplas, na ordem original (compatibilidade com o caminho por linha)"""
+        colunas = [self.textos(n) if n in self.codigos else self.valores[n].tolist() for n in self.nomes]
+        return list(zip(*colunas))
+
+    def memoria_bytes(self):
+        """Tamanho dos arrays (sem contar os dicionários)"""
+        return (sum(a.nbytes for a in self.codigos.values())
+                + sum(a.nbytes for a in self.valores.values()))
+
+
+def ler_colunas(cursor, tamanho_lote=TAMANHO_LOTE_COLUNAR, colunas_texto=()):
+    """Lê todo o resultado de um cursor já executado em ColunasBoletim.
+
+    O tipo de cada coluna (texto ou número) é decidido pelo primeiro valor
+    não nulo do primeiro lote; `colunas_texto` força códigos de dicionário
+    (ex.: PROJETO, que é numérico no banco mas chave de agrupamento).
+    """
+    nomes = [d[0] for d in cursor.description]
+    numericas = None
+    indices = {}
+    partes_codigos = {}
+    partes_valores = {}
+    quantidade = 0
+
+    while True:
+        lote = cursor.fetchmany(tamanho_lote)
+        if not lote:
+            break
+        colunas = list(zip(*lote))
+        if numericas is None:
+            numericas = set()
+            for nome, coluna in zip(nomes, colunas):
+                primeiro = next((v for v in coluna if v is not None), None)
+                if (nome not in colunas_texto and isinstance(primeiro, _TIPOS_NUMERICOS)
+                        and not isinstance(primeiro, bool)):
+                    numericas.add(nome)
+                else:
+                    indices[nome] = {}
+            partes_codigos = {nome: [] for nome in indices}
+            partes_valores = {nome: [] for nome in numericas}
+
+        tamanho = len(lote)
+        for nome, coluna in zip(nomes, colunas):
+            if nome in numericas:
+                partes_valores[nome].append(
+                    np.fromiter((v or 0 for v in coluna), dtype=np.float64, count=tamanho)
+                )
+            else:
+                novo = indices[nome].setdefault
+                partes_codigos[nome].append(
+                    np.fromiter((novo(v, len(indices[nome])) for v in coluna), dtype=np.int32, count=tamanho)
+                )
+        quantidade += tamanho
+
+    if numericas is None:
+        # Resultado vazio: todas as colunas como texto, sem valores
+        indices = {nome: {} for nome in nomes}
+        partes_codigos = {nome: [] for nome in nomes}
+
+    def juntar(partes, tipo):
+        return np.concatenate(partes) if partes else np.zeros(0, dtype=tipo)
+
+    codigos = {nome: juntar(partes, np.int32) for nome, partes in partes_codigos.items()}
+    valores = {nome: juntar(partes, np.float64) for nome, partes in partes_valores.items()}
+    dicionarios = {nome: list(indice) for nome, indice in indices.items()}
+    return ColunasBoletim(nomes, codigos, dicionarios, valores, quantidade)
@@ -0,0 +1,399 @@
+"""
+Gramática dos comandos de texto/voz ("produção projeto 202 dia 5 de agosto").
+
+Substitui a cascata de regex de processar_comando_audio, mantendo os mesmos
+resultados (comando, parametro):
+
+- todos os padrões são compilados uma vez, no carregamento do módulo, e a
+  tabela de meses é única;
+- uma passada inicial levanta os sinais presentes no texto (dígitos,
+  barras, "projeto", "dia", "exportar"...) e só são tentadas as regras cujos
+  sinais obrigatórios apareceram. Texto sem dígitos, o caso mais comum
+  ("1", "menu", "produção"), pula todas as regras de data explícita;
+- o prefixo "produção do projeto N" é reconhecido uma vez e as variações
+  (dia, período, data numérica, hoje) são testadas a partir do fim dele,
+  na mesma ordem de prioridade da cascata original.
+
+Datas relativas ("produção de ontem", "semana passada", "mês passado",
+"este mês", "sexta-feira") são resolvidas no fuso de Brasília para os
+mesmos comandos periodo/projeto_periodo, quando nenhuma data explícita
+aparece no texto.
+
+interpretar(texto, transcrito=True) passa antes o texto por correcao_fala
+(números por extenso, palavras de comando mal reconhecidas pela
+transcrição); o texto digitado (transcrito=False, o padrão) é interpretado
+como chegou.
+
+Os mesmos comandos curtos chegam milhares de vezes por dia: interpretar()
+e resolver_periodo() guardam os resultados em LRU. Como as datas sem ano
+e as relativas dependem do dia, a chave de interpretar() inclui a data de
+Brasília e as entradas de ontem deixam de ser usadas à meia-noite.
+"""
+
+import functools
+import os
+import re
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+import metricas
+from correcao_fala import corrigir_transcricao
+
+TIMEZONE_BRASILIA = pytz.timezone('America/Sao_Paulo')
+
+# Comandos distintos (texto normalizado + dia) guardados já interpretados
+LIMITE_MEMO_COMANDOS = int(os.environ.get('LIMITE_MEMO_COMANDOS', 1024))
+
+MESES = {
+    'janeiro': '01', 'jan': '01', 'fevereiro': '02', 'fev': '02',
+    'março': '03', 'mar': '03', 'abril': '04', 'abr': '04',
+    'maio': '05', 'mai': '05', 'junho': '06', 'jun': '06',
+    'julho': '07', 'jul': '07', 'agosto': '08', 'ago': '08',
+    'setembro': '09', 'set': '09', 'outubro': '10', 'out': '10',
+    'novembro': '11', 'nov': '11', 'dezembro': '12', 'dez': '12'
+}
+
+_MES = r'(julho|jul|janeiro|jan|fevereiro|fev|março|mar|abril|abr|maio|mai|junho|jun|agosto|ago|setembro|set|outubro|out|novembro|nov|dezembro|dez)'
+_DATA = r'(\d{1,2})[/-](\d{1,2})(?:[/-](\d{4}))?'
+
+# Trechos que alguma regra exige; testes de substring são mais baratos que uma varredura por regex
+_SINAIS_LITERAIS = ('projeto', 'exportar', 'dia', 'de', 'mudou', 'altera', 'novidades')
+_DIGITO = re.compile(r'\d')
+
+_EXPORTAR = re.compile(
+    r'exportar\s+(?:(?:do\s+)?projeto\s+(\d+)\s+)?(?:de\s+)?(\d{1,2})/(\d{1,2})(?:/(\d{4}))?\s*(?:a|até)\s*(\d{1,2})/(\d{1,2})(?:/(\d{4}))?'
+)
+_CSV = re.compile(r'\bcsv\b')
+_EXCEL = re.compile(r'\b(?:excel|xlsx|planilha)\b')
+_ALTERACOES = re.compile(r'\b(?:o\s+que\s+mudou|altera[cç][oõ]es|novidades)\b')
+
+_PREFIXO_PROJETO = re.compile(r'(?:produção|producao|faturamento)\s+(?:do\s+)?projeto\s+(\d+)\s+')
+# Continuações do prefixo, em ordem de prioridade
+_PROJETO_DIA_PERIODO = re.compile(r'(?:do\s+)?dia\s+(\d{1,2})\s*(?:a|até)\s*(\d{1,2})\s*de\s*' + _MES)
+_PROJETO_DIA_MES = re.compile(r'(?:do\s+)?dia\s+(\d{1,2})\s*de\s*' + _MES)
+_PROJETO_DATA_SIMPLES = re.compile(r'(\d{1,2})[/](\d{1,2})(?:[/](\d{4}))?')
+_PROJETO_DATAS = re.compile(_DATA + r'\s*(?:a|até)\s*' + _DATA)
+_PROJETO_PERIODO_MES = re.compile(r'(?:dia\s+)?(\d{1,2})\s*(?:a|até|de)\s*(\d{1,2})\s*de\s*' + _MES)
+_PROJETO_HOJE = re.compile(r'(?:do\s+dia|hoje)')
+_PROJETO_DATA_MES = re.compile(r'(?:dia\s+)?(\d{1,2})\s*de\s*' + _MES)
+
+_DIA_ESPECIFICO = re.compile(r'(?:produção|producao|faturamento)\s+do\s+dia\s+(\d{1,2})[/](\d{1,2})(?:[/](\d{4}))?')
+_PERIODO_MES = re.compile(r'(\d{1,2})\s*(?:a|até|de)\s*(\d{1,2})\s*de\s*' + _MES)
+_PERIODO_DATAS = re.compile(_DATA + r'\s*(?:a|até)\s*' + _DATA)
+_DATA_UNICA = re.compile(_DATA)
+_PERIODO_COMPLETO = re.compile(r'(\d{1,2}/\d{1,2}/\d{4})\s*[Aa]\s*(\d{1,2}/\d{1,2}/\d{4})')
+
+# Datas relativas: "ontem", "semana passada", "este mês", "sexta(-feira) passada"...
+# "segunda" a "sexta" também são ordinais ("segunda quinzena", "terça parte"): só
+# valem como dia da semana com "feira"/"passada" depois, de/da/na/no/em antes ou
+# sozinhas no começo do texto, e nunca antes de quinzena/semana/vez
+_DIA_UTIL = r'(?:segunda|ter[cç]a|quarta|quinta|sexta)'
+_PADRAO_RELATIVA = (
+    r'\b(?:(?P<dias>anteontem|ontem)'
+    r'|[dn]?(?:est|ess)[ae]\s+(?P<atual>semana|m[eê]s)'
+    r'|(?P<passado>semana|m[eê]s)\s+passad[oa]'
+    r'|(?P<dia_semana>s[aá]bado|domingo'
+    r'|(?:^|(?<=(?<!\w)(?:de|da|do|na|no|em)\s)|(?=' + _DIA_UTIL + r'(?:[-\s]feira|\s+passad[oa])\b))'
+    + _DIA_UTIL + r'(?![-\s]+(?:quinzena|semana|vez)\b))(?:[-\s]feira)?'
+    r'(?:\s+(?P<anterior>passad[oa]))?)\b'
+)
+_RELATIVA = re.compile(_PADRAO_RELATIVA)
+# A expressão sozinha ("ontem", "da semana passada?") também vale como pedido de produção
+_SO_RELATIVA = re.compile(r'(?:(?:de|da|do|na|no|em)\s+)?' + _PADRAO_RELATIVA + r'\W*')
+_PROJETO_NUMERO = re.compile(r'projeto\s+(\d+)')
+DIAS_DA_SEMANA = {
+    'segunda': 0, 'terça': 1, 'terca': 1, 'quarta': 2, 'quinta': 3,
+    'sexta': 4, 'sábado': 5, 'sabado': 5, 'domingo': 6
+}
+
+PALAVRAS_PRODUCAO = ("produção", "producao", "produzido")
+PALAVRAS_FATURADO = ("faturado", "faturamento")
+PALAVRAS_MENU = ("oi", "olá", "menu")
+
+
+def sinais(texto):
+    """Conjunto dos sinais presentes no texto ('digito' para qualquer dígito, '/' para / ou -)"""
+    presentes = {sinal for sinal in _SINAIS_LITERAIS if sinal in texto}
+    if _DIGITO.search(texto):
+        presentes.add('digito')
+    if '/' in texto or '-' in texto:
+        presentes.add('/')
+    return presentes
+
+
+def periodo_relativo(match, hoje):
+    """(primeiro dia, último dia) da expressão casada por _RELATIVA, contada a partir de `hoje`"""
+    if match.group('dias'):
+        dia = hoje - timedelta(days=2 if match.group('dias') == 'anteontem' else 1)
+        return dia, dia
+    if match.group('atual'):
+        if match.group('atual') == 'semana':
+            return hoje - timedelta(days=hoje.weekday()), hoje
+        return hoje.replace(day=1), hoje
+    if match.group('passado'):
+        if match.group('passado') == 'semana':
+            segunda = hoje - timedelta(days=hoje.weekday() + 7)
+            return segunda, segunda + timedelta(days=6)
+        ultimo_dia = hoje.replace(day=1) - timedelta(days=1)
+        return ultimo_dia.replace(day=1), ultimo_dia
+    # Dia da semana: o mais recente até hoje; "passada" pula o de hoje
+    atras = (hoje.weekday() - DIAS_DA_SEMANA[match.group('dia_semana')]) % 7
+    if atras == 0 and match.group('anterior'):
+        atras = 7
+    dia = hoje - timedelta(days=atras)
+    return dia, dia
+
+
+def _comando_relativo(texto, hoje):
+    """Datas relativas com palavra de relatório ou sozinhas; None se não houver"""
+    m = _RELATIVA.search(texto)
+    if not m:
+        return None
+    if not (any(palavra in texto for palavra in PALAVRAS_PRODUCAO + PALAVRAS_FATURADO)
+            or _SO_RELATIVA.fullmatch(texto)):
+        return None
+
+    inicio, fim = periodo_relativo(m, hoje)
+    periodo = _periodo(inicio.strftime('%d/%m/%Y'), fim.strftime('%d/%m/%Y'))
+    projeto = _PROJETO_NUMERO.search(texto)
+    print(f"[DEBUG] ✅ DATA RELATIVA DETECTADA: '{m.group(0)}' -> {periodo}")
+    if projeto:
+        return "projeto_periodo", f"{projeto.group(1)}|{periodo}"
+    return "periodo", periodo
+
+
+def _periodo(data_inicio, data_fim):
+    return f"{data_inicio} A {data_fim}"
+
+
+def _comando_projeto(texto, ano_atual):
+    """Regras "produção do projeto N ..."; None se nenhuma casar"""
+    prefixos = [(m.group(1), m.end()) for m in _PREFIXO_PROJETO.finditer(texto)]
+    if not prefixos:
+        return None
+
+    def casar(padrao):
+        for projeto, posicao in prefixos:
+            match = padrao.match(texto, posicao)
+            if match:
+                return projeto, match
+        return None, None
+
+    projeto, m = casar(_PROJETO_DIA_PERIODO)
+    if m:
+        dia_inicio, dia_fim, mes_nome = m.groups()
+        mes, ano = MESES[mes_nome], ano_atual
+        data_inicio = f"{dia_inicio.zfill(2)}/{mes}/{ano}"
+        data_fim = f"{dia_fim.zfill(2)}/{mes}/{ano}"
+        print(f"[DEBUG] ✅ PROJETO PERÍODO DETECTADO: Projeto {projeto}, {data_inicio} a {data_fim}")
+        return "projeto_periodo", f"{projeto}|{_periodo(data_inicio, data_fim)}"
+
+    projeto, m = casar(_PROJETO_DIA_MES)
+    if m:
+        dia, mes_nome = m.groups()
+        data_br = f"{dia.zfill(2)}/{MESES[mes_nome]}/{ano_atual}"
+        print(f"[DEBUG] ✅ PROJETO DATA ÚNICA DETECTADO: Projeto {projeto}, {data_br}")
+        return "projeto_periodo", f"{projeto}|{_periodo(data_br, data_br)}"
+
+    projeto, m = casar(_PROJETO_DATA_SIMPLES)
+    if m:
+        dia, mes, ano = m.groups()
+        data_br = f"{dia.zfill(2)}/{mes.zfill(2)}/{ano or ano_atual}"
+        print(f"[DEBUG] ✅ PROJETO DATA NUMÉRICA DETECTADO: Projeto {projeto}, {data_br}")
+        return "projeto_periodo", f"{projeto}|{_periodo(data_br, data_br)}"
+
+    projeto, m = casar(_PROJETO_DATAS)
+    if m:
+        dia_i, mes_i, ano_i, dia_f, mes_f, ano_f = m.groups()
+        ano_i = ano_i or ano_atual
+        data_inicio = f"{dia_i.zfill(2)}/{mes_i.zfill(2)}/{ano_i}"
+        data_fim = f"{dia_f.zfill(2)}/{mes_f.zfill(2)}/{ano_f or ano_i}"
+        try:
+            if datetime.strptime(data_fim, '%d/%m/%Y') < datetime.strptime(data_inicio, '%d/%m/%Y'):
+                return "invalido", "Data final anterior à data inicial"
+        except ValueError:
+            return "invalido", "Formato de data inválido"
+        return "projeto_periodo", f"{projeto}|{_periodo(data_inicio, data_fim)}"
+
+    projeto, m = casar(_PROJETO_PERIODO_MES)
+    if m:
+        dia_inicio, dia_fim, mes_nome = m.groups()
+        mes, ano = MESES[mes_nome], ano_atual
+        return "projeto_periodo", f"{projeto}|{dia_inicio.zfill(2)}/{mes}/{ano} A {dia_fim.zfill(2)}/{mes}/{ano}"
+
+    projeto, m = casar(_PROJETO_HOJE)
+    if m:
+        return "projeto_hoje", projeto
+
+    projeto, m = casar(_PROJETO_DATA_MES)
+    if m:
+        dia, mes_nome = m.groups()
+        data_br = f"{dia.zfill(2)}/{MESES[mes_nome]}/{ano_atual}"
+        return "projeto_periodo", f"{projeto}|{_periodo(data_br, data_br)}"
+
+    return None
+
+
+def _comando_datas(texto, presentes, ano_atual):
+    """Datas e períodos para todos os projetos; None se nenhuma regra casar"""
+    barra = '/' in presentes
+
+    if barra and 'dia' in presentes:
+        m = _DIA_ESPECIFICO.search(texto)
+        if m:
+            dia, mes, ano = m.groups()
+            data_br = f"{dia.zfill(2)}/{mes.zfill(2)}/{ano or ano_atual}"
+            return "periodo", _periodo(data_br, data_br)
+
+    if 'de' in presentes:
+        m = _PERIODO_MES.search(texto)
+        if m:
+            dia_inicio, dia_fim, mes_nome = m.groups()
+            mes, ano = MESES[mes_nome], ano_atual
+            return "periodo", f"{dia_inicio.zfill(2)}/{mes}/{ano} A {dia_fim.zfill(2)}/{mes}/{ano}"
+
+    if barra:
+        m = _PERIODO_DATAS.search(texto)
+        if m:
+            dia_i, mes_i, ano_i, dia_f, mes_f, ano_f = m.groups()
+            data_inicio = f"{dia_i.zfill(2)}/{mes_i.zfill(2)}/{ano_i or ano_atual}"
+            data_fim = f"{dia_f.zfill(2)}/{mes_f.zfill(2)}/{ano_f or ano_atual}"
+            return "periodo", _periodo(data_inicio, data_fim)
+
+        m = _DATA_UNICA.search(texto)
+        if m:
+            dia, mes, ano = m.groups()
+            data_br = f"{dia.zfill(2)}/{mes.zfill(2)}/{ano or ano_atual}"
+            return "periodo", _periodo(data_br, data_br)
+
+    return None
+
+
+def interpretar_comando(texto, hoje=None):
+    """(comando, parametro) para o texto de uma mensagem ou transcrição.
+
+    `hoje` (date, padrão: hoje em Brasília) completa datas sem ano e
+    resolve as datas relativas.
+    """
+    texto = texto.lower().strip()
+    hoje = hoje or data_brasilia()
+    ano_atual = str(hoje.year)
+    presentes = sinais(texto)
+    tem_digito = 'digito' in presentes
+
+    # "exportar [projeto N] 01/08 a 31/08 [csv|excel]": arquivo do período como documento
+    if tem_digito and 'exportar' in presentes:
+        m = _EXPORTAR.search(texto)
+        if m:
+            projeto, dia_i, mes_i, ano_i, dia_f, mes_f, ano_f = m.groups()
+            periodo = f"{dia_i.zfill(2)}/{mes_i.zfill(2)}/{ano_i or ano_atual} A {dia_f.zfill(2)}/{mes_f.zfill(2)}/{ano_f or ano_atual}"
+            formato = 'csv' if _CSV.search(texto) else ('xlsx' if _EXCEL.search(texto) else '')
+            print(f"[DEBUG] ✅ EXPORTAÇÃO DETECTADA: projeto {projeto or 'todos'}, {periodo} {formato}")
+            return "exportar", f"{projeto or ''}|{periodo}|{formato}"
+
+    # "o que mudou" / "alterações" / "novidades": só o que mudou desde a última consulta de hoje
+    if presentes & {'mudou', 'altera', 'novidades'} and _ALTERACOES.search(texto):
+        print(f"[DEBUG] ✅ ALTERAÇÕES DETECTADO")
+        return "alteracoes_hoje", None
+
+    if tem_digito:
+        resultado = None
+        if 'projeto' in presentes:
+            resultado = _comando_projeto(texto, ano_atual)
+        if resultado is None:
+            resultado = _comando_datas(texto, presentes, ano_atual)
+        if resultado is not None:
+            return resultado
+
+    # Datas explícitas têm prioridade; depois "ontem", "semana passada", "este mês"...
+    resultado = _comando_relativo(texto, hoje)
+    if resultado is not None:
+        return resultado
+
+    if any(palavra in texto for palavra in PALAVRAS_PRODUCAO):
+        return "producao_hoje", None
+    elif any(palavra in texto for palavra in PALAVRAS_FATURADO):
+        return "faturado_hoje", None
+    elif any(palavra in texto for palavra in PALAVRAS_MENU):
+        return "menu", None
+    else:
+        return "nao_reconhecido", None
+
+
+def normalizar_texto(texto):
+    """Minúsculas e espaços colapsados (as regras tratam qualquer sequência de espaços igual)"""
+    return ' '.join(texto.lower().split())
+
+
+# (data de hoje em Brasília, instante da próxima meia-noite): evita o pytz a cada comando
+_dia_atual = (None, 0.0)
+
+
+def data_brasilia():
+    global _dia_atual
+    data, virada = _dia_atual
+    if time.time() < virada:
+        return data
+    data = datetime.now(TIMEZONE_BRASILIA).date()
+    meia_noite = TIMEZONE_BRASILIA.localize(datetime.combine(data + timedelta(days=1), datetime.min.time()))
+    _dia_atual = (data, meia_noite.timestamp())
+    return data
+
+
+@functools.lru_cache(maxsize=LIMITE_MEMO_COMANDOS)
+def _interpretar_no_dia(texto, data, transcrito=False):
+    metricas.incrementar('comandos_memo_faltas')
+    if not transcrito:
+        return interpretar_comando(texto, data)
+    corrigido = corrigir_transcricao(texto)
+    if corrigido != texto:
+        metricas.incrementar('comandos_corrigidos')
+        print(f"[DEBUG] 🔤 Comando corrigido: '{texto}' -> '{corrigido}'")
+    return interpretar_comando(corrigido, data)
+
+
+def interpretar(texto, agora=None, transcrito=False):
+    """interpretar_comando com memória (chave: texto normalizado + data de Brasília + origem);
+    só o texto transcrito do áudio passa pela correção de fala"""
+    inicio = time.perf_counter()
+    data = agora.date() if agora else data_brasilia()
+    resultado = _interpretar_no_dia(normalizar_texto(texto), data, transcrito)
+    metricas.incrementar('comandos_consultas')
+    metricas.registrar_tempo('comando_interpretacao', time.perf_counter() - inicio)
+    return resultado
+
+
+@functools.lru_cache(maxsize=LIMITE_MEMO_COMANDOS)
+def resolver_periodo(texto):
+    """"dd/mm/aaaa A dd/mm/aaaa" -> ('aaaa-mm-dd', 'aaaa-mm-dd'), ou (None, None)"""
+    match = _PERIODO_COMPLETO.search(texto)
+    if match:
+        try:
+            data_inicio_str = match.group(1)
+            data_fim_str = match.group(2)
+            data_inicio_dt = datetime.strptime(data_inicio_str, '%d/%m/%Y')
+            data_fim_dt = datetime.strptime(data_fim_str, '%d/%m/%Y')
+
+            if data_fim_dt < data_inicio_dt:
+                print(f"[ERRO] Data final ({data_fim_str}) anterior à data inicial ({data_inicio_str})")
+                return None, None
+
+            return data_inicio_dt.strftime('%Y-%m-%d'), data_fim_dt.strftime('%Y-%m-%d')
+        except ValueError as e:
+            print(f"[ERRO] Erro ao processar datas: {e}")
+            return None, None
+    print(f"[DEBUG] Período não reconhecido: {texto}")
+    return None, None
+
+
+def estatisticas_memo():
+    comandos = _interpretar_no_dia.cache_info()
+    periodos = resolver_periodo.cache_info()
+    return {
+        'comandos': {'acertos': comandos.hits, 'faltas': comandos.misses,
+                     'entradas': comandos.currsize, 'limite': comandos.maxsize},
+        'periodos': {'acertos': periodos.hits, 'faltas': periodos.misses,
+                     'entradas': periodos.currsize, 'limite': periodos.maxsize},
+    }
@@ -0,0 +1,131 @@
+"""
+Execução em paralelo de consultas longas sobre BOLETIM_DIARIO.
+
+Um período grande ("produção de 01/01 a 31/08") é quebrado em fatias
+mensais (ou semanais), cada fatia roda a mesma consulta agregada numa
+conexão do pool e os resultados são mesclados com a mesma semântica do
+GROUP BY / ORDER BY original.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+# Threads compartilhadas por todas as requisições do worker
+POOL_CONSULTAS_WORKERS = int(os.environ.get('POOL_CONSULTAS_WORKERS', 4))
+# Fatias simultâneas de uma mesma requisição (evita um usuário monopolizar o banco)
+LIMITE_FATIAS_POR_REQUISICAO = int(os.environ.get('LIMITE_FATIAS_POR_REQUISICAO', 2))
+# Tempo máximo para todas as fatias juntas, esperas por vaga incluídas (abaixo do --timeout 120 do gunicorn)
+TIMEOUT_FATIAS = int(os.environ.get('TIMEOUT_FATIAS', 90))
+
+_executor = ThreadPoolExecutor(max_workers=POOL_CONSULTAS_WORKERS, thread_name_prefix='fatia')
+
+
+def dividir_periodo(data_inicio, data_fim, granularidade='mes'):
+    """Divide 'YYYY-MM-DD'..'YYYY-MM-DD' em fatias contíguas por mês ou semana"""
+    inicio = datetime.strptime(data_inicio, '%Y-%m-%d').date()
+    fim = datetime.strptime(data_fim, '%Y-%m-%d').date()
+    fatias = []
+    atual = inicio
+    while atual <= fim:
+        if granularidade == 'semana':
+            proximo = atual + timedelta(days=7 - atual.weekday())
+        else:
+            proximo = (atual.replace(day=1) + timedelta(days=32)).replace(day=1)
+        fim_fatia = min(proximo - timedelta(days=1), fim)
+        fatias.append((atual.strftime('%Y-%m-%d'), fim_fatia.strftime('%Y-%m-%d')))
+        atual = proximo
+    return fatias
+
+
+def executar_em_fatias(pool, query, fatias, parametros_extra):
+    """Roda `query` (com ? ? para início/fim) em cada fatia e devolve os resultados na ordem das fatias.
+
+    Um único prazo de TIMEOUT_FATIAS vale para a requisição inteira: cada
+    espera por vaga e a espera final usam só o que sobrou dele.
+    """
+    prazo = time.monotonic() + TIMEOUT_FATIAS
+    vagas = threading.BoundedSemaphore(LIMITE_FATIAS_POR_REQUISICAO)
+
+    def executar(fatia):
+        try:
+            with pool.obter() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, [fatia[0], fatia[1]] + list(parametros_extra))
+                return cursor.fetchall()
+        finally:
+            vagas.release()
+
+    def restante():
+        return max(0.0, prazo - time.monotonic())
+
+    futuros = []
+    for fatia in fatias:
+        if not vagas.acquire(timeout=restante()):
+            for futuro in futuros:
+                futuro.cancel()
+            raise TimeoutError(f"Fatias anteriores não liberaram vaga em {TIMEOUT_FATIAS}s")
+        futuros.append(_executor.submit(executar, fatia))
+
+    concluidos, pendentes = wait(futuros, timeout=restante())
+    if pendentes:
+        for futuro in pendentes:
+            futuro.cancel()
+        raise TimeoutError(f"{len(pendentes)} fatia(s) não terminaram em {TIMEOUT_FATIAS}s")
+    return [futuro.result() for futuro in futuros]
+
+
+def chave_ordenacao_sql(valor):
+    """Aproxima a ordenação do SQL Server (NULL primeiro, texto sem diferenciar maiúsculas)"""
+    if valor is None:
+        return (0, '')
+    if isinstance(valor, str):
+        return (1, valor.casefold())
+    return (1, valor)
+
+
+def chave_grupo_sql(valor):
+    """Igualdade do GROUP BY com collation CI do SQL Server: sem diferenciar maiúsculas nem espaços à direita"""
+    if isinstance(valor, str):
+        return valor.rstrip(' ').casefold()
+    return valor
+
+
+def mesclar_linhas_boletim(lotes):
+    """Mescla lotes de (NOME_DO_LIDER, SERVIÇO, MEDIDA, MOD, PROJETO, producao, faturado).
+
+    Soma as linhas do mesmo grupo (como o GROUP BY: "Ana" e "ANA" de fatias
+    diferentes são o mesmo líder, com a grafia da primeira fatia) e reordena
+    por PROJETO, NOME_DO_LIDER, SERVIÇO.
+    """
+    grupos = {}
+    for lote in lotes:
+        for lider, servico, medida, mod, projeto, producao, faturado in lote:
+            dimensoes = (lider, servico, medida, mod, projeto)
+            chave = tuple(chave_grupo_sql(valor) for valor in dimensoes)
+            if chave in grupos:
+                acumulado = grupos[chave]
+                acumulado[1] += producao
+                acumulado[2] += faturado
+            else:
+                grupos[chave] = [dimensoes, producao, faturado]
+
+    linhas = [dimensoes + (producao, faturado) for dimensoes, producao, faturado in grupos.values()]
+    linhas.sort(key=lambda l: (chave_ordenacao_sql(l[4]), chave_ordenacao_sql(l[0]), chave_ordenacao_sql(l[1])))
+    return linhas
+
+
+def mesclar_supervisores(lotes):
+    """Mescla lotes de (SUPERVISOR, total_faturado) ordenando por faturado decrescente"""
+    totais = {}
+    for lote in lotes:
+        for supervisor, faturado in lote:
+            chave = chave_grupo_sql(supervisor)
+            if chave in totais:
+                totais[chave][1] += faturado
+            else:
+                totais[chave] = [supervisor, faturado]
+    return sorted(((supervisor, faturado) for supervisor, faturado in totais.values()),
+                  key=lambda item: item[1], reverse=True)
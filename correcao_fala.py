@@ -0,0 +1,231 @@
+"""
+Correção de transcrições antes da gramática de comandos.
+
+O reconhecimento de voz devolve "produsão", "fatoramento" ou números por
+extenso ("projeto duzentos e dois") e o comando não é reconhecido: o
+usuário grava de novo, e cada tentativa é mais um download, conversão e
+transcrição. Antes de interpretar o texto:
+
+- números por extenso viram dígitos pela tabela NUMEROS_POR_EXTENSO
+  (1 a 999, montada no carregamento; "mil" é combinado na leitura);
+- palavras fora do vocabulário de comandos são aproximadas pelo índice de
+  trigramas do vocabulário (coeficiente de Dice sobre a chave fonética:
+  sem acentos, ss/ç/ce/ci/z com som de s unificados), só quando a
+  semelhança chega a LIMIAR_SEMELHANCA e a primeira letra confere.
+  Ordinais ("quinto", "quarto") e outras palavras de NAO_CORRIGIR nunca
+  são trocadas.
+
+Só o texto transcrito passa por aqui; o texto digitado vai direto para a
+gramática (comandos.interpretar com transcrito=False).
+"""
+
+import functools
+import os
+import re
+from collections import defaultdict
+from itertools import product
+
+# Semelhança mínima (Dice sobre trigramas) para trocar uma palavra por uma do vocabulário
+LIMIAR_SEMELHANCA = float(os.environ.get('LIMIAR_SEMELHANCA', 0.6))
+# Palavras mais curtas só são corrigidas por acento ("producão" -> "produção")
+TAMANHO_MINIMO_APROXIMACAO = 5
+
+VOCABULARIO = (
+    'produção', 'produzido', 'faturamento', 'faturado', 'projeto', 'exportar', 'planilha', 'excel',
+    'alterações', 'novidades', 'mudou', 'hoje', 'ontem', 'anteontem', 'semana', 'mês', 'passada',
+    'passado', 'segunda', 'terça', 'quarta', 'quinta', 'sexta', 'sábado', 'domingo', 'feira',
+    'janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho', 'julho', 'agosto', 'setembro',
+    'outubro', 'novembro', 'dezembro', 'menu',
+)
+# Ordinais que não são palavras de comando ("quinto" ficaria "quinta", "quarto" ficaria "quarta")
+ORDINAIS = (
+    'primeira', 'segundo', 'terceiro', 'terceira', 'quarto', 'quinto', 'sexto', 'sétimo', 'sétima',
+    'oitavo', 'oitava', 'nono', 'nona', 'décimo', 'décima',
+)
+# Palavras comuns que ficam perto demais de uma palavra de comando
+NAO_CORRIGIR = frozenset(('passar', 'passou', 'semanal', 'projetar', 'projetos', 'produto') + ORDINAIS)
+
+_SEM_ACENTO = str.maketrans('áàâãéêíóôõúüç', 'aaaaeeiooouus')
+# Grafias com o mesmo som que a transcrição troca entre si: ss/ç/c(e,i)/z entre vogais -> s
+_SONS = ((re.compile(r'ss'), 's'), (re.compile(r'c(?=[ei])'), 's'), (re.compile(r'(?<=[aeiou])z(?=[aeiou])'), 's'))
+
+_UNIDADES = {
+    1: ('um', 'uma'), 2: ('dois', 'duas'), 3: ('três', 'tres'), 4: ('quatro',), 5: ('cinco',),
+    6: ('seis',), 7: ('sete',), 8: ('oito',), 9: ('nove',),
+}
+_DEZ_A_DEZENOVE = {
+    10: ('dez',), 11: ('onze',), 12: ('doze',), 13: ('treze',), 14: ('catorze', 'quatorze'),
+    15: ('quinze',), 16: ('dezesseis', 'dezasseis'), 17: ('dezessete', 'dezassete'),
+    18: ('dezoito',), 19: ('dezenove', 'dezanove'),
+}
+_DEZENAS = {
+    20: ('vinte',), 30: ('trinta',), 40: ('quarenta',), 50: ('cinquenta', 'cinqüenta'),
+    60: ('sessenta',), 70: ('setenta',), 80: ('oitenta',), 90: ('noventa',),
+}
+_CENTENAS = {
+    100: ('cento',), 200: ('duzentos', 'duzentas'), 300: ('trezentos', 'trezentas'),
+    400: ('quatrocentos', 'quatrocentas'), 500: ('quinhentos', 'quinhentas'),
+    600: ('seiscentos', 'seiscentas'), 700: ('setecentos', 'setecentas'),
+    800: ('oitocentos', 'oitocentas'), 900: ('novecentos', 'novecentas'),
+}
+
+
+def _extenso(numero):
+    """Todas as grafias de 1..999 como tuplas de palavras (sem o "e" de ligação)"""
+    if numero < 10:
+        return [(p,) for p in _UNIDADES[numero]]
+    if numero < 20:
+        return [(p,) for p in _DEZ_A_DEZENOVE[numero]]
+    if numero < 100:
+        dezena, resto = divmod(numero, 10)
+        dezenas = [(p,) for p in _DEZENAS[dezena * 10]]
+        return dezenas if not resto else [d + u for d, u in product(dezenas, _extenso(resto))]
+    if numero == 100:
+        return [('cem',)]
+    centena, resto = divmod(numero, 100)
+    centenas = [(p,) for p in _CENTENAS[centena * 100]]
+    return centenas if not resto else [c + r for c, r in product(centenas, _extenso(resto))]
+
+
+NUMEROS_POR_EXTENSO = {grafia: numero for numero in range(1, 1000) for grafia in _extenso(numero)}
+NUMEROS_POR_EXTENSO[('primeiro',)] = 1
+_PALAVRAS_NUMERO = frozenset(p for grafia in NUMEROS_POR_EXTENSO for p in grafia) | {'mil'}
+_MAIOR_GRAFIA = max(len(grafia) for grafia in NUMEROS_POR_EXTENSO)
+
+_TOKEN = re.compile(r'\w+|\W+')
+# Palavras entre os dois dias de uma faixa ("de um a dez")
+_LIGACOES_FAIXA = ('a', 'até', 'ate')
+
+
+def chave_fonetica(palavra):
+    """Forma sem acentos e com os sons de s unificados ("produssão", "produção" -> "produsao")"""
+    chave = palavra.translate(_SEM_ACENTO)
+    for padrao, troca in _SONS:
+        chave = padrao.sub(troca, chave)
+    return chave
+
+
+def _trigramas(palavra):
+    palavra = f" {palavra} "
+    return {palavra[i:i + 3] for i in range(len(palavra) - 2)}
+
+
+_CANONICAS = {chave_fonetica(p): p for p in VOCABULARIO}
+# Comparadas pela chave fonética: "setimo" e "decimo" sem acento também ficam como estão
+_CHAVES_NAO_CORRIGIR = frozenset(chave_fonetica(p) for p in NAO_CORRIGIR)
+_INDICE_TRIGRAMAS = defaultdict(list)
+_QUANTIDADE_TRIGRAMAS = {}
+for _chave in _CANONICAS:
+    if len(_chave) >= TAMANHO_MINIMO_APROXIMACAO:
+        _QUANTIDADE_TRIGRAMAS[_chave] = len(_trigramas(_chave))
+        for _trigrama in _trigramas(_chave):
+            _INDICE_TRIGRAMAS[_trigrama].append(_chave)
+
+
+@functools.lru_cache(maxsize=4096)
+def aproximar(palavra):
+    """Palavra do vocabulário equivalente a `palavra`, ou None"""
+    chave = chave_fonetica(palavra)
+    if chave in _CANONICAS:
+        return _CANONICAS[chave]
+    if len(chave) < TAMANHO_MINIMO_APROXIMACAO or chave in _CHAVES_NAO_CORRIGIR:
+        return None
+
+    trigramas = _trigramas(chave)
+    comuns = defaultdict(int)
+    for trigrama in trigramas:
+        for candidata in _INDICE_TRIGRAMAS.get(trigrama, ()):
+            comuns[candidata] += 1
+
+    melhor, melhor_semelhanca = None, LIMIAR_SEMELHANCA
+    for candidata, quantidade in comuns.items():
+        if candidata[0] != chave[0] or abs(len(candidata) - len(chave)) > 2:
+            continue
+        semelhanca = 2 * quantidade / (len(trigramas) + _QUANTIDADE_TRIGRAMAS[candidata])
+        if semelhanca >= melhor_semelhanca:
+            melhor, melhor_semelhanca = candidata, semelhanca
+    return _CANONICAS[melhor] if melhor else None
+
+
+def _ler_valores(palavras):
+    """Números de uma sequência de palavras numéricas ("dois mil vinte cinco" -> [2025])"""
+    valores = []
+    i = 0
+
+    def abaixo_de_mil(inicio):
+        for tamanho in range(min(_MAIOR_GRAFIA, len(palavras) - inicio), 0, -1):
+            numero = NUMEROS_POR_EXTENSO.get(tuple(palavras[inicio:inicio + tamanho]))
+            if numero is not None:
+                return numero, inicio + tamanho
+        return None, inicio
+
+    while i < len(palavras):
+        valor, i = abaixo_de_mil(i)
+        if i < len(palavras) and palavras[i] == 'mil':
+            valor = (valor or 1) * 1000
+            resto, i = abaixo_de_mil(i + 1)
+            valor += resto or 0
+        elif valor is None:
+            break
+        valores.append(valor)
+    return valores
+
+
+def _e_numero(palavra):
+    return palavra.isdigit() or palavra in _PALAVRAS_NUMERO
+
+
+def _um_em_data(partes, inicio, fim):
+    """Se o "um"/"uma" de partes[inicio] é o dia 1: depois de "dia" ou numa faixa ("um a dez", "trinta a um")"""
+    anterior = partes[inicio - 2] if inicio >= 2 else ''
+    if anterior == 'dia':
+        return True
+    if anterior in _LIGACOES_FAIXA and inicio >= 4 and _e_numero(partes[inicio - 4]):
+        return True
+    seguinte = partes[fim + 1] if fim + 1 < len(partes) else ''
+    depois = partes[fim + 3] if fim + 3 < len(partes) else ''
+    return seguinte in _LIGACOES_FAIXA and _e_numero(depois)
+
+
+def _numero_em(partes, inicio):
+    """(índice após o número, texto com dígitos) a partir da palavra partes[inicio]"""
+    palavras = [partes[inicio]]
+    fim = inicio + 1
+    while fim + 1 < len(partes) and not partes[fim].strip():
+        seguinte = fim + 1
+        if (partes[seguinte] == 'e' and seguinte + 2 < len(partes) and not partes[seguinte + 1].strip()
+                and partes[seguinte + 2] in _PALAVRAS_NUMERO):
+            seguinte += 2
+        if partes[seguinte] not in _PALAVRAS_NUMERO:
+            break
+        palavras.append(partes[seguinte])
+        fim = seguinte + 1
+
+    if len(palavras) == 1:
+        palavra = palavras[0]
+        anterior = partes[inicio - 2] if inicio >= 2 else ''
+        # "um"/"uma" soltos são artigo, salvo em data ("dia um", "de um a dez",
+        # "de trinta a um"); "de dez" é dezembro
+        if palavra in ('um', 'uma') and not _um_em_data(partes, inicio, fim):
+            return fim, palavra
+        if palavra == 'dez' and anterior == 'de':
+            return fim, palavra
+    return fim, ' '.join(str(v) for v in _ler_valores(palavras))
+
+
+def corrigir_transcricao(texto):
+    """Texto (já em minúsculas) com números em dígitos e palavras de comando corrigidas"""
+    partes = _TOKEN.findall(texto)
+    saida = []
+    i = 0
+    while i < len(partes):
+        parte = partes[i]
+        if parte in _PALAVRAS_NUMERO:
+            i, convertido = _numero_em(partes, i)
+            saida.append(convertido)
+            continue
+        if parte[0].isalpha():
+            parte = aproximar(parte) or parte
+        saida.append(parte)
+        i += 1
+    return ''.join(saida)
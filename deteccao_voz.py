@@ -0,0 +1,105 @@
+"""
+Detecção de voz por energia e corte de silêncios antes da transcrição.
+
+Os áudios de campo têm silêncio longo no começo e no fim, pausas no meio e
+ruído de motor ao fundo, e tudo isso era enviado ao reconhecedor. Aqui, no
+PCM já decodificado (float32 a 16 kHz), com NumPy e sem laço por amostra:
+
+- a energia é medida em quadros de QUADRO_MS;
+- o piso de ruído é estimado pelo percentil PERCENTIL_PISO das energias
+  (os quadros mais baixos são o ruído de fundo, com ou sem motor) e é fala
+  o quadro que passa o piso por VAD_MARGEM_DB;
+- a fala ganha VAD_FOLGA_MS de cada lado para não cortar início e fim de
+  palavra; o que fica antes da primeira fala e depois da última sai;
+- pausas maiores que VAD_PAUSA_MAXIMA_MS são encurtadas para esse tamanho.
+
+Sem contraste entre fala e fundo (áudio todo falado, ou todo silêncio) o
+áudio segue inteiro: quem decide se há fala é o reconhecedor.
+"""
+
+import os
+
+import numpy as np
+
+VAD_ATIVO = os.environ.get('VAD_ATIVO', '1') == '1'
+# Quanto acima do piso de ruído um quadro precisa estar para contar como fala
+VAD_MARGEM_DB = float(os.environ.get('VAD_MARGEM_DB', 12))
+# Áudio mantido antes e depois de cada trecho de fala
+VAD_FOLGA_MS = int(os.environ.get('VAD_FOLGA_MS', 200))
+# Pausas maiores que isso são encurtadas para esse tamanho
+VAD_PAUSA_MAXIMA_MS = int(os.environ.get('VAD_PAUSA_MAXIMA_MS', 600))
+
+QUADRO_MS = 20
+PERCENTIL_PISO = 10
+# Abaixo disso (dBFS) é silêncio digital, mesmo que o áudio inteiro seja baixo
+PISO_MINIMO_DB = -70.0
+
+
+def energia_quadros(amostras, tamanho_quadro):
+    """Energia (dBFS) de cada quadro completo"""
+    quadros = len(amostras) // tamanho_quadro
+    blocos = amostras[:quadros * tamanho_quadro].reshape(quadros, tamanho_quadro)
+    potencia = np.einsum('ij,ij->i', blocos, blocos, dtype=np.float64) / tamanho_quadro
+    return 10 * np.log10(potencia + 1e-12)
+
+
+def _dilatar(mascara, quadros):
+    """Marca também os `quadros` vizinhos de cada quadro marcado"""
+    if quadros <= 0:
+        return mascara
+    return np.convolve(mascara, np.ones(2 * quadros + 1, dtype=np.int32), mode='same') > 0
+
+
+def quadros_mantidos(fala, folga, pausa_maxima):
+    """Máscara dos quadros que ficam: fala com folga, sem as pontas, com pausas longas encurtadas"""
+    manter = np.zeros(len(fala), dtype=bool)
+    if not fala.any():
+        return manter
+    com_folga = _dilatar(fala.astype(np.int32), folga)
+    primeiro = int(np.argmax(com_folga))
+    ultimo = len(fala) - 1 - int(np.argmax(com_folga[::-1]))
+    manter[primeiro:ultimo + 1] = True
+
+    # Pausas entre a primeira e a última fala: [inicio, fim)
+    falados = np.flatnonzero(fala)
+    trecho = ~fala[falados[0]:falados[-1] + 1]
+    bordas = np.diff(np.concatenate(([0], trecho.astype(np.int8), [0])))
+    inicios = np.flatnonzero(bordas == 1) + falados[0]
+    fins = np.flatnonzero(bordas == -1) + falados[0]
+    longas = fins - inicios > pausa_maxima
+    # Da pausa longa ficam a primeira e a última metade de pausa_maxima (a folga fica dentro delas)
+    cortes = np.zeros(len(fala) + 1, dtype=np.int32)
+    np.add.at(cortes, inicios[longas] + pausa_maxima // 2, 1)
+    np.add.at(cortes, fins[longas] - (pausa_maxima - pausa_maxima // 2), -1)
+    manter &= np.cumsum(cortes[:-1]) == 0
+    return manter
+
+
+def recortar_silencios(amostras, taxa, margem_db=VAD_MARGEM_DB, folga_ms=VAD_FOLGA_MS,
+                       pausa_maxima_ms=VAD_PAUSA_MAXIMA_MS):
+    """(amostras sem os silêncios, dados da detecção: piso_db, limiar_db, segundos antes e depois)"""
+    tamanho_quadro = taxa * QUADRO_MS // 1000
+    segundos = len(amostras) / taxa
+    energias = energia_quadros(amostras, tamanho_quadro)
+    if len(energias) == 0:
+        return amostras, {'piso_db': None, 'limiar_db': None, 'segundos_antes': segundos, 'segundos_depois': segundos}
+
+    piso = max(float(np.percentile(energias, PERCENTIL_PISO)), PISO_MINIMO_DB)
+    limiar = piso + margem_db
+    fala = energias > limiar
+    dados = {'piso_db': round(piso, 1), 'limiar_db': round(limiar, 1), 'segundos_antes': segundos}
+
+    # Sem quadros de fundo abaixo do limiar (ou sem fala acima dele) não há o que cortar
+    if fala.all() or not fala.any():
+        dados['segundos_depois'] = segundos
+        return amostras, dados
+
+    manter = quadros_mantidos(fala, folga_ms // QUADRO_MS, pausa_maxima_ms // QUADRO_MS)
+    # A sobra final (menos de um quadro) acompanha o último quadro
+    por_amostra = np.repeat(manter, tamanho_quadro)
+    sobra = len(amostras) - len(por_amostra)
+    if sobra:
+        por_amostra = np.concatenate((por_amostra, np.full(sobra, manter[-1])))
+    recortado = amostras[por_amostra]
+    dados['segundos_depois'] = len(recortado) / taxa
+    return recortado, dados
@@ -0,0 +1,211 @@
+"""
+Exportação de relatórios de período em CSV/XLSX, enviada como documento no WhatsApp.
+
+Relatórios longos ficam ilegíveis como texto no chat. Aqui a agregação de
+BOLETIM_DIARIO é lida do cursor em lotes (fetchmany) e escrita direto no
+arquivo, sem montar a lista completa nem a mensagem: a memória fica
+constante qualquer que seja o tamanho do período. O XLSX usa o modo
+constant_memory do xlsxwriter; sem o pacote, a exportação sai em CSV.
+
+O arquivo é enviado pelo endpoint send-document da Z-API em multipart,
+lido do disco em pedaços durante o envio (sem base64 nem cópia em memória).
+ZAPI_URL_BASE permite apontar para um servidor local (ver teste_exportacao.py).
+"""
+
+import csv
+import io
+import os
+import tempfile
+import time
+import uuid
+
+import requests
+
+import metricas
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+INSTANCE_ID = os.environ.get('INSTANCE_ID')
+TOKEN = os.environ.get('TOKEN')
+CLIENT_TOKEN = os.environ.get('CLIENT_TOKEN')
+ZAPI_URL_BASE = os.environ.get('ZAPI_URL_BASE', 'https://api.z-api.io').rstrip('/')
+
+# Linhas lidas do cursor por vez
+TAMANHO_LOTE_EXPORTACAO = int(os.environ.get('TAMANHO_LOTE_EXPORTACAO', 5000))
+# 'xlsx' ou 'csv' (xlsx cai para csv se o xlsxwriter não estiver instalado)
+FORMATO_EXPORTACAO = os.environ.get('FORMATO_EXPORTACAO', 'xlsx').lower()
+DIRETORIO_EXPORTACAO = os.environ.get('DIRETORIO_EXPORTACAO', tempfile.gettempdir())
+TIMEOUT_ENVIO_DOCUMENTO = int(os.environ.get('TIMEOUT_ENVIO_DOCUMENTO', 120))
+
+COLUNAS = ('Projeto', 'Líder', 'Serviço', 'Medida', 'Modalidade', 'Produção', 'Faturado')
+
+QUERY_EXPORTACAO = """
+SELECT
+    PROJETO,
+    NOME_DO_LIDER,
+    SERVIÇO,
+    MEDIDA,
+    MOD,
+    ISNULL(SUM([PRODUÇÃO]), 0) as total_producao,
+    ISNULL(SUM([FATURADO]), 0) as total_faturado
+FROM BOLETIM_DIARIO
+WHERE DATA_EXECUÇÃO BETWEEN ? AND ? AND PROJETO IN ({placeholders})
+GROUP BY PROJETO, NOME_DO_LIDER, SERVIÇO, MEDIDA, MOD
+ORDER BY PROJETO, NOME_DO_LIDER, SERVIÇO
+"""
+
+
+def formato_efetivo(formato=None):
+    formato = (formato or FORMATO_EXPORTACAO).lower()
+    if formato == 'xlsx' and xlsxwriter is None:
+        print("[INFO] xlsxwriter não instalado: exportando em CSV")
+        return 'csv'
+    return 'xlsx' if formato == 'xlsx' else 'csv'
+
+
+def consultar_em_lotes(conn, projetos, data_inicio, data_fim, tamanho_lote=TAMANHO_LOTE_EXPORTACAO):
+    """Gera as linhas agregadas do período sem carregar o resultado inteiro"""
+    cursor = conn.cursor()
+    query = QUERY_EXPORTACAO.format(placeholders=','.join(['?' for _ in projetos]))
+    cursor.execute(query, [data_inicio, data_fim] + list(projetos))
+    while True:
+        lote = cursor.fetchmany(tamanho_lote)
+        if not lote:
+            break
+        yield from lote
+
+
+def _numero_csv(valor):
+    """Número no padrão do Excel pt-BR (vírgula decimal, sem milhar)"""
+    return format(valor or 0, '.2f').replace('.', ',')
+
+
+def escrever_csv(linhas, caminho):
+    """CSV com ';' e BOM, abre direto no Excel em português. Devolve o total de linhas"""
+    quantidade = 0
+    with open(caminho, 'w', newline='', encoding='utf-8-sig') as arquivo:
+        escritor = csv.writer(arquivo, delimiter=';')
+        escritor.writerow(COLUNAS)
+        for projeto, lider, servico, medida, mod, producao, faturado in linhas:
+            escritor.writerow((projeto, lider, servico, medida, mod,
+                               _numero_csv(producao), _numero_csv(faturado)))
+            quantidade += 1
+    return quantidade
+
+
+def escrever_xlsx(linhas, caminho):
+    """XLSX em modo constant_memory (cada linha vai para o disco ao ser escrita)"""
+    # Sem detecção de fórmulas/URLs nos textos (nomes de líder e serviço são texto puro)
+    pasta = xlsxwriter.Workbook(caminho, {
+        'constant_memory': True, 'strings_to_formulas': False, 'strings_to_urls': False,
+    })
+    try:
+        planilha = pasta.add_worksheet('Produção')
+        negrito = pasta.add_format({'bold': True})
+        numero = pasta.add_format({'num_format': '#,##0.00'})
+        moeda = pasta.add_format({'num_format': '"R$" #,##0.00'})
+        planilha.write_row(0, 0, COLUNAS, negrito)
+        planilha.set_column(0, 0, 10)
+        planilha.set_column(1, 2, 30)
+        # Formato na coluna: as células sem formato próprio herdam
+        planilha.set_column(5, 5, 16, numero)
+        planilha.set_column(6, 6, 16, moeda)
+        planilha.freeze_panes(1, 0)
+
+        quantidade = 0
+        escrever_linha = planilha.write_row
+        for projeto, lider, servico, medida, mod, producao, faturado in linhas:
+            quantidade += 1
+            escrever_linha(quantidade, 0, (str(projeto), lider or '', servico or '', medida or '', mod or '',
+                                          float(producao or 0), float(faturado or 0)))
+    finally:
+        pasta.close()
+    return quantidade
+
+
+def exportar(linhas, nome_base, formato=None, diretorio=DIRETORIO_EXPORTACAO):
+    """Escreve `linhas` em arquivo; devolve (caminho, quantidade de linhas)"""
+    formato = formato_efetivo(formato)
+    caminho = os.path.join(diretorio, f"{nome_base}.{formato}")
+    inicio = time.time()
+    if formato == 'xlsx':
+        quantidade = escrever_xlsx(linhas, caminho)
+    else:
+        quantidade = escrever_csv(linhas, caminho)
+    metricas.registrar_tempo('exportacao_escrita', time.time() - inicio)
+    metricas.incrementar('exportacao_linhas', quantidade)
+    return caminho, quantidade
+
+
+class CorpoMultipart:
+    """Corpo multipart/form-data que lê o arquivo do disco sob demanda.
+
+    O requests envia objetos com read() em pedaços; len() dá o Content-Length,
+    então o envio não precisa de chunked nem de montar o corpo inteiro.
+    """
+
+    def __init__(self, campos, nome_campo, caminho, nome_arquivo, tipo):
+        self.fronteira = uuid.uuid4().hex
+        cabecalho = b''.join(
+            f'--{self.fronteira}\r\nContent-Disposition: form-data; name="{nome}"\r\n\r\n{valor}\r\n'.encode('utf-8')
+            for nome, valor in campos.items()
+        )
+        cabecalho += (f'--{self.fronteira}\r\nContent-Disposition: form-data; name="{nome_campo}"; '
+                      f'filename="{nome_arquivo}"\r\nContent-Type: {tipo}\r\n\r\n').encode('utf-8')
+        rodape = f'\r\n--{self.fronteira}--\r\n'.encode('utf-8')
+        self._tamanho = len(cabecalho) + os.path.getsize(caminho) + len(rodape)
+        self._arquivo = open(caminho, 'rb')
+        self._partes = [io.BytesIO(cabecalho), self._arquivo, io.BytesIO(rodape)]
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.fronteira}"
+
+    def __len__(self):
+        return self._tamanho
+
+    def read(self, tamanho=-1):
+        if tamanho is None or tamanho < 0:
+            return b''.join(parte.read() for parte in self._partes)
+        pedacos = []
+        while tamanho > 0 and self._partes:
+            pedaco = self._partes[0].read(tamanho)
+            if not pedaco:
+                self._partes.pop(0)
+                continue
+            pedacos.append(pedaco)
+            tamanho -= len(pedaco)
+        return b''.join(pedacos)
+
+    def close(self):
+        self._arquivo.close()
+
+
+def enviar_documento(numero, caminho, legenda=None):
+    """Envia o arquivo pelo send-document da Z-API (multipart, lido do disco durante o envio)"""
+    nome_arquivo = os.path.basename(caminho)
+    extensao = nome_arquivo.rsplit('.', 1)[-1]
+    tipo = ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            if extensao == 'xlsx' else 'text/csv')
+
+    url = f"{ZAPI_URL_BASE}/instances/{INSTANCE_ID}/token/{TOKEN}/send-document/{extensao}"
+    campos = {"phone": numero, "fileName": nome_arquivo}
+    if legenda:
+        campos["caption"] = legenda
+
+    corpo = None
+    try:
+        corpo = CorpoMultipart(campos, "document", caminho, nome_arquivo, tipo)
+        headers = {"Content-Type": corpo.content_type, "Client-Token": CLIENT_TOKEN}
+        resposta = requests.post(url, data=corpo, headers=headers, timeout=TIMEOUT_ENVIO_DOCUMENTO)
+        print(f"[DEBUG] Documento enviado - Status: {resposta.status_code}")
+        return resposta
+    except Exception as e:
+        print(f"[ERRO] Erro ao enviar documento: {e}")
+        return None
+    finally:
+        if corpo is not None:
+            corpo.close()
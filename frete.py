@@ -0,0 +1,166 @@
+"""
+Leitura de mensagens de frete ("frete 150 da São João para São Pedro km 50324").
+
+Substitui os dois regex com grupos preguiçosos (.*?) de processar_frete_texto,
+que eram recompilados a cada chamada e, em textos longos com muitos "de",
+"para" e números, retrocediam combinando cada "frete" com cada conector,
+cada "para" e cada número (tempo polinomial de grau alto).
+
+Aqui o texto é percorrido uma vez por um padrão pré-compilado com todos os
+elementos e as posições de "frete", conectores (da/do/das/dos/de), "para"/"pra",
+pontuação, palavras de km e números ficam em listas ordenadas. Cada conector
+é então testado com buscas binárias nessas listas. O resultado é o mesmo
+dos regex originais, inclusive nas escolhas que eles faziam:
+
+- vale o primeiro "frete"; o projeto são os 2 a 6 dígitos logo após ele;
+- vale o primeiro conector para o qual o resto casa;
+- a origem vai até o primeiro "para"/"pra" (sem , . ; no meio);
+- o destino é só o primeiro caractere depois do "para": o grupo preguiçoso
+  do padrão original seguido de .*? nunca pegava mais do que isso;
+- com palavra de km (km, km inicial, quilometragem...), o KM são os
+  primeiros 1 a 7 dígitos depois dela; sem ela, o primeiro número de 4 a 7
+  dígitos terminado em fronteira de palavra.
+"""
+
+import re
+from bisect import bisect_left
+
+_PROJETO = re.compile(r'\s*(\d{2,6})')
+# Um único padrão para todos os elementos (nenhum se sobrepõe a outro): uma passada pelo texto.
+# A antecipação pela primeira letra evita testar cada alternativa em todas as posições.
+_ELEMENTOS = re.compile(
+    r'(?=[fdpkq\d,.;\n])(?:'
+    r'(?P<frete>\bfrete\b)'
+    r'|(?P<conector>\b(?:das|dos|da|do|de)\b)'
+    r'|(?P<para>(?<=\s)(?:para|pra)(?=\s))'
+    r'|(?P<km>\bkm\b|\bkm\s*inicial\b|\bquilometragem\b|\bkm\s*é\b|\bkilometro\b)'
+    r'|(?P<numero>\d+)'
+    r'|(?P<pontuacao>[,.;\n]))',
+    re.IGNORECASE
+)
+
+
+def normalizar_local(s):
+    s = " ".join(s.strip().split())
+    return " ".join(p.capitalize() for p in s.split(" "))
+
+
+def _eh_palavra(caractere):
+    # Mesma definição de \w do re para str
+    return caractere.isalnum() or caractere == '_'
+
+
+class _Posicoes:
+    """Posições dos elementos do texto, em ordem, para busca binária"""
+
+    def __init__(self, texto):
+        self.texto = texto
+        self.frete = None
+        self.conectores = []
+        self.para_inicios, self.para_fins = [], []
+        self.km_inicios, self.km_fins = [], []
+        self.numero_inicios, self.numero_fins = [], []
+        self.pontuacao = []
+        for m in _ELEMENTOS.finditer(texto):
+            tipo = m.lastgroup
+            if tipo == 'numero':
+                self.numero_inicios.append(m.start())
+                self.numero_fins.append(m.end())
+            elif tipo == 'conector':
+                self.conectores.append((m.start(), m.end()))
+            elif tipo == 'para':
+                self.para_inicios.append(m.start())
+                self.para_fins.append(m.end())
+            elif tipo == 'km':
+                self.km_inicios.append(m.start())
+                self.km_fins.append(m.end())
+            elif tipo == 'pontuacao':
+                self.pontuacao.append(m.start())
+            elif self.frete is None:
+                self.frete = m.end()
+        self._proximo_km_flex = None
+
+    def destino(self, inicio_origem):
+        """(fim da origem, posição do destino) do primeiro "para" válido, ou None"""
+        i = bisect_left(self.para_inicios, inicio_origem + 2)
+        if i == len(self.para_inicios):
+            return None
+        inicio_para = self.para_inicios[i]
+        j = bisect_left(self.pontuacao, inicio_origem)
+        if j < len(self.pontuacao) and self.pontuacao[j] < inicio_para - 1:
+            return None
+        posicao_destino = self.para_fins[i] + 1
+        if posicao_destino >= len(self.texto) or self.texto[posicao_destino] in ',.;\n':
+            return None
+        return inicio_para - 1, posicao_destino
+
+    def km_com_palavra(self, depois_de):
+        """Primeiros 1 a 7 dígitos após a primeira palavra de km que começa em `depois_de` ou depois"""
+        i = bisect_left(self.km_inicios, depois_de)
+        if i == len(self.km_inicios):
+            return None
+        fim_palavra = self.km_fins[i]
+        j = bisect_left(self.numero_fins, fim_palavra + 1)
+        if j == len(self.numero_fins):
+            return None
+        inicio = max(self.numero_inicios[j], fim_palavra)
+        return self.texto[inicio:min(self.numero_fins[j], inicio + 7)]
+
+    def proximo_km_flex(self):
+        """Para cada índice, o próximo número que casa \\d{4,7}\\b sem recorte no início (só no 2º padrão)"""
+        if self._proximo_km_flex is None:
+            texto = self.texto
+            proximos = [None] * (len(self.numero_inicios) + 1)
+            for i in range(len(self.numero_inicios) - 1, -1, -1):
+                inicio, fim = self.numero_inicios[i], self.numero_fins[i]
+                valido = fim - inicio >= 4 and (fim == len(texto) or not _eh_palavra(texto[fim]))
+                proximos[i] = (max(inicio, fim - 7), fim) if valido else proximos[i + 1]
+            self._proximo_km_flex = proximos
+        return self._proximo_km_flex
+
+    def km_sem_palavra(self, depois_de):
+        """Primeiro trecho \\d{4,7}\\b que começa em `depois_de` ou depois"""
+        j = bisect_left(self.numero_fins, depois_de + 1)
+        if j == len(self.numero_fins):
+            return None
+        # O primeiro número pode começar antes de `depois_de` (o destino era um dígito)
+        inicio, fim = max(self.numero_inicios[j], depois_de), self.numero_fins[j]
+        if fim - inicio >= 4 and (fim == len(self.texto) or not _eh_palavra(self.texto[fim])):
+            return self.texto[max(inicio, fim - 7):fim]
+        proximo = self.proximo_km_flex()[j + 1]
+        return self.texto[proximo[0]:proximo[1]] if proximo else None
+
+
+def extrair_frete(texto):
+    """Dados do frete (TIPO, PROJETO, SAIDA, DESTINO, KM_INICIAL) ou None"""
+    texto_limpo = " ".join(texto.split())
+    posicoes = _Posicoes(texto_limpo)
+    if posicoes.frete is None:
+        return None
+
+    m_projeto = _PROJETO.match(texto_limpo, posicoes.frete)
+    projeto = m_projeto.group(1) if m_projeto else None
+    inicio_busca = m_projeto.end() if m_projeto else posicoes.frete
+    conectores = [fim for inicio, fim in posicoes.conectores if inicio >= inicio_busca]
+
+    # Como no original: primeiro tenta com palavra de km no texto inteiro, depois sem ela
+    for ler_km in (posicoes.km_com_palavra, posicoes.km_sem_palavra):
+        for fim_conector in conectores:
+            if fim_conector >= len(texto_limpo) or not texto_limpo[fim_conector].isspace():
+                continue
+            inicio_origem = fim_conector + 1
+            trecho = posicoes.destino(inicio_origem)
+            if trecho is None:
+                continue
+            fim_origem, posicao_destino = trecho
+            km = ler_km(posicao_destino + 1)
+            if km is None:
+                continue
+            return {
+                "TIPO": "FRETE",
+                "PROJETO": projeto,
+                "SAIDA": normalizar_local(texto_limpo[inicio_origem:fim_origem]),
+                "DESTINO": normalizar_local(texto_limpo[posicao_destino]),
+                "KM_INICIAL": int(km)
+            }
+    return None
@@ -0,0 +1,13 @@
+"""
+Configuração do gunicorn (Procfile: gunicorn -c gunicorn.conf.py bot_final:app).
+
+As threads de segundo plano do bot (pré-aquecimento do relatório de hoje)
+sobem em cada worker depois que a aplicação foi carregada, e não no import
+de bot_final: assim o master, scripts e testes que importam o módulo não
+disparam consultas ao banco.
+"""
+
+
+def post_worker_init(worker):
+    import bot_final
+    bot_final.iniciar_tarefas_de_fundo()
@@ -0,0 +1,45 @@
+"""
+Representação compacta das linhas de relatório vindas de BOLETIM_DIARIO.
+
+Os pyodbc.Row são trocados por LinhaBoletim (tupla com __slots__ vazio) e os
+valores de dimensão repetidos (líder, serviço, MEDIDA, MOD) passam por um
+dicionário compartilhado, de modo que cada texto distinto exista uma única
+vez na memória do worker.
+"""
+
+# Acima deste tamanho o dicionário é reiniciado para não crescer sem limite
+LIMITE_DIMENSOES = 100_000
+
+_dimensoes = {}
+
+
+class LinhaBoletim(tuple):
+    """(NOME_DO_LIDER, SERVIÇO, MEDIDA, MOD, PROJETO, total_producao, total_faturado)"""
+
+    __slots__ = ()
+
+
+def compactar_linhas(resultados):
+    """Converte as linhas do cursor em LinhaBoletim com dimensões internadas"""
+    if len(_dimensoes) > LIMITE_DIMENSOES:
+        _dimensoes.clear()
+
+    novo = tuple.__new__
+    dim = _dimensoes.setdefault
+    return [
+        novo(LinhaBoletim, (
+            dim(lider, lider),
+            dim(servico, servico),
+            dim(medida, medida),
+            dim(mod, mod),
+            dim(projeto, projeto),
+            producao,
+            faturado,
+        ))
+        for lider, servico, medida, mod, projeto, producao, faturado in resultados
+    ]
+
+
+def estatisticas_dimensoes():
+    """Quantidade de valores distintos mantidos no dicionário compartilhado"""
+    return {'valores_distintos': len(_dimensoes), 'limite': LIMITE_DIMENSOES}
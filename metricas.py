@@ -0,0 +1,57 @@
+"""
+Métricas em memória do worker (contadores, medidores e tempos).
+
+Cada worker do gunicorn mantém as suas; o endpoint /metricas devolve o
+retrato do worker que atendeu a requisição.
+"""
+
+import threading
+from collections import defaultdict, deque
+
+# Quantas amostras de tempo são mantidas por métrica
+AMOSTRAS_POR_TEMPO = 500
+
+_lock = threading.Lock()
+_contadores = defaultdict(int)
+_medidores = {}
+_tempos = defaultdict(lambda: deque(maxlen=AMOSTRAS_POR_TEMPO))
+
+
+def incrementar(nome, valor=1):
+    with _lock:
+        _contadores[nome] += valor
+
+
+def definir(nome, valor):
+    """Medidor: guarda o último valor informado"""
+    with _lock:
+        _medidores[nome] = valor
+
+
+def registrar_tempo(nome, segundos):
+    with _lock:
+        _tempos[nome].append(segundos)
+
+
+def _percentil(ordenados, fracao):
+    indice = min(len(ordenados) - 1, int(round(fracao * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def resumo():
+    """Retrato atual de todas as métricas"""
+    with _lock:
+        contadores = dict(_contadores)
+        medidores = dict(_medidores)
+        amostras = {nome: sorted(valores) for nome, valores in _tempos.items() if valores}
+
+    tempos = {}
+    for nome, ordenados in amostras.items():
+        tempos[nome] = {
+            'amostras': len(ordenados),
+            'media_ms': round(sum(ordenados) / len(ordenados) * 1000, 1),
+            'p50_ms': round(_percentil(ordenados, 0.5) * 1000, 1),
+            'p95_ms': round(_percentil(ordenados, 0.95) * 1000, 1),
+            'max_ms': round(ordenados[-1] * 1000, 1),
+        }
+    return {'contadores': contadores, 'medidores': medidores, 'tempos': tempos}
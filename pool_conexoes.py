@@ -0,0 +1,83 @@
+"""
+Pool simples de conexões pyodbc reaproveitadas entre requisições.
+
+Abrir uma conexão com o Azure SQL custa o handshake TLS + login a cada
+consulta; o pool mantém até `tamanho_maximo` conexões abertas e entrega cada
+uma a uma única thread por vez.
+"""
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolConexoes:
+    """Pool de conexões criado a partir de uma fábrica (ex.: conectar_db)"""
+
+    def __init__(self, fabrica, tamanho_maximo=4, tempo_ocioso_maximo=300, timeout_espera=30):
+        self.fabrica = fabrica
+        self.tamanho_maximo = tamanho_maximo
+        self.tempo_ocioso_maximo = tempo_ocioso_maximo
+        self.timeout_espera = timeout_espera
+        self._livres = queue.LifoQueue()
+        self._vagas = threading.BoundedSemaphore(tamanho_maximo)
+        self._lock = threading.Lock()
+        self._abertas = 0
+
+    def _descartar(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._abertas -= 1
+
+    def _pegar_livre(self):
+        """Conexão ociosa ainda válida, ou None"""
+        while True:
+            try:
+                conn, devolvida_em = self._livres.get_nowait()
+            except queue.Empty:
+                return None
+            if time.time() - devolvida_em <= self.tempo_ocioso_maximo:
+                return conn
+            self._descartar(conn)
+
+    @contextmanager
+    def obter(self):
+        """Empresta uma conexão; em caso de erro ela é descartada, não devolvida"""
+        if not self._vagas.acquire(timeout=self.timeout_espera):
+            raise TimeoutError("Pool de conexões esgotado")
+        conn = None
+        try:
+            conn = self._pegar_livre()
+            if conn is None:
+                conn = self.fabrica()
+                with self._lock:
+                    self._abertas += 1
+            yield conn
+        except Exception:
+            if conn is not None:
+                self._descartar(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._livres.put((conn, time.time()))
+            self._vagas.release()
+
+    def estatisticas(self):
+        return {
+            'abertas': self._abertas,
+            'ociosas': self._livres.qsize(),
+            'tamanho_maximo': self.tamanho_maximo,
+        }
+
+    def fechar_todas(self):
+        while True:
+            try:
+                conn, _ = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            self._descartar(conn)
@@ -0,0 +1,161 @@
+"""
+Pool de processos para trabalho de CPU fora do worker do gunicorn.
+
+A decodificação e a reamostragem de um áudio longo rodavam na thread do
+webhook e seguravam todas as outras mensagens que caíam no mesmo worker
+(sync). Aqui o trabalho vai para processos separados:
+
+- os processos são criados no primeiro uso (depois do fork do gunicorn) com
+  "spawn", que não herda threads nem conexões do worker;
+- a fila é limitada: com `processos` rodando e `fila` esperando, a próxima
+  tarefa é recusada na hora (FilaCheia) e o webhook responde sem esperar;
+- cada tarefa tem `timeout` segundos; estourado, quem pediu recebe
+  TempoEsgotado e, se a tarefa já estava rodando, os processos são
+  encerrados e recriados na próxima tarefa (um áudio travado não ocupa o
+  processo para sempre);
+- ocupação, profundidade da fila, esperas e recusas vão para metricas.
+
+Com processos=0 a tarefa roda na própria thread, como antes.
+"""
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as TimeoutFuturo
+from concurrent.futures.process import BrokenProcessPool
+
+import metricas
+
+
+class FilaCheia(Exception):
+    """Todos os processos ocupados e a fila no limite"""
+
+
+class TempoEsgotado(Exception):
+    """A tarefa não terminou dentro do timeout"""
+
+
+def _cronometrar(funcao, argumentos):
+    """Roda no processo filho: (início em epoch, duração, resultado)"""
+    inicio = time.time()
+    resultado = funcao(*argumentos)
+    return inicio, time.time() - inicio, resultado
+
+
+class PoolProcessos:
+    """ProcessPoolExecutor com fila limitada, timeout por tarefa e métricas com o prefixo `nome`"""
+
+    def __init__(self, nome, processos=1, fila=4, timeout=60):
+        self.nome = nome
+        self.processos = processos
+        self.fila = fila
+        self.timeout = timeout
+        self._vagas = threading.BoundedSemaphore(max(processos, 1) + fila)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pendentes = 0
+
+    def _obter_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.processos,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _publicar(self):
+        """Chamar com o lock: ocupação e fila atuais como medidores"""
+        ocupados = min(self._pendentes, max(self.processos, 1))
+        metricas.definir(f'{self.nome}_pool_ocupados', ocupados)
+        metricas.definir(f'{self.nome}_pool_fila', self._pendentes - ocupados)
+        metricas.definir(f'{self.nome}_pool_utilizacao', round(ocupados / max(self.processos, 1), 2))
+
+    def _entrar(self):
+        if not self._vagas.acquire(blocking=False):
+            metricas.incrementar(f'{self.nome}_pool_recusadas')
+            raise FilaCheia(f"Pool {self.nome}: {self.processos} processos ocupados e {self.fila} na fila")
+        with self._lock:
+            self._pendentes += 1
+            self._publicar()
+
+    def _sair(self, _futuro=None):
+        with self._lock:
+            self._pendentes -= 1
+            self._publicar()
+        self._vagas.release()
+
+    def _descartar_se_quebrado(self, executor):
+        with self._lock:
+            if self._executor is executor and getattr(executor, '_broken', False):
+                self._executor = None
+
+    def _reiniciar(self, executor):
+        """Encerra os processos de um executor com tarefa travada; o próximo uso cria outro"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        metricas.incrementar(f'{self.nome}_pool_reinicios')
+        # Os processos não são expostos pelo executor; sem eles, o shutdown esperaria a tarefa travada
+        for processo in list((getattr(executor, '_processes', None) or {}).values()):
+            try:
+                processo.terminate()
+            except Exception:
+                pass
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def executar(self, funcao, *argumentos):
+        """Resultado de funcao(*argumentos) num processo do pool (funcao precisa ser importável)"""
+        self._entrar()
+        metricas.incrementar(f'{self.nome}_pool_tarefas')
+        if self.processos <= 0:
+            try:
+                inicio = time.perf_counter()
+                resultado = funcao(*argumentos)
+                metricas.registrar_tempo(f'{self.nome}_pool_execucao', time.perf_counter() - inicio)
+                return resultado
+            finally:
+                self._sair()
+
+        executor = self._obter_executor()
+        enviado = time.time()
+        try:
+            futuro = executor.submit(_cronometrar, funcao, argumentos)
+        except Exception:
+            self._sair()
+            self._descartar_se_quebrado(executor)
+            raise
+        futuro.add_done_callback(self._sair)
+        try:
+            inicio, duracao, resultado = futuro.result(timeout=self.timeout)
+        except TimeoutFuturo:
+            metricas.incrementar(f'{self.nome}_pool_timeouts')
+            if not futuro.cancel():
+                self._reiniciar(executor)
+            raise TempoEsgotado(f"Pool {self.nome}: tarefa passou de {self.timeout} s") from None
+        except BrokenProcessPool:
+            # Processo morto (memória, reinício por timeout de outra tarefa): o próximo uso cria outro pool
+            metricas.incrementar(f'{self.nome}_pool_falhas')
+            self._descartar_se_quebrado(executor)
+            raise
+        except Exception:
+            metricas.incrementar(f'{self.nome}_pool_falhas')
+            raise
+        metricas.registrar_tempo(f'{self.nome}_pool_espera', max(0.0, inicio - enviado))
+        metricas.registrar_tempo(f'{self.nome}_pool_execucao', duracao)
+        return resultado
+
+    def estatisticas(self):
+        with self._lock:
+            ocupados = min(self._pendentes, max(self.processos, 1))
+            return {
+                'processos': self.processos,
+                'ocupados': ocupados,
+                'fila': self._pendentes - ocupados,
+                'limite_fila': self.fila,
+                'iniciado': self._executor is not None,
+            }
+
+    def encerrar(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
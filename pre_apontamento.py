@@ -2,10 +2,11 @@ import pyodbc
 import re
 import hashlib
 import os
-from openai import OpenAI
+import threading
 from datetime import datetime
 import json
 import pytz  # Para timezone de Brasília
+from renderizador_relatorio import formatar_moeda
 
 # Carregar variáveis de ambiente do arquivo .env
 try:
@@ -81,21 +82,27 @@ DB_PASSWORD = os.environ.get('DB_PASSWORD')
 
 # Configuração OpenAI
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
-client = None
+# O pacote openai leva ~0,5 s para importar: o cliente só é criado no primeiro
+# pré-apontamento, não no boot de cada worker (ver obter_cliente_openai)
+_cliente_openai = None
+_trava_cliente_openai = threading.Lock()
 
-print(f"[INIT] Inicializando cliente OpenAI...")
-print(f"[INIT] API Key presente: {'Sim' if OPENAI_API_KEY else 'Não'}")
+print(f"[INIT] API Key presente: {'Sim' if OPENAI_API_KEY else 'Não'} (cliente OpenAI criado no primeiro uso)")
 
-if OPENAI_API_KEY:
-    try:
-        from openai import OpenAI
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        print(f"[INIT] ✅ Cliente OpenAI configurado com sucesso")
-    except Exception as e:
-        print(f"[INIT] ❌ Erro ao configurar OpenAI: {e}")
-        client = None
-else:
-    print(f"[INIT] ❌ OPENAI_API_KEY não encontrada")
+def obter_cliente_openai():
+    """Cliente OpenAI, criado (e o pacote importado) na primeira chamada; None sem chave"""
+    global _cliente_openai
+    if _cliente_openai is None and OPENAI_API_KEY:
+        with _trava_cliente_openai:
+            if _cliente_openai is None:
+                print(f"[INIT] Inicializando cliente OpenAI...")
+                try:
+                    from openai import OpenAI
+                    _cliente_openai = OpenAI(api_key=OPENAI_API_KEY)
+                    print(f"[INIT] ✅ Cliente OpenAI configurado com sucesso")
+                except Exception as e:
+                    print(f"[INIT] ❌ Erro ao configurar OpenAI: {e}")
+    return _cliente_openai
 
 # Configurações Z-API para notificações
 INSTANCE_ID = os.environ.get('INSTANCE_ID')
@@ -386,6 +393,7 @@ def extrair_dados_com_openai(texto):
     try:
         print(f"[OPENAI] 🚀 Iniciando extração de dados...")
         
+        client = obter_cliente_openai()
         if not client:
             print(f"[OPENAI] ❌ Cliente OpenAI não configurado")
             return None
@@ -844,10 +852,10 @@ def enviar_notificacao_coordenador_texto(telefone_coord, dados_resumo, raw_id, t
 
         # Formatar valores
         valor_ganho = dados_resumo.get('valor_ganho')
-        valor_ganho_str = f"R$ {valor_ganho:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") if valor_ganho else "N/A"
+        valor_ganho_str = formatar_moeda(valor_ganho) if valor_ganho else "N/A"
         
         diaria_colaborador = dados_resumo.get('diaria_colaborador')
-        diaria_str = f"R$ {diaria_colaborador:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") if diaria_colaborador else "N/A"
+        diaria_str = formatar_moeda(diaria_colaborador) if diaria_colaborador else "N/A"
         
         # Formatar data
         data_execucao = dados_resumo.get('data_execucao', '')
@@ -940,10 +948,10 @@ def enviar_notificacao_coordenador(telefone_coord, dados_resumo, raw_id, telefon
         
         # Formatar valores monetários
         valor_ganho = dados_resumo.get('valor_ganho')
-        valor_ganho_str = f"R$ {valor_ganho:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") if valor_ganho else "N/A"
+        valor_ganho_str = formatar_moeda(valor_ganho) if valor_ganho else "N/A"
         
         diaria_colaborador = dados_resumo.get('diaria_colaborador')
-        diaria_str = f"R$ {diaria_colaborador:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") if diaria_colaborador else "N/A"
+        diaria_str = formatar_moeda(diaria_colaborador) if diaria_colaborador else "N/A"
         
         # Formatar data
         data_execucao = dados_resumo.get('data_execucao', '')
@@ -1051,7 +1059,7 @@ def processar_pre_apontamento(numero, texto):
         # 4. Extrair dados com OpenAI
         print(f"[PRE-APONT] Iniciando extração OpenAI...")
         print(f"[PRE-APONT] Verificando API Key: {OPENAI_API_KEY[:20] if OPENAI_API_KEY else 'NONE'}...")
-        print(f"[PRE-APONT] Cliente configurado: {'SIM' if client else 'NÃO'}")
+        print(f"[PRE-APONT] Cliente configurado: {'SIM' if obter_cliente_openai() else 'NÃO'}")
         print(f"[PRE-APONT] Texto para processar (primeiros 200 chars): {texto[:200]}...")
         
         dados_extraidos = extrair_dados_com_openai(texto)
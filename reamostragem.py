@@ -0,0 +1,82 @@
+"""
+Reamostragem polifásica em NumPy para o áudio dos comandos de voz.
+
+Os áudios do WhatsApp (OGG/Opus) são decodificados a 48 kHz e o
+reconhecimento usa 16 kHz: subir 1, descer 3. Em vez de filtrar o sinal
+inteiro e descartar 2 de cada 3 amostras, o filtro passa-baixa (sinc com
+janela de Kaiser, como o resample_poly do SciPy) é dividido em fases e cada
+fase é convolvida (np.convolve, em C) só com as amostras que contribuem para
+as saídas calculadas, em blocos. Para 48k -> 16k são 3 convoluções de 21
+coeficientes sobre um terço do sinal cada, sem copiar o sinal. Qualquer
+razão inteira funciona; razões com muitas fases (44,1k -> 16k) fazem mais
+chamadas pequenas, mas continuam lineares.
+"""
+
+import functools
+from math import gcd
+
+import numpy as np
+
+# Zeros do sinc de cada lado do filtro, na taxa mais baixa, e forma da janela de Kaiser
+ZEROS_FILTRO = 10
+BETA_KAISER = 5.0
+# Saídas calculadas por vez: limita os temporários em float64 a ~0,5 MB
+SAIDAS_POR_BLOCO = 65536
+
+
+@functools.lru_cache(maxsize=32)
+def filtro_polifasico(subir, descer):
+    """Coeficientes do passa-baixa para subir/descer (ganho `subir` na banda passante)"""
+    maior = max(subir, descer)
+    meio = ZEROS_FILTRO * maior
+    posicoes = np.arange(-meio, meio + 1)
+    filtro = np.sinc(posicoes / maior) * np.kaiser(2 * meio + 1, BETA_KAISER)
+    filtro *= subir / filtro.sum()
+    filtro.setflags(write=False)
+    return filtro
+
+
+def _trecho(amostras, inicio, passo, quantidade):
+    """amostras[inicio::passo][:quantidade], com zeros nas posições fora do sinal (só nas bordas)"""
+    fim = inicio + passo * (quantidade - 1)
+    if inicio >= 0 and fim < len(amostras):
+        return amostras[inicio:fim + 1:passo]
+    trecho = np.zeros(quantidade, dtype=amostras.dtype)
+    primeiro = max(0, -(-(-inicio) // passo))
+    ultimo = min(quantidade, (len(amostras) - 1 - inicio) // passo + 1)
+    if primeiro < ultimo:
+        trecho[primeiro:ultimo] = amostras[inicio + passo * primeiro:inicio + passo * (ultimo - 1) + 1:passo]
+    return trecho
+
+
+def reamostrar(amostras, taxa_origem, taxa_destino):
+    """Amostras (1D) convertidas de taxa_origem para taxa_destino Hz, no tipo de entrada"""
+    if taxa_origem == taxa_destino:
+        return amostras
+    divisor = gcd(taxa_origem, taxa_destino)
+    subir, descer = taxa_destino // divisor, taxa_origem // divisor
+    filtro = filtro_polifasico(subir, descer)
+    atraso = (len(filtro) - 1) // 2
+    quantidade = -(-len(amostras) * subir // descer)
+    saida = np.empty(quantidade, dtype=amostras.dtype)
+
+    # Saída n usa a posição n*descer + atraso do sinal "subido"; a fase é essa posição mod subir
+    inverso = pow(descer, -1, subir) if subir > 1 else 0
+    for fase in range(subir):
+        primeira = (fase - atraso) * inverso % subir
+        # Entrada da primeira saída desta fase; as seguintes avançam `descer` amostras
+        base = (primeira * descer + atraso - fase) // subir
+        coeficientes = filtro[fase::subir]
+        total = len(range(primeira, quantidade, subir))
+        for feitas in range(0, total, SAIDAS_POR_BLOCO):
+            bloco = min(SAIDAS_POR_BLOCO, total - feitas)
+            # Coeficiente j multiplica a entrada base - j; j = resto + descer * q separa as convoluções
+            acumulado = np.zeros(bloco, dtype=np.float64)
+            for resto in range(min(descer, len(coeficientes))):
+                sub_filtro = coeficientes[resto::descer]
+                recuo = len(sub_filtro) - 1
+                inicio = base + descer * (feitas - recuo) - resto
+                trecho = _trecho(amostras, inicio, descer, bloco + recuo)
+                acumulado += np.convolve(trecho, sub_filtro, mode='valid')
+            saida[primeira + subir * feitas:primeira + subir * (feitas + bloco):subir] = acumulado
+    return saida
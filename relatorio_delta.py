@@ -0,0 +1,79 @@
+"""
+Relatório de alterações: o que mudou desde a última consulta do usuário.
+
+Supervisores pedem "produção do dia" várias vezes por tarde só para
+acompanhar o andamento. Aqui fica guardado, por usuário, o retrato
+(líder/serviço -> produção, faturado) do último relatório de hoje que ele
+recebeu; o comando de alterações responde só com o que mudou desde então.
+
+Se BOLETIM_DIARIO tiver uma coluna de marca de alteração (rowversion ou
+data/hora da última gravação), basta informá-la em COLUNA_MARCA_ALTERACAO:
+quando MAX(marca) e COUNT(*) do dia não mudaram, a resposta sai sem ler as
+linhas do dia.
+"""
+
+import os
+import threading
+import time
+
+# Coluna de BOLETIM_DIARIO que muda a cada gravação (opcional)
+COLUNA_MARCA_ALTERACAO = os.environ.get('COLUNA_MARCA_ALTERACAO')
+
+
+def totais_por_servico(dados):
+    """{(projeto, líder, serviço): (produção, faturado, medida)} com os mesmos padrões do detalhado"""
+    totais = {}
+    for linha in dados:
+        chave = (str(linha[4]), linha[0] or "Sem Líder", linha[1] or "Sem Serviço")
+        producao = round(linha[5] or 0, 2)
+        faturado = round(linha[6] or 0, 2)
+        anterior = totais.get(chave)
+        if anterior:
+            producao += anterior[0]
+            faturado += anterior[1]
+        totais[chave] = (producao, faturado, linha[2] or "Un")
+    return totais
+
+
+def comparar(anteriores, atuais):
+    """Lista de (projeto, líder, serviço, medida, produção antes, agora, faturado antes, agora)
+    para os serviços que mudaram, entraram ou saíram, ordenada por projeto/líder/serviço"""
+    mudancas = []
+    for chave in anteriores.keys() | atuais.keys():
+        prod_antes, fat_antes, medida_antes = anteriores.get(chave, (0, 0, None))
+        prod_agora, fat_agora, medida_agora = atuais.get(chave, (0, 0, None))
+        if round(prod_antes - prod_agora, 2) or round(fat_antes - fat_agora, 2):
+            projeto, lider, servico = chave
+            mudancas.append((projeto, lider, servico, medida_agora or medida_antes,
+                             prod_antes, prod_agora, fat_antes, fat_agora))
+    mudancas.sort(key=lambda m: (m[0].casefold(), m[1].casefold(), m[2].casefold()))
+    return mudancas
+
+
+class InstantaneosUsuarios:
+    """Último retrato do dia entregue a cada usuário (memória do worker)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._por_usuario = {}
+
+    def registrar(self, numero, data, totais, marca=None):
+        with self._lock:
+            self._por_usuario[numero] = {
+                'data': data,
+                'totais': totais,
+                'marca': marca,
+                'registrado_em': time.time(),
+            }
+
+    def obter(self, numero, data):
+        """Retrato de `data` do usuário, ou None (retratos de outros dias não valem)"""
+        with self._lock:
+            instantaneo = self._por_usuario.get(numero)
+        if instantaneo and instantaneo['data'] == data:
+            return instantaneo
+        return None
+
+    def estatisticas(self):
+        with self._lock:
+            return {'usuarios': len(self._por_usuario), 'marca_alteracao': bool(COLUNA_MARCA_ALTERACAO)}
@@ -0,0 +1,234 @@
+"""
+Renderização das mensagens de relatório (resumo geral e detalhado).
+
+As mensagens são montadas com list + join em vez de `texto +=` e os valores
+usam um formato pré-definido para o pt-BR (duas trocas em vez das três
+str.replace anteriores). O resumo geral é idêntico, byte a byte, ao
+antigo formatar_resumo_geral; o detalhado sai em blocos por projeto com as
+mesmas linhas do antigo formatar_resumo_detalhado.
+"""
+
+import os
+from collections import defaultdict
+
+# Tamanho máximo (caracteres) de cada mensagem do detalhado em blocos
+TAMANHO_MAXIMO_BLOCO = int(os.environ.get('TAMANHO_MAXIMO_BLOCO', 4000))
+
+# ================== FORMATAÇÃO PT-BR ==================
+# Agrupamento com '_' evita o caractere temporário: duas trocas em vez de três.
+# Decimal não aceita '_', então cai na tabela de tradução.
+_TABELA_PT_BR = str.maketrans(',.', '.,')
+
+
+def formatar_numero(valor):
+    """1234.5 -> '1.234,50'"""
+    try:
+        return format(valor, '_.2f').replace('.', ',').replace('_', '.')
+    except ValueError:
+        return format(valor, ',.2f').translate(_TABELA_PT_BR)
+
+
+def formatar_moeda(valor):
+    """1234.5 -> 'R$ 1.234,50'"""
+    try:
+        return 'R$ ' + format(valor, '_.2f').replace('.', ',').replace('_', '.')
+    except ValueError:
+        return 'R$ ' + format(valor, ',.2f').translate(_TABELA_PT_BR)
+
+
+# ================== TEMPLATES ==================
+SEPARADOR_RESUMO = "---------------------------------------------\n"
+SEPARADOR_RANKING_PROJETO = "-----------------------------------------------\n"
+SEPARADOR_LIDER = "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
+SEPARADOR_TOTAL_LIDER = "═══════════════════════════════════\n\n"
+SEPARADOR_SERVICO = "_____________________\n"
+
+CABECALHO_GERAL = "📊 {titulo}\n\n🎯 RESUMO GERAL - {nome}\n\n"
+CABECALHO_DETALHADO = "📊 {titulo}\n\n🎯 RESUMO DETALHADO - {nome}\n\n"
+CABECALHO_ALTERACOES = "🔄 {titulo}\n\n🎯 ALTERAÇÕES DESDE AS {desde} - {nome}\n\n"
+TITULO_RANKING_SUPERVISOR = "🏆 RANKING FATURAMENTO POR SUPERVISOR\n"
+TITULO_RANKING_PROJETO = "🏆 RANKING FATURAMENTO POR PROJETO\n"
+TITULO_AGRUPADO_SERVICO = "***AGRUPADO POR SERVIÇO***\n"
+
+_MEDALHAS = ("🥇", "🥈", "🥉")
+
+
+def emoji_posicao(posicao):
+    """Medalha para o pódio, 'Nº' para as demais posições"""
+    if posicao <= 3:
+        return _MEDALHAS[posicao - 1]
+    return f"{posicao}º"
+
+
+def _linhas_servico(partes, servico, producao, faturado, medida):
+    partes.append(
+        f"{servico}\n"
+        f"📊 Produção: {formatar_numero(producao)} {medida}\n"
+        f"💰 Faturado: {formatar_moeda(faturado)}\n"
+        f"{SEPARADOR_SERVICO}"
+    )
+
+
+# ================== RESUMO GERAL ==================
+def montar_resumo_geral(titulo_data, nome_usuario, corpo):
+    """Cabeçalho do usuário + corpo já renderizado (único trecho que depende de quem pediu)"""
+    return (CABECALHO_GERAL.format(titulo=titulo_data, nome=nome_usuario) + corpo).strip()
+
+
+def renderizar_corpo_resumo_geral(resumo_projetos, projetos_modalidade, classes_info, supervisores_ranking):
+    """Resumo geral sem o cabeçalho: igual para todos os usuários com os mesmos projetos"""
+    partes = []
+    adicionar = partes.append
+
+    total_faturado = sum(proj['faturado'] for proj in resumo_projetos.values())
+    adicionar(f"💰 Faturado Total: {formatar_moeda(total_faturado)}\n")
+
+    modalidades_totais = defaultdict(lambda: {'producao': 0, 'faturado': 0})
+    for mods in projetos_modalidade.values():
+        for mod, dados_mod in mods.items():
+            modalidades_totais[mod]['producao'] += dados_mod['producao']
+            modalidades_totais[mod]['faturado'] += dados_mod['faturado']
+
+    for mod, tot in modalidades_totais.items():
+        adicionar(f"{mod}: {formatar_numero(tot['producao'])} | {formatar_moeda(tot['faturado'])}\n")
+
+    adicionar(SEPARADOR_RESUMO)
+
+    total_colabs = sum(sum(cl.values()) for cl in classes_info.values())
+    adicionar(f"👤Colaboradores: {total_colabs}\n")
+    todas_classes = defaultdict(int)
+    for classes in classes_info.values():
+        for classe, qtd in classes.items():
+            todas_classes[classe] += qtd
+    for classe, qtd in todas_classes.items():
+        adicionar(f"👤 {classe}: {qtd}\n")
+
+    adicionar(SEPARADOR_RESUMO)
+
+    if supervisores_ranking:
+        adicionar(TITULO_RANKING_SUPERVISOR)
+        for posicao, (supervisor, faturado) in enumerate(supervisores_ranking, 1):
+            adicionar(f"{emoji_posicao(posicao)} {supervisor} - {formatar_moeda(faturado)}\n")
+
+    adicionar(SEPARADOR_RANKING_PROJETO)
+
+    if resumo_projetos:
+        adicionar(TITULO_RANKING_PROJETO)
+        projetos_ordenados = sorted(
+            resumo_projetos.items(),
+            key=lambda x: x[1]['faturado'],
+            reverse=True
+        )
+        posicao = 1
+        for projeto, dados_proj in projetos_ordenados:
+            if dados_proj['faturado'] > 0:
+                adicionar(f"{emoji_posicao(posicao)} {projeto} - {formatar_moeda(dados_proj['faturado'])}\n")
+                posicao += 1
+
+    return ''.join(partes)
+
+
+# ================== RESUMO DETALHADO EM BLOCOS ==================
+def _secoes_do_projeto(projeto, lideres, servicos):
+    """Trechos (líderes e serviços) de um projeto, com as mesmas linhas do antigo detalhado em mensagem única"""
+    yield f"🏗 PROJETO {projeto} - RESUMO POR LÍDER\n"
+    for dados_lider in lideres:
+        nome_lider = dados_lider['nome']
+        partes = [f"👷 {nome_lider}\n{SEPARADOR_LIDER}"]
+        total_lider_producao = 0
+        total_lider_faturado = 0
+        total_lider_medida = ""
+        for servico, dados_servico in dados_lider['servicos'].items():
+            total_lider_producao += dados_servico['producao']
+            total_lider_faturado += dados_servico['faturado']
+            total_lider_medida = dados_servico['medida']
+            _linhas_servico(partes, servico, dados_servico['producao'], dados_servico['faturado'],
+                            dados_servico['medida'])
+        partes.append(
+            f"🏆 TOTAL {nome_lider}:\n"
+            f"📊 Produção: {formatar_numero(total_lider_producao)} {total_lider_medida}\n"
+            f"💰 Faturado: {formatar_moeda(total_lider_faturado)}\n"
+            f"{SEPARADOR_TOTAL_LIDER}"
+        )
+        yield ''.join(partes)
+
+    yield f"{TITULO_AGRUPADO_SERVICO}PROJETO {projeto}\n"
+    for servico, dados in servicos.items():
+        partes = []
+        _linhas_servico(partes, servico, dados['producao'], dados['faturado'], dados['medida'])
+        yield partes[0]
+
+
+def secoes_detalhadas(lideres_detalhado, servicos_por_projeto):
+    """Trechos do detalhado agrupados por projeto, sem cabeçalho (gerados projeto a projeto)"""
+    lideres_por_projeto = {}
+    for dados_lider in lideres_detalhado.values():
+        lideres_por_projeto.setdefault(dados_lider['projeto'], []).append(dados_lider)
+    projetos = list(lideres_por_projeto)
+    projetos += [p for p in servicos_por_projeto if p not in lideres_por_projeto]
+
+    for projeto in projetos:
+        yield list(_secoes_do_projeto(projeto, lideres_por_projeto.get(projeto, []),
+                                      servicos_por_projeto.get(projeto, {})))
+
+
+def empacotar_blocos(titulo_data, nome_usuario, secoes, tamanho_maximo=TAMANHO_MAXIMO_BLOCO):
+    """Junta o cabeçalho do usuário e os trechos de cada projeto em mensagens de até `tamanho_maximo`"""
+    cabecalho = CABECALHO_DETALHADO.format(titulo=titulo_data, nome=nome_usuario)
+    atual = [cabecalho]
+    tamanho_atual = len(cabecalho)
+    so_cabecalho = True
+    for trechos in secoes:
+        for trecho in trechos:
+            if atual and not so_cabecalho and tamanho_atual + len(trecho) > tamanho_maximo:
+                yield ''.join(atual).strip()
+                atual, tamanho_atual = [], 0
+            atual.append(trecho)
+            tamanho_atual += len(trecho)
+            so_cabecalho = False
+
+        # Cada projeto fecha a sua mensagem
+        yield ''.join(atual).strip()
+        atual, tamanho_atual = [], 0
+
+    # Sem projetos: cabeçalho e título do agrupado, como no antigo detalhado vazio
+    if so_cabecalho:
+        yield (cabecalho + TITULO_AGRUPADO_SERVICO).strip()
+
+
+# ================== ALTERAÇÕES DESDE A ÚLTIMA CONSULTA ==================
+def _variacao(antes, agora, formatar):
+    diferenca = agora - antes
+    sinal = '+' if diferenca >= 0 else '-'
+    return f"{formatar(antes)} → {formatar(agora)} ({sinal}{formatar(abs(diferenca))})"
+
+
+def renderizar_alteracoes(titulo_data, nome_usuario, desde, mudancas):
+    """Só os líderes/serviços que mudaram (ver relatorio_delta.comparar)"""
+    partes = [CABECALHO_ALTERACOES.format(titulo=titulo_data, desde=desde, nome=nome_usuario)]
+    adicionar = partes.append
+
+    if not mudancas:
+        adicionar("✅ Nenhuma alteração de produção ou faturamento.")
+        return ''.join(partes).strip()
+
+    projeto_atual = lider_atual = None
+    variacao_faturado = 0
+    for projeto, lider, servico, medida, prod_antes, prod_agora, fat_antes, fat_agora in mudancas:
+        if projeto != projeto_atual:
+            projeto_atual, lider_atual = projeto, None
+            adicionar(f"🏗 PROJETO {projeto}\n")
+        if lider != lider_atual:
+            lider_atual = lider
+            adicionar(f"👷 {lider}\n{SEPARADOR_LIDER}")
+        adicionar(
+            f"{servico}\n"
+            f"📊 Produção: {_variacao(prod_antes, prod_agora, formatar_numero)} {medida}\n"
+            f"💰 Faturado: {_variacao(fat_antes, fat_agora, formatar_moeda)}\n"
+            f"{SEPARADOR_SERVICO}"
+        )
+        variacao_faturado += fat_agora - fat_antes
+
+    sinal = '+' if variacao_faturado >= 0 else '-'
+    adicionar(f"\n💰 Variação do faturado: {sinal}{formatar_moeda(abs(variacao_faturado))}\n")
+    return ''.join(partes).strip()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste de equivalência do motor de agregação NumPy (agregacao_numpy.py,
+opcional via MOTOR_AGREGACAO=numpy) com a agregação Python
+(bot_final.agrupar_dados_python): mesmas chaves, mesma ordem de inserção e
+mesmas somas em dados sintéticos e nos casos de borda (nulos, arredondamento
+em meio centavo, projetos numéricos e texto, modalidades a normalizar), e o
+retorno para a agregação Python quando o NumPy recusa a entrada (Decimal).
+A leitura colunar (colunas_numpy.ler_colunas + agrupar_colunas_numpy) é
+conferida contra o mesmo resultado, lendo o cursor em vários lotes.
+"""
+
+import contextlib
+import io
+import random
+import sys
+from decimal import Decimal
+
+import bot_final
+from agregacao_numpy import agrupar_colunas_numpy, agrupar_dados_numpy
+from benchmark_agregacao import estrutura, gerar_linhas
+from benchmark_colunar import CursorFalso
+from bot_final import agrupar_dados_python, normalizar_modalidade
+from colunas_numpy import ler_colunas
+
+CASOS_DE_BORDA = {
+    "Vazio": [],
+    "Uma linha": [("Ana", "Plantio", "Ha", "MEC", 202, 1.5, 150.0)],
+    "Nulos em todas as colunas": [(None, None, None, None, 202, None, None), ("Ana", None, "Ha", None, 202, 2, None)],
+    "Meio centavo": [("Ana", "Plantio", "Ha", "MEC", 202, v, v * 100) for v in (0.005, 0.015, 0.125, 2.675, 1.005, -0.005)],
+    "Projetos número e texto": [("Ana", "Plantio", "Ha", "MEC", 202, 1, 10.0), ("Ana", "Plantio", "Ha", "MEC", "202", 2, 20.0),
+                                ("Bia", "Capina", "Ha", "man", "150", 3, 30.0)],
+    "Modalidades a normalizar": [("Ana", "Plantio", "Ha", m, 202, 1, 10.0)
+                                 for m in ("MEC", "mec", "mecânica", " Man ", "manual", "APO", "drone", "outro", "", None)],
+    "Mesmo serviço com medidas diferentes": [("Ana", "Plantio", "Ha", "MEC", 202, 1, 10.0),
+                                             ("Bia", "Plantio", "Un", "MEC", 202, 2, 20.0)],
+}
+
+
+def main():
+    print("=== TESTE MOTOR DE AGREGAÇÃO NUMPY ===")
+    falhas = 0
+
+    def conferir(condicao, descricao):
+        nonlocal falhas
+        print(f"{'✅' if condicao else '❌'} {descricao}")
+        falhas += not condicao
+
+    for nome, linhas in CASOS_DE_BORDA.items():
+        conferir(estrutura(agrupar_dados_numpy(linhas, normalizar_modalidade)) == estrutura(agrupar_dados_python(linhas)),
+                 f"{nome}: saídas idênticas")
+
+    aleatorio = random.Random(26)
+    divergentes = []
+    for semente in range(40):
+        linhas = gerar_linhas(aleatorio.choice([1, 10, 100, 1000, 5000]), semente=semente)
+        if estrutura(agrupar_dados_numpy(linhas, normalizar_modalidade)) != estrutura(agrupar_dados_python(linhas)):
+            divergentes.append(semente)
+    conferir(not divergentes, f"40 conjuntos sintéticos idênticos (divergentes: {divergentes})")
+
+    linhas = gerar_linhas(100_000, semente=7)
+    conferir(estrutura(agrupar_dados_numpy(linhas, normalizar_modalidade)) == estrutura(agrupar_dados_python(linhas)),
+             "100k linhas idênticas")
+
+    # Leitura colunar em lotes de 700 linhas (NULL numérico vira 0 na leitura)
+    for nome in ("Uma linha", "Meio centavo", "Projetos número e texto", "Modalidades a normalizar"):
+        linhas = CASOS_DE_BORDA[nome]
+        colunas = ler_colunas(CursorFalso(linhas), 700, colunas_texto=('PROJETO',))
+        conferir(estrutura(agrupar_colunas_numpy(colunas, normalizar_modalidade)) == estrutura(agrupar_dados_python(linhas)),
+                 f"Colunar, {nome}: saídas idênticas")
+    linhas = [l[:5] + (l[5] or 0.0, l[6]) for l in gerar_linhas(5000, semente=11)]
+    colunas = ler_colunas(CursorFalso(linhas), 700, colunas_texto=('PROJETO',))
+    conferir(len(colunas) == 5000 and colunas.linhas() == [l[:5] + (float(l[5]), float(l[6])) for l in linhas],
+             "Colunar: 5000 linhas em 8 lotes voltam iguais")
+    conferir(estrutura(agrupar_colunas_numpy(colunas, normalizar_modalidade)) == estrutura(agrupar_dados_python(linhas)),
+             "Colunar: 5000 linhas agregadas idênticas")
+    conferir(agrupar_colunas_numpy(ler_colunas(CursorFalso([])), normalizar_modalidade) == ({}, {}, {}, {}),
+             "Colunar: cursor vazio")
+
+    # Pelo seletor do bot: numpy quando pedido, Python quando o NumPy recusa a entrada
+    bot_final.MOTOR_AGREGACAO = 'numpy'
+    linhas = gerar_linhas(2000, semente=3)
+    conferir(estrutura(bot_final.agrupar_dados_completo(linhas)) == estrutura(agrupar_dados_python(linhas)),
+             "agrupar_dados_completo com MOTOR_AGREGACAO=numpy")
+    decimais = [("Ana", "Plantio", "Ha", "MEC", 202, Decimal("1.005"), Decimal("100.50"))]
+    with contextlib.redirect_stdout(io.StringIO()) as saida:
+        resultado = bot_final.agrupar_dados_completo(decimais)
+    conferir(estrutura(resultado) == estrutura(agrupar_dados_python(decimais)) and "usando agregação Python" in saida.getvalue(),
+             "Decimal: volta para a agregação Python")
+    bot_final.MOTOR_AGREGACAO = 'python'
+
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
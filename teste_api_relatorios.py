@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do endpoint GET /api/producao (bot_final + api_relatorios) pelo
+cliente de teste do Flask: API desligada sem API_TOKEN (503), token ausente
+ou errado (401), parâmetros inválidos (400), 200 com o JSON dos agregados,
+304 com If-None-Match (ETag igual para as duas representações), gzip quando
+aceito e nova versão quando as linhas mudam.
+
+As linhas de BOLETIM_DIARIO são simuladas; o banco não é consultado.
+"""
+
+import gzip
+import json
+import sys
+
+import api_relatorios
+import bot_final
+
+TOKEN = "segredo-de-teste"
+URL = "/api/producao?projetos=202,150&data=2025-01-15"
+
+# (líder, serviço, medida, modalidade, projeto, produção, faturado), como na consulta dos relatórios
+LINHAS = [
+    ("Ana", "Plantio", "Ha", "MEC", 202, 10.5, 1050.0),
+    ("Ana", "Capina", "Ha", "man", 202, 4.0, 200.0),
+    ("Bruno", "Plantio", "Ha", "MEC", 150, 7.25, 725.0),
+] + [(f"Líder {i}", f"Serviço {i % 7}", "Ha", "apo", 150, i, i * 10.0) for i in range(60)]
+
+
+def main():
+    print("=== TESTE API DE PRODUÇÃO ===")
+    falhas = 0
+
+    def conferir(condicao, descricao):
+        nonlocal falhas
+        print(f"{'✅' if condicao else '❌'} {descricao}")
+        falhas += not condicao
+
+    linhas_atuais = {'linhas': LINHAS}
+    consultas = []
+
+    def obter_linhas_simuladas(projetos, data_inicio, data_fim):
+        consultas.append((tuple(projetos), data_inicio, data_fim))
+        return linhas_atuais['linhas']
+
+    bot_final.obter_linhas_api = obter_linhas_simuladas
+    cliente = bot_final.app.test_client()
+    autorizacao = {'Authorization': f'Bearer {TOKEN}'}
+
+    api_relatorios.API_TOKEN = None
+    resposta = cliente.get(URL, headers=autorizacao)
+    conferir(resposta.status_code == 503 and not consultas, "Sem API_TOKEN a API fica desligada (503)")
+
+    api_relatorios.API_TOKEN = TOKEN
+    conferir(cliente.get(URL).status_code == 401, "Sem token: 401")
+    conferir(cliente.get(URL, headers={'Authorization': 'Bearer errado'}).status_code == 401, "Token errado: 401")
+    conferir(cliente.get(URL + "&token=errado").status_code == 401, "?token= errado: 401")
+    conferir(not consultas, "Requisições recusadas não consultam o banco")
+
+    conferir(cliente.get("/api/producao?data=2025-01-15", headers=autorizacao).status_code == 400,
+             "Sem projetos: 400")
+    conferir(cliente.get("/api/producao?projetos=202&inicio=2025-02-01&fim=2025-01-01",
+                         headers=autorizacao).status_code == 400, "Fim antes do início: 400")
+
+    resposta = cliente.get(URL, headers=autorizacao)
+    corpo = json.loads(resposta.data)
+    etag = resposta.headers.get('ETag')
+    faturado = round(sum(linha[6] for linha in LINHAS), 2)
+    conferir(resposta.status_code == 200 and resposta.content_type.startswith('application/json')
+             and 'Content-Encoding' not in resposta.headers, "200 com JSON sem gzip quando não pedido")
+    conferir(corpo['faturado_total'] == faturado and {p['projeto'] for p in corpo['projetos']} == {'202', '150'}
+             and corpo['periodo'] == {'inicio': '2025-01-15', 'fim': '2025-01-15'},
+             f"Agregados corretos (faturado {corpo['faturado_total']})")
+    conferir(cliente.get(URL + f"&token={TOKEN}").status_code == 200, "?token= certo: 200")
+
+    resposta = cliente.get(URL, headers={**autorizacao, 'If-None-Match': etag})
+    conferir(resposta.status_code == 304 and not resposta.data and resposta.headers.get('ETag') == etag,
+             "If-None-Match com o ETag: 304 sem corpo")
+
+    resposta = cliente.get(URL, headers={**autorizacao, 'Accept-Encoding': 'gzip, deflate'})
+    etag_gzip = resposta.headers.get('ETag')
+    conferir(resposta.status_code == 200 and resposta.headers.get('Content-Encoding') == 'gzip'
+             and json.loads(gzip.decompress(resposta.data)) == corpo
+             and 'Accept-Encoding' in resposta.headers.get('Vary', ''),
+             f"gzip quando aceito ({len(resposta.data)} de {len(json.dumps(corpo).encode())} bytes)")
+    conferir(etag_gzip != etag and cliente.get(URL, headers={**autorizacao, 'If-None-Match': etag_gzip}).status_code == 304,
+             "ETag da versão gzip também dá 304")
+
+    linhas_atuais['linhas'] = LINHAS + [("Ana", "Plantio", "Ha", "MEC", 202, 1.0, 100.0)]
+    resposta = cliente.get(URL, headers={**autorizacao, 'If-None-Match': etag})
+    conferir(resposta.status_code == 200 and resposta.headers.get('ETag') != etag
+             and json.loads(resposta.data)['faturado_total'] == round(faturado + 100.0, 2),
+             "Linhas mudaram: ETag antigo recebe 200 com a versão nova")
+
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do áudio em memória (audio_memoria.converter_audio).
+
+Gera áudios OGG/Opus sintéticos (como os do WhatsApp) e confere que:
+- com REAMOSTRADOR_AUDIO=librosa e sem o corte de silêncios, o
+  sr.AudioData entregue ao reconhecedor tem exatamente as amostras que o
+  caminho antigo lia do WAV temporário;
+- o filtro polifásico (reamostragem.py) dá o mesmo resultado do
+  scipy.signal.resample_poly e, na faixa da voz, o mesmo do librosa;
+- nenhum arquivo é criado e áudios convertidos ao mesmo tempo não se misturam.
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import librosa
+import numpy as np
+import soundfile as sf
+import speech_recognition as sr
+
+import audio_memoria
+from audio_memoria import converter_audio, decodificar_audio
+from reamostragem import reamostrar
+
+try:
+    from scipy.signal import resample_poly
+except ImportError:
+    resample_poly = None
+
+
+def gerar_ogg(segundos, frequencia, taxa=48000, semente=0, ruido=0.05):
+    """Bytes de um OGG/Opus mono com um tom modulado e ruído"""
+    t = np.arange(int(segundos * taxa)) / taxa
+    aleatorio = np.random.default_rng(semente).standard_normal(len(t))
+    amostras = 0.6 * np.sin(2 * np.pi * frequencia * t) * np.sin(2 * np.pi * 0.7 * t) + ruido * aleatorio
+    buffer = io.BytesIO()
+    sf.write(buffer, amostras.astype('float32'), taxa, format='OGG', subtype='OPUS')
+    return buffer.getvalue()
+
+
+def relacao_sinal_erro(referencia, obtido):
+    """dB entre a energia da referência e a da diferença"""
+    return 10 * np.log10(np.sum(referencia.astype('float64') ** 2) / np.sum((referencia - obtido) ** 2.0))
+
+
+def testar_reamostragem():
+    falhas = 0
+    aleatorio = np.random.default_rng(45)
+    razoes = ((48000, 16000), (8000, 16000), (44100, 16000), (22050, 16000), (32000, 16000), (24000, 16000))
+    if resample_poly is not None:
+        maior_erro = 0.0
+        for quantidade in (1, 2, 7, 100, 4801, 48000):
+            sinal = aleatorio.standard_normal(quantidade).astype('float32')
+            for origem, destino in razoes:
+                subir, descer = destino // np.gcd(origem, destino), origem // np.gcd(origem, destino)
+                esperado = resample_poly(sinal.astype('float64'), subir, descer, window=('kaiser', 5.0))
+                obtido = reamostrar(sinal, origem, destino)
+                if len(obtido) != len(esperado) or obtido.dtype != sinal.dtype:
+                    maior_erro = float('inf')
+                    break
+                maior_erro = max(maior_erro, float(np.max(np.abs(obtido - esperado))))
+        igual = maior_erro < 1e-5
+        print(f"{'✅' if igual else '❌'} Polifásico = scipy resample_poly em {len(razoes)} razões "
+              f"(erro máximo {maior_erro:.1e})")
+        falhas += not igual
+    else:
+        print("⚠️ SciPy ausente: comparação com resample_poly ignorada")
+
+    # Faixa da voz: tons abaixo de 4 kHz devem sair iguais aos do librosa
+    if audio_memoria.librosa is not None:
+        conteudo = gerar_ogg(5, 300, ruido=0.0)
+        audio_memoria.REAMOSTRADOR_AUDIO = 'librosa'
+        referencia = decodificar_audio(conteudo)
+        audio_memoria.REAMOSTRADOR_AUDIO = 'numpy'
+        obtido = decodificar_audio(conteudo)
+        db = relacao_sinal_erro(referencia, obtido) if len(obtido) == len(referencia) else 0.0
+        print(f"{'✅' if db > 50 else '❌'} Voz (tom de 300 Hz): polifásico x librosa {db:.1f} dB")
+        falhas += db <= 50
+    return falhas
+
+
+def converter_audio_legado(conteudo, pasta):
+    """Caminho antigo (arquivos .ogg e .wav), sem o sleep, lido como em transcrever_com_speech_recognition"""
+    nome_arquivo = os.path.join(pasta, f"temp_audio_{int(time.time())}")
+    caminho_ogg = f"{nome_arquivo}.ogg"
+    with open(caminho_ogg, 'wb') as f:
+        f.write(conteudo)
+    audio_data, sample_rate = librosa.load(caminho_ogg, sr=16000)
+    caminho_wav = f"{nome_arquivo}.wav"
+    sf.write(caminho_wav, audio_data, sample_rate)
+    os.remove(caminho_ogg)
+    with sr.AudioFile(caminho_wav) as source:
+        audio = sr.Recognizer().record(source)
+    os.remove(caminho_wav)
+    return audio
+
+
+def main():
+    print("=== TESTE ÁUDIO EM MEMÓRIA ===")
+    falhas = 0
+    audios = [gerar_ogg(segundos, 220 + 110 * i, semente=i) for i, segundos in enumerate((1, 5, 30))]
+
+    audio_memoria.REAMOSTRADOR_AUDIO = 'librosa'
+    with tempfile.TemporaryDirectory() as pasta:
+        for conteudo in audios:
+            esperado = converter_audio_legado(conteudo, pasta)
+            obtido = converter_audio(conteudo, recortar=False)
+            identico = (obtido.frame_data == esperado.frame_data and obtido.sample_rate == esperado.sample_rate
+                        and obtido.sample_width == esperado.sample_width)
+            segundos = len(obtido.frame_data) / obtido.sample_width / obtido.sample_rate
+            print(f"{'✅' if identico else '❌'} {segundos:4.1f} s (librosa): amostras "
+                  f"{'idênticas' if identico else 'DIFERENTES'} ao WAV temporário")
+            falhas += not identico
+    audio_memoria.REAMOSTRADOR_AUDIO = 'numpy'
+
+    falhas += testar_reamostragem()
+
+    antes = set(os.listdir('.'))
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        concorrentes = list(executor.map(converter_audio, audios * 4))
+    novos = set(os.listdir('.')) - antes
+    separados = all(a.frame_data == converter_audio(c).frame_data for a, c in zip(concorrentes, audios * 4))
+    print(f"{'✅' if separados else '❌'} {len(concorrentes)} conversões simultâneas sem mistura")
+    print(f"{'✅' if not novos else '❌'} Nenhum arquivo criado no diretório de trabalho {sorted(novos) or ''}")
+    falhas += (not separados) + bool(novos)
+
+    try:
+        converter_audio(b"isto nao e audio")
+        print("❌ Bytes inválidos deveriam gerar erro")
+        falhas += 1
+    except Exception as e:
+        print(f"✅ Bytes inválidos geram erro ({type(e).__name__})")
+
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do cache de COLABORADORES por classe (cache_dimensoes.py): mesmo
+formato de obter_colaboradores_por_classe, impressão digital conferida no
+máximo a cada INTERVALO_VERIFICACAO_DIMENSOES, recarga só quando ela muda
+ou a carga vence, invalidar(), uma única recarga com várias threads ao
+mesmo tempo e nenhuma consulta além de COLABORADORES.
+
+O banco é simulado por um pool falso; nada vai para o SQL Server.
+"""
+
+import contextlib
+import sys
+import threading
+import time
+
+import cache_dimensoes
+from cache_dimensoes import CacheDimensoes
+
+
+class BancoSimulado:
+    """Tabela COLABORADORES em memória com as duas consultas do cache"""
+
+    def __init__(self, colaboradores, demora=0.0):
+        self.colaboradores = colaboradores
+        self.demora = demora
+        self.consultas = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def obter(self):
+        yield self
+
+    def cursor(self):
+        return CursorSimulado(self)
+
+
+class CursorSimulado:
+    def __init__(self, banco):
+        self.banco = banco
+
+    def execute(self, query, parametros=None):
+        banco = self.banco
+        with banco._lock:
+            banco.consultas.append(query)
+        time.sleep(banco.demora)
+        if 'CHECKSUM_AGG' in query:
+            self._linhas = [(len(banco.colaboradores), hash(tuple(banco.colaboradores)))]
+            return
+        contagem = {}
+        for projeto, classe in banco.colaboradores:
+            if classe is not None and classe not in parametros:
+                contagem[(projeto, classe)] = contagem.get((projeto, classe), 0) + 1
+        self._linhas = [(projeto, classe, qtd) for (projeto, classe), qtd in sorted(contagem.items())]
+
+    def fetchone(self):
+        return self._linhas[0]
+
+    def fetchall(self):
+        return self._linhas
+
+
+def main():
+    print("=== TESTE CACHE DE DIMENSÕES ===")
+    falhas = 0
+
+    def conferir(condicao, descricao):
+        nonlocal falhas
+        print(f"{'✅' if condicao else '❌'} {descricao}")
+        falhas += not condicao
+
+    colaboradores = ([('202', 'AJUDANTE')] * 5 + [('202', 'OPERADOR')] * 2 + [('202', 'ADM')] * 3
+                     + [('150', 'AJUDANTE')] * 4 + [('150', None)] + [('150', 'COF')] + [('830', 'MOTORISTA')])
+    banco = BancoSimulado(list(colaboradores))
+    cache = CacheDimensoes(banco)
+
+    classes = cache.classes_por_projeto([202, '150'])
+    conferir(classes == {'202': {'AJUDANTE': 5, 'OPERADOR': 2}, '150': {'AJUDANTE': 4}},
+             f"Formato de obter_colaboradores_por_classe, sem ADM/COF/nulos {classes}")
+    conferir(cache.recargas == 1 and cache.verificacoes == 1, "Primeira chamada carrega a tabela")
+    conferir(all('COLABORADORES' in q and 'BOLETIM_DIARIO' not in q for q in banco.consultas),
+             f"Só COLABORADORES é consultada ({len(banco.consultas)} consultas)")
+
+    for _ in range(50):
+        cache.classes_por_projeto(['202'])
+    conferir(len(banco.consultas) == 2, "Dentro do intervalo as chamadas não vão ao banco")
+
+    # Intervalo vencido sem mudança: só a impressão digital é lida
+    cache_dimensoes.INTERVALO_VERIFICACAO_DIMENSOES = 0
+    cache.classes_por_projeto(['202'])
+    conferir(cache.verificacoes == 2 and cache.recargas == 1, "Tabela igual: confere a impressão e não recarrega")
+
+    banco.colaboradores.append(('202', 'OPERADOR'))
+    conferir(cache.classes_por_projeto(['202'])['202']['OPERADOR'] == 3 and cache.recargas == 2,
+             "Tabela mudou: recarrega e devolve a contagem nova")
+
+    cache_dimensoes.VALIDADE_MAXIMA_DIMENSOES = 0
+    time.sleep(0.01)
+    cache.classes_por_projeto(['202'])
+    conferir(cache.recargas == 3, "Carga vencida recarrega mesmo sem mudança")
+    cache_dimensoes.VALIDADE_MAXIMA_DIMENSOES = 3600
+
+    cache_dimensoes.INTERVALO_VERIFICACAO_DIMENSOES = 600
+    cache.invalidar()
+    cache.classes_por_projeto(['202'])
+    conferir(cache.recargas == 4, "invalidar() força a recarga na chamada seguinte")
+
+    # Várias threads no primeiro acesso: uma recarga só
+    lento = BancoSimulado(list(colaboradores), demora=0.1)
+    cache_lento = CacheDimensoes(lento)
+    resultados = []
+    threads = [threading.Thread(target=lambda: resultados.append(cache_lento.classes_por_projeto(['830'])))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    conferir(cache_lento.recargas == 1 and len(lento.consultas) == 2
+             and resultados == [{'830': {'MOTORISTA': 1}}] * 8, "8 threads ao mesmo tempo: uma recarga só")
+
+    estatisticas = cache.estatisticas()
+    conferir(estatisticas['classes_projeto'] == 4 and estatisticas['recargas'] == 4, f"Estatísticas {estatisticas}")
+
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
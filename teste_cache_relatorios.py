@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste dos caches de relatório (cache_relatorios.py + bot_final):
+o import de bot_final não sobe a thread de pré-aquecimento; ela só sobe por
+iniciar_tarefas_de_fundo (hook do gunicorn.conf.py ou __main__), uma por
+processo; CacheLinhasDia guarda os agregados de cada projeto junto com as
+linhas, e a mescla deles é igual a agrupar as linhas do dia de uma vez; os
+relatórios compartilhados são guardados por (projetos, período, versão das
+linhas), sem as linhas na chave, e a versão só muda quando as linhas mudam;
+quem espera um cálculo igual travado desiste em espera_maxima e calcula.
+
+O banco é simulado; nada vai para o SQL Server.
+"""
+
+import runpy
+import sys
+import threading
+import time
+
+import bot_final
+import cache_relatorios
+import metricas
+from benchmark_agregacao import estrutura, gerar_linhas
+from cache_relatorios import CacheCompartilhado, CacheLinhasDia, LinhasRelatorio
+from consultas_periodo import chave_ordenacao_sql
+
+
+def threads_preaquecimento():
+    return [t for t in threading.enumerate() if t.name == 'preaquecimento']
+
+
+class BancoDia:
+    """Linhas do dia por projeto, devolvidas na ordem do ORDER BY PROJETO, NOME_DO_LIDER, SERVIÇO"""
+
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.consultas = []
+
+    def consultar(self, projetos, data):
+        self.consultas.append((tuple(projetos), data))
+        filtro = {str(p) for p in projetos}
+        return ordenar([linha for linha in self.linhas if str(linha[4]) in filtro])
+
+
+def ordenar(linhas):
+    return sorted(linhas, key=lambda l: (chave_ordenacao_sql(l[4]), chave_ordenacao_sql(l[0]),
+                                         chave_ordenacao_sql(l[1])))
+
+
+def main():
+    print("=== TESTE CACHES DE RELATÓRIO ===")
+    falhas = 0
+
+    def conferir(condicao, descricao):
+        nonlocal falhas
+        print(f"{'✅' if condicao else '❌'} {descricao}")
+        falhas += not condicao
+
+    conferir(not threads_preaquecimento(), "Importar bot_final não sobe o pré-aquecimento")
+
+    # Agregados guardados por projeto e mesclados na requisição
+    linhas = gerar_linhas(20000)
+    projetos = sorted({str(l[4]) for l in linhas})
+    banco = BancoDia(linhas)
+    chamadas_agrupar = []
+
+    def agrupar_contando(linhas_projeto):
+        chamadas_agrupar.append(len(linhas_projeto))
+        return bot_final.agrupar_dados_completo(linhas_projeto)
+
+    cache = CacheLinhasDia(banco.consultar, validade=60, agrupar=agrupar_contando)
+    pedidos = projetos[:10] + ['999999']
+    dia = cache.obter(pedidos, '2025-01-15')
+    esperadas = banco.consultar(pedidos, '2025-01-15')
+    conferir(isinstance(dia, LinhasRelatorio) and list(dia) == esperadas, f"Linhas na ordem da consulta ({len(dia)})")
+    conferir(len(dia.agregados) == 10 and len(chamadas_agrupar) == 10,
+             "Um agregado por projeto com linhas, calculado ao guardar")
+    mesclado = bot_final.agrupar_dados_completo(dia)
+    conferir(estrutura(mesclado) == estrutura(bot_final.agrupar_dados_python(esperadas)),
+             "Mescla dos agregados = agrupar as linhas do dia de uma vez (valores e ordem)")
+
+    consultas_antes = len(banco.consultas)
+    de_novo = cache.obter(list(reversed(pedidos)), '2025-01-15')
+    conferir(len(banco.consultas) == consultas_antes and len(chamadas_agrupar) == 10 and list(de_novo) == esperadas,
+             "Acerto de cache: sem consulta e sem reagrupar")
+    um = cache.obter([projetos[3]], '2025-01-15')
+    conferir(estrutura(bot_final.agrupar_dados_completo(um))
+             == estrutura(bot_final.agrupar_dados_python(banco.consultar([projetos[3]], '2025-01-15'))),
+             "Projeto único usa o agregado guardado")
+    vazio = cache.obter(['999999'], '2025-01-15')
+    conferir(vazio == [] and bot_final.agrupar_dados_completo(vazio) == ({}, {}, {}, {}), "Projeto sem linhas")
+
+    primeiro = next(l[4] for l in linhas if str(l[4]) == projetos[0])
+    banco.linhas = banco.linhas + [("LIDER NOVO", "SERVIÇO 001", "Ha", "MEC", primeiro, 5, 500.0)]
+    cache.aquecer([projetos[0]], '2025-01-15')
+    atualizado = bot_final.agrupar_dados_completo(cache.obter([projetos[0]], '2025-01-15'))
+    conferir(f"{projetos[0]}_LIDER NOVO" in atualizado[2], "aquecer() recalcula os agregados do projeto")
+
+    # Versão dos dados: igual enquanto as linhas não mudam
+    versao = cache.obter(pedidos, '2025-01-15').versao
+    chamadas_antes = len(chamadas_agrupar)
+    cache.aquecer(pedidos, '2025-01-15')
+    conferir(cache.obter(pedidos, '2025-01-15').versao == versao and len(chamadas_agrupar) == chamadas_antes,
+             "Pré-aquecimento sem mudança mantém a versão e não reagrupa")
+    banco.linhas = banco.linhas + [("LIDER NOVO", "SERVIÇO 002", "Ha", "MEC", primeiro, 1, 10.0)]
+    cache.aquecer(pedidos, '2025-01-15')
+    nova = cache.obter(pedidos, '2025-01-15').versao
+    conferir(nova != versao and len(chamadas_agrupar) == chamadas_antes + 1,
+             "Linhas mudaram num projeto: versão nova e só ele é reagrupado")
+    conferir(cache.obter(pedidos[:2], '2025-01-15').versao != nova, "Projetos diferentes, versões diferentes")
+
+    # Resumo compartilhado por (projetos, período, versão)
+    calculos = []
+    bot_final.obter_nome_usuario = lambda numero: f"Usuário {numero[-1]}"
+    bot_final.obter_projetos_usuario = lambda numero: list(reversed(pedidos)) if numero.endswith('2') else pedidos
+    bot_final.calcular_corpo_resumo_geral = lambda dados, projetos, inicio=None, fim=None: calculos.append(1) or "CORPO"
+    compartilhado = bot_final.cache_relatorios_compartilhados
+    dia = cache.obter(pedidos, '2025-01-15')
+    r1 = bot_final.formatar_resumo_geral(dia, "5511000000001", "HOJE")
+    r2 = bot_final.formatar_resumo_geral(cache.obter(pedidos, '2025-01-15'), "5511000000002", "HOJE")
+    conferir(len(calculos) == 1 and "Usuário 1" in r1 and "Usuário 2" in r2,
+             "Mesmos projetos e mesma versão: um cálculo, cabeçalho por usuário")
+    chaves = list(compartilhado._entradas)
+    conferir(all(len(repr(chave)) < 2000 for chave in chaves), f"Chaves sem as linhas ({len(repr(chaves[-1]))} caracteres)")
+    banco.linhas = banco.linhas + [("LIDER NOVO", "SERVIÇO 003", "Ha", "MEC", primeiro, 1, 10.0)]
+    cache.aquecer(pedidos, '2025-01-15')
+    bot_final.formatar_resumo_geral(cache.obter(pedidos, '2025-01-15'), "5511000000001", "HOJE")
+    conferir(len(calculos) == 2, "Linhas mudaram: resumo recalculado")
+    bot_final.formatar_resumo_geral(list(dia), "5511000000001", "HOJE")
+    bot_final.formatar_resumo_geral(list(dia), "5511000000001", "HOJE")
+    conferir(len(calculos) == 4 and len(compartilhado._entradas) == len(chaves) + 1,
+             "Linhas sem versão são calculadas sem cache")
+
+    # Período: versão nova a cada consulta, compartilhada enquanto a consulta está no cache
+    consultas_periodo = []
+    bot_final.consultar_linhas_periodo = lambda p, i, f: consultas_periodo.append(1) or banco.consultar(p, i)
+    p1 = bot_final.obter_linhas_periodo_compartilhadas(pedidos, '2025-01-01', '2025-01-31')
+    p2 = bot_final.obter_linhas_periodo_compartilhadas(list(reversed(pedidos)), '2025-01-01', '2025-01-31')
+    conferir(len(consultas_periodo) == 1 and p1.versao == p2.versao and list(p1) == list(p2),
+             "Período: uma consulta, mesma versão para os mesmos projetos")
+    outro = bot_final.obter_linhas_periodo_compartilhadas(pedidos, '2025-02-01', '2025-02-28')
+    conferir(outro.versao != p1.versao, "Outro período, outra versão")
+
+    # Cálculo igual travado: quem espera desiste em espera_maxima e calcula sozinho
+    travado = CacheCompartilhado('teste_espera', validade=60, espera_maxima=0.3)
+    liberar = threading.Event()
+    primeiro_calculo = threading.Thread(target=lambda: travado.obter('chave', lambda: liberar.wait(10) and "LENTO"))
+    primeiro_calculo.start()
+    time.sleep(0.1)
+    inicio = time.monotonic()
+    valor = travado.obter('chave', lambda: "LOCAL")
+    decorrido = time.monotonic() - inicio
+    conferir(valor == "LOCAL" and decorrido < 1, f"Espera esgotada: calcula localmente em {decorrido:.2f}s")
+    conferir(metricas.resumo()['contadores'].get('teste_espera_esperas_esgotadas') == 1, "Espera esgotada contada")
+    liberar.set()
+    primeiro_calculo.join()
+    conferir(travado.obter('chave', lambda: "OUTRO") == "LENTO", "O cálculo original ainda é guardado")
+
+    # Pré-aquecimento só por chamada explícita, uma thread por processo
+    aquecidos = threading.Event()
+
+    def consultar_dia(projetos_pedidos, data):
+        aquecidos.set()
+        return []
+
+    cache_relatorios.em_horario_de_trabalho = lambda agora=None: True
+    bot_final.listar_projetos_ativos = lambda: ['202', '150']
+    bot_final.cache_linhas_dia.consultar = consultar_dia
+    hook = runpy.run_path('gunicorn.conf.py')['post_worker_init']
+    hook(None)
+    conferir(aquecidos.wait(5) and len(threads_preaquecimento()) == 1,
+             "post_worker_init do gunicorn.conf.py sobe o pré-aquecimento")
+    bot_final.iniciar_tarefas_de_fundo()
+    hook(None)
+    time.sleep(0.1)
+    conferir(len(threads_preaquecimento()) == 1, "Chamadas repetidas não criam outra thread")
+
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
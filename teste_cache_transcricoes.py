@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do cache de transcrições (cache_transcricoes.CacheTranscricoes):
+caminho rápido pela URL, acerto pelo conteúdo com outra URL, limite LRU,
+falhas não guardadas, reentregas simultâneas transcritas uma vez só (e,
+com a transcrição original travada, transcritas localmente depois de
+espera_maxima) e o disco compartilhado entre duas instâncias (dois workers), com poda.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cache_transcricoes
+import metricas
+from cache_transcricoes import CacheTranscricoes
+
+
+class Transcritor:
+    """Conta as chamadas, como a conversão + STT que o cache deve evitar"""
+
+    def __init__(self, texto="produção de ontem", demora=0.0):
+        self.texto = texto
+        self.demora = demora
+        self.chamadas = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.chamadas += 1
+        time.sleep(self.demora)
+        return self.texto
+
+
+def main():
+    print("=== TESTE CACHE DE TRANSCRIÇÕES ===")
+    falhas = 0
+
+    def conferir(condicao, descricao):
+        nonlocal falhas
+        print(f"{'✅' if condicao else '❌'} {descricao}")
+        falhas += not condicao
+
+    audio = b"OggS" + bytes(range(256)) * 40
+    cache = CacheTranscricoes(limite=3)
+    stt = Transcritor()
+
+    conferir(cache.por_url("https://z-api/a1.ogg") is None, "URL nova não está no cache")
+    conferir(cache.obter("https://z-api/a1.ogg", audio, stt) == "produção de ontem" and stt.chamadas == 1,
+             "Primeira vez transcreve")
+    conferir(cache.por_url("https://z-api/a1.ogg") == "produção de ontem", "Reentrega sai pela URL, sem baixar")
+    conferir(cache.obter("https://z-api/encaminhado.ogg", audio, stt) == "produção de ontem" and stt.chamadas == 1,
+             "Encaminhamento (outra URL, mesmo conteúdo) não transcreve de novo")
+    conferir(cache.por_url("https://z-api/encaminhado.ogg") == "produção de ontem",
+             "URL do encaminhamento passa a ter caminho rápido")
+
+    for i in range(5):
+        cache.obter(f"https://z-api/outro{i}.ogg", audio + bytes([i]), Transcritor(f"texto {i}"))
+    estatisticas = cache.estatisticas()
+    conferir(estatisticas['por_conteudo'] == 3 and estatisticas['por_url'] == 3, f"Limite LRU respeitado {estatisticas}")
+    conferir(cache.por_url("https://z-api/a1.ogg") is None, "Entrada mais antiga saiu do cache")
+
+    falha = Transcritor(texto=None)
+    cache.obter("https://z-api/falha.ogg", b"falha", falha)
+    cache.obter("https://z-api/falha.ogg", b"falha", falha)
+    conferir(falha.chamadas == 2 and cache.por_url("https://z-api/falha.ogg") is None, "Falha (None) não é guardada")
+    mudo = Transcritor(texto="")
+    cache.obter("https://z-api/mudo.ogg", b"mudo", mudo)
+    conferir(cache.por_url("https://z-api/mudo.ogg") == "", "Áudio sem fala ('') é guardado")
+
+    lento = Transcritor(demora=0.2)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        textos = list(executor.map(lambda i: cache.obter(f"https://z-api/reentrega{i}.ogg", b"igual", lento), range(8)))
+    conferir(lento.chamadas == 1 and set(textos) == {"produção de ontem"},
+             f"8 reentregas simultâneas, {lento.chamadas} transcrição")
+
+    # Transcrição travada: a reentrega desiste de esperar e transcreve por conta própria
+    travar = threading.Event()
+    travado = Transcritor()
+
+    def transcrever_travado():
+        travar.wait(10)
+        return travado()
+
+    cache_espera = CacheTranscricoes(espera_maxima=0.3)
+    primeira = threading.Thread(target=cache_espera.obter, args=("https://z-api/travado.ogg", b"travado", transcrever_travado))
+    primeira.start()
+    time.sleep(0.05)
+    esgotadas = metricas.resumo()['contadores'].get('cache_transcricao_esperas_esgotadas', 0)
+    inicio = time.time()
+    texto = cache_espera.obter("https://z-api/travado2.ogg", b"travado", stt)
+    conferir(texto == "produção de ontem" and time.time() - inicio < 2
+             and metricas.resumo()['contadores'].get('cache_transcricao_esperas_esgotadas', 0) == esgotadas + 1,
+             f"Transcrição travada: reentrega transcreve sozinha em {time.time() - inicio:.2f}s")
+    conferir(cache_espera.por_url("https://z-api/travado2.ogg") == "produção de ontem",
+             "Transcrição local depois da espera fica no cache")
+    travar.set()
+    primeira.join(5)
+    conferir(not primeira.is_alive() and cache_espera.estatisticas()['em_transcricao'] == 0,
+             "Transcrição travada termina e libera a chave")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        worker_1 = CacheTranscricoes(diretorio=pasta)
+        worker_2 = CacheTranscricoes(diretorio=pasta)
+        stt_disco = Transcritor()
+        worker_1.obter("https://z-api/d.ogg", audio, stt_disco)
+        conferir(worker_2.por_url("https://z-api/d.ogg") == "produção de ontem", "Outro worker acha a URL no disco")
+        conferir(worker_2.obter("https://z-api/d2.ogg", audio, stt_disco) == "produção de ontem"
+                 and stt_disco.chamadas == 1, "Outro worker acha o conteúdo no disco")
+        conferir(not [n for n in os.listdir(pasta) if n.endswith('.tmp')], "Sem temporários no disco")
+
+        cache_transcricoes.PODA_A_CADA_GRAVACOES = 5
+        pequeno = CacheTranscricoes(diretorio=pasta, limite_disco=6)
+        for i in range(10):
+            pequeno.obter(f"https://z-api/p{i}.ogg", bytes([i]) * 10, Transcritor(f"p{i}"))
+        arquivos = len(os.listdir(pasta))
+        conferir(arquivos <= 6 + 2 * (cache_transcricoes.PODA_A_CADA_GRAVACOES - 1),
+                 f"Disco podado ({arquivos} arquivos)")
+
+    contadores = metricas.resumo()['contadores']
+    print(f"📊 {dict((k, v) for k, v in sorted(contadores.items()) if k.startswith('cache_transcricao'))}")
+    conferir(contadores.get('cache_transcricao_acertos_url', 0) >= 3
+             and contadores.get('cache_transcricao_acertos_conteudo', 0) >= 2
+             and contadores.get('cache_transcricao_acertos_disco', 0) >= 2
+             and contadores.get('cache_transcricao_esperas', 0) >= 1, "Métricas de acertos, faltas e esperas")
+
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
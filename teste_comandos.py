@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste de regressão da gramática de comandos (comandos.interpretar_comando).
+
+Compara com uma cópia congelada da cascata de regex original de
+processar_comando_audio: um corpus de frases reais/típicas e frases
+geradas combinando os pedaços de todos os padrões (prefixos, dias, meses,
+datas numéricas, conectivos, palavras-chave). Os resultados
+(comando, parametro) têm de ser idênticos. As datas relativas, que a
+cascata não conhecia, são conferidas contra resultados fixos.
+"""
+
+import contextlib
+import io
+import random
+import re
+import sys
+from datetime import date, datetime
+
+import comandos
+from comandos import interpretar_comando, resolver_periodo
+from correcao_fala import ORDINAIS, aproximar, corrigir_transcricao
+
+
+def processar_comando_legado(texto):
+    """Cópia congelada da cascata de regex original de bot_final (referência)"""
+    texto = texto.lower().strip()
+    
+    # "exportar [projeto N] 01/08 a 31/08 [csv|excel]": arquivo do período como documento
+    padrao_exportar = r'exportar\s+(?:(?:do\s+)?projeto\s+(\d+)\s+)?(?:de\s+)?(\d{1,2})/(\d{1,2})(?:/(\d{4}))?\s*(?:a|até)\s*(\d{1,2})/(\d{1,2})(?:/(\d{4}))?'
+    match_exportar = re.search(padrao_exportar, texto)
+    if match_exportar:
+        projeto, dia_i, mes_i, ano_i, dia_f, mes_f, ano_f = match_exportar.groups()
+        ano_atual = str(datetime.now().year)
+        periodo = f"{dia_i.zfill(2)}/{mes_i.zfill(2)}/{ano_i or ano_atual} A {dia_f.zfill(2)}/{mes_f.zfill(2)}/{ano_f or ano_atual}"
+        formato = 'csv' if re.search(r'\bcsv\b', texto) else ('xlsx' if re.search(r'\b(?:excel|xlsx|planilha)\b', texto) else '')
+        print(f"[DEBUG] ✅ EXPORTAÇÃO DETECTADA: projeto {projeto or 'todos'}, {periodo} {formato}")
+        return "exportar", f"{projeto or ''}|{periodo}|{formato}"
+    
+    # "o que mudou" / "alterações" / "novidades": só o que mudou desde a última consulta de hoje
+    if re.search(r'\b(?:o\s+que\s+mudou|altera[cç][oõ]es|novidades)\b', texto):
+        print(f"[DEBUG] ✅ ALTERAÇÕES DETECTADO")
+        return "alteracoes_hoje", None
+    
+    # NOVO PADRÃO CORRIGIDO: "produção do projeto X do dia Y a Z de mês"
+    padrao_projeto_periodo_completo = r'(?:produção|producao|faturamento)\s+(?:do\s+)?projeto\s+(\d+)\s+(?:do\s+)?dia\s+(\d{1,2})\s*(?:a|até)\s*(\d{1,2})\s*de\s*(julho|jul|janeiro|jan|fevereiro|fev|março|mar|abril|abr|maio|mai|junho|jun|agosto|ago|setembro|set|outubro|out|novembro|nov|dezembro|dez)'
+    match_projeto_periodo_completo = re.search(padrao_projeto_periodo_completo, texto)
+    
+    if match_projeto_periodo_completo:
+        projeto = match_projeto_periodo_completo.group(1)
+        dia_inicio = match_projeto_periodo_completo.group(2).zfill(2)
+        dia_fim = match_projeto_periodo_completo.group(3).zfill(2)
+        mes_nome = match_projeto_periodo_completo.group(4).lower()
+        
+        meses = {
+            'janeiro': '01', 'jan': '01', 'fevereiro': '02', 'fev': '02', 
+            'março': '03', 'mar': '03', 'abril': '04', 'abr': '04',
+            'maio': '05', 'mai': '05', 'junho': '06', 'jun': '06',
+            'julho': '07', 'jul': '07', 'agosto': '08', 'ago': '08',
+            'setembro': '09', 'set': '09', 'outubro': '10', 'out': '10',
+            'novembro': '11', 'nov': '11', 'dezembro': '12', 'dez': '12'
+        }
+        
+        mes = meses.get(mes_nome, '07')
+        ano = str(datetime.now().year)
+        
+        data_inicio = f"{dia_inicio}/{mes}/{ano}"
+        data_fim = f"{dia_fim}/{mes}/{ano}"
+        
+        print(f"[DEBUG] ✅ PROJETO PERÍODO DETECTADO: Projeto {projeto}, {data_inicio} a {data_fim}")
+        return "projeto_periodo", f"{projeto}|{data_inicio} A {data_fim}"
+    
+    # PADRÃO CORRIGIDO: "produção do projeto X dia Y de mês" (data única)
+    padrao_projeto_data_unica = r'(?:produção|producao|faturamento)\s+(?:do\s+)?projeto\s+(\d+)\s+(?:do\s+)?dia\s+(\d{1,2})\s*de\s*(julho|jul|janeiro|jan|fevereiro|fev|março|mar|abril|abr|maio|mai|junho|jun|agosto|ago|setembro|set|outubro|out|novembro|nov|dezembro|dez)'
+    match_projeto_data_unica = re.search(padrao_projeto_data_unica, texto)
+    
+    if match_projeto_data_unica:
+        projeto = match_projeto_data_unica.group(1)
+        dia = match_projeto_data_unica.group(2).zfill(2)
+        mes_nome = match_projeto_data_unica.group(3).lower()
+        
+        meses = {
+            'janeiro': '01', 'jan': '01', 'fevereiro': '02', 'fev': '02', 
+            'março': '03', 'mar': '03', 'abril': '04', 'abr': '04',
+            'maio': '05', 'mai': '05', 'junho': '06', 'jun': '06',
+            'julho': '07', 'jul': '07', 'agosto': '08', 'ago': '08',
+            'setembro': '09', 'set': '09', 'outubro': '10', 'out': '10',
+            'novembro': '11', 'nov': '11', 'dezembro': '12', 'dez': '12'
+        }
+        
+        mes = meses.get(mes_nome, '07')
+        ano = str(datetime.now().year)
+        data_br = f"{dia}/{mes}/{ano}"
+        
+        print(f"[DEBUG] ✅ PROJETO DATA ÚNICA DETECTADO: Projeto {projeto}, {data_br}")
+        return "projeto_periodo", f"{projeto}|{data_br} A {data_br}"
+    
+    # NOVO: Padrão para projeto específico com data numérica SIMPLES
+    padrao_projeto_data_simples = r'(?:produção|producao|faturamento)\s+(?:do\s+)?projeto\s+(\d+)\s+(\d{1,2})[/](\d{1,2})(?:[/](\d{4}))?'
+    match_projeto_data_simples = re.search(padrao_projeto_data_simples, texto)
+    
+    if match_projeto_data_simples:
+        projeto = match_projeto_data_simples.group(1)
+        dia = match_projeto_data_simples.group(2).zfill(2)
+        mes = match_projeto_data_simples.group(3).zfill(2)
+        ano = match_projeto_data_simples.group(4) if match_projeto_data_simples.group(4) else str(datetime.now().year)
+        
+        data_br = f"{dia}/{mes}/{ano}"
+        
+        print(f"[DEBUG] ✅ PROJETO DATA NUMÉRICA DETECTADO: Projeto {projeto}, {data_br}")
+        return "projeto_periodo", f"{projeto}|{data_br} A {data_br}"
+    
+    # Padrão para projeto específico com data numérica (PERÍODO)
+    padrao_projeto_numerico = r'(?:produção|producao|faturamento)\s+(?:do\s+)?projeto\s+(\d+)\s+(\d{1,2})[/-](\d{1,2})(?:[/-](\d{4}))?\s*(?:a|até)\s*(\d{1,2})[/-](\d{1,2})(?:[/-](\d{4}))?'
+    match_projeto_numerico = re.search(padrao_projeto_numerico, texto)
+    
+    if match_projeto_numerico:
+        projeto = match_projeto_numerico.group(1)
+        dia_inicio = match_projeto_numerico.group(2).zfill(2)
+        mes_inicio = match_projeto_numerico.group(3).zfill(2)
+        ano_inicio = match_projeto_numerico.group(4) if match_projeto_numerico.group(4) else str(datetime.now().year)
+        dia_fim = match_projeto_numerico.group(5).zfill(2)
+        mes_fim = match_projeto_numerico.group(6).zfill(2)
+        ano_fim = match_projeto_numerico.group(7) if match_projeto_numerico.group(7) else ano_inicio
+        
+        data_inicio = f"{dia_inicio}/{mes_inicio}/{ano_inicio}"
+        data_fim = f"{dia_fim}/{mes_fim}/{ano_fim}"
+        
+        try:
+            data_inicio_dt = datetime.strptime(data_inicio, '%d/%m/%Y')
+            data_fim_dt = datetime.strptime(data_fim, '%d/%m/%Y')
+            if data_fim_dt < data_inicio_dt:
+                return "invalido", "Data final anterior à data inicial"
+        except ValueError:
+            return "invalido", "Formato de data inválido"
+        
+        return "projeto_periodo", f"{projeto}|{data_inicio} A {data_fim}"
+    
+    # Padrão para projeto específico com período
+    padrao_projeto_periodo = r'(?:produção|producao|faturamento)\s+(?:do\s+)?projeto\s+(\d+)\s+(?:dia\s+)?(\d{1,2})\s*(?:a|até|de)\s*(\d{1,2})\s*de\s*(julho|jul|janeiro|jan|fevereiro|fev|março|mar|abril|abr|maio|mai|junho|jun|agosto|ago|setembro|set|outubro|out|novembro|nov|dezembro|dez)'
+    match_projeto_periodo = re.search(padrao_projeto_periodo, texto)
+    
+    if match_projeto_periodo:
+        projeto = match_projeto_periodo.group(1)
+        dia_inicio = match_projeto_periodo.group(2).zfill(2)
+        dia_fim = match_projeto_periodo.group(3).zfill(2)
+        mes_nome = match_projeto_periodo.group(4).lower()
+        
+        meses = {
+            'janeiro': '01', 'jan': '01', 'fevereiro': '02', 'fev': '02', 
+            'março': '03', 'mar': '03', 'abril': '04', 'abr': '04',
+            'maio': '05', 'mai': '05', 'junho': '06', 'jun': '06',
+            'julho': '07', 'jul': '07', 'agosto': '08', 'ago': '08',
+            'setembro': '09', 'set': '09', 'outubro': '10', 'out': '10',
+            'novembro': '11', 'nov': '11', 'dezembro': '12', 'dez': '12'
+        }
+        
+        mes = meses.get(mes_nome, '07')
+        ano = str(datetime.now().year)
+        
+        data_inicio = f"{dia_inicio}/{mes}/{ano}"
+        data_fim = f"{dia_fim}/{mes}/{ano}"
+        
+        return "projeto_periodo", f"{projeto}|{data_inicio} A {data_fim}"
+    
+    # Padrão para projeto específico hoje
+    padrao_projeto_hoje = r'(?:produção|producao|faturamento)\s+(?:do\s+)?projeto\s+(\d+)\s+(?:do\s+dia|hoje)'
+    match_projeto_hoje = re.search(padrao_projeto_hoje, texto)
+    
+    if match_projeto_hoje:
+        projeto = match_projeto_hoje.group(1)
+        return "projeto_hoje", projeto
+    
+    # Padrão para projeto específico em data específica
+    padrao_projeto_data = r'(?:produção|producao|faturamento)\s+(?:do\s+)?projeto\s+(\d+)\s+(?:dia\s+)?(\d{1,2})\s*de\s*(julho|jul|janeiro|jan|fevereiro|fev|março|mar|abril|abr|maio|mai|junho|jun|agosto|ago|setembro|set|outubro|out|novembro|nov|dezembro|dez)'
+    match_projeto_data = re.search(padrao_projeto_data, texto)
+    
+    if match_projeto_data:
+        projeto = match_projeto_data.group(1)
+        dia = match_projeto_data.group(2).zfill(2)
+        mes_nome = match_projeto_data.group(3).lower()
+        
+        meses = {
+            'janeiro': '01', 'jan': '01', 'fevereiro': '02', 'fev': '02', 
+            'março': '03', 'mar': '03', 'abril': '04', 'abr': '04',
+            'maio': '05', 'mai': '05', 'junho': '06', 'jun': '06',
+            'julho': '07', 'jul': '07', 'agosto': '08', 'ago': '08',
+            'setembro': '09', 'set': '09', 'outubro': '10', 'out': '10',
+            'novembro': '11', 'nov': '11', 'dezembro': '12', 'dez': '12'
+        }
+        
+        mes = meses.get(mes_nome, '07')
+        ano = str(datetime.now().year)
+        data_br = f"{dia}/{mes}/{ano}"
+        
+        return "projeto_periodo", f"{projeto}|{data_br} A {data_br}"
+    
+    # Padrão para "do dia" com data específica (TODOS OS PROJETOS)
+    padrao_dia_especifico = r'(?:produção|producao|faturamento)\s+do\s+dia\s+(\d{1,2})[/](\d{1,2})(?:[/](\d{4}))?'
+    match_dia_especifico = re.search(padrao_dia_especifico, texto)
+    
+    if match_dia_especifico:
+        dia = match_dia_especifico.group(1).zfill(2)
+        mes = match_dia_especifico.group(2).zfill(2)
+        ano = match_dia_especifico.group(3) if match_dia_especifico.group(3) else str(datetime.now().year)
+        data_br = f"{dia}/{mes}/{ano}"
+        periodo = f"{data_br} A {data_br}"
+        return "periodo", periodo
+    
+    # Padrões originais (sem projeto específico)
+    padrao_periodo = r'(\d{1,2})\s*(?:a|até|de)\s*(\d{1,2})\s*de\s*(julho|jul|janeiro|jan|fevereiro|fev|março|mar|abril|abr|maio|mai|junho|jun|agosto|ago|setembro|set|outubro|out|novembro|nov|dezembro|dez)'
+    match_periodo = re.search(padrao_periodo, texto)
+    
+    if match_periodo:
+        dia_inicio = match_periodo.group(1).zfill(2)
+        dia_fim = match_periodo.group(2).zfill(2)
+        mes_nome = match_periodo.group(3).lower()
+        
+        meses = {
+            'janeiro': '01', 'jan': '01', 'fevereiro': '02', 'fev': '02', 
+            'março': '03', 'mar': '03', 'abril': '04', 'abr': '04',
+            'maio': '05', 'mai': '05', 'junho': '06', 'jun': '06',
+            'julho': '07', 'jul': '07', 'agosto': '08', 'ago': '08',
+            'setembro': '09', 'set': '09', 'outubro': '10', 'out': '10',
+            'novembro': '11', 'nov': '11', 'dezembro': '12', 'dez': '12'
+        }
+        
+        mes = meses.get(mes_nome, '07')
+        ano = str(datetime.now().year)
+        
+        data_inicio = f"{dia_inicio}/{mes}/{ano}"
+        data_fim = f"{dia_fim}/{mes}/{ano}"
+        
+        return "periodo", f"{data_inicio} A {data_fim}"
+    
+    # Padrão original para datas numéricas (TODOS OS PROJETOS)
+    padrao_data = r'(\d{1,2})[/-](\d{1,2})(?:[/-](\d{4}))?\s*(?:a|até)\s*(\d{1,2})[/-](\d{1,2})(?:[/-](\d{4}))?'
+    match_data = re.search(padrao_data, texto)
+    if match_data:
+        dia_inicio = match_data.group(1).zfill(2)
+        mes_inicio = match_data.group(2).zfill(2)
+        ano_inicio = match_data.group(3) if match_data.group(3) else str(datetime.now().year)
+        dia_fim = match_data.group(4).zfill(2)
+        mes_fim = match_data.group(5).zfill(2)
+        ano_fim = match_data.group(6) if match_data.group(6) else str(datetime.now().year)
+        
+        data_inicio = f"{dia_inicio}/{mes_inicio}/{ano_inicio}"
+        data_fim = f"{dia_fim}/{mes_fim}/{ano_fim}"
+        periodo = f"{data_inicio} A {data_fim}"
+        return "periodo", periodo
+    
+    # Padrão para data única numérica (TODOS OS PROJETOS)
+    padrao_data_unica = r'(\d{1,2})[/-](\d{1,2})(?:[/-](\d{4}))?'
+    match_data_unica = re.search(padrao_data_unica, texto)
+    if match_data_unica:
+        dia = match_data_unica.group(1).zfill(2)
+        mes = match_data_unica.group(2).zfill(2)
+        ano = match_data_unica.group(3) if match_data_unica.group(3) else str(datetime.now().year)
+        data_br = f"{dia}/{mes}/{ano}"
+        periodo = f"{data_br} A {data_br}"
+        return "periodo", periodo
+    
+    if any(palavra in texto for palavra in ["produção", "producao", "produzido"]):
+        return "producao_hoje", None
+    elif any(palavra in texto for palavra in ["faturado", "faturamento"]):
+        return "faturado_hoje", None
+    elif any(palavra in texto for palavra in ["oi", "olá", "menu"]):
+        return "menu", None
+    else:
+        return "nao_reconhecido", None
+
+
+CORPUS = [
+    "1", "2", "menu", "oi", "Olá", "bom dia", "obrigado", "", "   ",
+    "produção", "Produção", "producao de hoje", "quanto foi produzido", "faturamento", "faturado hoje",
+    "produção do dia", "produção projeto 202 do dia", "faturamento do projeto 150 hoje",
+    "produção projeto 202 hoje", "produção do projeto 202 do dia",
+    "produção do projeto 202 do dia 5 a 10 de agosto", "produção projeto 202 dia 5 até 10 de julho",
+    "faturamento projeto 830 dia 1 a 31 de dezembro", "produção projeto 202 dia 5 de agosto",
+    "produção do projeto 202 do dia 15 de março", "faturamento projeto 150 dia 3 de mar",
+    "produção projeto 202 05/08", "produção projeto 202 5/8/2024", "produção do projeto 202 05/08/2025",
+    "produção projeto 202 05-08 a 10-08", "produção projeto 202 05-08-2024 a 10-08-2024",
+    "produção projeto 202 10-08 a 05-08", "produção projeto 202 31-02 a 05-03",
+    "produção projeto 202 5 a 10 de setembro", "produção projeto 202 dia 5 de 10 de outubro",
+    "produção projeto 202 5 de novembro", "faturamento do projeto 202 dia 7 de fev",
+    "produção do dia 05/08", "produção do dia 5/8/2024", "faturamento do dia 12/12",
+    "5 a 10 de agosto", "1 até 15 de janeiro", "de 3 de 9 de abril", "10 a 20 de maio",
+    "01/08 a 31/08", "1/8/2024 até 31/8/2024", "05-08 a 10-08", "10/08 a 05/08",
+    "05/08", "5-8", "dia 5/8/2025", "31/02",
+    "exportar 01/08 a 31/08", "exportar projeto 202 01/08 a 31/08 csv",
+    "exportar do projeto 150 de 1/7/2024 até 31/7/2024 excel", "exportar 01/08 a 31/08 planilha",
+    "exportar agosto", "exportar 01/08",
+    "o que mudou", "O que mudou hoje?", "alterações", "alteracoes do dia", "novidades", "novidade",
+    "produção projeto", "produção projeto abc", "projeto 202", "produção do projeto 202",
+    "produção projeto 202 dia 40 de agosto", "produção 12 de marcos", "oito de setembro",
+    "produção projeto 2024 dia 5 de agosto", "produção projeto 202 202 dia 5 de agosto",
+    "produção projeto 1 dia 2 de jan produção projeto 3 hoje",
+    "faturamento projeto 7 hoje produção projeto 8 dia 1 a 2 de jun",
+    "relatório 1 a 5 de jul", "total 1/2 e 3/4", "nota 2024-05-06", "tel 11-98765-4321",
+]
+
+# Datas relativas (não existiam na cascata): resultado esperado numa quarta-feira, 13/08/2025
+HOJE_RELATIVAS = date(2025, 8, 13)
+RELATIVAS = {
+    "produção de ontem": ("periodo", "12/08/2025 A 12/08/2025"),
+    "Ontem": ("periodo", "12/08/2025 A 12/08/2025"),
+    "faturamento de anteontem": ("periodo", "11/08/2025 A 11/08/2025"),
+    "semana passada": ("periodo", "04/08/2025 A 10/08/2025"),
+    "produção da semana passada?": ("periodo", "04/08/2025 A 10/08/2025"),
+    "produção desta semana": ("periodo", "11/08/2025 A 13/08/2025"),
+    "mês passado": ("periodo", "01/07/2025 A 31/07/2025"),
+    "faturamento do mes passado": ("periodo", "01/07/2025 A 31/07/2025"),
+    "produção deste mês": ("periodo", "01/08/2025 A 13/08/2025"),
+    "produção de segunda": ("periodo", "11/08/2025 A 11/08/2025"),
+    "produção da sexta-feira": ("periodo", "08/08/2025 A 08/08/2025"),
+    "produção de quarta": ("periodo", "13/08/2025 A 13/08/2025"),
+    "produção quarta passada": ("periodo", "06/08/2025 A 06/08/2025"),
+    "produção de sábado": ("periodo", "09/08/2025 A 09/08/2025"),
+    "produção projeto 202 ontem": ("projeto_periodo", "202|12/08/2025 A 12/08/2025"),
+    "faturamento do projeto 150 mês passado": ("projeto_periodo", "150|01/07/2025 A 31/07/2025"),
+    # Data explícita ganha da relativa; relativa sem palavra de relatório não é comando
+    "produção do dia 05/08 ontem": ("periodo", "05/08/2025 A 05/08/2025"),
+    "produção projeto 202 hoje": ("projeto_hoje", "202"),
+    "bom dia, segunda vez que peço": ("nao_reconhecido", None),
+    # "segunda" ordinal não é dia da semana; com feira/passada/de/na antes continua sendo
+    "produção segunda quinzena de agosto": ("producao_hoje", None),
+    "produção de segunda quinzena": ("producao_hoje", None),
+    "produção na segunda semana": ("producao_hoje", None),
+    "produção segunda-feira": ("periodo", "11/08/2025 A 11/08/2025"),
+    "produção na terça": ("periodo", "12/08/2025 A 12/08/2025"),
+    "segunda passada": ("periodo", "11/08/2025 A 11/08/2025"),
+    "segunda": ("periodo", "11/08/2025 A 11/08/2025"),
+    "ontem fui ao mercado": ("nao_reconhecido", None),
+}
+VIRADAS = {
+    # Mês passado em janeiro cai no ano anterior
+    ("mês passado", date(2025, 1, 10)): ("periodo", "01/12/2024 A 31/12/2024"),
+    ("semana passada", date(2025, 1, 1)): ("periodo", "23/12/2024 A 29/12/2024"),
+    ("ontem", date(2024, 3, 1)): ("periodo", "29/02/2024 A 29/02/2024"),
+}
+
+PEDACOS = [
+    "produção", "producao", "faturamento", "faturado", "produzido", "do", "de", "dia", "projeto",
+    "hoje", "a", "até", "ate", "exportar", "csv", "excel", "o que mudou", "alterações", "novidades",
+    "menu", "oi", "julho", "jul", "março", "mar", "dezembro", "set", "setembro", "ago", "2", "5", "15",
+    "31", "202", "2024", "05/08", "5/8/2024", "10-08", "1/13", "10/08/2025", "-", "/", "  ",
+]
+
+
+def frases_geradas(quantidade, semente=39):
+    aleatorio = random.Random(semente)
+    for _ in range(quantidade):
+        partes = [aleatorio.choice(PEDACOS) for _ in range(aleatorio.randint(1, 9))]
+        separador = aleatorio.choice((" ", " ", " ", ""))
+        yield separador.join(partes)
+
+
+def frases_projeto(quantidade, semente=139):
+    """Frases "produção [do] projeto N <continuação>" para exercitar a ordem das regras de projeto"""
+    aleatorio = random.Random(semente)
+    escolha = aleatorio.choice
+    for _ in range(quantidade):
+        continuacao = [escolha(PEDACOS[4:]) for _ in range(aleatorio.randint(0, 6))]
+        frase = " ".join([escolha(("produção", "producao", "faturamento")), escolha(("", "do")), "projeto",
+                          escolha(("202", "5", "2024", "x"))] + continuacao)
+        yield frase if aleatorio.random() < 0.8 else escolha(PEDACOS) + " " + frase
+
+
+def variacoes_espacos(frases, semente=40):
+    """Mesmas frases com maiúsculas, tabs e espaços repetidos (têm de cair na mesma entrada do memo)"""
+    aleatorio = random.Random(semente)
+    for frase in frases:
+        yield frase
+        yield "  " + frase.upper().replace(" ", aleatorio.choice(("  ", "\t", " \n "))) + " "
+
+
+def comparar(frases, funcao=interpretar_comando, preparar=lambda frase: frase):
+    divergencias = []
+    silencio = io.StringIO()
+    for frase in frases:
+        with contextlib.redirect_stdout(silencio):
+            esperado = processar_comando_legado(preparar(frase))
+            obtido = funcao(frase)
+        if esperado != obtido:
+            divergencias.append((frase, esperado, obtido))
+    return divergencias
+
+
+def testar_relativas():
+    falhas = 0
+    casos = {(texto, HOJE_RELATIVAS): esperado for texto, esperado in RELATIVAS.items()}
+    casos.update(VIRADAS)
+    for (texto, hoje), esperado in casos.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            obtido = interpretar_comando(texto, hoje)
+        if obtido != esperado:
+            falhas += 1
+            print(f"❌ Relativa {texto!r} em {hoje}: esperado {esperado}, obtido {obtido}")
+    if not falhas:
+        print(f"✅ Datas relativas: {len(casos)} frases corretas")
+    return falhas
+
+
+# Transcrições com erros do reconhecimento de voz
+TRANSCRICOES = {
+    "produsão projeto duzentos e dois do dia": ("projeto_hoje", "202"),
+    "fatoramento do projeto cento e cinquenta hoje": ("projeto_hoje", "150"),
+    "produção projeto oitocentos e trinta dia quinze de julho": ("projeto_periodo", "830|15/07/2025 A 15/07/2025"),
+    "produção projeto duzentos e dois dia cinco a dez de agosto": ("projeto_periodo", "202|05/08/2025 A 10/08/2025"),
+    "producão projeto 202 dia primeiro de agosto": ("projeto_periodo", "202|01/08/2025 A 01/08/2025"),
+    "produção projeto 202 dia cinco de dez": ("projeto_periodo", "202|05/12/2025 A 05/12/2025"),
+    "produção de um a dez de agosto": ("periodo", "01/08/2025 A 10/08/2025"),
+    "produção de uma até cinco de agosto": ("periodo", "01/08/2025 A 05/08/2025"),
+    "produção projeto 202 dia um de agosto": ("projeto_periodo", "202|01/08/2025 A 01/08/2025"),
+    "exportar projeto duzentos e dois 1/8 a 31/8 planilia": ("exportar", "202|01/08/2025 A 31/08/2025|xlsx"),
+    "produssão de ontem": ("periodo", "12/08/2025 A 12/08/2025"),
+    "produção da semana pasada": ("periodo", "04/08/2025 A 10/08/2025"),
+    "novidadis": ("alteracoes_hoje", None),
+    "dois": ("nao_reconhecido", None),
+    "preciso de um produto novo": ("nao_reconhecido", None),
+}
+
+
+def testar_correcao():
+    falhas = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        obtidos = {texto: interpretar_comando(corrigir_transcricao(texto), HOJE_RELATIVAS) for texto in TRANSCRICOES}
+    for texto, esperado in TRANSCRICOES.items():
+        if obtidos[texto] != esperado:
+            falhas += 1
+            print(f"❌ Transcrição {texto!r}: esperado {esperado}, obtido {obtidos[texto]} "
+                  f"(corrigido: {corrigir_transcricao(texto)!r})")
+    if not falhas:
+        print(f"✅ Transcrições corrigidas: {len(TRANSCRICOES)} frases corretas")
+
+    # Texto digitado não passa pela correção; o mesmo texto vindo do áudio passa
+    agora = comandos.TIMEZONE_BRASILIA.localize(datetime(2025, 8, 13, 10, 0))
+    with contextlib.redirect_stdout(io.StringIO()):
+        digitado = comandos.interpretar("fatoramento do projeto 202 hoje", agora)
+        transcrito = comandos.interpretar("fatoramento do projeto 202 hoje", agora, transcrito=True)
+    if digitado != ("nao_reconhecido", None) or transcrito != ("projeto_hoje", "202"):
+        falhas += 1
+        print(f"❌ Correção só no transcrito: digitado {digitado}, transcrito {transcrito}")
+    else:
+        print("✅ Correção aplicada só ao texto transcrito")
+    return falhas
+
+
+def testar_ordinais():
+    """Cada ordinal fica como está, com e sem acento, sozinho e no meio de uma frase"""
+    falhas = 0
+    for ordinal in ORDINAIS:
+        for grafia in {ordinal, ordinal.replace('é', 'e')}:
+            frase = f"produção do {grafia} talhão"
+            if aproximar(grafia) is not None or corrigir_transcricao(frase) != frase:
+                falhas += 1
+                print(f"❌ Ordinal {grafia!r} corrigido: {aproximar(grafia)!r} / {corrigir_transcricao(frase)!r}")
+    if not falhas:
+        print(f"✅ Ordinais preservados: {len(ORDINAIS)} ({', '.join(ORDINAIS)})")
+    return falhas
+
+
+def testar_memo():
+    """Virada do dia no memo e resolução de períodos"""
+    falhas = 0
+    fuso = comandos.TIMEZONE_BRASILIA
+    antes = comandos._interpretar_no_dia.cache_info().misses
+    with contextlib.redirect_stdout(io.StringIO()):
+        for agora in (fuso.localize(datetime(2025, 8, 4, 23, 59)), fuso.localize(datetime(2025, 8, 4, 23, 59)),
+                      fuso.localize(datetime(2025, 8, 5, 0, 0))):
+            comandos.interpretar("produção projeto 202 dia 5 de agosto", agora)
+    faltas = comandos._interpretar_no_dia.cache_info().misses - antes
+    if faltas != 2:
+        falhas += 1
+        print(f"❌ Memo: esperadas 2 interpretações (uma por dia), houve {faltas}")
+    else:
+        print("✅ Memo: mesmo dia reaproveita, meia-noite de Brasília recalcula")
+
+    casos = {
+        "01/08/2025 A 31/08/2025": ("2025-08-01", "2025-08-31"),
+        "5/8/2025 a 7/8/2025": ("2025-08-05", "2025-08-07"),
+        "31/08/2025 A 01/08/2025": (None, None),
+        "31/02/2025 A 01/03/2025": (None, None),
+        "agosto": (None, None),
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        obtidos = {texto: (resolver_periodo(texto), resolver_periodo(texto)) for texto in casos}
+    for texto, esperado in casos.items():
+        if obtidos[texto] != (esperado, esperado):
+            falhas += 1
+            print(f"❌ Período {texto!r}: esperado {esperado}, obtido {obtidos[texto]}")
+    if not falhas:
+        print(f"✅ Períodos: {len(casos)} resoluções corretas (com memo)")
+    return falhas
+
+
+def main():
+    print("=== TESTE GRAMÁTICA DE COMANDOS ===")
+    falhas = 0
+    for nome, frases in (
+        ("Corpus", CORPUS),
+        ("Geradas", list(frases_geradas(20000))),
+        ("Projeto", list(frases_projeto(20000))),
+        ("Espaços/maiúsculas (memo)", list(variacoes_espacos(CORPUS + list(frases_projeto(2000)))) * 2),
+    ):
+        if "memo" in nome:
+            # Texto digitado vai como chegou; o transcrito é corrigido antes: a referência recebe o texto já corrigido
+            divergencias = comparar(frases, comandos.interpretar, comandos.normalizar_texto)
+            divergencias += comparar(frases, lambda frase: comandos.interpretar(frase, transcrito=True),
+                                     lambda frase: corrigir_transcricao(comandos.normalizar_texto(frase)))
+        else:
+            divergencias = comparar(frases)
+        if divergencias:
+            falhas += len(divergencias)
+            print(f"❌ {nome}: {len(divergencias)} de {len(frases)} divergentes")
+            for frase, esperado, obtido in divergencias[:10]:
+                print(f"   {frase!r}: esperado {esperado}, obtido {obtido}")
+        else:
+            print(f"✅ {nome}: {len(frases)} frases idênticas")
+
+    falhas += testar_relativas()
+    falhas += testar_correcao()
+    falhas += testar_ordinais()
+    falhas += testar_memo()
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste das consultas fatiadas de períodos longos (consultas_periodo.py):
+divisão em meses e semanas, resultados na ordem das fatias com no máximo
+LIMITE_FATIAS_POR_REQUISICAO simultâneas, um único prazo TIMEOUT_FATIAS
+para a requisição inteira (e não um por fatia), e a mescla igual ao
+GROUP BY de uma consulta só, inclusive com grafias que só diferem em
+maiúsculas ou espaços à direita em fatias diferentes.
+
+O banco é simulado por conexões falsas no PoolConexoes.
+"""
+
+import random
+import sys
+import threading
+import time
+
+import consultas_periodo
+from consultas_periodo import (chave_grupo_sql, dividir_periodo, executar_em_fatias, mesclar_linhas_boletim,
+                               mesclar_supervisores)
+from pool_conexoes import PoolConexoes
+
+
+class BancoSimulado:
+    """Conexões falsas: cada execute devolve as linhas da fatia pedida depois de `demora` segundos"""
+
+    def __init__(self, linhas_por_fatia, demora=0.0):
+        self.linhas_por_fatia = linhas_por_fatia
+        self.demora = demora
+        self.simultaneas = 0
+        self.maximo_simultaneas = 0
+        self.executadas = []
+        self._lock = threading.Lock()
+
+    def conectar(self):
+        return ConexaoSimulada(self)
+
+
+class ConexaoSimulada:
+    def __init__(self, banco):
+        self.banco = banco
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, parametros):
+        banco = self.banco
+        with banco._lock:
+            banco.simultaneas += 1
+            banco.maximo_simultaneas = max(banco.maximo_simultaneas, banco.simultaneas)
+            banco.executadas.append(tuple(parametros))
+        try:
+            time.sleep(banco.demora)
+        finally:
+            with banco._lock:
+                banco.simultaneas -= 1
+        self._linhas = banco.linhas_por_fatia.get((parametros[0], parametros[1]), [])
+
+    def fetchall(self):
+        return self._linhas
+
+    def close(self):
+        pass
+
+
+def agrupar_como_sql(linhas_brutas):
+    """GROUP BY NOME_DO_LIDER, SERVIÇO, MEDIDA, MOD, PROJETO de uma consulta só (collation CI)"""
+    grupos = {}
+    for lider, servico, medida, mod, projeto, producao, faturado in linhas_brutas:
+        chave = tuple(chave_grupo_sql(v) for v in (lider, servico, medida, mod, projeto))
+        acumulado = grupos.setdefault(chave, [0, 0])
+        acumulado[0] += producao
+        acumulado[1] += faturado
+    return grupos
+
+
+def main():
+    print("=== TESTE CONSULTAS FATIADAS ===")
+    falhas = 0
+
+    def conferir(condicao, descricao):
+        nonlocal falhas
+        print(f"{'✅' if condicao else '❌'} {descricao}")
+        falhas += not condicao
+
+    meses = dividir_periodo('2024-11-15', '2025-02-10')
+    conferir(meses == [('2024-11-15', '2024-11-30'), ('2024-12-01', '2024-12-31'),
+                       ('2025-01-01', '2025-01-31'), ('2025-02-01', '2025-02-10')], f"Fatias mensais {meses}")
+    semanas = dividir_periodo('2025-01-01', '2025-01-20', 'semana')
+    conferir(semanas[0] == ('2025-01-01', '2025-01-05') and semanas[-1] == ('2025-01-20', '2025-01-20')
+             and all(a[1] < b[0] for a, b in zip(semanas, semanas[1:])), f"Fatias semanais contíguas ({len(semanas)})")
+
+    # Linhas brutas por fatia, com grafias diferentes do mesmo líder/serviço entre fatias
+    aleatorio = random.Random(29)
+    grafias_lider = ["Ana Souza", "ANA SOUZA", "ana souza ", "Bruno", "BRUNO", None]
+    grafias_servico = ["Plantio", "PLANTIO", "plantio  ", "Capina", None]
+    fatias = dividir_periodo('2025-01-01', '2025-06-30')
+    brutas_por_fatia = {
+        fatia: [(aleatorio.choice(grafias_lider), aleatorio.choice(grafias_servico), aleatorio.choice(["Ha", "HA"]),
+                 aleatorio.choice(["MEC", "mec", "Man"]), aleatorio.choice([202, 150]),
+                 aleatorio.randint(0, 50), aleatorio.randint(0, 5000)) for _ in range(200)]
+        for fatia in fatias
+    }
+    # Cada fatia já vem agrupada pelo SQL, com a grafia da primeira linha do grupo
+    agrupadas_por_fatia = {}
+    for fatia, brutas in brutas_por_fatia.items():
+        grupos = {}
+        for linha in brutas:
+            chave = tuple(chave_grupo_sql(v) for v in linha[:5])
+            if chave in grupos:
+                grupos[chave][5] += linha[5]
+                grupos[chave][6] += linha[6]
+            else:
+                grupos[chave] = list(linha)
+        agrupadas_por_fatia[fatia] = [tuple(l) for l in grupos.values()]
+
+    consultas_periodo.LIMITE_FATIAS_POR_REQUISICAO = 2
+    banco = BancoSimulado(agrupadas_por_fatia, demora=0.05)
+    pool = PoolConexoes(banco.conectar, tamanho_maximo=4)
+    lotes = executar_em_fatias(pool, "SELECT ...", fatias, [202, 150])
+    conferir([lote for lote in lotes] == [agrupadas_por_fatia[f] for f in fatias], "Resultados na ordem das fatias")
+    conferir(banco.maximo_simultaneas <= 2, f"No máximo 2 fatias simultâneas ({banco.maximo_simultaneas})")
+    conferir(sorted(banco.executadas) == sorted((i, f, 202, 150) for i, f in fatias), "Parâmetros de cada fatia")
+
+    mescladas = mesclar_linhas_boletim(lotes)
+    esperado = agrupar_como_sql([linha for brutas in brutas_por_fatia.values() for linha in brutas])
+    obtido = {tuple(chave_grupo_sql(v) for v in linha[:5]): [linha[5], linha[6]] for linha in mescladas}
+    conferir(len(mescladas) == len(esperado) and obtido == esperado,
+             f"Mescla = GROUP BY de uma consulta só ({len(mescladas)} grupos)")
+    ordem = [(consultas_periodo.chave_ordenacao_sql(l[4]), consultas_periodo.chave_ordenacao_sql(l[0]),
+              consultas_periodo.chave_ordenacao_sql(l[1])) for l in mescladas]
+    conferir(ordem == sorted(ordem), "Ordenado por PROJETO, NOME_DO_LIDER, SERVIÇO")
+    primeira = next(l for l in mescladas if chave_grupo_sql(l[0]) == 'ana souza')
+    conferir(primeira[0] in grafias_lider, f"Grafia original preservada ({primeira[0]!r})")
+
+    supervisores = mesclar_supervisores([[("João", 100), ("Maria", 50)], [("JOÃO", 30), ("maria ", 90)], [("Zé", 10)]])
+    conferir(supervisores == [("Maria", 140), ("João", 130), ("Zé", 10)], f"Supervisores mesclados {supervisores}")
+
+    # Prazo único: 12 fatias de 0.3 s, 2 por vez, levariam ~1.8 s; com TIMEOUT_FATIAS=1 desiste em ~1 s
+    consultas_periodo.TIMEOUT_FATIAS = 1
+    lento = BancoSimulado({}, demora=0.3)
+    fatias_lentas = dividir_periodo('2024-01-01', '2024-12-31')
+    inicio = time.monotonic()
+    try:
+        executar_em_fatias(PoolConexoes(lento.conectar, tamanho_maximo=4), "SELECT ...", fatias_lentas, [202])
+        conferir(False, "Deveria estourar o prazo")
+    except TimeoutError as e:
+        decorrido = time.monotonic() - inicio
+        conferir(decorrido < 1.4, f"Prazo único para a requisição inteira: desistiu em {decorrido:.2f}s ({e})")
+    time.sleep(0.5)
+    conferir(len(lento.executadas) < len(fatias_lentas), f"Fatias não iniciadas foram abandonadas "
+             f"({len(lento.executadas)} de {len(fatias_lentas)})")
+
+    # Fatia travada: a espera final usa só o que resta do prazo
+    travado = BancoSimulado({}, demora=5)
+    inicio = time.monotonic()
+    try:
+        executar_em_fatias(PoolConexoes(travado.conectar, tamanho_maximo=4), "SELECT ...",
+                           dividir_periodo('2025-01-01', '2025-02-28'), [202])
+        conferir(False, "Fatia travada deveria estourar o prazo")
+    except TimeoutError:
+        conferir(time.monotonic() - inicio < 1.4, "Fatia travada: desiste dentro do prazo")
+
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
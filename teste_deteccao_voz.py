@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste da detecção de voz e do corte de silêncios (deteccao_voz.py).
+
+Monta áudios de campo sintéticos a 16 kHz, com trechos de "fala" (tons
+modulados) separados por silêncio, com e sem ruído de motor ao fundo, e
+confere que:
+- as pontas saem e as pausas longas ficam com VAD_PAUSA_MAXIMA_MS;
+- toda a fala chega ao reconhecedor, com a folga antes e depois;
+- o piso de ruído estimado acompanha o ruído de fundo;
+- áudio sem silêncio, silêncio puro e áudio curto passam inteiros;
+- converter_audio corta o OGG e registra as métricas.
+"""
+
+import io
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+
+import audio_memoria
+import deteccao_voz
+import metricas
+from deteccao_voz import recortar_silencios
+
+TAXA = 16000
+
+
+def fala(segundos, frequencia=220, amplitude=0.3):
+    t = np.arange(int(segundos * TAXA)) / TAXA
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    return (amplitude * envelope * np.sin(2 * np.pi * frequencia * t)).astype('float32')
+
+
+def silencio(segundos):
+    return np.zeros(int(segundos * TAXA), dtype='float32')
+
+
+def motor(quantidade, nivel_db, semente=0):
+    """Ruído de fundo: zumbido grave + chiado, com energia total em nivel_db (dBFS)"""
+    t = np.arange(quantidade) / TAXA
+    aleatorio = np.random.default_rng(semente).standard_normal(quantidade)
+    ruido = np.sin(2 * np.pi * 90 * t) + 0.5 * aleatorio
+    ruido *= 10 ** (nivel_db / 20) / np.sqrt(np.mean(ruido ** 2))
+    return ruido.astype('float32')
+
+
+def montar(trechos):
+    """Concatena (tipo, segundos) e devolve o áudio e a máscara das amostras de fala"""
+    partes, mascaras = [], []
+    for tipo, segundos in trechos:
+        parte = fala(segundos) if tipo == 'fala' else silencio(segundos)
+        partes.append(parte)
+        mascaras.append(np.full(len(parte), tipo == 'fala'))
+    return np.concatenate(partes), np.concatenate(mascaras)
+
+
+def fala_preservada(original, mascara, recortado):
+    """A fala toda está no recorte, na ordem (procura cada trecho de fala no recorte)"""
+    bordas = np.diff(np.concatenate(([0], mascara.astype(np.int8), [0])))
+    posicao = 0
+    for inicio, fim in zip(np.flatnonzero(bordas == 1), np.flatnonzero(bordas == -1)):
+        trecho = original[inicio:fim]
+        candidatos = np.flatnonzero(recortado[posicao:] == trecho[0]) + posicao
+        achou = next((c for c in candidatos if np.array_equal(recortado[c:c + len(trecho)], trecho)), None)
+        if achou is None:
+            return False
+        posicao = achou + len(trecho)
+    return True
+
+
+def main():
+    print("=== TESTE DETECÇÃO DE VOZ ===")
+    falhas = 0
+
+    def conferir(condicao, descricao):
+        nonlocal falhas
+        print(f"{'✅' if condicao else '❌'} {descricao}")
+        falhas += not condicao
+
+    pausa = deteccao_voz.VAD_PAUSA_MAXIMA_MS / 1000
+    folga = deteccao_voz.VAD_FOLGA_MS / 1000
+    trechos = [('silencio', 2.0), ('fala', 1.2), ('silencio', 0.3), ('fala', 0.8),
+               ('silencio', 3.0), ('fala', 1.5), ('silencio', 4.0)]
+    limpo, mascara = montar(trechos)
+    # Fala + pausa curta + pausa longa encurtada + folga nas duas pontas
+    esperado = 1.2 + 0.3 + 0.8 + pausa + 1.5 + 2 * folga
+    falado = 1.2 + 0.8 + 1.5
+
+    for nome, ruido_db in (("silêncio digital", None), ("motor a -45 dBFS", -45), ("motor a -30 dBFS", -30)):
+        audio = limpo if ruido_db is None else limpo + motor(len(limpo), ruido_db)
+        recortado, dados = recortar_silencios(audio, TAXA)
+        # Com ruído forte o vale da fala fica abaixo do limiar e a folga conta a partir do pico: sobra menos
+        conferir(falado <= dados['segundos_depois'] <= esperado + 0.05
+                 and (ruido_db is not None or abs(dados['segundos_depois'] - esperado) <= 0.05),
+                 f"{nome}: {dados['segundos_antes']:.1f} s -> {dados['segundos_depois']:.2f} s "
+                 f"(esperado {esperado:.2f} s, piso {dados['piso_db']} dB)")
+        conferir(fala_preservada(audio, mascara, recortado), f"{nome}: toda a fala chega ao reconhecedor")
+        if ruido_db is not None:
+            conferir(abs(dados['piso_db'] - ruido_db) <= 3, f"{nome}: piso de ruído estimado {dados['piso_db']} dB")
+
+    continuo = fala(5.0) + motor(5 * TAXA, -40)
+    conferir(len(recortar_silencios(continuo, TAXA)[0]) == len(continuo), "Fala contínua passa inteira")
+    mudo = motor(3 * TAXA, -50)
+    conferir(len(recortar_silencios(mudo, TAXA)[0]) == len(mudo), "Só ruído passa inteiro (o reconhecedor decide)")
+    curto = fala(0.01)
+    conferir(len(recortar_silencios(curto, TAXA)[0]) == len(curto), "Áudio menor que um quadro passa inteiro")
+    impar, _ = montar([('silencio', 1.0), ('fala', 1.0), ('silencio', 1.00731)])
+    conferir(len(recortar_silencios(impar, TAXA)[0]) == int((1.0 + 2 * folga) * TAXA),
+             "Sobra final menor que um quadro acompanha o último quadro")
+
+    longo = np.tile(limpo + motor(len(limpo), -40), 3)
+    inicio = time.perf_counter()
+    for _ in range(10):
+        recortar_silencios(longo, TAXA)
+    ms = (time.perf_counter() - inicio) / 10 * 1000
+    conferir(ms < 50, f"Áudio de {len(longo) / TAXA:.0f} s analisado em {ms:.1f} ms")
+
+    buffer = io.BytesIO()
+    sf.write(buffer, np.repeat(limpo + motor(len(limpo), -45), 3), 48000, format='OGG', subtype='OPUS')
+    audio = audio_memoria.converter_audio(buffer.getvalue())
+    segundos = len(audio.frame_data) / audio.sample_width / audio.sample_rate
+    conferir(abs(segundos - esperado) <= 0.1, f"converter_audio corta o OGG: {len(limpo) / TAXA:.1f} s -> {segundos:.2f} s")
+    inteiro = audio_memoria.converter_audio(buffer.getvalue(), recortar=False)
+    conferir(len(inteiro.frame_data) > len(audio.frame_data), "recortar=False mantém o áudio inteiro")
+    resumo = metricas.resumo()
+    conferir(resumo['contadores'].get('vad_audios') == 1 and resumo['contadores'].get('vad_ms_removidos', 0) > 5000
+             and 'vad_piso_ruido_db' in resumo['medidores'] and 'vad' in resumo['tempos'],
+             f"Métricas do corte {dict((k, v) for k, v in resumo['contadores'].items() if k.startswith('vad'))}")
+
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
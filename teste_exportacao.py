@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste da exportação CSV/XLSX com um mock local da Z-API.
+
+Sobe um servidor HTTP em 127.0.0.1 que responde como o send-document,
+aponta ZAPI_URL_BASE para ele e confere o arquivo que chegou no corpo
+multipart (campos do formulário e bytes do documento).
+"""
+
+import csv
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from email.parser import BytesParser
+from email.policy import default as politica_email
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+recebidos = []
+
+
+def ler_multipart(tipo, corpo):
+    """{campo: texto} e {campo: (nome do arquivo, bytes)} de um corpo multipart/form-data"""
+    mensagem = BytesParser(policy=politica_email).parsebytes(
+        b'Content-Type: ' + tipo.encode() + b'\r\n\r\n' + corpo)
+    campos, arquivos = {}, {}
+    for parte in mensagem.iter_parts():
+        nome = parte.get_param('name', header='content-disposition')
+        if parte.get_filename():
+            arquivos[nome] = (parte.get_filename(), parte.get_payload(decode=True))
+        else:
+            campos[nome] = parte.get_content().strip()
+    return campos, arquivos
+
+
+class MockZapi(BaseHTTPRequestHandler):
+    def do_POST(self):
+        corpo = self.rfile.read(int(self.headers['Content-Length']))
+        campos, arquivos = ler_multipart(self.headers['Content-Type'], corpo)
+        recebidos.append({'caminho': self.path, 'headers': dict(self.headers),
+                          'payload': campos, 'arquivos': arquivos})
+        resposta = json.dumps({'zaapId': 'mock', 'messageId': str(len(recebidos))}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(resposta)))
+        self.end_headers()
+        self.wfile.write(resposta)
+
+    def log_message(self, *args):
+        pass
+
+
+def iniciar_mock():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), MockZapi)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def gerar_linhas(quantidade):
+    for i in range(quantidade):
+        yield (str(150 + i % 3), f"LÍDER {i % 7}", f"SERVIÇO {i % 11}", "HA", "MEC",
+               round(i * 1.25, 2), round(i * 10.5, 2))
+
+
+def main():
+    servidor = iniciar_mock()
+    os.environ['ZAPI_URL_BASE'] = f"http://127.0.0.1:{servidor.server_port}"
+    os.environ['INSTANCE_ID'] = 'instancia-teste'
+    os.environ['TOKEN'] = 'token-teste'
+    os.environ['CLIENT_TOKEN'] = 'client-teste'
+    import exportacao
+
+    diretorio = tempfile.mkdtemp()
+    print("=== TESTE EXPORTAÇÃO ===")
+
+    # CSV: conteúdo lido de volta
+    caminho, quantidade = exportacao.exportar(gerar_linhas(1000), 'teste', 'csv', diretorio)
+    assert quantidade == 1000, quantidade
+    with open(caminho, encoding='utf-8-sig', newline='') as arquivo:
+        linhas = list(csv.reader(arquivo, delimiter=';'))
+    assert tuple(linhas[0]) == exportacao.COLUNAS
+    assert linhas[2] == ['151', 'LÍDER 1', 'SERVIÇO 1', 'HA', 'MEC', '1,25', '10,50'], linhas[2]
+    print(f"✅ CSV: {quantidade} linhas")
+
+    # Envio pelo mock
+    resposta = exportacao.enviar_documento('5511999999999', caminho, 'legenda')
+    assert resposta.status_code == 200
+    pedido = recebidos[-1]
+    assert pedido['caminho'] == '/instances/instancia-teste/token/token-teste/send-document/csv', pedido['caminho']
+    assert pedido['headers']['Client-Token'] == 'client-teste'
+    assert pedido['payload']['fileName'] == 'teste.csv'
+    assert pedido['payload']['caption'] == 'legenda'
+    assert pedido['payload']['phone'] == '5511999999999'
+    assert pedido['headers']['Content-Type'].startswith('multipart/form-data; boundary=')
+    nome_arquivo, conteudo = pedido['arquivos']['document']
+    assert nome_arquivo == 'teste.csv'
+    with open(caminho, 'rb') as arquivo:
+        assert conteudo == arquivo.read()
+    assert int(pedido['headers']['Content-Length']) > len(conteudo)
+    print("✅ Documento CSV recebido pelo mock da Z-API")
+
+    # XLSX (ou CSV quando o xlsxwriter não está instalado)
+    caminho, quantidade = exportacao.exportar(gerar_linhas(1000), 'teste', 'xlsx', diretorio)
+    assert quantidade == 1000
+    if exportacao.xlsxwriter is None:
+        assert caminho.endswith('.csv')
+        print("⚠️ xlsxwriter não instalado: exportação caiu para CSV")
+    else:
+        with zipfile.ZipFile(caminho) as pacote:
+            assert 'xl/worksheets/sheet1.xml' in pacote.namelist()
+        resposta = exportacao.enviar_documento('5511999999999', caminho)
+        assert resposta.status_code == 200
+        assert recebidos[-1]['caminho'].endswith('/send-document/xlsx')
+        assert 'caption' not in recebidos[-1]['payload']
+        with open(caminho, 'rb') as arquivo:
+            assert recebidos[-1]['arquivos']['document'][1] == arquivo.read()
+        print(f"✅ XLSX: {quantidade} linhas, recebido pelo mock da Z-API")
+
+    # Cursor em lotes: fetchmany até esgotar
+    class CursorFalso:
+        def __init__(self, linhas):
+            self.linhas = list(linhas)
+
+        def execute(self, query, parametros):
+            assert parametros[:2] == ['2025-08-01', '2025-08-31']
+
+        def fetchmany(self, tamanho):
+            lote, self.linhas = self.linhas[:tamanho], self.linhas[tamanho:]
+            return lote
+
+    class ConexaoFalsa:
+        def cursor(self):
+            return CursorFalso(gerar_linhas(12345))
+
+    lidas = sum(1 for _ in exportacao.consultar_em_lotes(ConexaoFalsa(), ['150'], '2025-08-01', '2025-08-31', 1000))
+    assert lidas == 12345, lidas
+    print(f"✅ Leitura em lotes: {lidas} linhas")
+
+    servidor.shutdown()
+    print("🚀 EXPORTAÇÃO OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste de equivalência do leitor de frete (frete.extrair_frete).
+
+Compara com uma cópia congelada dos regex originais de processar_frete_texto
+num corpus de mensagens típicas, em frases geradas a partir dos pedaços dos
+padrões e num conjunto de piores casos (curtos o bastante para os regex
+originais terminarem).
+"""
+
+import random
+import re
+import sys
+
+from frete import extrair_frete
+
+
+def processar_frete_legado(texto):
+    """Cópia congelada dos regex originais de processar_frete_texto (referência)"""
+    
+    # Regex para capturar frete com projeto opcional
+    padrao_frete = re.compile(
+        r"\bfrete\b(?:\s*(?P<projeto>\d{2,6}))?.*?"
+        r"(?:\bda\b|\bdo\b|\bdas\b|\bdos\b|\bde\b)\s+(?P<origem>[^,.;\n]+?)\s+"
+        r"(?:\bpara\b|\bpra\b|\b->\b)\s+(?P<destino>[^,.;\n]+?)"
+        r".*?(?:\bkm\b|\bkm\s*inicial\b|\bquilometragem\b|\bkm\s*é\b|\bkilometro\b).*?(?P<km>\d{1,7})",
+        flags=re.IGNORECASE | re.UNICODE
+    )
+    
+    # Regex flexível (sem "km" explícito, assume número grande é KM)
+    padrao_frete_flex = re.compile(
+        r"\bfrete\b(?:\s*(?P<projeto>\d{2,6}))?.*?"
+        r"(?:\bda\b|\bdo\b|\bdas\b|\bdos\b|\bde\b)\s+(?P<origem>[^,.;\n]+?)\s+"
+        r"(?:\bpara\b|\bpra\b|\b->\b)\s+(?P<destino>[^,.;\n]+?)"
+        r".*?(?P<km>\d{4,7})\b",
+        flags=re.IGNORECASE | re.UNICODE
+    )
+    
+    def normalizar_local(s):
+        s = " ".join(s.strip().split())
+        return " ".join(p.capitalize() for p in s.split(" "))
+    
+    texto_limpo = " ".join(texto.split())
+    match = padrao_frete.search(texto_limpo) or padrao_frete_flex.search(texto_limpo)
+    
+    if not match:
+        return None
+        
+    projeto = match.group("projeto") if match.group("projeto") else None
+    origem = normalizar_local(match.group("origem"))
+    destino = normalizar_local(match.group("destino"))
+    km = int(match.group("km"))
+    
+    return {
+        "TIPO": "FRETE",
+        "PROJETO": projeto,
+        "SAIDA": origem,
+        "DESTINO": destino,
+        "KM_INICIAL": km
+    }
+
+
+CORPUS = [
+    "frete da São João para São Pedro km 50324",
+    "frete 150 da São João para São Pedro km 50324",
+    "Frete 202 do galpão central pra fazenda santa rita km inicial 123456",
+    "FRETE DE ITAPEVA PARA CAPÃO BONITO KM 98765",
+    "frete do viveiro para talhão 12 quilometragem 4567",
+    "frete das mudas para o projeto km é 3300",
+    "frete dos insumos para a fazenda kilometro 77",
+    "frete de A para B, km inicial 1234",
+    "frete da sede para campo 2 123456",
+    "frete 830 da base para fazenda boa vista 1234567",
+    "frete 830 da base para fazenda boa vista 12345678",
+    "frete da base para fazenda 123",
+    "frete da base, para fazenda km 1234",
+    "frete da base para , fazenda km 1234",
+    "frete da base para fazenda km",
+    "frete para fazenda km 1234",
+    "frete da para km 1234",
+    "frete de para para destino km 5555",
+    "frete 1234567 da base para fazenda km 4321",
+    "frete 1 da base para fazenda km 4321",
+    "frete150 da base para fazenda km 4321",
+    "fretes da base para fazenda km 4321",
+    "o frete de ontem: da base para fazenda km 4321",
+    "frete da base para 9 km 4321",
+    "frete da base para 12345 e km 9",
+    "frete da base para fazenda 1234km 5678",
+    "frete da base para fazenda 1234_5678 9999",
+    "frete  da   base\n para\tfazenda   km 4321",
+    "frete da base para fazenda; km 4321",
+    "frete da base para fazenda km 4321. frete 99 de x para y km 1",
+    "frete de de para para para de km 12345",
+    "frete da São João para São Pedro kminicial 50324",
+    "frete da São João para São Pedro km5 50324",
+    "",
+    "sem a palavra certa da base para fazenda km 4321",
+]
+
+PEDACOS = [
+    "frete", "Frete", "150", "830", "da", "do", "das", "dos", "de", "para", "pra", "->", "base",
+    "São João", "fazenda", "km", "km inicial", "quilometragem", "km é", "kilometro", "kminicial",
+    "1", "12", "1234", "12345", "1234567", "12345678", ",", ".", ";", "a", "e", "x1", "9km",
+]
+
+
+def frases_geradas(quantidade, semente=43):
+    aleatorio = random.Random(semente)
+    for _ in range(quantidade):
+        partes = [aleatorio.choice(PEDACOS) for _ in range(aleatorio.randint(3, 12))]
+        if aleatorio.random() < 0.7:
+            partes.insert(0, "frete")
+        yield " ".join(partes)
+
+
+def piores_casos(tamanho):
+    """Textos que fazem os regex originais retroceder muito (sem km, ou km sem número)"""
+    return {
+        "muitos 'frete de'": "frete de " * tamanho,
+        "de/para sem km": "frete de a para b " * tamanho,
+        "de/para com km no fim sem número": "frete " + "de a para b " * tamanho + "km",
+        "números curtos": "frete da base para fazenda " + "12 " * tamanho,
+        "origem longa": "frete de " + "x " * tamanho + "para y km 1234",
+    }
+
+
+def comparar(frases):
+    divergencias = []
+    for frase in frases:
+        esperado = processar_frete_legado(frase)
+        obtido = extrair_frete(frase)
+        if esperado != obtido:
+            divergencias.append((frase, esperado, obtido))
+    return divergencias
+
+
+def main():
+    print("=== TESTE LEITOR DE FRETE ===")
+    falhas = 0
+    for nome, frases in (
+        ("Corpus", CORPUS),
+        ("Geradas", list(frases_geradas(20000))),
+        ("Piores casos", list(piores_casos(40).values())),
+    ):
+        divergencias = comparar(frases)
+        if divergencias:
+            falhas += len(divergencias)
+            print(f"❌ {nome}: {len(divergencias)} de {len(frases)} divergentes")
+            for frase, esperado, obtido in divergencias[:10]:
+                print(f"   {frase[:80]!r}: esperado {esperado}, obtido {obtido}")
+        else:
+            print(f"✅ {nome}: {len(frases)} frases idênticas")
+
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
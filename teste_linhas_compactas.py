@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste das linhas compactas (linhas_compactas.py): LinhaBoletim se comporta
+como a tupla original (igualdade, hash, desempacotamento, acesso por posição),
+cada texto de dimensão é guardado uma vez e compartilhado entre consultas e
+entre threads, o dicionário é reiniciado ao passar de LIMITE_DIMENSOES e a
+agregação dos relatórios dá o mesmo resultado com linhas compactas.
+"""
+
+import sys
+import threading
+
+import linhas_compactas
+from benchmark_agregacao import estrutura, gerar_linhas
+from bot_final import agrupar_dados_python, normalizar_modalidade
+from linhas_compactas import LinhaBoletim, compactar_linhas, estatisticas_dimensoes
+
+
+def copia_sem_internar(linhas):
+    """Mesmas linhas com textos novos na memória (como chegam do driver a cada consulta)"""
+    return [tuple(''.join(list(v)) if isinstance(v, str) else v for v in linha) for linha in linhas]
+
+
+def main():
+    print("=== TESTE LINHAS COMPACTAS ===")
+    falhas = 0
+
+    def conferir(condicao, descricao):
+        nonlocal falhas
+        print(f"{'✅' if condicao else '❌'} {descricao}")
+        falhas += not condicao
+
+    brutas = gerar_linhas(20000, semente=27)
+    compactas = compactar_linhas(copia_sem_internar(brutas))
+    conferir(compactas == brutas and all(type(l) is LinhaBoletim for l in compactas), "Mesmos valores, como LinhaBoletim")
+    linha = compactas[0]
+    lider, servico, medida, mod, projeto, producao, faturado = linha
+    conferir((linha[0], linha[1], linha[2], linha[3], linha[4], linha[5], linha[6])
+             == (lider, servico, medida, mod, projeto, producao, faturado) == brutas[0],
+             "Acesso por posição e desempacotamento")
+    conferir(hash(linha) == hash(brutas[0]) and not hasattr(linha, '__dict__'), "Hash de tupla e sem __dict__")
+    conferir(estrutura(agrupar_dados_python(compactas)) == estrutura(agrupar_dados_python(brutas)),
+             "Agregação igual com linhas compactas")
+
+    segunda = compactar_linhas(copia_sem_internar(brutas))
+    conferir(all(a[0] is b[0] and a[1] is b[1] for a, b in zip(compactas, segunda) if a[0] and a[1]),
+             "Consultas seguidas compartilham os mesmos textos")
+    distintos = {id(l[0]) for l in compactas} | {id(l[1]) for l in compactas}
+    conferir(len(distintos) <= 401 + 81, f"Um objeto por texto distinto ({len(distintos)})")
+
+    # Várias threads compactando ao mesmo tempo: mesmos valores e mesmas instâncias
+    resultados = [None] * 8
+
+    def compactar(indice):
+        resultados[indice] = compactar_linhas(copia_sem_internar(brutas))
+
+    threads = [threading.Thread(target=compactar, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    conferir(all(r == brutas for r in resultados), "8 threads simultâneas: valores corretos")
+    conferir(all(r[i][0] is compactas[i][0] for r in resultados for i in range(0, 20000, 97)),
+             "8 threads simultâneas: textos compartilhados")
+
+    # Limite: ao passar de LIMITE_DIMENSOES o dicionário recomeça na consulta seguinte
+    limite_original = linhas_compactas.LIMITE_DIMENSOES
+    linhas_compactas.LIMITE_DIMENSOES = 100
+    muitos = [(f"L{i}", f"S{i}", "Ha", "MEC", 202, 1, 1.0) for i in range(200)]
+    compactar_linhas(muitos)
+    conferir(estatisticas_dimensoes()['valores_distintos'] > 100, "Dicionário passa do limite numa consulta grande")
+    depois = compactar_linhas([("Ana", "Plantio", "Ha", "MEC", 202, 1, 1.0)])
+    conferir(estatisticas_dimensoes()['valores_distintos'] == 5 and depois == [("Ana", "Plantio", "Ha", "MEC", 202, 1, 1.0)],
+             "Próxima consulta reinicia o dicionário")
+    linhas_compactas.LIMITE_DIMENSOES = limite_original
+
+    normalizar_modalidade.cache_clear()
+    for linha in compactas:
+        normalizar_modalidade(linha[3])
+    informacoes = normalizar_modalidade.cache_info()
+    conferir(informacoes.misses == len({l[3] for l in compactas}), f"normalizar_modalidade uma vez por valor ({informacoes})")
+
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
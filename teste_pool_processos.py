@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do pool de processos (pool_processos.PoolProcessos): resultado e
+exceções vindos do processo filho, fila limitada recusando na hora, timeout
+por tarefa com o processo travado encerrado e recriado, modo sem processos,
+medidores de ocupação e fila, e a conversão de áudio (audio_memoria) pelo
+pool igual à feita na própria thread.
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metricas
+from pool_processos import FilaCheia, PoolProcessos, TempoEsgotado
+
+
+def dobrar(valor):
+    return valor * 2
+
+
+def demorar(segundos):
+    time.sleep(segundos)
+    return segundos
+
+
+def falhar(mensagem):
+    raise ValueError(mensagem)
+
+
+def main():
+    print("=== TESTE POOL DE PROCESSOS ===")
+    falhas = 0
+
+    def conferir(condicao, descricao):
+        nonlocal falhas
+        print(f"{'✅' if condicao else '❌'} {descricao}")
+        falhas += not condicao
+
+    pool = PoolProcessos('teste', processos=1, fila=1, timeout=5)
+    conferir(pool.executar(dobrar, 21) == 42, "Resultado volta do processo filho")
+    conferir(pool.estatisticas()['iniciado'], "Processo criado no primeiro uso")
+    try:
+        pool.executar(falhar, "áudio inválido")
+        conferir(False, "Exceção do filho deveria subir")
+    except ValueError as e:
+        conferir(str(e) == "áudio inválido", "Exceção do filho sobe para quem chamou")
+
+    # 1 rodando + 1 na fila: a terceira é recusada sem esperar
+    ocupacao = []
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futuros = [executor.submit(pool.executar, demorar, 1.0) for _ in range(2)]
+        time.sleep(0.3)
+        ocupacao.append(pool.estatisticas())
+        medidores = metricas.resumo()['medidores']
+        inicio = time.perf_counter()
+        try:
+            pool.executar(dobrar, 1)
+            conferir(False, "Terceira tarefa deveria ser recusada")
+        except FilaCheia:
+            conferir(time.perf_counter() - inicio < 0.05, "Fila cheia recusa na hora")
+        resultados = [f.result() for f in futuros]
+    conferir(resultados == [1.0, 1.0], "Tarefas aceitas terminam")
+    conferir(ocupacao[0]['ocupados'] == 1 and ocupacao[0]['fila'] == 1,
+             f"Ocupação e fila durante o pico {ocupacao[0]}")
+    conferir(medidores.get('teste_pool_ocupados') == 1 and medidores.get('teste_pool_fila') == 1
+             and medidores.get('teste_pool_utilizacao') == 1.0, "Medidores de ocupação e fila exportados")
+    estatisticas = pool.estatisticas()
+    conferir(estatisticas['ocupados'] == 0 and estatisticas['fila'] == 0, "Vagas devolvidas ao terminar")
+
+    pool.timeout = 0.5
+    inicio = time.perf_counter()
+    try:
+        pool.executar(demorar, 30)
+        conferir(False, "Tarefa travada deveria estourar o timeout")
+    except TempoEsgotado:
+        conferir(time.perf_counter() - inicio < 2, "Timeout por tarefa devolve o controle")
+    pool.timeout = 5
+    conferir(pool.executar(dobrar, 5) == 10, "Pool recriado depois do processo travado")
+    tempo_vagas = time.perf_counter() + 2
+    while pool.estatisticas()['ocupados'] and time.perf_counter() < tempo_vagas:
+        time.sleep(0.05)
+    conferir(pool.estatisticas()['ocupados'] == 0, "Vaga do processo travado devolvida")
+    pool.encerrar()
+
+    na_thread = PoolProcessos('thread', processos=0, fila=0)
+    conferir(na_thread.executar(dobrar, 4) == 8 and not na_thread.estatisticas()['iniciado'],
+             "processos=0 roda na própria thread")
+    bloqueio = threading.Event()
+    segunda = threading.Thread(target=lambda: na_thread.executar(bloqueio.wait, 2))
+    segunda.start()
+    time.sleep(0.1)
+    try:
+        na_thread.executar(dobrar, 1)
+        conferir(False, "Sem processos e sem fila, a segunda tarefa deveria ser recusada")
+    except FilaCheia:
+        conferir(True, "Sem processos a fila também é limitada")
+    bloqueio.set()
+    segunda.join()
+
+    try:
+        from audio_memoria import converter_audio
+        from teste_audio_memoria import gerar_ogg
+    except ImportError as e:
+        print(f"⚠️ Áudio indisponível ({e}): conversão pelo pool ignorada")
+    else:
+        audio_pool = PoolProcessos('audio', processos=2, fila=4, timeout=60)
+        audios = [gerar_ogg(segundos, 330, semente=i) for i, segundos in enumerate((2, 10))]
+        iguais = all(converter_audio(c, executar=audio_pool.executar).frame_data == converter_audio(c).frame_data
+                     for c in audios)
+        conferir(iguais, "converter_audio pelo pool = na própria thread")
+        tempos = metricas.resumo()['tempos']
+        conferir('audio_pool_execucao' in tempos and 'audio_pool_espera' in tempos,
+                 f"Tempos de execução e espera ({tempos.get('audio_pool_execucao', {}).get('p50_ms')} ms)")
+        audio_pool.encerrar()
+
+    contadores = metricas.resumo()['contadores']
+    print(f"📊 {dict((k, v) for k, v in sorted(contadores.items()) if '_pool_' in k)}")
+    conferir(contadores.get('teste_pool_recusadas') == 1 and contadores.get('teste_pool_timeouts') == 1
+             and contadores.get('teste_pool_reinicios') == 1 and contadores.get('teste_pool_falhas', 0) >= 1,
+             "Contadores de recusas, timeouts, reinícios e falhas")
+
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do relatório de alterações (relatorio_delta.py + bot_final):
+totais_por_servico com os mesmos padrões do detalhado, comparar (mudou,
+entrou, saiu, ordem), InstantaneosUsuarios (retrato por usuário e por dia)
+e o comando "o que mudou" sem COLUNA_MARCA_ALTERACAO: uma gravação feita
+depois do último relatório aparece na hora, mesmo com as linhas de hoje
+ainda válidas no cache de VALIDADE_CACHE_DIA.
+
+O banco e a Z-API são simulados.
+"""
+
+import sys
+
+import bot_final
+from relatorio_delta import InstantaneosUsuarios, comparar, totais_por_servico
+
+NUMERO = "5511999999999"
+
+
+class Resposta:
+    status_code = 200
+
+
+def main():
+    print("=== TESTE RELATÓRIO DE ALTERAÇÕES ===")
+    falhas = 0
+
+    def conferir(condicao, descricao):
+        nonlocal falhas
+        print(f"{'✅' if condicao else '❌'} {descricao}")
+        falhas += not condicao
+
+    linhas = [
+        ("Ana", "Plantio", "Ha", "MEC", 202, 10.004, 1000.0),
+        ("Ana", "Plantio", "Ha", "MAN", 202, 5, 500.0),
+        (None, None, None, "MEC", 202, None, 50.0),
+        ("Bruno", "Capina", "Ha", "MEC", 150, 3, 300.0),
+    ]
+    totais = totais_por_servico(linhas)
+    conferir(totais == {('202', 'Ana', 'Plantio'): (15.0, 1500.0, 'Ha'), ('202', 'Sem Líder', 'Sem Serviço'): (0, 50.0, 'Un'),
+                        ('150', 'Bruno', 'Capina'): (3, 300.0, 'Ha')},
+             "Totais por serviço somam modalidades com os padrões do detalhado")
+
+    depois = dict(totais)
+    depois[('202', 'Ana', 'Plantio')] = (16.0, 1600.0, 'Ha')
+    del depois[('150', 'Bruno', 'Capina')]
+    depois[('202', 'carla', 'Roçada')] = (2, 200.0, 'Ha')
+    depois[('202', 'Sem Líder', 'Sem Serviço')] = (0.001, 50.004, 'Un')
+    mudancas = comparar(totais, depois)
+    conferir(mudancas == [
+        ('150', 'Bruno', 'Capina', 'Ha', 3, 0, 300.0, 0),
+        ('202', 'Ana', 'Plantio', 'Ha', 15.0, 16.0, 1500.0, 1600.0),
+        ('202', 'carla', 'Roçada', 'Ha', 0, 2, 0, 200.0),
+    ], "comparar: mudou, saiu e entrou, ignora diferenças de arredondamento, ordem sem caixa")
+    conferir(comparar(totais, dict(totais)) == [], "comparar: nada mudou")
+
+    instantaneos = InstantaneosUsuarios()
+    conferir(instantaneos.obter(NUMERO, '2025-01-15') is None, "Sem retrato antes do primeiro relatório")
+    instantaneos.registrar(NUMERO, '2025-01-15', totais, marca=(7, 10))
+    retrato = instantaneos.obter(NUMERO, '2025-01-15')
+    conferir(retrato['totais'] is totais and retrato['marca'] == (7, 10), "Retrato guardado por usuário")
+    conferir(instantaneos.obter(NUMERO, '2025-01-16') is None and instantaneos.obter("5511000000000", '2025-01-15') is None,
+             "Retrato de outro dia ou de outro usuário não vale")
+    conferir(instantaneos.estatisticas()['usuarios'] == 1, "Estatísticas")
+
+    # "o que mudou" sem coluna de marca: a gravação nova aparece mesmo com o cache do dia ainda válido
+    banco = {'linhas': list(linhas)}
+    consultas = []
+
+    def consultar_dia(projetos, data):
+        consultas.append(tuple(projetos))
+        filtro = {str(p) for p in projetos}
+        return [linha for linha in banco['linhas'] if str(linha[4]) in filtro]
+
+    mensagens = []
+    bot_final.COLUNA_MARCA_ALTERACAO = None
+    bot_final.cache_linhas_dia.consultar = consultar_dia
+    bot_final.cache_linhas_dia.validade = 300
+    bot_final.obter_projetos_usuario = lambda numero: ['202', '150']
+    bot_final.obter_nome_usuario = lambda numero: "Ana"
+    bot_final.enviar_mensagem = lambda numero, texto: mensagens.append(texto) or Resposta()
+    bot_final.formatar_resumo_geral = lambda *a, **k: "RESUMO"
+    bot_final.gerar_blocos_resumo_detalhado = lambda *a, **k: iter(["DETALHADO"])
+    bot_final.INTERVALO_ENTRE_MENSAGENS = 0
+
+    conferir(bot_final.enviar_alteracoes_hoje(NUMERO) and mensagens[:2] == ["RESUMO", "DETALHADO"],
+             "Primeiro pedido: relatório completo, que vira o ponto de partida")
+    banco['linhas'].append(("Ana", "Roçada", "Ha", "MEC", 202, 4, 400.0))
+    conferir(bot_final.obter_dados_detalhados_hoje(NUMERO) != banco['linhas'], "Cache do dia ainda tem as linhas antigas")
+    mensagens.clear()
+    conferir(bot_final.enviar_alteracoes_hoje(NUMERO) and "Roçada" in mensagens[0] and "Plantio" not in mensagens[0],
+             "Gravação nova aparece na hora, sem esperar a validade do cache")
+    mensagens.clear()
+    bot_final.enviar_alteracoes_hoje(NUMERO)
+    conferir("Nenhuma alteração" in mensagens[0], "Pedido seguinte sem gravação: nenhuma alteração")
+
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
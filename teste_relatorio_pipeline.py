@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do envio do relatório em pipeline (bot_final.enviar_relatorio_pipeline):
+resumo primeiro e detalhado em blocos na ordem, com o detalhado montado em
+paralelo ao resumo (o tempo total é o do mais lento, não a soma, e o resumo
+sai sem esperar o detalhado terminar); e, quando o envio para no
+meio (falha no resumo, falha num bloco com a fila cheia, exceção ao montar o
+resumo, produtor travado), a thread produtora termina e devolve a vaga de
+executor_relatorios, em vez de ficar presa para sempre. Exportações longas
+rodam no próprio executor e não atrasam o detalhado; acima da capacidade
+o pedido é recusado na hora.
+
+A Z-API e a montagem dos blocos são simuladas; nada vai para a rede.
+"""
+
+import sys
+import threading
+import time
+
+import bot_final
+
+
+class Resposta:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class ZapiSimulada:
+    """enviar_mensagem que guarda as mensagens e falha a partir da `falhar_em`-ésima"""
+
+    def __init__(self, falhar_em=None):
+        self.mensagens = []
+        self.falhar_em = falhar_em
+
+    def __call__(self, numero, texto):
+        self.mensagens.append(texto)
+        if self.falhar_em is not None and len(self.mensagens) >= self.falhar_em:
+            return Resposta(500)
+        return Resposta(200)
+
+
+produtores_ativos = 0
+lock_produtores = threading.Lock()
+_produzir_original = bot_final._produzir_blocos
+
+
+def _produzir_contando(*argumentos):
+    global produtores_ativos
+    with lock_produtores:
+        produtores_ativos += 1
+    try:
+        return _produzir_original(*argumentos)
+    finally:
+        with lock_produtores:
+            produtores_ativos -= 1
+
+
+def blocos(quantidade, travar=None):
+    def gerar(dados, numero_usuario, titulo_data):
+        for i in range(quantidade):
+            yield f"bloco {i + 1}"
+        if travar is not None:
+            travar.wait()
+    return gerar
+
+
+def esperar_produtores(limite=5):
+    fim = time.time() + limite
+    while produtores_ativos and time.time() < fim:
+        time.sleep(0.05)
+    return produtores_ativos == 0
+
+
+def enviar(zapi):
+    bot_final.enviar_mensagem = zapi
+    return bot_final.enviar_relatorio_pipeline("5511999999999", [], "PRODUÇÃO", data_inicio="2025-01-01")
+
+
+def main():
+    print("=== TESTE RELATÓRIO EM PIPELINE ===")
+    falhas = 0
+
+    def conferir(condicao, descricao):
+        nonlocal falhas
+        print(f"{'✅' if condicao else '❌'} {descricao}")
+        falhas += not condicao
+
+    bot_final._produzir_blocos = _produzir_contando
+    bot_final.INTERVALO_ENTRE_MENSAGENS = 0
+    bot_final.INTERVALO_ENTRE_BLOCOS = 0
+    bot_final.formatar_resumo_geral = lambda *a, **k: "RESUMO"
+
+    bot_final.gerar_blocos_resumo_detalhado = blocos(5)
+    zapi = ZapiSimulada()
+    conferir(enviar(zapi) and zapi.mensagens == ["RESUMO"] + [f"bloco {i}" for i in range(1, 6)],
+             "Resumo e os 5 blocos enviados na ordem")
+    conferir(esperar_produtores(), "Produtor termina depois do envio completo")
+
+    # Resumo e detalhado em paralelo: 0.4 s cada levam ~0.4 s, não 0.8 s
+    def resumo_lento(*a, **k):
+        time.sleep(0.4)
+        return "RESUMO"
+
+    def detalhado_lento(dados, numero_usuario, titulo_data):
+        time.sleep(0.4)
+        yield "bloco 1"
+
+    bot_final.formatar_resumo_geral = resumo_lento
+    bot_final.gerar_blocos_resumo_detalhado = detalhado_lento
+    inicio = time.time()
+    zapi = ZapiSimulada()
+    conferir(enviar(zapi) and time.time() - inicio < 0.7, f"Detalhado montado junto com o resumo "
+             f"({time.time() - inicio:.2f}s para 0.4 s + 0.4 s)")
+
+    # O resumo sai enquanto o detalhado ainda está sendo montado
+    zapi = ZapiSimulada()
+    resumo_antes_do_fim = []
+
+    def detalhado_esperando_resumo(dados, numero_usuario, titulo_data):
+        yield "bloco 1"
+        fim = time.time() + 3
+        while not zapi.mensagens and time.time() < fim:
+            time.sleep(0.01)
+        resumo_antes_do_fim.append(bool(zapi.mensagens))
+        yield "bloco 2"
+
+    bot_final.formatar_resumo_geral = lambda *a, **k: "RESUMO"
+    bot_final.gerar_blocos_resumo_detalhado = detalhado_esperando_resumo
+    conferir(enviar(zapi) and resumo_antes_do_fim == [True] and zapi.mensagens == ["RESUMO", "bloco 1", "bloco 2"],
+             "Resumo enviado antes de o detalhado terminar")
+
+    # Muitos blocos: a fila (maxsize=2) fica cheia quando o envio para
+    bot_final.gerar_blocos_resumo_detalhado = blocos(50)
+    resultados = [enviar(ZapiSimulada(falhar_em=1)) for _ in range(6)]
+    conferir(not any(resultados), "Falha no resumo devolve False")
+    conferir(esperar_produtores(), "Falhas no resumo com a fila cheia não prendem produtores")
+    for _ in range(6):
+        enviar(ZapiSimulada(falhar_em=3))
+    conferir(esperar_produtores(), "Falhas num bloco com a fila cheia não prendem produtores")
+
+    def resumo_com_erro(*a, **k):
+        raise RuntimeError("banco fora do ar")
+    bot_final.formatar_resumo_geral = resumo_com_erro
+    resultados = [enviar(ZapiSimulada()) for _ in range(6)]
+    conferir(not any(resultados), "Exceção ao montar o resumo devolve False")
+    conferir(esperar_produtores(), "Exceção no envio não prende produtores")
+    bot_final.formatar_resumo_geral = lambda *a, **k: "RESUMO"
+
+    # Produtor travado depois de 2 blocos: o envio desiste pelo timeout e o libera
+    bot_final.TIMEOUT_BLOCO_DETALHADO = 0.5
+    travar = threading.Event()
+    bot_final.gerar_blocos_resumo_detalhado = blocos(2, travar)
+    zapi = ZapiSimulada()
+    inicio = time.time()
+    conferir(not enviar(zapi) and len(zapi.mensagens) == 3 and time.time() - inicio < 3,
+             "Produtor travado: envio desiste pelo timeout de bloco")
+    travar.set()
+    conferir(esperar_produtores(), "Produtor liberado termina sem entregar mais nada")
+
+    # Depois de todas as falhas, as 4 threads de executor_relatorios continuam livres
+    bot_final.TIMEOUT_BLOCO_DETALHADO = 5
+    bot_final.gerar_blocos_resumo_detalhado = blocos(3)
+    zapi = ZapiSimulada()
+    conferir(enviar(zapi) and len(zapi.mensagens) == 4, "Relatório seguinte é entregue normalmente")
+
+    # Exportações lotadas: o detalhado não espera por elas e a excedente é recusada
+    exportando = threading.Event()
+    liberar_exportacoes = threading.Event()
+    exportacoes_iniciadas = []
+
+    def exportar_travado(*argumentos):
+        exportacoes_iniciadas.append(argumentos)
+        exportando.set()
+        liberar_exportacoes.wait(10)
+
+    bot_final.exportar_periodo = exportar_travado
+    bot_final.TIMEOUT_BLOCO_DETALHADO = 1
+    zapi_exportacao = ZapiSimulada()
+    bot_final.enviar_mensagem = zapi_exportacao
+    pedidos = bot_final.EXPORTACOES_SIMULTANEAS + 2
+    for _ in range(pedidos):
+        bot_final.iniciar_exportacao("5511999999999", "|01/08/2025 a 31/08/2025|csv")
+    exportando.wait(2)
+    time.sleep(0.1)
+    recusadas = zapi_exportacao.mensagens.count(bot_final.MENSAGEM_EXPORTACAO_LOTADA)
+    conferir(len(exportacoes_iniciadas) == bot_final.EXPORTACOES_SIMULTANEAS and recusadas == 2,
+             f"{pedidos} exportações: {len(exportacoes_iniciadas)} em andamento e {recusadas} recusadas")
+    conferir(bot_final.estatisticas_exportacao()['em_andamento'] == bot_final.EXPORTACOES_SIMULTANEAS,
+             "Exportações em andamento aparecem nas estatísticas")
+    bot_final.gerar_blocos_resumo_detalhado = blocos(3)
+    zapi = ZapiSimulada()
+    conferir(enviar(zapi) and len(zapi.mensagens) == 4, "Detalhado entregue com as exportações ocupadas")
+    liberar_exportacoes.set()
+    fim = time.time() + 5
+    while bot_final.estatisticas_exportacao()['em_andamento'] and time.time() < fim:
+        time.sleep(0.05)
+    conferir(bot_final.estatisticas_exportacao()['em_andamento'] == 0, "Vagas de exportação devolvidas ao terminar")
+
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste da escolha de motor de transcrição (transcricao.py): motor padrão,
+nome desconhecido, motor local sem modelo caindo para o Google, reserva
+usada só quando o principal falha, e o cálculo do WER do benchmark.
+"""
+
+import sys
+
+import metricas
+import transcricao
+
+
+class TranscritorFora:
+    """Motor que sempre falha, como o Google sem rede"""
+
+    nome = 'fora'
+
+    def transcrever(self, audio):
+        raise ConnectionError("sem rede")
+
+
+class TranscritorFixo:
+    nome = 'fixo'
+
+    def transcrever(self, audio):
+        return "produção de ontem"
+
+
+class TranscritorMudo:
+    nome = 'mudo'
+
+    def transcrever(self, audio):
+        return ""
+
+
+def configurar(principal, reserva=''):
+    transcricao.TRANSCRITOR_VOZ = principal
+    transcricao.TRANSCRITOR_VOZ_RESERVA = reserva
+
+
+def main():
+    print("=== TESTE MOTORES DE TRANSCRIÇÃO ===")
+    falhas = 0
+
+    def conferir(condicao, descricao):
+        nonlocal falhas
+        print(f"{'✅' if condicao else '❌'} {descricao}")
+        falhas += not condicao
+
+    google = transcricao.obter_transcritor('google')
+    conferir(google.nome == 'google', "Google carregado")
+    conferir(transcricao.obter_transcritor('google') is google, "Motor carregado uma vez por worker")
+    conferir(transcricao.obter_transcritor('inexistente') is google, "Nome desconhecido usa o Google")
+
+    # Sem o pacote vosk ou sem o modelo em CAMINHO_MODELO_VOSK (o caso deste ambiente de teste)
+    local = transcricao.obter_transcritor('vosk')
+    conferir(local is google, "Vosk sem pacote/modelo cai para o Google")
+    transcricao.obter_transcritor('vosk')
+    indisponivel = metricas.resumo()['contadores'].get('transcricao_vosk_indisponivel', 0)
+    conferir(indisponivel == 1, f"Aviso de indisponível uma vez só ({indisponivel})")
+
+    transcricao.TRANSCRITORES.update(fora=TranscritorFora, fixo=TranscritorFixo, mudo=TranscritorMudo)
+    configurar('fora', 'fixo')
+    conferir(transcricao.transcrever(None) == "produção de ontem", "Reserva usada quando o principal falha")
+    configurar('mudo', 'fixo')
+    conferir(transcricao.transcrever(None) == "", "Reserva não é usada quando o principal só não entendeu")
+    configurar('fora')
+    try:
+        transcricao.transcrever(None)
+        conferir(False, "Sem reserva, a falha do principal deveria subir")
+    except ConnectionError:
+        conferir(True, "Sem reserva, a falha do principal sobe para o chamador")
+    contadores = metricas.resumo()['contadores']
+    conferir(contadores.get('transcricao_fora_falhas') == 2 and contadores.get('transcricao_fixo_audios') == 1,
+             "Métricas de falhas e áudios por motor")
+
+    casos = [
+        (["produção de ontem"], ["produção de ontem"], 0.0),
+        (["produção de ontem"], ["produção ontem"], 1 / 3),
+        (["produção do projeto 202"], ["produção do projeto 200 e 2"], 3 / 4),
+        (["Faturamento, hoje!"], ["faturamento hoje"], 0.0),
+        (["a b", "c d e f"], ["a x", "c d e f g"], 2 / 6),
+    ]
+    for referencias, hipoteses, esperado in casos:
+        wer = transcricao.taxa_erro_palavras(referencias, hipoteses)
+        conferir(abs(wer - esperado) < 1e-9, f"WER {referencias} x {hipoteses} = {wer:.3f}")
+
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do caminho de áudio do webhook até o limite (bot_final):
+com AUDIO_EM_SEGUNDO_PLANO, o webhook responde na hora; até CAPACIDADE_AUDIO
+mensagens (processos + fila do pool de áudio) são aceitas e as seguintes
+são recusadas com o aviso "envie de novo", sem fila escondida; as aceitas
+passam pelo pool de processos sem FilaCheia e recebem a resposta; a
+reentrega de uma mensagem recusada é aceita depois que as vagas voltam.
+
+A Z-API, o download e o reconhecedor são simulados; a conversão do áudio
+roda de verdade no pool de processos.
+"""
+
+import sys
+import threading
+import time
+
+import bot_final
+import metricas
+from teste_audio_memoria import gerar_ogg
+
+
+def main():
+    print("=== TESTE WEBHOOK DE ÁUDIO NO LIMITE ===")
+    falhas = 0
+
+    def conferir(condicao, descricao):
+        nonlocal falhas
+        print(f"{'✅' if condicao else '❌'} {descricao}")
+        falhas += not condicao
+
+    capacidade = bot_final.CAPACIDADE_AUDIO
+    extras = 2
+    audios = {f"https://z-api/audio{i}.ogg": gerar_ogg(2, 300 + 20 * i, semente=i) for i in range(capacidade + extras)}
+    liberar_downloads = threading.Event()
+    mensagens = []
+    lock_mensagens = threading.Lock()
+
+    def baixar_preso(url):
+        liberar_downloads.wait(30)
+        return audios[url]
+
+    def enviar_simulado(numero, texto):
+        with lock_mensagens:
+            mensagens.append(texto)
+
+    bot_final.AUDIO_EM_SEGUNDO_PLANO = True
+    bot_final.verificar_autorizacao = lambda numero: True
+    bot_final.pode_processar_comando = lambda numero: True
+    bot_final.baixar_audio = baixar_preso
+    bot_final.enviar_mensagem = enviar_simulado
+    bot_final.transcricao.transcrever = lambda audio: "produção de ontem"
+    bot_final.processar_comando_audio = lambda texto, transcrito=False: (None, None)
+    cliente = bot_final.app.test_client()
+
+    def webhook(url):
+        inicio = time.perf_counter()
+        resposta = cliente.post('/webhook', json={'phone': '5511999999999', 'audio': {'audioUrl': url}})
+        return resposta.status_code, time.perf_counter() - inicio
+
+    respostas = [webhook(url) for url in audios]
+    conferir(all(status == 200 for status, _ in respostas), f"{len(respostas)} webhooks respondidos com 200")
+    conferir(max(tempo for _, tempo in respostas) < 1, "Webhook responde sem esperar o áudio")
+    avisos = [m for m in mensagens if m == bot_final.MENSAGEM_AUDIO_LOTADO]
+    conferir(len(avisos) == extras, f"{capacidade} aceitos e {len(avisos)} recusados com aviso (capacidade {capacidade})")
+    estatisticas = bot_final.estatisticas_audio()
+    conferir(estatisticas['mensagens_em_andamento'] == capacidade, f"Em andamento no limite {estatisticas}")
+    resumo = metricas.resumo()
+    conferir(resumo['contadores'].get('audio_mensagens_recusadas') == extras
+             and resumo['medidores'].get('audio_mensagens_em_andamento') == capacidade,
+             "Recusas e mensagens em andamento exportadas")
+
+    liberar_downloads.set()
+    fim = time.time() + 60
+    while bot_final.estatisticas_audio()['mensagens_em_andamento'] and time.time() < fim:
+        time.sleep(0.1)
+    ouvidos = [m for m in mensagens if m.startswith('🎤 Ouvi')]
+    conferir(len(ouvidos) == capacidade, f"As {capacidade} mensagens aceitas foram respondidas ({len(ouvidos)})")
+    contadores = metricas.resumo()['contadores']
+    conferir(contadores.get('audio_pool_tarefas') == capacidade and not contadores.get('audio_pool_recusadas'),
+             "Todas as aceitas passaram pelo pool de processos sem FilaCheia")
+
+    # A reentrega da última mensagem recusada é aceita agora que há vaga
+    status, _ = webhook(list(audios)[-1])
+    fim = time.time() + 30
+    while bot_final.estatisticas_audio()['mensagens_em_andamento'] and time.time() < fim:
+        time.sleep(0.1)
+    conferir(status == 200 and len([m for m in mensagens if m.startswith('🎤 Ouvi')]) == capacidade + 1,
+             "Reentrega da mensagem recusada é processada")
+
+    bot_final.pool_audio.encerrar()
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Transcrição dos áudios de comando com motor escolhido por configuração.
+
+Até aqui todo áudio ia para o recognize_google: uma ida e volta pela rede
+por áudio, latência fora do nosso controle e falha quando o serviço cai.
+Cada motor implementa transcrever(audio) -> texto (audio é o sr.AudioData
+de audio_memoria, PCM 16 bits a 16 kHz):
+
+- "google": o caminho de sempre (speech_recognition + Google Web Speech);
+- "vosk": reconhecimento local em CPU com um modelo Kaldi em português
+  (ex.: vosk-model-small-pt-0.3), carregado uma vez por worker.
+
+TRANSCRITOR_VOZ escolhe o motor; TRANSCRITOR_VOZ_RESERVA (opcional) é usado
+quando o principal falha (erro de rede, serviço fora), não quando ele só não
+entende o áudio. Um motor que não carrega (pacote ou modelo ausente) é
+trocado pelo Google com um aviso no log.
+"""
+
+import functools
+import json
+import os
+import re
+import threading
+import time
+
+import metricas
+
+# "google" ou "vosk"
+TRANSCRITOR_VOZ = os.environ.get('TRANSCRITOR_VOZ', 'google').lower()
+# Motor usado quando o principal falha ("" desliga)
+TRANSCRITOR_VOZ_RESERVA = os.environ.get('TRANSCRITOR_VOZ_RESERVA', '').lower()
+IDIOMA_TRANSCRICAO = os.environ.get('IDIOMA_TRANSCRICAO', 'pt-BR')
+# Pasta do modelo Vosk (descompactado de https://alphacephei.com/vosk/models)
+CAMINHO_MODELO_VOSK = os.environ.get('CAMINHO_MODELO_VOSK', 'modelos/vosk-model-small-pt-0.3')
+
+
+class TranscritorGoogle:
+    """Google Web Speech pelo speech_recognition (precisa de rede)"""
+
+    nome = 'google'
+
+    def __init__(self, idioma=IDIOMA_TRANSCRICAO):
+        import speech_recognition
+        self.sr = speech_recognition
+        self.idioma = idioma
+
+    def transcrever(self, audio):
+        try:
+            return self.sr.Recognizer().recognize_google(audio, language=self.idioma).strip()
+        except self.sr.UnknownValueError:
+            # Áudio sem fala reconhecível: não é falha do serviço
+            return ''
+
+
+class TranscritorVosk:
+    """Vosk (Kaldi) local em CPU; o modelo é carregado uma vez e compartilhado entre threads"""
+
+    nome = 'vosk'
+
+    def __init__(self, caminho_modelo=CAMINHO_MODELO_VOSK):
+        import vosk
+        if not os.path.isdir(caminho_modelo):
+            raise FileNotFoundError(f"modelo Vosk não encontrado em {caminho_modelo}")
+        vosk.SetLogLevel(-1)
+        self.vosk = vosk
+        self.modelo = vosk.Model(caminho_modelo)
+
+    def transcrever(self, audio):
+        # Um reconhecedor por áudio (o modelo é somente leitura e pode ser compartilhado)
+        reconhecedor = self.vosk.KaldiRecognizer(self.modelo, audio.sample_rate)
+        reconhecedor.AcceptWaveform(audio.get_raw_data(convert_width=2))
+        return json.loads(reconhecedor.FinalResult()).get('text', '').strip()
+
+
+TRANSCRITORES = {
+    'google': TranscritorGoogle,
+    'vosk': TranscritorVosk,
+}
+
+_trava_carga = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _carregar(nome):
+    inicio = time.time()
+    try:
+        transcritor = TRANSCRITORES[nome]()
+    except Exception as e:
+        if nome == 'google':
+            raise
+        # Fica em cache: o aviso sai uma vez por worker, não a cada áudio
+        print(f"[AVISO] Transcritor '{nome}' indisponível ({e}): usando google")
+        metricas.incrementar(f'transcricao_{nome}_indisponivel')
+        return _carregar('google')
+    print(f"[INIT] 🎙️ Transcritor '{nome}' carregado em {time.time() - inicio:.1f}s")
+    return transcritor
+
+
+def obter_transcritor(nome=None):
+    """Motor `nome` (padrão TRANSCRITOR_VOZ), carregado uma vez por worker; cai para o Google se não carregar"""
+    nome = nome or TRANSCRITOR_VOZ
+    if nome not in TRANSCRITORES:
+        print(f"[AVISO] Transcritor desconhecido '{nome}': usando google")
+        nome = 'google'
+    # A carga de um modelo local leva segundos: só uma thread carrega
+    with _trava_carga:
+        return _carregar(nome)
+
+
+def transcrever(audio):
+    """Texto do áudio pelo motor configurado (e pela reserva, se o principal falhar); '' se não entendeu"""
+    motores = [obter_transcritor()]
+    if TRANSCRITOR_VOZ_RESERVA and TRANSCRITOR_VOZ_RESERVA in TRANSCRITORES:
+        reserva = obter_transcritor(TRANSCRITOR_VOZ_RESERVA)
+        if reserva is not motores[0]:
+            motores.append(reserva)
+
+    for posicao, transcritor in enumerate(motores):
+        inicio = time.perf_counter()
+        try:
+            texto = transcritor.transcrever(audio)
+        except Exception as e:
+            metricas.incrementar(f'transcricao_{transcritor.nome}_falhas')
+            if posicao == len(motores) - 1:
+                raise
+            print(f"[AVISO] Transcritor '{transcritor.nome}' falhou ({e}): tentando '{motores[posicao + 1].nome}'")
+            continue
+        metricas.registrar_tempo(f'transcricao_{transcritor.nome}', time.perf_counter() - inicio)
+        metricas.incrementar(f'transcricao_{transcritor.nome}_audios')
+        return texto
+
+
+_PALAVRA = re.compile(r'\w+')
+
+
+def taxa_erro_palavras(referencias, hipoteses):
+    """WER: (substituições + inserções + remoções) / palavras das referências, somado no corpus"""
+    erros = palavras = 0
+    for referencia, hipotese in zip(referencias, hipoteses):
+        ref = _PALAVRA.findall(referencia.lower())
+        hip = _PALAVRA.findall(hipotese.lower())
+        # Distância de edição por palavras, uma linha da matriz por vez
+        anterior = list(range(len(hip) + 1))
+        for i, palavra in enumerate(ref, 1):
+            atual = [i]
+            for j, candidata in enumerate(hip, 1):
+                atual.append(min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + (palavra != candidata)))
+            anterior = atual
+        erros += anterior[-1]
+        palavras += len(ref)
+    return erros / palavras if palavras else 0.0